@@ -0,0 +1,62 @@
+"""
+Benchmark da busca textual: icontains (SearchFilter padrão) x índice full-text
+
+Uso:
+    python benchmarks/busca.py --linhas 1000000
+
+Mede, para alguns termos, o tempo de COUNT(*) + primeira página (10 linhas),
+que é o que a listagem paginada executa a cada `?search=`.
+"""
+
+import argparse
+import operator
+from functools import reduce
+
+from comum import configurar_django, imprimir, medir, popular
+
+
+TERMOS = ['viagem', 'hotel curitiba', 'certif', 'Ana Souza', 'notebook monitor licença']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=100000)
+    parser.add_argument('--banco', help='Arquivo SQLite a usar (padrão: benchmarks/dados/benchmark.sqlite3)')
+    parser.add_argument('--repeticoes', type=int, default=10)
+    args = parser.parse_args()
+
+    configurar_django(args.banco)
+
+    from django.db.models import Q
+    from solicitations import busca
+    from solicitations.models import Request
+
+    total = popular(args.linhas)
+    campos = ['titulo', 'descricao', 'solicitante']
+
+    def icontains(termo):
+        condicoes = (
+            reduce(operator.or_, (Q(**{f'{campo}__icontains': palavra}) for campo in campos))
+            for palavra in termo.split()
+        )
+        return Request.objects.filter(reduce(operator.and_, condicoes)).order_by('-data_criacao', '-id')
+
+    def full_text(termo):
+        return busca.filtrar(Request.objects.all(), termo.split()).order_by('-relevancia', '-data_criacao', '-id')
+
+    def executar(queryset):
+        queryset.count()
+        list(queryset[:10])
+
+    resultado = {'linhas': total, 'termos': {}}
+    for termo in TERMOS:
+        resultado['termos'][termo] = {
+            'resultados': full_text(termo).count(),
+            'icontains': medir(lambda: executar(icontains(termo)), args.repeticoes),
+            'full_text': medir(lambda: executar(full_text(termo)), args.repeticoes),
+        }
+    imprimir(resultado)
+
+
+if __name__ == '__main__':
+    main()
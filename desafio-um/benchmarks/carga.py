@@ -0,0 +1,136 @@
+"""
+Teste de carga: deploy WSGI (gunicorn) x ASGI (uvicorn) da API de solicitações
+
+Uso:
+    python benchmarks/carga.py --linhas 100000 --concorrencia 64 --duracao 20
+
+Sobe cada servidor com o mesmo número de processos, dispara requisições
+concorrentes (listagem, listagem filtrada, detalhe e estatísticas) durante
+`--duracao` segundos e reporta a vazão (requisições/s) e as latências.
+O cache de respostas é desativado para medir o caminho até o banco.
+"""
+
+import argparse
+import http.client
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from comum import configurar_django, gerar_settings, imprimir, popular, resumir, servidor
+
+
+def caminhos(ids, rng):
+    """
+    Mistura de requisições de leitura atendidas pelas views assíncronas
+    """
+    while True:
+        sorteio = rng.random()
+        if sorteio < 0.4:
+            yield f'/api/v1/solicitacoes/?page={rng.randint(1, 50)}'
+        elif sorteio < 0.6:
+            yield f'/api/v1/solicitacoes/?tipo=reembolso&status=pendente&page={rng.randint(1, 5)}'
+        elif sorteio < 0.9:
+            yield f'/api/v1/solicitacoes/{rng.choice(ids)}/'
+        else:
+            yield '/api/v1/solicitacoes/estatisticas/?tipo=ferias'
+
+
+def disparar(porta, ids, concorrencia, duracao):
+    """
+    Mantém `concorrencia` clientes (conexões keep-alive) requisitando até o fim da duração
+    """
+    tempos = []
+    erros = []
+    trava = threading.Lock()
+    fim = time.monotonic() + duracao
+
+    def cliente(semente):
+        rng = random.Random(semente)
+        conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=30)
+        locais = []
+        falhas = 0
+        for caminho in caminhos(ids, rng):
+            if time.monotonic() >= fim:
+                break
+            inicio = time.perf_counter()
+            try:
+                conexao.request('GET', caminho, headers={'Accept': 'application/json'})
+                resposta = conexao.getresponse()
+                resposta.read()
+                if resposta.status != 200:
+                    falhas += 1
+            except (OSError, http.client.HTTPException):
+                falhas += 1
+                conexao.close()
+                conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=30)
+                continue
+            locais.append((time.perf_counter() - inicio) * 1000)
+        conexao.close()
+        with trava:
+            tempos.extend(locais)
+            erros.append(falhas)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        list(executor.map(cliente, range(concorrencia)))
+    decorrido = time.perf_counter() - inicio
+    return {
+        'requisicoes': len(tempos),
+        'erros': sum(erros),
+        'requisicoes_por_segundo': round(len(tempos) / decorrido, 1),
+        **resumir(tempos),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=100000)
+    parser.add_argument('--banco', help='Arquivo SQLite a usar (padrão: benchmarks/dados/benchmark.sqlite3)')
+    parser.add_argument('--concorrencia', type=int, default=64)
+    parser.add_argument('--duracao', type=float, default=20)
+    parser.add_argument('--processos', type=int, default=2, help='Workers de cada servidor')
+    parser.add_argument('--threads', type=int, default=8, help='Threads por worker do gunicorn (WSGI)')
+    parser.add_argument('--porta', type=int, default=8765)
+    args = parser.parse_args()
+
+    banco = configurar_django(args.banco)
+
+    from solicitations.models import Request
+
+    total = popular(args.linhas)
+    ids = list(Request.objects.order_by('?').values_list('id', flat=True)[:1000])
+    modulo, pythonpath = gerar_settings(banco, SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0})
+
+    endereco = f'127.0.0.1:{args.porta}'
+    deploys = {
+        'wsgi': [
+            'gunicorn', 'core.wsgi:application', '--bind', endereco,
+            '--workers', str(args.processos), '--threads', str(args.threads),
+        ],
+        'asgi': [
+            'uvicorn', 'core.asgi:application', '--host', '127.0.0.1', '--port', str(args.porta),
+            '--workers', str(args.processos), '--no-access-log',
+        ],
+    }
+
+    resultado = {
+        'linhas': total,
+        'concorrencia': args.concorrencia,
+        'duracao_s': args.duracao,
+        'processos': args.processos,
+        'deploys': {},
+    }
+    for nome, comando in deploys.items():
+        with servidor(comando, args.porta, modulo, pythonpath):
+            disparar(args.porta, ids, min(args.concorrencia, 8), 2)  # aquecimento
+            resultado['deploys'][nome] = disparar(args.porta, ids, args.concorrencia, args.duracao)
+
+    wsgi, asgi = resultado['deploys']['wsgi'], resultado['deploys']['asgi']
+    resultado['ganho_vazao'] = round(asgi['requisicoes_por_segundo'] / wsgi['requisicoes_por_segundo'], 2)
+    resultado['ganho_p99'] = round(wsgi['p99_ms'] / asgi['p99_ms'], 2)
+    imprimir(resultado)
+
+
+if __name__ == '__main__':
+    main()
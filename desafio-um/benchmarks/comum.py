@@ -0,0 +1,180 @@
+"""
+Utilitários compartilhados pelos benchmarks da API de solicitações
+
+Os benchmarks rodam contra um banco SQLite próprio (por padrão em
+benchmarks/dados/), nunca contra o db.sqlite3 de desenvolvimento.
+"""
+
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+
+RAIZ = Path(__file__).resolve().parent.parent
+DIRETORIO_DADOS = Path(__file__).resolve().parent / 'dados'
+
+PALAVRAS = (
+    'viagem hotel passagem aérea táxi reunião cliente projeto treinamento curso '
+    'certificação inglês espanhol congresso alimentação combustível estacionamento '
+    'material escritório equipamento notebook monitor licença software férias '
+    'família descanso verão inverno recesso planejamento equipe gestão segurança '
+    'São Paulo Rio de Janeiro Belo Horizonte Curitiba Porto Alegre Recife Salvador'
+).split()
+
+NOMES = 'Ana Bruno Carlos Daniela Eduardo Fernanda Gabriel Helena Igor Juliana Lucas Mariana'.split()
+SOBRENOMES = 'Silva Santos Souza Costa Lima Oliveira Pereira Almeida Ferreira Rodrigues'.split()
+
+
+def configurar_django(banco=None):
+    """
+    Configura o Django apontando para o banco do benchmark e aplica as migrations
+    """
+    sys.path.insert(0, str(RAIZ))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    from django.conf import settings
+
+    if banco is None:
+        DIRETORIO_DADOS.mkdir(exist_ok=True)
+        banco = DIRETORIO_DADOS / 'benchmark.sqlite3'
+    settings.DATABASES['default']['NAME'] = str(banco)
+    settings.DEBUG = False
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', verbosity=0)
+    return banco
+
+
+def texto(rng, palavras):
+    return ' '.join(rng.choice(PALAVRAS) for _ in range(palavras))
+
+
+def popular(linhas, semente=42, tamanho_lote=5000):
+    """
+    Garante que o banco tenha ao menos `linhas` solicitações sintéticas
+    """
+    from django.utils import timezone
+    from solicitations.models import Request
+
+    existentes = Request.objects.count()
+    if existentes >= linhas:
+        return existentes
+
+    rng = random.Random(semente + existentes)
+    hoje = timezone.localdate()
+    faltam = linhas - existentes
+    inicio = time.perf_counter()
+    while faltam > 0:
+        lote = []
+        for _ in range(min(tamanho_lote, faltam)):
+            tipo = rng.choice([Request.TIPO_FERIAS, Request.TIPO_REEMBOLSO, Request.TIPO_TREINAMENTO])
+            data_inicio = hoje + timedelta(days=rng.randint(-365, 365))
+            lote.append(Request(
+                tipo=tipo,
+                titulo=texto(rng, 4).capitalize(),
+                descricao=texto(rng, 25),
+                solicitante=f'{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}',
+                status=rng.choice([choice[0] for choice in Request.STATUS_CHOICES]),
+                valor=None if tipo == Request.TIPO_FERIAS else Decimal(rng.randint(1000, 500000)) / 100,
+                data_inicio=None if tipo == Request.TIPO_REEMBOLSO else data_inicio,
+                data_fim=None if tipo == Request.TIPO_REEMBOLSO else data_inicio + timedelta(days=rng.randint(0, 20)),
+            ))
+        Request.objects.criar_em_massa(lote, tamanho_lote=tamanho_lote)
+        faltam -= len(lote)
+    print(f'{linhas - existentes} solicitações criadas em {time.perf_counter() - inicio:.1f}s', file=sys.stderr)
+    return linhas
+
+
+def medir(funcao, repeticoes=20, aquecimento=2):
+    """
+    Executa `funcao` repetidas vezes e retorna as latências em milissegundos
+    """
+    for _ in range(aquecimento):
+        funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return resumir(tempos)
+
+
+def resumir(tempos):
+    ordenados = sorted(tempos)
+
+    def percentil(p):
+        return round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))], 3)
+
+    return {
+        'n': len(tempos),
+        'media_ms': round(statistics.fmean(tempos), 3),
+        'p50_ms': percentil(50),
+        'p95_ms': percentil(95),
+        'p99_ms': percentil(99),
+    }
+
+
+def imprimir(resultado):
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+def gerar_settings(banco, **sobrescritas):
+    """
+    Gera um módulo de settings (em benchmarks/dados/) que aponta para o banco
+    do benchmark, para os servidores iniciados como subprocessos.
+    Retorna o nome do módulo e o PYTHONPATH a usar.
+    """
+    DIRETORIO_DADOS.mkdir(exist_ok=True)
+    linhas = [
+        'from core.settings import *  # noqa: F401,F403',
+        'DEBUG = False',
+        f"DATABASES['default']['NAME'] = {str(banco)!r}",
+        *(f'{nome} = {valor!r}' for nome, valor in sobrescritas.items()),
+    ]
+    (DIRETORIO_DADOS / 'settings_benchmark.py').write_text('\n'.join(linhas) + '\n')
+    return 'settings_benchmark', os.pathsep.join([str(RAIZ), str(DIRETORIO_DADOS)])
+
+
+@contextmanager
+def servidor(comando, porta, modulo_settings, pythonpath, espera=30, ambiente=None):
+    """
+    Inicia um servidor HTTP (gunicorn, uvicorn, ...) e aguarda a porta abrir.
+    `ambiente` são variáveis de ambiente adicionais para o servidor.
+    """
+    ambiente = {
+        **os.environ,
+        **(ambiente or {}),
+        'DJANGO_SETTINGS_MODULE': modulo_settings,
+        'PYTHONPATH': pythonpath,
+    }
+    processo = subprocess.Popen(
+        comando, cwd=RAIZ, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        limite = time.monotonic() + espera
+        while True:
+            if processo.poll() is not None:
+                raise RuntimeError(f'Servidor encerrou ao iniciar: {" ".join(comando)}')
+            try:
+                socket.create_connection(('127.0.0.1', porta), timeout=0.5).close()
+                break
+            except OSError:
+                if time.monotonic() > limite:
+                    raise RuntimeError(f'Servidor não respondeu na porta {porta}')
+                time.sleep(0.2)
+        yield processo
+    finally:
+        processo.terminate()
+        processo.wait(timeout=10)
@@ -0,0 +1,162 @@
+"""
+Benchmark de concorrência: SQLite padrão x perfil de produção (WAL, IMMEDIATE, ...)
+
+Uso:
+    python benchmarks/concorrencia.py --linhas 50000 --concorrencia 32 --duracao 20
+
+Sobe o gunicorn (WSGI, com threads) duas vezes sobre o mesmo banco: com a
+configuração padrão (journal DELETE, transações DEFERRED, uma conexão por
+requisição) e com RTECH_PERFIL_BANCO=producao. Cada cliente mistura criações,
+aprovações e leituras de detalhe. Reporta a vazão de escritas e de leituras
+e quantas requisições falharam (ex.: "database is locked" vira 500).
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from comum import (
+    NOMES,
+    configurar_django,
+    gerar_settings,
+    imprimir,
+    popular,
+    resumir,
+    servidor,
+    texto,
+)
+
+
+def disparar(porta, ids, concorrencia, duracao):
+    """
+    Mantém `concorrencia` clientes com 30% criações, 20% aprovações e 50% leituras
+    """
+    contagem = Counter()
+    tempos = {'escrita': [], 'leitura': []}
+    trava = threading.Lock()
+    fim = time.monotonic() + duracao
+
+    def cliente(semente):
+        rng = random.Random(semente)
+        conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+        locais = Counter()
+        latencias = {'escrita': [], 'leitura': []}
+        pendentes = list(rng.sample(ids, min(len(ids), 50)))
+        while time.monotonic() < fim:
+            sorteio = rng.random()
+            corpo = None
+            if sorteio < 0.3:
+                tipo, metodo, caminho = 'escrita', 'POST', '/api/v1/solicitacoes/'
+                corpo = json.dumps({
+                    'tipo': 'reembolso',
+                    'titulo': texto(rng, 4),
+                    'descricao': texto(rng, 20),
+                    'solicitante': rng.choice(NOMES),
+                    'valor': f'{rng.randint(1000, 100000) / 100:.2f}',
+                })
+            elif sorteio < 0.5 and pendentes:
+                tipo, metodo = 'escrita', 'POST'
+                caminho = f'/api/v1/solicitacoes/{pendentes.pop()}/aprovar/'
+                corpo = '{}'
+            else:
+                tipo, metodo = 'leitura', 'GET'
+                caminho = f'/api/v1/solicitacoes/{rng.choice(ids)}/'
+
+            inicio = time.perf_counter()
+            try:
+                conexao.request(metodo, caminho, body=corpo, headers={
+                    'Accept': 'application/json',
+                    'Content-Type': 'application/json',
+                })
+                resposta = conexao.getresponse()
+                conteudo = resposta.read()
+            except (OSError, http.client.HTTPException):
+                locais['erros'] += 1
+                conexao.close()
+                conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+                continue
+            latencias[tipo].append((time.perf_counter() - inicio) * 1000)
+
+            if resposta.status >= 500:
+                locais['erros'] += 1
+            elif resposta.status >= 400:
+                # Aprovação de solicitação já finalizada: regra de negócio, não falha
+                locais[f'{tipo}_recusadas'] += 1
+            else:
+                locais[f'{tipo}_ok'] += 1
+                if caminho == '/api/v1/solicitacoes/':
+                    pendentes.append(json.loads(conteudo)['id'])
+        conexao.close()
+        with trava:
+            contagem.update(locais)
+            for tipo, lista in latencias.items():
+                tempos[tipo].extend(lista)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        list(executor.map(cliente, range(concorrencia)))
+    decorrido = time.perf_counter() - inicio
+
+    resultado = {'erros': contagem['erros']}
+    for tipo in ['escrita', 'leitura']:
+        resultado[tipo] = {
+            'ok': contagem[f'{tipo}_ok'],
+            'recusadas': contagem[f'{tipo}_recusadas'],
+            'por_segundo': round(contagem[f'{tipo}_ok'] / decorrido, 1),
+            **(resumir(tempos[tipo]) if tempos[tipo] else {}),
+        }
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=50000)
+    parser.add_argument('--banco', help='Arquivo SQLite a usar (padrão: benchmarks/dados/benchmark.sqlite3)')
+    parser.add_argument('--concorrencia', type=int, default=32)
+    parser.add_argument('--duracao', type=float, default=20)
+    parser.add_argument('--processos', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--porta', type=int, default=8766)
+    args = parser.parse_args()
+
+    banco = configurar_django(args.banco)
+
+    from django.db import connection
+    from solicitations.models import Request
+
+    total = popular(args.linhas)
+    modulo, pythonpath = gerar_settings(banco, SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0})
+    comando = [
+        'gunicorn', 'core.wsgi:application', '--bind', f'127.0.0.1:{args.porta}',
+        '--workers', str(args.processos), '--threads', str(args.threads),
+    ]
+
+    resultado = {'linhas': total, 'concorrencia': args.concorrencia, 'duracao_s': args.duracao, 'perfis': {}}
+    for perfil in ['desenvolvimento', 'producao']:
+        # O journal_mode fica gravado no arquivo: volta ao padrão antes da linha de base
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode = DELETE' if perfil == 'desenvolvimento' else 'PRAGMA journal_mode')
+        ids = list(
+            Request.objects.filter(status=Request.STATUS_PENDENTE)
+            .order_by('?').values_list('id', flat=True)[:args.concorrencia * 100]
+        )
+        connection.close()
+        with servidor(comando, args.porta, modulo, pythonpath, ambiente={'RTECH_PERFIL_BANCO': perfil}):
+            resultado['perfis'][perfil] = disparar(args.porta, ids, args.concorrencia, args.duracao)
+
+    padrao, producao = resultado['perfis']['desenvolvimento'], resultado['perfis']['producao']
+    resultado['ganho'] = {
+        tipo: round(producao[tipo]['por_segundo'] / padrao[tipo]['por_segundo'], 2)
+        if padrao[tipo]['por_segundo'] else None
+        for tipo in ['escrita', 'leitura']
+    }
+    imprimir(resultado)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark da listagem: RequestListSerializer x caminho rápido (values())
+
+Uso:
+    python benchmarks/listagem.py --linhas 100000 --tamanhos 10 100 1000
+
+Mede, para alguns tamanhos de página, o tempo de ler a página do banco e
+montar a representação da listagem, e o número de linhas por segundo.
+"""
+
+import argparse
+
+from comum import configurar_django, imprimir, medir, popular
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=100000)
+    parser.add_argument('--banco', help='Arquivo SQLite a usar (padrão: benchmarks/dados/benchmark.sqlite3)')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    configurar_django(args.banco)
+
+    from solicitations.models import Request
+    from solicitations.serializers import RequestListSerializer
+
+    total = popular(args.linhas)
+    queryset = Request.objects.order_by('-data_criacao', '-id')
+
+    def serializer(tamanho):
+        return RequestListSerializer(list(queryset[:tamanho]), many=True).data
+
+    def rapido(tamanho):
+        return RequestListSerializer.representar(list(RequestListSerializer.valores(queryset)[:tamanho]))
+
+    def linhas_por_segundo(tempos, tamanho):
+        return round(tamanho / tempos['media_ms'] * 1000)
+
+    resultado = {'linhas': total, 'paginas': {}}
+    for tamanho in args.tamanhos:
+        assert serializer(tamanho) == rapido(tamanho)
+        antes = medir(lambda: serializer(tamanho), args.repeticoes)
+        depois = medir(lambda: rapido(tamanho), args.repeticoes)
+        resultado['paginas'][tamanho] = {
+            'serializer': {**antes, 'linhas_por_segundo': linhas_por_segundo(antes, tamanho)},
+            'rapido': {**depois, 'linhas_por_segundo': linhas_por_segundo(depois, tamanho)},
+            'ganho': round(antes['media_ms'] / depois['media_ms'], 2),
+        }
+    imprimir(resultado)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark da renderização: JSONRenderer (json da stdlib) x ORJSONRenderer x MessagePack
+
+Uso:
+    python benchmarks/renderizacao.py --linhas 100000 --tamanhos 100 1000
+
+Monta páginas de N linhas da listagem e do detalhe (no formato paginado) e
+mede, para cada renderer, o tempo de codificar a página e o tamanho do
+conteúdo gerado. Nestas páginas (sem floats), o ORJSONRenderer deve gerar os
+mesmos bytes do JSONRenderer. O MessagePack só é medido com o pacote msgpack
+instalado.
+"""
+
+import argparse
+
+from comum import configurar_django, imprimir, medir, popular
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=100000)
+    parser.add_argument('--banco', help='Arquivo SQLite a usar (padrão: benchmarks/dados/benchmark.sqlite3)')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+
+    configurar_django(args.banco)
+
+    from rest_framework.renderers import JSONRenderer
+    from solicitations.models import Request
+    from solicitations.renderers import RENDERERS_BINARIOS, ORJSONRenderer, orjson
+    from solicitations.serializers import RequestListSerializer, RequestSerializer
+
+    total = popular(args.linhas)
+    queryset = Request.objects.order_by('-data_criacao', '-id')
+    renderers = {'json': JSONRenderer(), 'orjson': ORJSONRenderer()}
+    renderers.update((renderer.format, renderer()) for renderer in RENDERERS_BINARIOS)
+
+    resultado = {'linhas': total, 'orjson_instalado': orjson is not None, 'paginas': {}}
+    for tamanho in args.tamanhos:
+        paginas = {
+            'listagem': RequestListSerializer.representar(RequestListSerializer.valores(queryset)[:tamanho]),
+            'detalhe': RequestSerializer(queryset[:tamanho], many=True).data,
+        }
+        for nome, itens in paginas.items():
+            pagina = {'count': total, 'contagem_exata': True, 'next': None, 'previous': None, 'results': itens}
+            base = renderers['json'].render(pagina)
+            assert renderers['orjson'].render(pagina) == base
+
+            medidas = {}
+            for formato, renderer in renderers.items():
+                tempos = medir(lambda: renderer.render(pagina), args.repeticoes)
+                medidas[formato] = {**tempos, 'bytes': len(renderer.render(pagina))}
+            for formato, medida in medidas.items():
+                medida['ganho'] = round(medidas['json']['media_ms'] / medida['media_ms'], 2)
+                medida['tamanho_relativo'] = round(medida['bytes'] / medidas['json']['bytes'], 3)
+            resultado['paginas'][f'{nome}_{tamanho}'] = medidas
+    imprimir(resultado)
+
+
+if __name__ == '__main__':
+    main()
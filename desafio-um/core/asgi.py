@@ -3,14 +3,35 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Sob ASGI, as requisições usam core/urls_asgi.py, em que a listagem, o detalhe,
+a criação e as estatísticas de solicitações são atendidos por views
+assíncronas. Para servir:
+
+    uvicorn core.asgi:application --workers 4
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+URLCONF_ASGI = 'core.urls_asgi'
+
+
+class SolicitacoesASGIHandler(ASGIHandler):
+    """
+    ASGIHandler que resolve as rotas pelo URLconf assíncrono
+    """
+
+    async def get_response_async(self, request):
+        request.urlconf = URLCONF_ASGI
+        return await super().get_response_async(request)
+
+
+django.setup(set_prefix=False)
+application = SolicitacoesASGIHandler()
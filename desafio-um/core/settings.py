@@ -2,6 +2,7 @@
 Django settings for core project.
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,6 +41,7 @@ INSTALLED_APPS = [
 
 # Middleware
 MIDDLEWARE = [
+    "solicitations.instrumentacao.InstrumentacaoMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -89,6 +91,51 @@ DATABASES = {
     }
 }
 
+# Perfil de produção do SQLite, ativado com RTECH_PERFIL_BANCO=producao:
+# - conexões persistentes (reaproveitadas entre requisições) com health check;
+# - transações IMMEDIATE: a trava de escrita é pedida no BEGIN e respeita o
+#   busy_timeout, em vez de falhar com "database is locked" ao promover uma
+#   leitura a escrita no meio da transação;
+# - PRAGMAs aplicados a cada nova conexão (SOLICITACOES["SQLITE_PRAGMAS"],
+#   veja solicitations/receivers.py).
+PERFIL_BANCO = os.environ.get("RTECH_PERFIL_BANCO", "desenvolvimento")
+
+SQLITE_PRAGMAS_PRODUCAO = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 268435456,
+    "cache_size": -65536,
+}
+
+if PERFIL_BANCO == "producao":
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+    })
+
+
+# Cache
+# O LocMemCache é local a cada processo, e o cache de respostas da API fica
+# desligado com ele. Com RTECH_CACHE_DIR, os workers da máquina compartilham um
+# FileBasedCache nesse diretório (ou configure memcached/redis).
+CACHE_DIRETORIO = os.environ.get("RTECH_CACHE_DIR")
+
+if CACHE_DIRETORIO:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": CACHE_DIRETORIO,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -159,3 +206,37 @@ SPECTACULAR_SETTINGS = {
     "SCHEMA_PATH_PREFIX": "/api/v1/",
     "COMPONENT_SPLIT_REQUEST": True,
 }
+
+# App de solicitações: os padrões e a descrição de cada chave estão em
+# solicitations/conf.py (PADROES); aqui ficam só os valores que o ambiente altera.
+SOLICITACOES = {
+    # Diretório dos arquivos de métricas de cada worker (limpe-o ao reiniciar o servidor)
+    "METRICAS_DIRETORIO": os.environ.get("RTECH_METRICAS_DIR"),
+}
+
+if PERFIL_BANCO == "producao":
+    SOLICITACOES.update({
+        "SQLITE_PRAGMAS": SQLITE_PRAGMAS_PRODUCAO,
+        "INSTRUMENTACAO_AMOSTRAGEM": 0.1,
+    })
+
+
+# Logging
+# A instrumentação de SQL (solicitations/instrumentacao.py) registra uma linha
+# JSON por requisição amostrada em INFO e as suspeitas de N+1 em WARNING. Em
+# desenvolvimento, os números já aparecem no cabeçalho Server-Timing; por isso
+# o padrão só mostra as suspeitas (ajuste com RTECH_LOG_NIVEL).
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "solicitations": {
+            "handlers": ["console"],
+            "level": os.environ.get("RTECH_LOG_NIVEL", "INFO" if PERFIL_BANCO == "producao" else "WARNING"),
+            "propagate": False,
+        },
+    },
+}
@@ -8,6 +8,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from solicitations.views import metricas_prometheus
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -15,6 +17,8 @@ urlpatterns = [
     # Documentação da API
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
+    # Métricas no formato do Prometheus
+    path("metrics", metricas_prometheus, name="metricas"),
 ]
 
 if settings.DEBUG:
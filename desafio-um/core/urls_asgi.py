@@ -0,0 +1,16 @@
+"""
+URL configuration for core project under ASGI.
+
+As rotas assíncronas da API vêm antes das síncronas de core/urls.py, que
+continuam atendendo o restante (admin, documentação, demais ações).
+"""
+
+from django.urls import include, path
+
+from .urls import urlpatterns as urlpatterns_wsgi
+
+
+urlpatterns = [
+    path("api/v1/", include("solicitations.urls_async")),
+    *urlpatterns_wsgi,
+]
@@ -2,9 +2,18 @@
 Admin registration for the requests app
 """
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.http import HttpResponseRedirect
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import Request
+from .models import (
+    ConflitoDeVersao,
+    Request,
+    RequestArquivada,
+    RequestRelatorio,
+    RequestWebhook,
+    RequestWebhookEntrega,
+)
 
 
 @admin.register(Request)
@@ -45,6 +54,7 @@ class RequestAdmin(admin.ModelAdmin):
         'id',
         'data_criacao',
         'data_atualizacao',
+        'versao',
         'duracao_dias',
         'pode_ser_cancelada',
         'pode_ser_aprovada',
@@ -66,6 +76,7 @@ class RequestAdmin(admin.ModelAdmin):
                 'id',
                 'data_criacao',
                 'data_atualizacao',
+                'versao',
                 'duracao_dias',
                 'pode_ser_cancelada',
                 'pode_ser_aprovada',
@@ -83,6 +94,28 @@ class RequestAdmin(admin.ModelAdmin):
     # Ações customizadas
     actions = ['aprovar_solicitacoes', 'rejeitar_solicitacoes', 'cancelar_solicitacoes']
     
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        """
+        Se a solicitação foi alterada por outra escrita durante o salvamento
+        (ConflitoDeVersao), desfaz a transação e volta ao formulário, que é
+        reaberto com os dados atuais
+        """
+        try:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        except ConflitoDeVersao as exc:
+            self.message_user(request, f'{exc} Revise os dados atuais e salve novamente.', messages.ERROR)
+            return HttpResponseRedirect(request.get_full_path())
+    
+    def response_action(self, request, queryset):
+        """
+        Idem para as ações em massa: volta à lista com a mensagem de erro
+        """
+        try:
+            return super().response_action(request, queryset)
+        except ConflitoDeVersao as exc:
+            self.message_user(request, f'{exc} Tente novamente.', messages.ERROR)
+            return HttpResponseRedirect(request.get_full_path())
+    
     def tipo_display(self, obj):
         """Exibe o tipo formatado"""
         return obj.get_tipo_display()
@@ -116,43 +149,94 @@ class RequestAdmin(admin.ModelAdmin):
     valor_formatado.short_description = 'Valor'
     valor_formatado.admin_order_field = 'valor'
     
-    # Ações em massa
+    # Ações em massa (um UPDATE condicional por ação)
     def aprovar_solicitacoes(self, request, queryset):
         """Aprova solicitações selecionadas"""
-        count = 0
-        for solicitacao in queryset:
-            if solicitacao.pode_ser_aprovada:
-                try:
-                    solicitacao.aprovar('Aprovado em massa pelo admin')
-                    count += 1
-                except ValueError:
-                    pass
+        count = queryset.aprovar('Aprovado em massa pelo admin')
         self.message_user(request, f'{count} solicitação(ões) aprovada(s) com sucesso.')
     aprovar_solicitacoes.short_description = 'Aprovar solicitações selecionadas'
     
     def rejeitar_solicitacoes(self, request, queryset):
         """Rejeita solicitações selecionadas"""
-        count = 0
-        for solicitacao in queryset:
-            if solicitacao.pode_ser_aprovada:
-                try:
-                    solicitacao.rejeitar('Rejeitado em massa pelo admin')
-                    count += 1
-                except ValueError:
-                    pass
+        count = queryset.rejeitar('Rejeitado em massa pelo admin')
         self.message_user(request, f'{count} solicitação(ões) rejeitada(s).')
     rejeitar_solicitacoes.short_description = 'Rejeitar solicitações selecionadas'
     
     def cancelar_solicitacoes(self, request, queryset):
         """Cancela solicitações selecionadas"""
-        count = 0
-        for solicitacao in queryset:
-            if solicitacao.pode_ser_cancelada:
-                try:
-                    solicitacao.cancelar('Cancelado em massa pelo admin')
-                    count += 1
-                except ValueError:
-                    pass
+        count = queryset.cancelar('Cancelado em massa pelo admin')
         self.message_user(request, f'{count} solicitação(ões) cancelada(s).')
     cancelar_solicitacoes.short_description = 'Cancelar solicitações selecionadas'
 
+
+@admin.register(RequestArquivada)
+class RequestArquivadaAdmin(admin.ModelAdmin):
+    """
+    Consulta (somente leitura) das solicitações arquivadas
+    """
+    list_display = ['id', 'tipo', 'titulo', 'solicitante', 'status', 'valor', 'data_criacao', 'data_atualizacao']
+    list_filter = ['tipo', 'status', 'data_criacao']
+    search_fields = ['titulo', 'descricao', 'solicitante', 'observacoes']
+    ordering = ['-data_criacao']
+    list_per_page = 25
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RequestWebhook)
+class RequestWebhookAdmin(admin.ModelAdmin):
+    """
+    Assinaturas de webhooks das transições de status
+    """
+    list_display = ['nome', 'url', 'tipos', 'status', 'concorrencia_maxima', 'ativo', 'data_criacao']
+    list_filter = ['ativo']
+    search_fields = ['nome', 'url']
+
+
+@admin.register(RequestWebhookEntrega)
+class RequestWebhookEntregaAdmin(admin.ModelAdmin):
+    """
+    Consulta da fila de saída de webhooks. A ação reenviar agenda as
+    entregas selecionadas para a próxima execução do entregar_webhooks.
+    """
+    list_display = ['id', 'webhook', 'solicitacao_id', 'situacao', 'tentativas', 'proxima_tentativa', 'ultimo_erro']
+    list_filter = ['situacao', 'webhook']
+    readonly_fields = [campo.name for campo in RequestWebhookEntrega._meta.fields]
+    ordering = ['-id']
+    list_per_page = 50
+    actions = ['reenviar_entregas']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def reenviar_entregas(self, request, queryset):
+        """Agenda novamente as entregas selecionadas"""
+        count = queryset.update(
+            situacao=RequestWebhookEntrega.SITUACAO_PENDENTE,
+            tentativas=0,
+            proxima_tentativa=timezone.now(),
+            reservada_ate=None,
+        )
+        self.message_user(request, f'{count} entrega(s) agendada(s) para reenvio.')
+    reenviar_entregas.short_description = 'Reenviar entregas selecionadas'
+
+
+@admin.register(RequestRelatorio)
+class RequestRelatorioAdmin(admin.ModelAdmin):
+    """
+    Consulta (somente leitura) dos relatórios em segundo plano
+    """
+    list_display = ['id', 'tipo', 'formato', 'situacao', 'progresso', 'tentativas', 'data_criacao', 'data_conclusao']
+    list_filter = ['tipo', 'situacao']
+    ordering = ['-id']
+    list_per_page = 50
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
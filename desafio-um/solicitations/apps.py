@@ -3,9 +3,45 @@ Apps configuration for the solicitations app
 """
 
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class SolicitationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "solicitations"
     verbose_name = "Solicitações"
+
+    def ready(self):
+        from . import receivers  # noqa: F401
+
+        post_migrate.connect(garantir_busca, sender=self)
+        post_migrate.connect(analisar_tabelas, sender=self)
+
+
+def garantir_busca(sender, using, **kwargs):
+    """
+    Recria os triggers da busca textual descartados por migrations
+    que recriam a tabela de solicitações no SQLite
+    """
+    from django.db import connections
+
+    from .busca import garantir_triggers
+
+    garantir_triggers(connections[using])
+
+
+def analisar_tabelas(sender, using, **kwargs):
+    """
+    Atualiza as estatísticas do planejador do SQLite (sqlite_stat1) após as
+    migrations: sem elas, a escolha entre os índices compostos de
+    solicitações ignora a seletividade de cada status e tipo
+    """
+    from django.db import connections
+
+    from .models import Request
+
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {connection.ops.quote_name(Request._meta.db_table)}')
@@ -0,0 +1,201 @@
+"""
+Busca textual (full-text) das solicitações
+
+- SQLite: tabela virtual FTS5 (external content) sobre titulo, descricao e
+  solicitante, mantida por triggers, com acentos removidos na indexação.
+- PostgreSQL: coluna tsvector gerada com pesos por campo, índice GIN e uma
+  configuração de busca em português com unaccent + stemming.
+
+Outros bancos continuam usando o SearchFilter padrão do DRF (icontains).
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Lookup, TextField
+from django.db.models.expressions import RawSQL
+
+
+TABELA = 'solicitations_request'
+TABELA_FTS = 'solicitations_request_fts'
+CONFIGURACAO_PG = 'solicitacoes_pt'
+
+TRIGGERS_SQLITE = {
+    f'{TABELA_FTS}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ai AFTER INSERT ON {TABELA} BEGIN
+            INSERT INTO {TABELA_FTS}(rowid, titulo, descricao, solicitante)
+            VALUES (new.id, new.titulo, new.descricao, new.solicitante);
+        END
+    """,
+    f'{TABELA_FTS}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ad AFTER DELETE ON {TABELA} BEGIN
+            INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, titulo, descricao, solicitante)
+            VALUES ('delete', old.id, old.titulo, old.descricao, old.solicitante);
+        END
+    """,
+    f'{TABELA_FTS}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_au
+        AFTER UPDATE OF titulo, descricao, solicitante ON {TABELA} BEGIN
+            INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, titulo, descricao, solicitante)
+            VALUES ('delete', old.id, old.titulo, old.descricao, old.solicitante);
+            INSERT INTO {TABELA_FTS}(rowid, titulo, descricao, solicitante)
+            VALUES (new.id, new.titulo, new.descricao, new.solicitante);
+        END
+    """,
+}
+
+SQL_SQLITE = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5(
+        titulo, descricao, solicitante,
+        content='{TABELA}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    *TRIGGERS_SQLITE.values(),
+]
+
+SQL_SQLITE_REMOVER = [
+    *(f'DROP TRIGGER IF EXISTS {nome}' for nome in TRIGGERS_SQLITE),
+    f'DROP TABLE IF EXISTS {TABELA_FTS}',
+]
+
+SQL_POSTGRESQL = [
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    f'CREATE TEXT SEARCH CONFIGURATION {CONFIGURACAO_PG} (COPY = pg_catalog.portuguese)',
+    f"""
+    ALTER TEXT SEARCH CONFIGURATION {CONFIGURACAO_PG}
+        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem
+    """,
+    f"""
+    ALTER TABLE {TABELA} ADD COLUMN busca tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{CONFIGURACAO_PG}'::regconfig, coalesce(titulo, '')), 'A') ||
+        setweight(to_tsvector('{CONFIGURACAO_PG}'::regconfig, coalesce(solicitante, '')), 'B') ||
+        setweight(to_tsvector('{CONFIGURACAO_PG}'::regconfig, coalesce(descricao, '')), 'C')
+    ) STORED
+    """,
+    f'CREATE INDEX solicitacao_busca_gin_idx ON {TABELA} USING GIN (busca)',
+]
+
+SQL_POSTGRESQL_REMOVER = [
+    'DROP INDEX IF EXISTS solicitacao_busca_gin_idx',
+    f'ALTER TABLE {TABELA} DROP COLUMN IF EXISTS busca',
+    f'DROP TEXT SEARCH CONFIGURATION IF EXISTS {CONFIGURACAO_PG}',
+]
+
+# Pesos do bm25 (SQLite) na ordem das colunas: titulo, descricao, solicitante.
+# Ficam gravados como ranking padrão da tabela, exposto na coluna oculta `rank`.
+PESOS_BM25 = '10.0, 1.0, 5.0'
+SQL_SQLITE_RANKING = f"INSERT INTO {TABELA_FTS}({TABELA_FTS}, rank) VALUES ('rank', 'bm25({PESOS_BM25})')"
+
+
+class ColunaFTS5(TextField):
+    """
+    Coluna oculta de uma tabela FTS5 que tem o mesmo nome da tabela e
+    recebe as consultas MATCH
+    """
+
+
+@ColunaFTS5.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+    
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+def suportada(connection):
+    """
+    Indica se o banco possui um backend de busca textual
+    """
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def instalar(connection):
+    """
+    Cria as estruturas de busca textual e indexa as solicitações existentes
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for sql in SQL_SQLITE:
+                cursor.execute(sql)
+            cursor.execute(SQL_SQLITE_RANKING)
+            cursor.execute(f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')")
+        elif connection.vendor == 'postgresql':
+            for sql in SQL_POSTGRESQL:
+                cursor.execute(sql)
+
+
+def remover(connection):
+    """
+    Remove as estruturas de busca textual
+    """
+    comandos = {'sqlite': SQL_SQLITE_REMOVER, 'postgresql': SQL_POSTGRESQL_REMOVER}
+    with connection.cursor() as cursor:
+        for sql in comandos.get(connection.vendor, []):
+            cursor.execute(sql)
+
+
+def garantir_triggers(connection):
+    """
+    Recria os triggers do FTS5 caso tenham sido perdidos.
+
+    No SQLite, migrations que alteram a tabela de solicitações a recriam
+    (cópia + rename), o que descarta os triggers. Nesse caso o índice
+    também é reconstruído, pois pode ter ficado defasado, e as respostas
+    em cache são invalidadas.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+            [f'{TABELA_FTS}%'],
+        )
+        existentes = {nome for (nome,) in cursor.fetchall()}
+        if TABELA_FTS not in existentes or existentes.issuperset(TRIGGERS_SQLITE):
+            return
+        for sql in TRIGGERS_SQLITE.values():
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')")
+
+    from .cache import incrementar_geracao
+
+    incrementar_geracao()
+
+
+def extrair_tokens(termos):
+    """
+    Quebra os termos de busca em palavras, descartando pontuação e operadores
+    """
+    return [token for termo in termos for token in re.findall(r'\w+', termo)]
+
+
+def filtrar(queryset, termos):
+    """
+    Filtra o queryset pelos termos (todas as palavras, por prefixo) e anota
+    a relevância de cada resultado em `relevancia` (maior = mais relevante).
+
+    Retorna None quando o banco ou a tabela não possuem busca textual.
+    """
+    connection = connections[queryset.db]
+    tokens = extrair_tokens(termos)
+    if queryset.model._meta.db_table != TABELA or not suportada(connection) or not tokens:
+        return None
+
+    if connection.vendor == 'sqlite':
+        # Junção com a tabela FTS5 (RequestIndiceBusca): o MATCH percorre o
+        # índice uma única vez e o bm25 de cada linha sai da coluna `rank`
+        consulta = ' '.join(f'"{token}"*' for token in tokens)
+        return queryset.filter(indice_busca__documento__match=consulta).annotate(
+            relevancia=-F('indice_busca__rank'),
+        )
+
+    consulta = ' & '.join(f'{token}:*' for token in tokens)
+    tsquery = f"to_tsquery('{CONFIGURACAO_PG}'::regconfig, %s)"
+    filtro = RawSQL(f'"{TABELA}"."busca" @@ {tsquery}', [consulta], output_field=BooleanField())
+    relevancia = RawSQL(f'ts_rank_cd("{TABELA}"."busca", {tsquery})', [consulta], output_field=FloatField())
+    return queryset.filter(filtro).annotate(relevancia=relevancia)
@@ -0,0 +1,196 @@
+"""
+Cache de respostas da API de solicitações
+
+As respostas da listagem e das estatísticas são guardadas no cache do Django
+(configurável em CACHES) com chave formada por ação + URL normalizada +
+formato + geração. A geração é um contador global incrementado a cada escrita
+em Request (criação, alteração, transição ou exclusão), então uma escrita
+invalida todas as respostas de uma vez, sem precisar localizá-las.
+
+O cache só é usado com um backend compartilhado entre os processos (arquivo,
+banco, memcached ou redis). No LocMemCache cada processo teria o seu próprio
+contador, e uma escrita atendida por um worker não invalidaria as respostas
+guardadas pelos outros; com ele (ou com o DummyCache) as respostas não são
+guardadas.
+"""
+
+import hashlib
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.http import urlencode
+from rest_framework.response import Response
+
+from .conf import configuracao
+
+
+PREFIXO = 'solicitacoes'
+CHAVE_GERACAO = f'{PREFIXO}:geracao'
+CHAVE_ACERTOS = f'{PREFIXO}:cache:acertos'
+CHAVE_FALHAS = f'{PREFIXO}:cache:falhas'
+
+# Backends cujo conteúdo não é visto pelos demais processos
+BACKENDS_LOCAIS = (LocMemCache, DummyCache)
+
+
+def obter_cache():
+    return caches[configuracao('CACHE_RESPOSTAS_ALIAS')]
+
+
+def ativo():
+    """
+    Indica se as respostas devem ser guardadas: timeout maior que zero e
+    backend compartilhado entre os processos
+    """
+    return bool(configuracao('CACHE_RESPOSTAS_TIMEOUT')) and not isinstance(obter_cache(), BACKENDS_LOCAIS)
+
+
+def _incrementar(cache, chave):
+    # add() não sobrescreve um valor existente; incr() é atômico nos backends que suportam
+    if not cache.add(chave, 1, timeout=None):
+        try:
+            cache.incr(chave)
+        except ValueError:
+            cache.set(chave, 1, timeout=None)
+
+
+async def _aincrementar(cache, chave):
+    if not await cache.aadd(chave, 1, timeout=None):
+        try:
+            await cache.aincr(chave)
+        except ValueError:
+            await cache.aset(chave, 1, timeout=None)
+
+
+def geracao():
+    """
+    Retorna a geração atual das solicitações
+    """
+    return obter_cache().get_or_set(CHAVE_GERACAO, 0, timeout=None)
+
+
+async def ageracao():
+    return await obter_cache().aget_or_set(CHAVE_GERACAO, 0, timeout=None)
+
+
+def incrementar_geracao():
+    """
+    Invalida todas as respostas em cache.
+
+    O incremento é feito agora e repetido após o commit: o primeiro impede
+    que a própria transação leia respostas antigas; o segundo descarta o que
+    outra requisição tenha guardado entre os dois (com os dados de antes do
+    commit).
+    """
+    _incrementar(obter_cache(), CHAVE_GERACAO)
+    transaction.on_commit(lambda: _incrementar(obter_cache(), CHAVE_GERACAO))
+
+
+def contadores():
+    """
+    Retorna os acertos e falhas do cache de respostas
+    """
+    cache = obter_cache()
+    valores = cache.get_many([CHAVE_ACERTOS, CHAVE_FALHAS])
+    return {
+        'geracao': geracao(),
+        'acertos': valores.get(CHAVE_ACERTOS, 0),
+        'falhas': valores.get(CHAVE_FALHAS, 0),
+    }
+
+
+def zerar_contadores():
+    obter_cache().delete_many([CHAVE_ACERTOS, CHAVE_FALHAS])
+
+
+def _assinatura(acao, request):
+    # A mesma consulta com os parâmetros em outra ordem resulta na mesma assinatura
+    parametros = urlencode(sorted(
+        (nome, valores) for nome, valores in request.query_params.lists()
+    ), doseq=True)
+    url = f'{request.build_absolute_uri(request.path)}?{parametros}'
+    assinatura = '|'.join([acao, url, request.accepted_renderer.format or ''])
+    return hashlib.md5(assinatura.encode(), usedforsecurity=False).hexdigest()
+
+
+def chave_resposta(acao, request):
+    """
+    Monta a chave da resposta: ação + URL normalizada + formato + geração
+    """
+    return f'{PREFIXO}:resposta:{geracao()}:{_assinatura(acao, request)}'
+
+
+async def achave_resposta(acao, request):
+    return f'{PREFIXO}:resposta:{await ageracao()}:{_assinatura(acao, request)}'
+
+
+def em_cache(metodo):
+    """
+    Decorator para ações de leitura do RequestViewSet.
+
+    Em um acerto, a resposta é montada a partir dos dados guardados (sem
+    consultar o banco) e o ETag guardado ainda permite responder 304.
+    Apenas respostas 200 são guardadas. O cabeçalho X-Cache indica HIT ou MISS.
+    Aceita também métodos assíncronos, usando a API assíncrona do cache.
+    Sem um backend compartilhado (ver ativo()), a ação é sempre executada.
+    """
+    if iscoroutinefunction(metodo):
+        return _em_cache_async(metodo)
+
+    @wraps(metodo)
+    def wrapper(view, request, *args, **kwargs):
+        if not ativo():
+            return metodo(view, request, *args, **kwargs)
+
+        cache = obter_cache()
+        chave = chave_resposta(view.action, request)
+        entrada = cache.get(chave)
+        if entrada is not None:
+            _incrementar(cache, CHAVE_ACERTOS)
+            dados, etag = entrada
+            response = view.resposta_condicional(request, etag)
+            if response is None:
+                response = view.aplicar_validadores(Response(dados), etag)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _incrementar(cache, CHAVE_FALHAS)
+        response = metodo(view, request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            cache.set(chave, (response.data, response.get('ETag')), configuracao('CACHE_RESPOSTAS_TIMEOUT'))
+        response['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
+
+
+def _em_cache_async(metodo):
+    @wraps(metodo)
+    async def wrapper(view, request, *args, **kwargs):
+        if not ativo():
+            return await metodo(view, request, *args, **kwargs)
+
+        cache = obter_cache()
+        chave = await achave_resposta(view.action, request)
+        entrada = await cache.aget(chave)
+        if entrada is not None:
+            await _aincrementar(cache, CHAVE_ACERTOS)
+            dados, etag = entrada
+            response = view.resposta_condicional(request, etag)
+            if response is None:
+                response = view.aplicar_validadores(Response(dados), etag)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        await _aincrementar(cache, CHAVE_FALHAS)
+        response = await metodo(view, request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            await cache.aset(chave, (response.data, response.get('ETag')), configuracao('CACHE_RESPOSTAS_TIMEOUT'))
+        response['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
@@ -0,0 +1,86 @@
+"""
+Configurações da app solicitations
+
+Os valores podem ser sobrescritos no dicionário SOLICITACOES do settings.py.
+"""
+
+from django.conf import settings
+
+
+PADROES = {
+    # Criação em massa (POST /solicitacoes/bulk/)
+    'CRIACAO_EM_MASSA_MAX_ITENS': 5000,
+    'CRIACAO_EM_MASSA_TAMANHO_LOTE': 500,
+    # Ações em massa (POST /solicitacoes/acoes-em-massa/)
+    'ACOES_EM_MASSA_MAX_IDS': 10000,
+    # Exportação (GET /solicitacoes/exportar/): linhas lidas do banco por vez
+    'EXPORTACAO_TAMANHO_LOTE': 2000,
+    # Listagem paginada por número: com filtros além de tipo/status, a
+    # contagem para este número de linhas após o início da página (0 conta
+    # sempre todas)
+    'LISTAGEM_LIMITE_CONTAGEM': 10000,
+    # Arquivamento (manage.py arquivar_solicitacoes): idade mínima, em dias
+    # desde a última atualização, das solicitações finalizadas arquivadas e
+    # linhas movidas por transação
+    'ARQUIVAMENTO_IDADE_DIAS': 365,
+    'ARQUIVAMENTO_TAMANHO_LOTE': 1000,
+    # Log de mudanças (GET /solicitacoes/mudancas/): mudanças por resposta
+    # (padrão e máximo) e dias mantidos pelo comando podar_mudancas
+    'MUDANCAS_LIMITE_PADRAO': 500,
+    'MUDANCAS_LIMITE_MAXIMO': 5000,
+    'MUDANCAS_RETENCAO_DIAS': 30,
+    # Eventos (GET /solicitacoes/eventos/, ASGI): segundos entre as leituras
+    # do log, para ver as escritas de outros workers (0 lê apenas quando o
+    # próprio processo grava), segundos entre os comentários que mantêm a
+    # conexão aberta, espera sugerida ao cliente para reconectar (ms),
+    # eventos pendentes por conexão antes de relê-los do log e mudanças lidas
+    # por consulta
+    'EVENTOS_INTERVALO_SEGUNDOS': 1.0,
+    'EVENTOS_BATIMENTO_SEGUNDOS': 15,
+    'EVENTOS_RETRY_MS': 3000,
+    'EVENTOS_FILA_MAXIMA': 1000,
+    'EVENTOS_TAMANHO_LOTE': 500,
+    # Webhooks (manage.py entregar_webhooks): entregas reservadas por lote e
+    # por quanto tempo, requisições simultâneas no total, eventos por
+    # requisição, timeout, tentativas antes de marcar a entrega como falha,
+    # espera após a primeira falha (dobra a cada tentativa, até o máximo) e
+    # espera quando a fila está vazia
+    'WEBHOOKS_TAMANHO_LOTE': 200,
+    'WEBHOOKS_RESERVA_SEGUNDOS': 120,
+    'WEBHOOKS_CONCORRENCIA': 8,
+    'WEBHOOKS_EVENTOS_POR_REQUISICAO': 50,
+    'WEBHOOKS_TIMEOUT_SEGUNDOS': 10,
+    'WEBHOOKS_TENTATIVAS_MAXIMAS': 10,
+    'WEBHOOKS_ATRASO_INICIAL_SEGUNDOS': 10,
+    'WEBHOOKS_ATRASO_MAXIMO_SEGUNDOS': 3600,
+    'WEBHOOKS_INTERVALO_SEGUNDOS': 1.0,
+    # Relatórios em segundo plano (POST /relatorios/ e manage.py run_workers):
+    # processos, espera com a fila vazia, duração da reserva de um relatório
+    # (renovada a cada progresso; vencida, outro processo o assume) e
+    # execuções antes de marcá-lo como erro
+    'RELATORIOS_CONCORRENCIA': 2,
+    'RELATORIOS_INTERVALO_SEGUNDOS': 1.0,
+    'RELATORIOS_RESERVA_SEGUNDOS': 300,
+    'RELATORIOS_TENTATIVAS_MAXIMAS': 3,
+    # Cache de respostas da listagem e das estatísticas (0 desativa)
+    'CACHE_RESPOSTAS_ALIAS': 'default',
+    'CACHE_RESPOSTAS_TIMEOUT': 300,
+    # PRAGMAs aplicados a cada nova conexão SQLite ({nome: valor})
+    'SQLITE_PRAGMAS': {},
+    # Instrumentação de SQL (Server-Timing e log): fração das requisições
+    # medidas (0 desativa, 1 mede todas) e a partir de quantas execuções da
+    # mesma forma de consulta a requisição é apontada como suspeita de N+1
+    'INSTRUMENTACAO_AMOSTRAGEM': 1.0,
+    'INSTRUMENTACAO_LIMIAR_REPETICOES': 10,
+    # Métricas do Prometheus (GET /metrics). Com vários processos, informe um
+    # diretório compartilhado entre eles (um arquivo por processo)
+    'METRICAS_ATIVAS': True,
+    'METRICAS_DIRETORIO': None,
+}
+
+
+def configuracao(nome):
+    """
+    Retorna a configuração `nome`, considerando o settings do projeto
+    """
+    return getattr(settings, 'SOLICITACOES', {}).get(nome, PADROES[nome])
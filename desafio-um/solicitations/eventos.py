@@ -0,0 +1,293 @@
+"""
+Eventos das solicitações em tempo real (Server-Sent Events)
+
+GET /api/v1/solicitacoes/eventos/ (apenas sob ASGI) envia as criações,
+alterações, transições e exclusões como eventos SSE, em vez de os painéis
+consultarem a listagem a cada poucos segundos.
+
+A fonte dos eventos é o log de mudanças (RequestMudanca), gravado na mesma
+transação de cada escrita. Ele funciona como barramento entre os workers:
+
+- em cada processo, um único Transmissor lê o log e distribui os eventos a
+  todas as conexões abertas (uma consulta por lote, não por cliente);
+- escritas feitas no próprio processo acordam o Transmissor logo após o
+  commit; as de outros workers são vistas a cada EVENTOS_INTERVALO_SEGUNDOS
+  (0 desativa a leitura periódica, para um único processo);
+- o id de cada evento é a sequência da mudança, então o `Last-Event-ID`
+  enviado pelo EventSource ao reconectar retoma do ponto exato, lendo o
+  log. Clientes lentos demais para a fila também são realimentados pelo log.
+"""
+
+import asyncio
+import json
+import logging
+import weakref
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.fields import DateTimeField
+
+from .conf import configuracao
+from .models import Request, RequestArquivada, RequestMudanca
+from .serializers import RequestSerializer
+from .signals import OPERACAO_EXCLUSAO
+
+
+logger = logging.getLogger(__name__)
+
+# Espera máxima (segundos) entre as novas tentativas após um erro de leitura
+ESPERA_MAXIMA_APOS_ERRO = 30
+
+# Um Transmissor por event loop (em produção, um por processo)
+_transmissores = weakref.WeakKeyDictionary()
+
+
+def transmissor():
+    """
+    Transmissor do event loop atual
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _transmissores:
+        _transmissores[loop] = Transmissor(loop)
+    return _transmissores[loop]
+
+
+def notificar():
+    """
+    Acorda os Transmissores deste processo (seguro para chamar de qualquer
+    thread, ex.: no on_commit de uma view síncrona)
+    """
+    for loop, instancia in list(_transmissores.items()):
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(instancia.acordar.set)
+
+
+class Filtros:
+    """
+    Filtros de tipo, status e solicitante de uma conexão, com a mesma
+    semântica do RequestFilter (o status confere com o atual ou o anterior,
+    para que quem acompanha as pendentes veja a aprovação)
+    """
+
+    def __init__(self, tipo=None, status=None, solicitante=''):
+        self.tipo = set(tipo or [])
+        self.status = set(status or [])
+        self.solicitante = (solicitante or '').casefold()
+
+    def aceita(self, evento):
+        if self.tipo and evento.tipo is not None and evento.tipo not in self.tipo:
+            return False
+        if self.status and evento.status is not None and not (
+            {evento.status, evento.status_anterior} & self.status
+        ):
+            return False
+        # Nas exclusões o solicitante não é mais conhecido: o evento é enviado
+        solicitacao = evento.dados['solicitacao']
+        if self.solicitante and solicitacao is not None:
+            return self.solicitante in solicitacao['solicitante'].casefold()
+        return True
+
+
+class Evento:
+    """
+    Um evento SSE montado a partir de uma linha do log de mudanças
+    """
+    __slots__ = ('sequencia', 'tipo', 'status', 'status_anterior', 'dados')
+
+    def __init__(self, mudanca, solicitacao, data_hora):
+        sequencia, pk, operacao, data, tipo, status, status_anterior = mudanca
+        self.sequencia = sequencia
+        self.tipo = tipo
+        self.status = status
+        self.status_anterior = status_anterior
+        self.dados = {
+            'sequencia': sequencia,
+            'id': pk,
+            'operacao': operacao if solicitacao is not None else OPERACAO_EXCLUSAO,
+            'data': data_hora(data),
+            'status_anterior': status_anterior,
+            'solicitacao': solicitacao,
+        }
+
+    def codificar(self):
+        dados = json.dumps(self.dados, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'))
+        return f'id: {self.sequencia}\nevent: {self.dados["operacao"]}\ndata: {dados}\n\n'.encode()
+
+
+async def ler_eventos(desde, limite):
+    """
+    Até `limite` eventos do log posteriores à sequência `desde`, com o
+    estado atual das solicitações (de Request ou do arquivo) em uma consulta
+    """
+    mudancas, mais = await RequestMudanca.objects.aapos(desde, limite)
+    ids = {mudanca[1] for mudanca in mudancas if mudanca[2] != OPERACAO_EXCLUSAO}
+    solicitacoes = await Request.objects.ain_bulk(ids) if ids else {}
+    faltantes = ids - set(solicitacoes)
+    if faltantes:
+        solicitacoes.update(await RequestArquivada.objects.ain_bulk(faltantes))
+    representacoes = {pk: RequestSerializer(solicitacao).data for pk, solicitacao in solicitacoes.items()}
+    data_hora = DateTimeField().to_representation
+    eventos = [Evento(mudanca, representacoes.get(mudanca[1]), data_hora) for mudanca in mudancas]
+    return eventos, mais
+
+
+class Assinatura:
+    """
+    Uma conexão SSE: fila de eventos pendentes e a última sequência enviada
+    """
+
+    def __init__(self, filtros, ultimo):
+        self.filtros = filtros
+        self.ultimo = ultimo
+        self.fila = asyncio.Queue(maxsize=configuracao('EVENTOS_FILA_MAXIMA'))
+        # A fila encheu: os eventos seguintes são relidos do log
+        self.atrasada = False
+
+    def entregar(self, evento):
+        if self.atrasada or evento.sequencia <= self.ultimo or not self.filtros.aceita(evento):
+            return
+        try:
+            self.fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.atrasada = True
+
+
+class Transmissor:
+    """
+    Lê o log de mudanças e distribui os eventos às assinaturas do processo.
+    A leitura roda em uma tarefa que existe enquanto houver assinaturas.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.assinaturas = set()
+        self.acordar = asyncio.Event()
+        self.ultimo = None
+        self.tarefa = None
+
+    async def assinar(self, filtros, desde=None):
+        """
+        Registra uma assinatura que recebe os eventos posteriores a `desde`
+        (padrão: a partir de agora). Retorna a assinatura e a sequência até a
+        qual ela deve ler o log antes de consumir a fila.
+        """
+        if self.tarefa is None or self.tarefa.done():
+            self.ultimo = await RequestMudanca.objects.aatual()
+            self.tarefa = self.loop.create_task(self.executar())
+        assinatura = Assinatura(filtros, self.ultimo if desde is None else desde)
+        self.assinaturas.add(assinatura)
+        return assinatura, self.ultimo
+
+    def cancelar(self, assinatura):
+        self.assinaturas.discard(assinatura)
+        if not self.assinaturas and self.tarefa is not None:
+            self.tarefa.cancel()
+            self.tarefa = None
+
+    async def executar(self):
+        """
+        Laço da tarefa. Um erro na leitura (ex.: "database is locked" no
+        SQLite) não a encerra: é registrado e a leitura é repetida a partir
+        da última sequência distribuída, com espera crescente entre as
+        tentativas.
+        """
+        intervalo = configuracao('EVENTOS_INTERVALO_SEGUNDOS') or None
+        lote = configuracao('EVENTOS_TAMANHO_LOTE')
+        espera = None
+        while True:
+            if espera:
+                await asyncio.sleep(espera)
+            else:
+                try:
+                    await asyncio.wait_for(self.acordar.wait(), timeout=intervalo)
+                except asyncio.TimeoutError:
+                    pass
+            self.acordar.clear()
+            try:
+                await self.distribuir(lote)
+            except Exception:
+                espera = min((espera or 0.5) * 2, ESPERA_MAXIMA_APOS_ERRO)
+                logger.exception('Erro ao ler o log de mudanças; nova tentativa em %.1fs', espera)
+            else:
+                espera = None
+
+    async def distribuir(self, lote):
+        """
+        Entrega às assinaturas os eventos posteriores a self.ultimo
+        """
+        mais = True
+        while mais:
+            eventos, mais = await ler_eventos(self.ultimo, lote)
+            for evento in eventos:
+                for assinatura in list(self.assinaturas):
+                    assinatura.entregar(evento)
+            if eventos:
+                self.ultimo = eventos[-1].sequencia
+
+
+async def transmitir(filtros, desde=None):
+    """
+    Registra a conexão no Transmissor e retorna o corpo da resposta SSE.
+
+    A assinatura é feita aqui, antes de a resposta começar, para que as
+    escritas feitas logo após a requisição não se percam.
+    """
+    instancia = transmissor()
+    assinatura, ate = await instancia.assinar(filtros, desde)
+    return _transmitir(instancia, assinatura, desde, ate)
+
+
+async def _transmitir(instancia, assinatura, desde, ate):
+    """
+    Corpo da resposta SSE: primeiro o que o cliente perdeu (a partir de
+    `desde`, lido do log), depois os eventos distribuídos pelo Transmissor,
+    com comentários periódicos para manter a conexão aberta
+    """
+    lote = configuracao('EVENTOS_TAMANHO_LOTE')
+    batimento = configuracao('EVENTOS_BATIMENTO_SEGUNDOS')
+    try:
+        yield f'retry: {configuracao("EVENTOS_RETRY_MS")}\n\n'.encode()
+        if desde is not None and await RequestMudanca.objects.aexpirada(desde):
+            # Mudanças perdidas já foram removidas do log: o cliente deve recarregar
+            yield f'id: {ate}\nevent: expirado\ndata: {{}}\n\n'.encode()
+            assinatura.ultimo = ate
+        async for evento in _reler(assinatura, ate, lote):
+            yield evento
+        while True:
+            if assinatura.atrasada:
+                _esvaziar(assinatura.fila)
+                assinatura.atrasada = False
+                async for evento in _reler(assinatura, None, lote):
+                    yield evento
+                continue
+            try:
+                evento = await asyncio.wait_for(assinatura.fila.get(), timeout=batimento)
+            except asyncio.TimeoutError:
+                yield b': batimento\n\n'
+                continue
+            if evento.sequencia > assinatura.ultimo:
+                assinatura.ultimo = evento.sequencia
+                yield evento.codificar()
+    finally:
+        instancia.cancelar(assinatura)
+
+
+async def _reler(assinatura, ate, lote):
+    """
+    Eventos do log posteriores a assinatura.ultimo (até a sequência `ate`,
+    ou até o fim do log), já filtrados e codificados
+    """
+    while ate is None or assinatura.ultimo < ate:
+        eventos, mais = await ler_eventos(assinatura.ultimo, lote)
+        for evento in eventos:
+            if ate is not None and evento.sequencia > ate:
+                return
+            assinatura.ultimo = evento.sequencia
+            if assinatura.filtros.aceita(evento):
+                yield evento.codificar()
+        if not mais:
+            return
+
+
+def _esvaziar(fila):
+    while not fila.empty():
+        fila.get_nowait()
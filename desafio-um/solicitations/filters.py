@@ -3,20 +3,42 @@ Filtros customizados para a app solicitations
 """
 
 import django_filters
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from . import busca
 from .models import Request
 
 
+class MultipleChoiceInFilter(django_filters.MultipleChoiceFilter):
+    """
+    MultipleChoiceFilter que filtra com um único `campo IN (...)`, sem DISTINCT.
+
+    O filtro padrão gera `campo = a OR campo = b` e um SELECT DISTINCT sobre
+    todas as colunas, o que impede o banco de usar os índices compostos
+    (status, data de criação) para ordenar a página.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('distinct', False)
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if not value or self.is_noop(qs, value):
+            return qs
+        return self.get_method(qs)(**{f'{self.field_name}__in': sorted(set(value))})
+
+
 class RequestFilter(django_filters.FilterSet):
     """
     Filtros avançados para solicitações
     """
     # Filtros por tipo e status (múltiplos valores)
-    tipo = django_filters.MultipleChoiceFilter(
+    tipo = MultipleChoiceInFilter(
         choices=Request.TIPO_CHOICES,
         help_text='Filtrar por tipo de solicitação (pode usar múltiplos valores)'
     )
     
-    status = django_filters.MultipleChoiceFilter(
+    status = MultipleChoiceInFilter(
         choices=Request.STATUS_CHOICES,
         help_text='Filtrar por status (pode usar múltiplos valores)'
     )
@@ -68,3 +90,33 @@ class RequestFilter(django_filters.FilterSet):
     class Meta:
         model = Request
         fields = ['tipo', 'status', 'solicitante']
+
+
+
+class RequestSearchFilter(SearchFilter):
+    """
+    Busca textual (`?search=`) usando o índice full-text do banco
+    (FTS5 no SQLite, tsvector + GIN no PostgreSQL), com os resultados
+    anotados com a relevância. Em outros bancos, usa o icontains padrão.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        termos = self.get_search_terms(request)
+        if not termos or not self.get_search_fields(view, request):
+            return queryset
+        
+        resultado = busca.filtrar(queryset, termos)
+        if resultado is None:
+            return super().filter_queryset(request, queryset, view)
+        return resultado
+
+
+class RequestOrderingFilter(OrderingFilter):
+    """
+    Ordenação que, em buscas sem `?ordering=` explícito, ordena por relevância
+    """
+    
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and 'relevancia' in queryset.query.annotations:
+            return ['-relevancia', *self.get_default_ordering(view)]
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,246 @@
+"""
+Instrumentação de SQL por requisição
+
+Para uma amostra das requisições (SOLICITACOES["INSTRUMENTACAO_AMOSTRAGEM"]),
+InstrumentacaoMiddleware registra o número de consultas, o tempo total no
+banco, a consulta mais lenta e o tempo de serialização (renderização da
+resposta). O resultado vai no cabeçalho Server-Timing, visível nas
+ferramentas do navegador, e em uma linha de log JSON no logger
+"solicitations.instrumentacao". Consultas com a mesma forma repetidas muitas
+vezes na mesma requisição (suspeita de N+1) são apontadas no log, que passa a
+ser um WARNING.
+
+As consultas são medidas por um execute_wrapper instalado em cada conexão
+(veja receivers.py), que grava na medição da requisição atual guardada em
+uma ContextVar. Assim a medição funciona sob WSGI e sob ASGI, onde as
+consultas das views assíncronas rodam em outra thread (sync_to_async copia o
+contexto).
+
+O mesmo middleware grava as métricas de todas as requisições, amostradas ou
+não, para o /metrics (veja metricas.py).
+"""
+
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import metricas
+from .conf import configuracao
+
+
+logger = logging.getLogger(__name__)
+
+_medicao = ContextVar('solicitacoes_medicao', default=None)
+
+# Literais e listas de parâmetros que não mudam a forma da consulta
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+
+TAMANHO_MAXIMO_SQL = 300
+
+
+def forma(sql):
+    """
+    Normaliza o SQL para agrupar consultas iguais a menos dos valores
+    (parâmetros, literais, LIMIT/OFFSET e o tamanho das listas de IN)
+    """
+    return _LISTAS.sub('(...)', _LITERAIS.sub('?', sql))
+
+
+class Medicao:
+    """
+    Consultas e tempos de uma requisição
+    """
+
+    def __init__(self, detalhada=True):
+        # Só as requisições amostradas agrupam as consultas por forma
+        self.detalhada = detalhada
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tempo_db = 0.0
+        self.mais_lenta = 0.0
+        self.sql_mais_lenta = ''
+        self.serializacao = 0.0
+        self.inicio_serializacao = None
+        self.formas = Counter()
+
+    def registrar(self, sql, duracao):
+        self.consultas += 1
+        self.tempo_db += duracao
+        if self.detalhada:
+            self.formas[forma(sql)] += 1
+        if duracao >= self.mais_lenta:
+            self.mais_lenta = duracao
+            self.sql_mais_lenta = sql
+
+    def repetidas(self):
+        """
+        Formas executadas pelo menos INSTRUMENTACAO_LIMIAR_REPETICOES vezes
+        """
+        limiar = configuracao('INSTRUMENTACAO_LIMIAR_REPETICOES')
+        return [(sql, vezes) for sql, vezes in self.formas.most_common() if vezes >= limiar]
+
+    def server_timing(self, total):
+        metricas = [
+            f'db;dur={self.tempo_db * 1000:.2f};desc="{self.consultas} consultas"',
+            f'db-lenta;dur={self.mais_lenta * 1000:.2f}',
+            f'serializacao;dur={self.serializacao * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ]
+        repetidas = self.repetidas()
+        if repetidas:
+            # Valores de cabeçalho são ASCII: o desc não leva acentos
+            metricas.append(f'n1;desc="{len(repetidas)} formas repetidas (max {repetidas[0][1]}x)"')
+        return ', '.join(metricas)
+
+    def registro(self, request, response, total):
+        """
+        Dicionário da linha de log
+        """
+        view, acao = identificar_view(request)
+        return {
+            'metodo': request.method,
+            'caminho': request.path,
+            'view': f'{view}.{acao}' if acao else (view or None),
+            'status': response.status_code,
+            'duracao_ms': round(total * 1000, 2),
+            'consultas': self.consultas,
+            'db_ms': round(self.tempo_db * 1000, 2),
+            'consulta_mais_lenta_ms': round(self.mais_lenta * 1000, 2),
+            'consulta_mais_lenta': self.sql_mais_lenta[:TAMANHO_MAXIMO_SQL],
+            'serializacao_ms': round(self.serializacao * 1000, 2),
+            'repetidas': [
+                {'sql': sql[:TAMANHO_MAXIMO_SQL], 'vezes': vezes} for sql, vezes in self.repetidas()
+            ],
+        }
+
+
+def identificar_view(request):
+    """
+    Nome da view e, nos viewsets, a ação do método HTTP,
+    ex.: ("RequestViewSet", "list"). Sem rota, ("", "").
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '', ''
+    classe = getattr(match.func, 'cls', None)
+    if classe is None:
+        return getattr(match.func, '__qualname__', ''), ''
+    acoes = getattr(match.func, 'actions', None) or {}
+    metodo = request.method.lower()
+    acao = acoes.get(metodo) or (acoes.get('get') if metodo == 'head' else None)
+    return classe.__name__, acao or ''
+
+
+def registrar_consulta(execute, sql, params, many, context):
+    """
+    execute_wrapper: mede a consulta se a requisição atual estiver amostrada
+    """
+    medicao = _medicao.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicao.registrar(sql, time.perf_counter() - inicio)
+
+
+@contextmanager
+def serializando():
+    """
+    Soma o tempo do bloco à serialização da requisição atual
+    """
+    medicao = _medicao.get()
+    if medicao is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicao.serializacao += time.perf_counter() - inicio
+
+
+def amostrar():
+    taxa = configuracao('INSTRUMENTACAO_AMOSTRAGEM')
+    return taxa >= 1 or (taxa > 0 and random.random() < taxa)
+
+
+class InstrumentacaoMiddleware:
+    """
+    Server-Timing e log estruturado com as consultas SQL de cada requisição amostrada
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        detalhada = amostrar()
+        if not detalhada and not metricas.ativas():
+            return self.get_response(request)
+        medicao = Medicao(detalhada)
+        token = _medicao.set(medicao)
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicao.reset(token)
+        return self.concluir(request, response, medicao)
+
+    async def __acall__(self, request):
+        detalhada = amostrar()
+        if not detalhada and not metricas.ativas():
+            return await self.get_response(request)
+        medicao = Medicao(detalhada)
+        token = _medicao.set(medicao)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicao.reset(token)
+        return self.concluir(request, response, medicao)
+
+    def process_template_response(self, request, response):
+        # Chamado logo antes de o handler renderizar a resposta do DRF
+        medicao = _medicao.get()
+        if medicao is not None:
+            medicao.inicio_serializacao = time.perf_counter()
+        return response
+
+    def concluir(self, request, response, medicao):
+        fim = time.perf_counter()
+        if medicao.inicio_serializacao is not None:
+            medicao.serializacao += fim - medicao.inicio_serializacao
+        total = fim - medicao.inicio
+
+        if metricas.ativas():
+            view, acao = identificar_view(request)
+            tamanho = None
+            if not response.streaming:
+                # O CommonMiddleware já preencheu o Content-Length (evita copiar o corpo)
+                tamanho = int(response.get('Content-Length') or len(response.content))
+            metricas.registro().observar(
+                view, acao, request.method, response.status_code, total, medicao.consultas, tamanho,
+            )
+        if not medicao.detalhada:
+            return response
+
+        response['Server-Timing'] = medicao.server_timing(total)
+        registro = medicao.registro(request, response, total)
+        nivel = logging.WARNING if registro['repetidas'] else logging.INFO
+        if logger.isEnabledFor(nivel):
+            logger.log(nivel, json.dumps(registro, ensure_ascii=False), extra={'instrumentacao': registro})
+        return response
@@ -0,0 +1,69 @@
+"""
+Comando para arquivar as solicitações finalizadas antigas
+"""
+
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from solicitations.conf import configuracao
+from solicitations.models import Request
+
+
+class Command(BaseCommand):
+    help = (
+        'Move as solicitações aprovadas, rejeitadas ou canceladas sem alterações há mais '
+        'de N dias para o arquivo (RequestArquivada), em lotes curtos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            help='Idade mínima, em dias desde a última atualização (padrão: ARQUIVAMENTO_IDADE_DIAS)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            help='Solicitações movidas por transação (padrão: ARQUIVAMENTO_TAMANHO_LOTE)',
+        )
+        parser.add_argument(
+            '--pausa',
+            type=float,
+            default=0,
+            help='Segundos de espera entre os lotes, para ceder o banco às requisições',
+        )
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Apenas conta as solicitações que seriam arquivadas',
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Alias do banco (padrão: default)')
+
+    def handle(self, *args, **options):
+        dias = options['dias'] if options['dias'] is not None else configuracao('ARQUIVAMENTO_IDADE_DIAS')
+        lote = options['lote'] or configuracao('ARQUIVAMENTO_TAMANHO_LOTE')
+        if dias < 0 or lote < 1:
+            raise CommandError('--dias não pode ser negativo e --lote deve ser positivo.')
+
+        antes_de = timezone.now() - timedelta(days=dias)
+        solicitacoes = Request.objects.db_manager(options['database'])
+        inicio = time.perf_counter()
+        if options['simular']:
+            resultado = {
+                'elegiveis': solicitacoes.filter(
+                    status__in=Request.STATUS_FINALIZADOS,
+                    data_atualizacao__lt=antes_de,
+                ).count(),
+            }
+        else:
+            resultado = {
+                'arquivadas': solicitacoes.all().arquivar(antes_de, tamanho_lote=lote, pausa=options['pausa']),
+            }
+        resultado['antes_de'] = antes_de.isoformat()
+        resultado['segundos'] = round(time.perf_counter() - inicio, 2)
+        self.stdout.write(json.dumps(resultado))
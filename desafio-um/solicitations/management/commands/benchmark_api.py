@@ -0,0 +1,179 @@
+"""
+Comando de benchmark da API de solicitações (macro, pelo cliente de teste)
+"""
+
+import json
+import random
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+
+from solicitations.models import Request
+
+
+URL = '/api/v1/solicitacoes/'
+PALAVRAS_BUSCA = ['hotel', 'táxi', 'curso', 'férias', 'congresso', 'combustível', 'São Paulo']
+
+
+def cenarios(rng, ids, pendentes, paginas):
+    """
+    {nome: função que gera (método, caminho)} das requisições de cada cenário
+    """
+    def aprovar():
+        if not pendentes:
+            raise CommandError('Sem solicitações pendentes para o cenário de transições.')
+        return 'post', f'{URL}{pendentes.pop()}/aprovar/'
+
+    return {
+        'listagem': lambda: ('get', f'{URL}?page={rng.randint(1, min(paginas, 50))}'),
+        'listagem_cursor': lambda: ('get', f'{URL}?paginacao=cursor'),
+        'filtro_tipo_status_valor': lambda: (
+            'get', f'{URL}?tipo=reembolso&status=pendente&valor_min={rng.randint(10, 500)}'
+        ),
+        'filtro_fila_aberta': lambda: ('get', f'{URL}?status=pendente&status=em_analise'),
+        'busca': lambda: ('get', f'{URL}?search={rng.choice(PALAVRAS_BUSCA)}'),
+        'ordenacao_valor': lambda: ('get', f'{URL}?ordering=-valor&page={rng.randint(1, min(paginas, 10))}'),
+        'ordenacao_data_inicio': lambda: ('get', f'{URL}?ordering=data_inicio&tipo=ferias'),
+        'detalhe': lambda: ('get', f'{URL}{rng.choice(ids)}/'),
+        'transicao_aprovar': aprovar,
+        'estatisticas': lambda: ('get', f'{URL}estatisticas/'),
+        'estatisticas_filtradas': lambda: ('get', f'{URL}estatisticas/?tipo={rng.choice(["ferias", "reembolso"])}'),
+        'estatisticas_serie': lambda: (
+            'get', f'{URL}estatisticas/serie/?granularidade={rng.choice(["dia", "semana", "mes"])}'
+        ),
+    }
+
+
+def resumir(tempos, consultas):
+    ordenados = sorted(tempos)
+
+    def percentil(p):
+        return round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))], 3)
+
+    return {
+        'n': len(tempos),
+        'media_ms': round(statistics.fmean(tempos), 3),
+        'p50_ms': percentil(50),
+        'p95_ms': percentil(95),
+        'p99_ms': percentil(99),
+        'consultas_por_chamada': round(statistics.fmean(consultas), 2),
+        'consultas_max': max(consultas),
+    }
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=Path(settings.BASE_DIR), capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede listagem, filtros, busca, ordenação, detalhe, transições e estatísticas pelo '
+        'cliente de teste e reporta p50/p95/p99 e consultas por chamada em JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=50, help='Chamadas por cenário (padrão: 50)')
+        parser.add_argument('--aquecimento', type=int, default=3, help='Chamadas descartadas por cenário')
+        parser.add_argument('--cenarios', nargs='+', help='Executa só estes cenários')
+        parser.add_argument('--semente', type=int, default=42)
+        parser.add_argument(
+            '--com-cache',
+            action='store_true',
+            help='Mantém o cache de respostas (por padrão é desativado para medir o caminho até o banco)',
+        )
+        parser.add_argument('--saida', help='Grava o resultado JSON neste arquivo')
+        parser.add_argument('--comparar', help='Resultado JSON anterior para comparar (ex.: de outro commit)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['semente'])
+        ids = list(Request.objects.order_by('?').values_list('id', flat=True)[:1000])
+        if not ids:
+            raise CommandError('Banco sem solicitações: rode antes "manage.py seed_solicitacoes".')
+        chamadas = options['repeticoes'] + options['aquecimento']
+        pendentes = list(
+            Request.objects.filter(status=Request.STATUS_PENDENTE)
+            .order_by('?').values_list('id', flat=True)[:chamadas]
+        )
+        linhas = Request.objects.count()
+        paginas = max(1, linhas // settings.REST_FRAMEWORK['PAGE_SIZE'])
+        todos = cenarios(rng, ids, pendentes, paginas)
+        escolhidos = options['cenarios'] or list(todos)
+        desconhecidos = set(escolhidos) - set(todos)
+        if desconhecidos:
+            raise CommandError(f'Cenários desconhecidos: {", ".join(sorted(desconhecidos))}. Disponíveis: {", ".join(todos)}')
+
+        configuracoes = {'DEBUG': False, 'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver']}
+        if not options['com_cache']:
+            configuracoes['SOLICITACOES'] = {**getattr(settings, 'SOLICITACOES', {}), 'CACHE_RESPOSTAS_TIMEOUT': 0}
+
+        resultado = {
+            'commit': commit_atual(),
+            'banco': connection.vendor,
+            'linhas': linhas,
+            'repeticoes': options['repeticoes'],
+            'cenarios': {},
+        }
+        # As transições são desfeitas ao final: o banco pode ser reutilizado
+        with override_settings(**configuracoes), transaction.atomic():
+            cliente = Client(HTTP_ACCEPT='application/json')
+            for nome in escolhidos:
+                resultado['cenarios'][nome] = self.medir(cliente, todos[nome], options)
+            transaction.set_rollback(True)
+
+        if options['comparar']:
+            resultado['comparacao'] = self.comparar(resultado, options['comparar'])
+        texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if options['saida']:
+            Path(options['saida']).write_text(texto + '\n')
+        self.stdout.write(texto)
+
+    def medir(self, cliente, requisicao, options):
+        tempos, consultas = [], []
+        contador = [0]
+
+        def contar(execute, sql, params, many, context):
+            contador[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(contar):
+            for indice in range(options['aquecimento'] + options['repeticoes']):
+                metodo, caminho = requisicao()
+                contador[0] = 0
+                inicio = time.perf_counter()
+                response = getattr(cliente, metodo)(caminho)
+                decorrido = (time.perf_counter() - inicio) * 1000
+                if response.status_code >= 400:
+                    raise CommandError(f'{metodo.upper()} {caminho} respondeu {response.status_code}')
+                if indice >= options['aquecimento']:
+                    tempos.append(decorrido)
+                    consultas.append(contador[0])
+        return resumir(tempos, consultas)
+
+    @staticmethod
+    def comparar(resultado, caminho):
+        """
+        Razão (atual / anterior) do p50, do p95 e das consultas por chamada de cada cenário
+        """
+        anterior = json.loads(Path(caminho).read_text())
+        comparacao = {'commit_anterior': anterior.get('commit')}
+        for nome, atual in resultado['cenarios'].items():
+            base = anterior.get('cenarios', {}).get(nome)
+            if not base:
+                continue
+            comparacao[nome] = {
+                metrica: round(atual[metrica] / base[metrica], 2) if base[metrica] else None
+                for metrica in ['p50_ms', 'p95_ms', 'consultas_por_chamada']
+            }
+        return comparacao
@@ -0,0 +1,36 @@
+"""
+Comando para consultar e invalidar o cache de respostas
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from solicitations import cache
+
+
+class Command(BaseCommand):
+    help = 'Mostra a geração e os acertos/falhas do cache de respostas da API de solicitações'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--invalidar',
+            action='store_true',
+            help='Incrementa a geração, descartando todas as respostas em cache',
+        )
+        parser.add_argument(
+            '--zerar',
+            action='store_true',
+            help='Zera os contadores de acertos e falhas',
+        )
+
+    def handle(self, *args, **options):
+        if options['invalidar']:
+            cache.incrementar_geracao()
+        if options['zerar']:
+            cache.zerar_contadores()
+
+        contadores = cache.contadores()
+        total = contadores['acertos'] + contadores['falhas']
+        contadores['taxa_acertos'] = round(contadores['acertos'] / total, 4) if total else None
+        self.stdout.write(json.dumps(contadores))
@@ -0,0 +1,68 @@
+"""
+Comando (processo de entrega) que envia os webhooks da fila de saída
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from solicitations.conf import configuracao
+from solicitations.webhooks import Entregador
+
+
+class Command(BaseCommand):
+    help = (
+        'Envia as entregas pendentes de webhooks (RequestWebhookEntrega) em lotes, com '
+        'novas tentativas e espera exponencial. Rode em um processo separado do servidor; '
+        'vários processos podem rodar ao mesmo tempo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Envia as entregas vencidas até esvaziar a fila e termina',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            help='Segundos de espera quando a fila está vazia (padrão: WEBHOOKS_INTERVALO_SEGUNDOS)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            help='Entregas reservadas por vez (padrão: WEBHOOKS_TAMANHO_LOTE)',
+        )
+        parser.add_argument(
+            '--concorrencia',
+            type=int,
+            help='Requisições simultâneas no total (padrão: WEBHOOKS_CONCORRENCIA)',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+        if intervalo is None:
+            intervalo = configuracao('WEBHOOKS_INTERVALO_SEGUNDOS')
+        if intervalo < 0 or (options['lote'] is not None and options['lote'] < 1) or (
+            options['concorrencia'] is not None and options['concorrencia'] < 1
+        ):
+            raise CommandError('--intervalo não pode ser negativo; --lote e --concorrencia devem ser positivos.')
+
+        entregador = Entregador(tamanho_lote=options['lote'], concorrencia=options['concorrencia'])
+        total = {'entregues': 0, 'reagendadas': 0, 'falhas': 0}
+        try:
+            while True:
+                resultado = entregador.executar_lote()
+                if any(resultado.values()):
+                    for chave, quantidade in resultado.items():
+                        total[chave] += quantidade
+                    if not options['uma_vez']:
+                        self.stdout.write(json.dumps(resultado))
+                    continue
+                if options['uma_vez']:
+                    break
+                time.sleep(intervalo)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(json.dumps(total))
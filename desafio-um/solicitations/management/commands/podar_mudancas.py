@@ -0,0 +1,35 @@
+"""
+Comando para remover as mudanças antigas do log de mudanças
+"""
+
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from solicitations.conf import configuracao
+from solicitations.models import RequestMudanca
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove do log de mudanças (GET /solicitacoes/mudancas/) as mudanças com mais de N dias. '
+        'Clientes com tokens anteriores passam a receber 410 e precisam de uma carga completa.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            help='Dias de mudanças mantidos no log (padrão: MUDANCAS_RETENCAO_DIAS)',
+        )
+
+    def handle(self, *args, **options):
+        dias = options['dias'] if options['dias'] is not None else configuracao('MUDANCAS_RETENCAO_DIAS')
+        if dias < 0:
+            raise CommandError('--dias não pode ser negativo.')
+
+        antes_de = timezone.now() - timedelta(days=dias)
+        removidas = RequestMudanca.objects.podar(antes_de)
+        self.stdout.write(json.dumps({'removidas': removidas, 'antes_de': antes_de.isoformat()}))
@@ -0,0 +1,35 @@
+"""
+Comando para reconstruir ou verificar o resumo de solicitações
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from solicitations.models import RequestSummary
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o resumo por tipo/status usado pelo endpoint de estatísticas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Apenas compara o resumo mantido com o calculado, sem alterá-lo',
+        )
+
+    def handle(self, *args, **options):
+        if options['verificar']:
+            divergencias = RequestSummary.objects.divergencias()
+            if not divergencias:
+                self.stdout.write(self.style.SUCCESS('Resumo consistente com as solicitações.'))
+                return
+            for (tipo, status, arquivada), (atual, esperado) in sorted(divergencias.items()):
+                arquivadas = ' (arquivadas)' if arquivada else ''
+                self.stdout.write(
+                    f'{tipo}/{status}{arquivadas}: mantido={atual[0]} (R$ {atual[1]}), '
+                    f'calculado={esperado[0]} (R$ {esperado[1]})'
+                )
+            raise CommandError(f'{len(divergencias)} divergência(s) encontrada(s) no resumo.')
+
+        RequestSummary.objects.recalcular()
+        self.stdout.write(self.style.SUCCESS('Resumo de solicitações reconstruído.'))
@@ -0,0 +1,42 @@
+"""
+Comando para reconstruir (backfill) ou verificar as séries temporais de solicitações
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from solicitations.models import RequestSerie
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói as séries por dia/semana/mês, tipo e status usadas pelo endpoint '
+        'estatisticas/serie/, a partir das solicitações e do arquivo'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Apenas compara as séries mantidas com as calculadas, sem alterá-las',
+        )
+
+    def handle(self, *args, **options):
+        if options['verificar']:
+            divergencias = RequestSerie.objects.divergencias()
+            if not divergencias:
+                self.stdout.write(self.style.SUCCESS('Séries consistentes com as solicitações.'))
+                return
+            for (granularidade, inicio, tipo, status), (atual, esperado) in sorted(divergencias.items()):
+                self.stdout.write(
+                    f'{granularidade} {inicio:%Y-%m-%d} {tipo}/{status}: '
+                    f'mantido={atual[0]} (R$ {atual[2]}), calculado={esperado[0]} (R$ {esperado[2]})'
+                )
+            raise CommandError(f'{len(divergencias)} divergência(s) encontrada(s) nas séries.')
+
+        inicio = time.perf_counter()
+        linhas = RequestSerie.objects.recalcular()
+        self.stdout.write(self.style.SUCCESS(
+            f'Séries reconstruídas: {linhas} linha(s) em {time.perf_counter() - inicio:.1f}s.'
+        ))
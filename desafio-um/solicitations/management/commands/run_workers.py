@@ -0,0 +1,86 @@
+"""
+Comando que mantém os processos que executam os relatórios em segundo plano
+"""
+
+import json
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from solicitations.conf import configuracao
+from solicitations.relatorios import Trabalhador, trabalhar
+
+
+class Command(BaseCommand):
+    help = (
+        'Executa os relatórios pedidos em POST /api/v1/relatorios/ em N processos, '
+        'gravando os resultados em MEDIA_ROOT. Processos que terminam inesperadamente '
+        'são substituídos; SIGTERM ou Ctrl+C encerram todos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help='Número de processos (padrão: RELATORIOS_CONCORRENCIA)',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            help='Segundos de espera de cada processo com a fila vazia (padrão: RELATORIOS_INTERVALO_SEGUNDOS)',
+        )
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Executa os relatórios pendentes neste processo, sem criar outros, e termina',
+        )
+
+    def handle(self, *args, **options):
+        concorrencia = options['concurrency']
+        if concorrencia is None:
+            concorrencia = configuracao('RELATORIOS_CONCORRENCIA')
+        intervalo = options['intervalo']
+        if intervalo is None:
+            intervalo = configuracao('RELATORIOS_INTERVALO_SEGUNDOS')
+        if concorrencia < 1 or intervalo < 0:
+            raise CommandError('--concurrency deve ser positivo e --intervalo não pode ser negativo.')
+
+        if options['uma_vez']:
+            trabalhador = Trabalhador()
+            executados = 0
+            while trabalhador.executar_proximo():
+                executados += 1
+            self.stdout.write(json.dumps({'executados': executados}))
+            return
+
+        # Os filhos são criados com fork: cada um deve abrir as próprias conexões
+        connections.close_all()
+        contexto = multiprocessing.get_context('fork')
+        processos = [None] * concorrencia
+        signal.signal(signal.SIGTERM, self.encerrar)
+        self.stdout.write(f'Iniciando {concorrencia} processo(s) de relatórios.')
+        try:
+            while True:
+                for indice, processo in enumerate(processos):
+                    if processo is not None and processo.is_alive():
+                        continue
+                    if processo is not None:
+                        self.stderr.write(f'Processo {processo.pid} terminou (código {processo.exitcode}); substituindo.')
+                    processos[indice] = contexto.Process(target=trabalhar, args=(intervalo,), daemon=True)
+                    processos[indice].start()
+                time.sleep(1)
+        except (KeyboardInterrupt, SystemExit):
+            for processo in processos:
+                if processo is not None:
+                    processo.terminate()
+            for processo in processos:
+                if processo is not None:
+                    processo.join()
+            self.stdout.write('Processos de relatórios encerrados.')
+
+    @staticmethod
+    def encerrar(signum, frame):
+        raise SystemExit(0)
@@ -0,0 +1,65 @@
+"""
+Comando para popular o banco com solicitações sintéticas
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from solicitations.apps import analisar_tabelas
+from solicitations.models import Request
+from solicitations.sinteticos import GeradorSolicitacoes, datas_explicitas
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera solicitações sintéticas com distribuições realistas (tipos, status, '
+        'solicitantes, datas e valores) via bulk_create, para testes de carga'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--linhas', '--rows',
+            dest='linhas',
+            type=int,
+            default=100000,
+            help='Quantidade de solicitações a criar (padrão: 100000)',
+        )
+        parser.add_argument('--semente', type=int, default=42, help='Semente do gerador (padrão: 42)')
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=730,
+            help='Período, em dias até hoje, das datas de criação (padrão: 730)',
+        )
+        parser.add_argument('--lote', type=int, default=5000, help='Linhas por INSERT (padrão: 5000)')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Alias do banco (padrão: default)')
+
+    def handle(self, *args, **options):
+        linhas, lote = options['linhas'], options['lote']
+        if linhas < 1 or lote < 1:
+            raise CommandError('--linhas e --lote devem ser positivos.')
+
+        gerador = GeradorSolicitacoes(semente=options['semente'], dias=options['dias'])
+        gerenciador = Request.objects.db_manager(options['database'])
+        inicio = time.perf_counter()
+        criadas = 0
+        with datas_explicitas():
+            while criadas < linhas:
+                solicitacoes = gerador.lote(min(lote, linhas - criadas))
+                gerenciador.criar_em_massa(solicitacoes, tamanho_lote=lote)
+                criadas += len(solicitacoes)
+                if options['verbosity'] > 1:
+                    self.stderr.write(f'{criadas}/{linhas}')
+        # Estatísticas do planejador atualizadas para o novo volume
+        analisar_tabelas(None, using=options['database'])
+
+        decorrido = time.perf_counter() - inicio
+        self.stdout.write(json.dumps({
+            'criadas': criadas,
+            'total': gerenciador.count(),
+            'segundos': round(decorrido, 2),
+            'linhas_por_segundo': round(criadas / decorrido),
+        }))
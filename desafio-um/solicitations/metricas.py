@@ -0,0 +1,341 @@
+"""
+Métricas da API no formato texto do Prometheus (GET /metrics)
+
+Cada requisição atualiza contadores e histogramas por view e ação do
+RequestViewSet (list, create, aprovar, estatisticas, ...): número de
+requisições, erros (status 5xx), latência, consultas SQL e tamanho da
+resposta. A gravação é feita pelo InstrumentacaoMiddleware (veja
+instrumentacao.py).
+
+Os valores ficam em um arquivo mapeado em memória por processo, no diretório
+SOLICITACOES["METRICAS_DIRETORIO"]. Cada worker (ex.: do gunicorn) grava só no
+seu arquivo, sem travas entre processos, e o /metrics soma os arquivos de
+todos eles. Os arquivos de workers encerrados continuam somando, para que os
+contadores não diminuam; limpe o diretório ao reiniciar o servidor. Sem
+diretório, as métricas ficam na memória do processo.
+
+Gravar uma observação custa poucos microssegundos: as posições dos valores de
+cada combinação de rótulos são resolvidas uma vez, e o mapa de memória é
+atualizado por uma memoryview de float64, sem serialização.
+"""
+
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import weakref
+from bisect import bisect_left
+from collections import defaultdict
+
+from .conf import configuracao
+
+
+PREFIXO = 'solicitacoes_http'
+
+# Entradas: tamanho da chave (uint32), chave UTF-8 alinhada em 8 bytes, valor (float64)
+_TAMANHO = struct.Struct('<I')
+_VALOR = struct.Struct('<d')
+_CABECALHO = 8
+_TAMANHO_INICIAL = 1 << 16
+
+
+class Histograma:
+    """
+    Histograma do Prometheus. Os buckets são gravados sem acumular (uma escrita
+    por observação) e acumulados na exposição.
+    """
+
+    def __init__(self, nome, descricao, limites):
+        self.nome = nome
+        self.descricao = descricao
+        self.limites = tuple(float(limite) for limite in limites)
+
+    def chaves(self, rotulos):
+        return [
+            *(chave(f'{self.nome}_bucket', rotulos, le=formatar(limite)) for limite in self.limites),
+            chave(f'{self.nome}_bucket', rotulos, le='+Inf'),
+            chave(f'{self.nome}_sum', rotulos),
+            chave(f'{self.nome}_count', rotulos),
+        ]
+
+
+REQUISICOES = f'{PREFIXO}_requisicoes_total'
+ERROS = f'{PREFIXO}_erros_total'
+LATENCIA = Histograma(
+    f'{PREFIXO}_latencia_segundos',
+    'Latência das requisições',
+    [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+)
+CONSULTAS = Histograma(
+    f'{PREFIXO}_consultas_sql',
+    'Consultas SQL por requisição',
+    [0, 1, 2, 3, 5, 10, 20, 50, 100],
+)
+TAMANHO_RESPOSTA = Histograma(
+    f'{PREFIXO}_resposta_bytes',
+    'Tamanho do corpo das respostas',
+    [256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304],
+)
+HISTOGRAMAS = [LATENCIA, CONSULTAS, TAMANHO_RESPOSTA]
+DESCRICOES = {
+    REQUISICOES: ('counter', 'Requisições atendidas'),
+    ERROS: ('counter', 'Requisições com erro (status 5xx)'),
+    **{histograma.nome: ('histogram', histograma.descricao) for histograma in HISTOGRAMAS},
+}
+
+
+def formatar(valor):
+    return repr(float(valor))
+
+
+def chave(nome, rotulos, **extras):
+    """
+    Chave de uma série: nome + rótulos em JSON (veja exposicao())
+    """
+    return json.dumps([nome, [*rotulos, *extras.items()]], separators=(',', ':'))
+
+
+class ArquivoMetricas:
+    """
+    Valores float64 de um processo em um mapa de memória (arquivo ou anônimo)
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho
+        if caminho is None:
+            self._mapa = mmap.mmap(-1, _TAMANHO_INICIAL)
+            self._usado = _CABECALHO
+        else:
+            self._arquivo = open(caminho, 'a+b')
+            tamanho = os.fstat(self._arquivo.fileno()).st_size
+            if tamanho == 0:
+                self._arquivo.truncate(_TAMANHO_INICIAL)
+            self._mapa = mmap.mmap(self._arquivo.fileno(), max(tamanho, _TAMANHO_INICIAL))
+            self._usado = _TAMANHO.unpack_from(self._mapa, 0)[0] or _CABECALHO
+        self.posicoes = {nome: posicao // _VALOR.size for nome, _, posicao in ler_entradas(self._mapa, self._usado)}
+        _TAMANHO.pack_into(self._mapa, 0, self._usado)
+        # Os valores ficam alinhados em 8 bytes: valores[i] é o float64 na posição 8 * i
+        self.valores = memoryview(self._mapa).cast('d')
+
+    def indice(self, nome):
+        """
+        Índice em `valores` do valor da chave `nome`, criando a entrada se
+        preciso (chame com a trava do Registro)
+        """
+        indice = self.posicoes.get(nome)
+        if indice is None:
+            codificada = nome.encode('utf-8')
+            tamanho = _TAMANHO.size + len(codificada)
+            tamanho += -tamanho % 8
+            fim = self._usado + tamanho + _VALOR.size
+            if fim > len(self._mapa):
+                self._crescer(fim)
+            _TAMANHO.pack_into(self._mapa, self._usado, len(codificada))
+            self._mapa[self._usado + _TAMANHO.size:self._usado + _TAMANHO.size + len(codificada)] = codificada
+            indice = (self._usado + tamanho) // _VALOR.size
+            self.valores[indice] = 0.0
+            self._usado = fim
+            # O tamanho usado é gravado por último: leitores só veem entradas completas
+            _TAMANHO.pack_into(self._mapa, 0, self._usado)
+            self.posicoes[nome] = indice
+        return indice
+
+    def _crescer(self, minimo):
+        tamanho = len(self._mapa)
+        while tamanho < minimo:
+            tamanho *= 2
+        if self.caminho is None:
+            novo = mmap.mmap(-1, tamanho)
+            novo[:len(self._mapa)] = self._mapa[:]
+        else:
+            self._mapa.flush()
+            self._arquivo.truncate(tamanho)
+            novo = mmap.mmap(self._arquivo.fileno(), tamanho)
+        self.valores.release()
+        self._mapa.close()
+        self._mapa = novo
+        self.valores = memoryview(self._mapa).cast('d')
+
+    def entradas(self):
+        return [(nome, valor) for nome, valor, _ in ler_entradas(self._mapa, self._usado)]
+
+
+def ler_entradas(dados, usado=None):
+    """
+    Gera (chave, valor, posição do valor) das entradas gravadas em `dados`
+    """
+    if usado is None:
+        usado = _TAMANHO.unpack_from(dados, 0)[0]
+    posicao = _CABECALHO
+    while posicao < usado:
+        tamanho, = _TAMANHO.unpack_from(dados, posicao)
+        inicio = posicao + _TAMANHO.size
+        nome = bytes(dados[inicio:inicio + tamanho]).decode('utf-8')
+        posicao = inicio + tamanho + (-(_TAMANHO.size + tamanho) % 8)
+        yield nome, _VALOR.unpack_from(dados, posicao)[0], posicao
+        posicao += _VALOR.size
+
+
+class Registro:
+    """
+    Métricas do processo atual. Após um fork (workers do gunicorn com
+    --preload), o primeiro registro abre o arquivo do novo processo.
+    """
+
+    def __init__(self, diretorio=None):
+        self.diretorio = diretorio
+        self._trava = threading.Lock()
+        self._arquivo = None
+        self._series = {}
+        _registros.add(self)
+
+    def _abrir(self):
+        caminho = None
+        if self.diretorio:
+            os.makedirs(self.diretorio, exist_ok=True)
+            caminho = os.path.join(self.diretorio, f'metricas_{os.getpid()}.db')
+        self._arquivo = ArquivoMetricas(caminho)
+        self._series = {}
+
+    def _apos_fork(self):
+        self._trava = threading.Lock()
+        self._arquivo = None
+        self._series = {}
+
+    def _serie(self, rotulos):
+        """
+        Índices dos valores de uma combinação de rótulos: contador de
+        requisições e de erros e os valores de cada histograma
+        """
+        view, acao, metodo, status = rotulos
+        base = (('view', view), ('acao', acao))
+        indice = self._arquivo.indice
+        serie = (
+            indice(chave(REQUISICOES, base, metodo=metodo, status=str(status))),
+            indice(chave(ERROS, base)),
+            *([indice(nome) for nome in histograma.chaves(base)] for histograma in HISTOGRAMAS),
+        )
+        self._series[rotulos] = serie
+        return serie
+
+    def observar(self, view, acao, metodo, status, duracao, consultas, tamanho):
+        """
+        Registra uma requisição. `tamanho` None (respostas em streaming) não
+        entra no histograma de tamanho.
+        """
+        rotulos = (view, acao, metodo, status)
+        with self._trava:
+            if self._arquivo is None:
+                self._abrir()
+            requisicoes, erros, latencia, consultas_sql, tamanhos = (
+                self._series.get(rotulos) or self._serie(rotulos)
+            )
+            valores = self._arquivo.valores
+            valores[requisicoes] += 1.0
+            if status >= 500:
+                valores[erros] += 1.0
+            valores[latencia[bisect_left(LATENCIA.limites, duracao)]] += 1.0
+            valores[latencia[-2]] += duracao
+            valores[latencia[-1]] += 1.0
+            valores[consultas_sql[bisect_left(CONSULTAS.limites, consultas)]] += 1.0
+            valores[consultas_sql[-2]] += consultas
+            valores[consultas_sql[-1]] += 1.0
+            if tamanho is not None:
+                valores[tamanhos[bisect_left(TAMANHO_RESPOSTA.limites, tamanho)]] += 1.0
+                valores[tamanhos[-2]] += tamanho
+                valores[tamanhos[-1]] += 1.0
+
+    def valores(self):
+        """
+        Soma das entradas de todos os processos: {chave: valor}
+        """
+        totais = defaultdict(float)
+        if not self.diretorio:
+            with self._trava:
+                if self._arquivo is not None:
+                    for nome, valor in self._arquivo.entradas():
+                        totais[nome] += valor
+            return totais
+        for caminho in sorted(glob.glob(os.path.join(self.diretorio, 'metricas_*.db'))):
+            with open(caminho, 'rb') as arquivo:
+                dados = arquivo.read()
+            if len(dados) < _CABECALHO:
+                continue
+            for nome, valor, _ in ler_entradas(dados):
+                totais[nome] += valor
+        return totais
+
+
+_registros = weakref.WeakSet()
+_registro = None
+
+
+def _apos_fork():
+    for registro_processo in list(_registros):
+        registro_processo._apos_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_apos_fork)
+
+
+def registro():
+    global _registro
+    diretorio = configuracao('METRICAS_DIRETORIO')
+    if _registro is None or _registro.diretorio != diretorio:
+        _registro = Registro(diretorio)
+    return _registro
+
+
+def ativas():
+    return configuracao('METRICAS_ATIVAS')
+
+
+def exposicao(valores):
+    """
+    Texto no formato de exposição do Prometheus (version=0.0.4)
+    """
+    por_metrica = defaultdict(list)
+    for nome_chave, valor in valores.items():
+        nome, rotulos = json.loads(nome_chave)
+        por_metrica[nome].append((rotulos, valor))
+
+    linhas = []
+    for nome, (tipo, descricao) in DESCRICOES.items():
+        if tipo == 'histogram':
+            series = [(f'{nome}_bucket', *item) for item in _acumular(por_metrica[f'{nome}_bucket'])]
+            series += [(f'{nome}_sum', *item) for item in por_metrica[f'{nome}_sum']]
+            series += [(f'{nome}_count', *item) for item in por_metrica[f'{nome}_count']]
+        else:
+            series = [(nome, *item) for item in por_metrica[nome]]
+        if not series:
+            continue
+        linhas.append(f'# HELP {nome} {descricao}')
+        linhas.append(f'# TYPE {nome} {tipo}')
+        for nome_serie, rotulos, valor in series:
+            texto_rotulos = ','.join(f'{rotulo}="{_escapar(valor_rotulo)}"' for rotulo, valor_rotulo in rotulos)
+            linhas.append(f'{nome_serie}{{{texto_rotulos}}} {formatar(valor)}')
+    return '\n'.join(linhas) + '\n'
+
+
+def _acumular(buckets):
+    """
+    Converte os buckets gravados (contagem por faixa) em cumulativos, por série
+    """
+    por_serie = defaultdict(list)
+    for rotulos, valor in buckets:
+        *base, (_, le) = rotulos
+        por_serie[tuple(map(tuple, base))].append((float(le), le, valor))
+    resultado = []
+    for base, faixas in sorted(por_serie.items()):
+        acumulado = 0.0
+        for _, le, valor in sorted(faixas):
+            acumulado += valor
+            resultado.append(([*base, ('le', le)], acumulado))
+    return resultado
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-16 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='request',
+            name='solicitatio_data_cr_d4b838_idx',
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['-data_criacao', '-id'], name='solicitatio_data_cr_9a880f_idx'),
+        ),
+    ]
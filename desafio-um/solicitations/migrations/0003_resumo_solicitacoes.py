@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-16 10:03
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def popular_resumo(apps, schema_editor):
+    """
+    Preenche o resumo com as solicitações já existentes
+    """
+    Request = apps.get_model('solicitations', 'Request')
+    RequestSummary = apps.get_model('solicitations', 'RequestSummary')
+    
+    tipos = [choice[0] for choice in Request._meta.get_field('tipo').choices]
+    todos_status = [choice[0] for choice in Request._meta.get_field('status').choices]
+    resumo = {(tipo, status): (0, 0) for tipo in tipos for status in todos_status}
+    
+    agregados = (
+        Request.objects.order_by()
+        .values_list('tipo', 'status')
+        .annotate(quantidade=Count('id'), valor_total=Sum('valor'))
+    )
+    for tipo, status, quantidade, valor_total in agregados:
+        resumo[(tipo, status)] = (quantidade, valor_total or 0)
+    
+    RequestSummary.objects.bulk_create([
+        RequestSummary(tipo=tipo, status=status, quantidade=quantidade, valor_total=valor_total)
+        for (tipo, status), (quantidade, valor_total) in resumo.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitations', '0002_indice_data_criacao_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('ferias', 'Férias'), ('reembolso', 'Reembolso'), ('treinamento', 'Treinamento')], max_length=20, verbose_name='Tipo de Solicitação')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('em_analise', 'Em Análise'), ('aprovado', 'Aprovado'), ('rejeitado', 'Rejeitado'), ('cancelado', 'Cancelado')], max_length=20, verbose_name='Status')),
+                ('quantidade', models.BigIntegerField(default=0, verbose_name='Quantidade')),
+                ('valor_total', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Valor Total')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Solicitações',
+                'verbose_name_plural': 'Resumos de Solicitações',
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'status'), name='resumo_tipo_status_unico')],
+            },
+        ),
+        migrations.RunPython(popular_resumo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-16 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from solicitations import busca
+
+
+def instalar_busca(apps, schema_editor):
+    busca.instalar(schema_editor.connection)
+
+
+def remover_busca(apps, schema_editor):
+    busca.remover(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitations', '0003_resumo_solicitacoes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestIndiceBusca',
+            fields=[
+                ('solicitacao', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='indice_busca', serialize=False, to='solicitations.request')),
+                ('documento', busca.ColunaFTS5(db_column='solicitations_request_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'solicitations_request_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(instalar_busca, remover_busca),
+    ]
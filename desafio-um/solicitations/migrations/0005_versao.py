@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-16 22:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitations', '0004_busca_textual'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='request',
+            name='versao',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Incrementada a cada alteração (usada com If-Match)', verbose_name='Versão'),
+        ),
+    ]
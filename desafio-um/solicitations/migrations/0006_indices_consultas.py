@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-16 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitations', '0005_versao'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='request',
+            name='solicitatio_tipo_d137db_idx',
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['tipo', 'status', 'valor'], name='solicitacao_tipo_st_valor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['status', '-data_criacao', '-id'], name='solicitacao_status_criacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(condition=models.Q(('status__in', ['pendente', 'em_analise'])), fields=['-data_criacao', '-id'], name='solicitacao_abertas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['status', 'valor'], name='solicitacao_status_valor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['data_inicio'], name='solicitacao_inicio_idx'),
+        ),
+    ]
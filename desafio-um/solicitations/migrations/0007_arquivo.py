@@ -0,0 +1,62 @@
+# Generated by Django 6.0 on 2026-10-16 23:05
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitations', '0006_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestArquivada',
+            fields=[
+                ('tipo', models.CharField(choices=[('ferias', 'Férias'), ('reembolso', 'Reembolso'), ('treinamento', 'Treinamento')], help_text='Tipo da solicitação: férias, reembolso ou treinamento', max_length=20, verbose_name='Tipo de Solicitação')),
+                ('titulo', models.CharField(help_text='Título descritivo da solicitação', max_length=200, verbose_name='Título')),
+                ('descricao', models.TextField(help_text='Descrição detalhada da solicitação', verbose_name='Descrição')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('em_analise', 'Em Análise'), ('aprovado', 'Aprovado'), ('rejeitado', 'Rejeitado'), ('cancelado', 'Cancelado')], default='pendente', help_text='Status atual da solicitação', max_length=20, verbose_name='Status')),
+                ('valor', models.DecimalField(blank=True, decimal_places=2, help_text='Valor monetário (obrigatório para reembolsos e treinamentos)', max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(0.01)], verbose_name='Valor')),
+                ('data_inicio', models.DateField(blank=True, help_text='Data de início (obrigatório para férias e treinamentos)', null=True, verbose_name='Data de Início')),
+                ('data_fim', models.DateField(blank=True, help_text='Data de término (obrigatório para férias e treinamentos)', null=True, verbose_name='Data de Término')),
+                ('solicitante', models.CharField(help_text='Nome do colaborador solicitante', max_length=200, verbose_name='Solicitante')),
+                ('observacoes', models.TextField(blank=True, help_text='Observações adicionais ou motivo de rejeição', verbose_name='Observações')),
+                ('versao', models.PositiveIntegerField(default=1, editable=False, help_text='Incrementada a cada alteração (usada com If-Match)', verbose_name='Versão')),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_criacao', models.DateTimeField(verbose_name='Data de Criação')),
+                ('data_atualizacao', models.DateTimeField(verbose_name='Data de Atualização')),
+            ],
+            options={
+                'verbose_name': 'Solicitação Arquivada',
+                'verbose_name_plural': 'Solicitações Arquivadas',
+                'ordering': ['-data_criacao'],
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='requestsummary',
+            name='resumo_tipo_status_unico',
+        ),
+        migrations.AddField(
+            model_name='requestsummary',
+            name='arquivada',
+            field=models.BooleanField(default=False, verbose_name='Arquivadas'),
+        ),
+        migrations.AddConstraint(
+            model_name='requestsummary',
+            constraint=models.UniqueConstraint(fields=('tipo', 'status', 'arquivada'), name='resumo_tipo_status_arquivada_unico'),
+        ),
+        migrations.AddIndex(
+            model_name='requestarquivada',
+            index=models.Index(fields=['-data_criacao', '-id'], name='arquivada_criacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestarquivada',
+            index=models.Index(fields=['tipo', 'status', 'valor'], name='arquivada_tipo_st_valor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestarquivada',
+            index=models.Index(fields=['solicitante'], name='arquivada_solicitante_idx'),
+        ),
+    ]
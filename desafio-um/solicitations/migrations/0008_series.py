@@ -0,0 +1,68 @@
+# Generated by Django 6.0 on 2026-10-16 23:40
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+from solicitations.series import Acumulado, periodos, somar_histogramas
+
+
+def popular_series(apps, schema_editor):
+    """
+    Preenche as séries com as solicitações (e as arquivadas) já existentes
+    """
+    RequestSerie = apps.get_model('solicitations', 'RequestSerie')
+    acumulados = defaultdict(Acumulado)
+    for nome in ['Request', 'RequestArquivada']:
+        linhas = apps.get_model('solicitations', nome).objects.order_by().values_list(
+            'data_criacao', 'tipo', 'status', 'valor'
+        )
+        for data_criacao, tipo, status, valor in linhas.iterator(chunk_size=5000):
+            for granularidade, inicio in periodos(data_criacao):
+                acumulados[(granularidade, inicio, tipo, status)].adicionar(valor)
+    RequestSerie.objects.bulk_create(
+        [
+            RequestSerie(
+                granularidade=granularidade,
+                inicio=inicio,
+                tipo=tipo,
+                status=status,
+                quantidade=acumulado.quantidade,
+                quantidade_valor=acumulado.quantidade_valor,
+                valor_total=acumulado.valor_total,
+                histograma=somar_histogramas({}, acumulado.histograma),
+            )
+            for (granularidade, inicio, tipo, status), acumulado in acumulados.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitations', '0007_arquivo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestSerie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularidade', models.CharField(choices=[('dia', 'Dia'), ('semana', 'Semana'), ('mes', 'Mês')], max_length=10, verbose_name='Granularidade')),
+                ('inicio', models.DateField(help_text='Primeiro dia do período (semanas começam na segunda-feira)', verbose_name='Início do Período')),
+                ('tipo', models.CharField(choices=[('ferias', 'Férias'), ('reembolso', 'Reembolso'), ('treinamento', 'Treinamento')], max_length=20, verbose_name='Tipo de Solicitação')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('em_analise', 'Em Análise'), ('aprovado', 'Aprovado'), ('rejeitado', 'Rejeitado'), ('cancelado', 'Cancelado')], max_length=20, verbose_name='Status')),
+                ('quantidade', models.BigIntegerField(default=0, verbose_name='Quantidade')),
+                ('quantidade_valor', models.BigIntegerField(default=0, verbose_name='Quantidade com Valor')),
+                ('valor_total', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Valor Total')),
+                ('histograma', models.JSONField(default=dict, help_text='Quantidade de valores por faixa logarítmica (veja solicitations/series.py)', verbose_name='Histograma dos Valores')),
+            ],
+            options={
+                'verbose_name': 'Série de Solicitações',
+                'verbose_name_plural': 'Séries de Solicitações',
+                'constraints': [models.UniqueConstraint(fields=('granularidade', 'inicio', 'tipo', 'status'), name='serie_periodo_tipo_status_unico')],
+            },
+        ),
+        migrations.RunPython(popular_series, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-17 00:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitations', '0008_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestMudanca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('solicitacao_id', models.BigIntegerField(verbose_name='Solicitação')),
+                ('operacao', models.CharField(choices=[('criacao', 'Criação'), ('atualizacao', 'Atualização'), ('transicao', 'Transição'), ('exclusao', 'Exclusão')], max_length=20, verbose_name='Operação')),
+                ('data', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Data')),
+            ],
+            options={
+                'verbose_name': 'Mudança de Solicitação',
+                'verbose_name_plural': 'Mudanças de Solicitações',
+                'indexes': [models.Index(fields=['data'], name='mudanca_data_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-17 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitations', '0009_log_mudancas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestmudanca',
+            name='status',
+            field=models.CharField(choices=[('pendente', 'Pendente'), ('em_analise', 'Em Análise'), ('aprovado', 'Aprovado'), ('rejeitado', 'Rejeitado'), ('cancelado', 'Cancelado')], max_length=20, null=True, verbose_name='Status'),
+        ),
+        migrations.AddField(
+            model_name='requestmudanca',
+            name='status_anterior',
+            field=models.CharField(choices=[('pendente', 'Pendente'), ('em_analise', 'Em Análise'), ('aprovado', 'Aprovado'), ('rejeitado', 'Rejeitado'), ('cancelado', 'Cancelado')], max_length=20, null=True, verbose_name='Status Anterior'),
+        ),
+        migrations.AddField(
+            model_name='requestmudanca',
+            name='tipo',
+            field=models.CharField(choices=[('ferias', 'Férias'), ('reembolso', 'Reembolso'), ('treinamento', 'Treinamento')], max_length=20, null=True, verbose_name='Tipo de Solicitação'),
+        ),
+    ]
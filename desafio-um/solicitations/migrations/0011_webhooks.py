@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-17 02:05
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitations', '0010_eventos_mudancas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestWebhook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, verbose_name='Nome')),
+                ('url', models.URLField(max_length=500, verbose_name='URL')),
+                ('tipos', models.JSONField(blank=True, default=list, help_text='Tipos de solicitação notificados (vazio: todos)', verbose_name='Tipos')),
+                ('status', models.JSONField(blank=True, default=list, help_text='Status que disparam a notificação, ex.: ["aprovado"] (vazio: todos)', verbose_name='Status de destino')),
+                ('segredo', models.CharField(blank=True, help_text='Chave da assinatura HMAC-SHA256 enviada em X-Webhook-Assinatura', max_length=200, verbose_name='Segredo')),
+                ('concorrencia_maxima', models.PositiveSmallIntegerField(default=2, help_text='Requisições simultâneas para esta URL em cada processo de entrega', validators=[django.core.validators.MinValueValidator(1)], verbose_name='Concorrência máxima')),
+                ('ativo', models.BooleanField(default=True, verbose_name='Ativo')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+            ],
+            options={
+                'verbose_name': 'Webhook',
+                'verbose_name_plural': 'Webhooks',
+                'ordering': ['nome'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RequestWebhookEntrega',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('solicitacao_id', models.BigIntegerField(verbose_name='Solicitação')),
+                ('payload', models.JSONField(verbose_name='Payload')),
+                ('situacao', models.CharField(choices=[('pendente', 'Pendente'), ('entregue', 'Entregue'), ('falha', 'Falha')], default='pendente', max_length=20, verbose_name='Situação')),
+                ('tentativas', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('proxima_tentativa', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próxima Tentativa')),
+                ('reserva', models.CharField(blank=True, max_length=64, verbose_name='Reserva')),
+                ('reservada_ate', models.DateTimeField(blank=True, null=True, verbose_name='Reservada Até')),
+                ('ultimo_erro', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_entrega', models.DateTimeField(blank=True, null=True, verbose_name='Data de Entrega')),
+                ('webhook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entregas', to='solicitations.requestwebhook', verbose_name='Webhook')),
+            ],
+            options={
+                'verbose_name': 'Entrega de Webhook',
+                'verbose_name_plural': 'Entregas de Webhooks',
+                'indexes': [models.Index(fields=['situacao', 'proxima_tentativa'], name='entrega_pendentes_idx')],
+            },
+        ),
+    ]
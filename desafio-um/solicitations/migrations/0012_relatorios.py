@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitations', '0011_webhooks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestRelatorio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('exportacao', 'Exportação'), ('estatisticas', 'Estatísticas'), ('estatisticas_serie', 'Série temporal')], max_length=20, verbose_name='Tipo de Relatório')),
+                ('formato', models.CharField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON'), ('json', 'JSON')], max_length=10, verbose_name='Formato')),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parâmetros')),
+                ('situacao', models.CharField(choices=[('pendente', 'Pendente'), ('executando', 'Executando'), ('concluido', 'Concluído'), ('erro', 'Erro')], default='pendente', max_length=20, verbose_name='Situação')),
+                ('progresso', models.PositiveSmallIntegerField(default=0, verbose_name='Progresso (%)')),
+                ('linhas_processadas', models.PositiveIntegerField(default=0, verbose_name='Linhas Processadas')),
+                ('linhas_total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Total de Linhas')),
+                ('arquivo', models.FileField(blank=True, upload_to='relatorios/%Y/%m/', verbose_name='Arquivo')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('reserva', models.CharField(blank=True, max_length=64, verbose_name='Reserva')),
+                ('reservada_ate', models.DateTimeField(blank=True, null=True, verbose_name='Reservado Até')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Data de Início')),
+                ('data_conclusao', models.DateTimeField(blank=True, null=True, verbose_name='Data de Conclusão')),
+            ],
+            options={
+                'verbose_name': 'Relatório',
+                'verbose_name_plural': 'Relatórios',
+                'indexes': [models.Index(fields=['situacao', 'id'], name='relatorio_situacao_idx')],
+            },
+        ),
+    ]
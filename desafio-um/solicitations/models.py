@@ -2,15 +2,331 @@
 Models for the solicitations app
 """
 
-from django.db import models
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import DatabaseError, connections, models, transaction
+from django.db.models import Count, F, Func, IntegerField, Max, Min, Q, Sum, Value
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 
+from .busca import ColunaFTS5, TABELA_FTS
+from .cache import incrementar_geracao
+from .series import GRANULARIDADES, Acumulado, inicio_periodo, percentis, periodos, somar_histogramas
+from .signals import (
+    CAMPOS_ESTADO,
+    OPERACAO_ATUALIZACAO,
+    OPERACAO_CRIACAO,
+    OPERACAO_EXCLUSAO,
+    OPERACAO_TRANSICAO,
+    Alteracao,
+    Estado,
+    solicitacoes_alteradas,
+)
+
 
-class Request(models.Model):
+class ConflitoDeVersao(Exception):
     """
-    Modelo para representar solicitações internas da empresa.
-    Suporta diferentes tipos de solicitações como férias, reembolsos e treinamentos.
+    A solicitação foi alterada por outra escrita depois de ter sido lida
+    """
+
+
+def _estatisticas_vazias():
+    return {
+        'total': 0,
+        'por_tipo': {},
+        'por_status': {},
+        'valor_total_aprovado': 0.0,
+    }
+
+
+class DuracaoDias(Func):
+    """
+    Duração em dias (data_fim - data_inicio + 1) calculada no banco.
+    É nula quando alguma das datas é nula, como Request.duracao_dias.
+    """
+    arg_joiner = ' - '
+    template = '(%(expressions)s) + 1'
+    output_field = IntegerField()
+    
+    def __init__(self, inicio, fim, **extra):
+        super().__init__(fim, inicio, **extra)
+    
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Datas ficam como texto no SQLite: a diferença vem de julianday()
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER) + 1',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+    
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='DATEDIFF(%(expressions)s) + 1',
+            arg_joiner=', ',
+            **extra_context
+        )
+
+
+class SolicitacaoQuerySet(models.QuerySet):
+    """
+    QuerySet com as estatísticas, comum às solicitações e ao arquivo
+    """
+    
+    def estatisticas(self, *outros):
+        """
+        Calcula as estatísticas do queryset em uma única passada,
+        usando agregação condicional em vez de um GROUP BY por dimensão.
+        
+        `outros` são querysets somados ao resultado (ex.: as solicitações
+        arquivadas que atendem aos mesmos filtros): cada um vira uma linha
+        de agregados em um UNION ALL, ainda em uma única consulta.
+        """
+        if not outros:
+            return self._montar_estatisticas(self.order_by().aggregate(**self._agregados_estatisticas()))
+        return self._montar_estatisticas(self._somar(list(self._linhas_estatisticas(outros))))
+    
+    async def aestatisticas(self, *outros):
+        """
+        Versão assíncrona de estatisticas()
+        """
+        if not outros:
+            return self._montar_estatisticas(await self.order_by().aaggregate(**self._agregados_estatisticas()))
+        return self._montar_estatisticas(self._somar([linha async for linha in self._linhas_estatisticas(outros)]))
+    
+    def _linhas_estatisticas(self, outros):
+        agregados = self._agregados_estatisticas()
+        # values() de uma constante + anotações agregadas: uma linha por queryset
+        linhas = [
+            queryset.order_by().annotate(parte=Value(1)).values('parte').annotate(**agregados)
+            for queryset in (self, *outros)
+        ]
+        return linhas[0].union(*linhas[1:], all=True)
+    
+    @staticmethod
+    def _somar(resultados):
+        return {chave: sum(resultado[chave] or 0 for resultado in resultados) for chave in resultados[0]}
+    
+    @staticmethod
+    def _agregados_estatisticas():
+        agregados = {
+            'total': Count('id'),
+            'valor_total_aprovado': Sum('valor', filter=Q(status=Request.STATUS_APROVADO)),
+        }
+        for tipo, _ in Request.TIPO_CHOICES:
+            agregados[f'tipo__{tipo}'] = Count('id', filter=Q(tipo=tipo))
+        for status, _ in Request.STATUS_CHOICES:
+            agregados[f'status__{status}'] = Count('id', filter=Q(status=status))
+        return agregados
+    
+    @staticmethod
+    def _montar_estatisticas(resultado):
+        estatisticas = _estatisticas_vazias()
+        estatisticas['total'] = resultado['total']
+        estatisticas['valor_total_aprovado'] = float(resultado['valor_total_aprovado'] or 0)
+        for tipo, _ in sorted(Request.TIPO_CHOICES):
+            if resultado[f'tipo__{tipo}']:
+                estatisticas['por_tipo'][tipo] = resultado[f'tipo__{tipo}']
+        for status, _ in sorted(Request.STATUS_CHOICES):
+            if resultado[f'status__{status}']:
+                estatisticas['por_status'][status] = resultado[f'status__{status}']
+        return estatisticas
+
+
+class RequestQuerySet(SolicitacaoQuerySet):
+    """
+    QuerySet de solicitações com operações em conjunto
+    """
+    
+    def delete(self):
+        """
+        Exclui as solicitações notificando as estruturas derivadas
+        """
+        with transaction.atomic(using=self.db):
+            estados = list(self.values_list('pk', *CAMPOS_ESTADO))
+            resultado = super().delete()
+            solicitacoes_alteradas.send(
+                sender=self.model,
+                alteracoes=[
+                    Alteracao(OPERACAO_EXCLUSAO, pk, Estado(*estado), None)
+                    for pk, *estado in estados
+                ],
+            )
+        return resultado
+    
+    delete.alters_data = True
+    delete.queryset_only = True
+    
+    def criar_em_massa(self, solicitacoes, tamanho_lote=None):
+        """
+        Insere as solicitações (já validadas) com bulk_create em lotes,
+        dentro de uma única transação, sem passar por save()/full_clean()
+        
+        Os ids preenchidos são usados pelas estruturas derivadas e pela
+        resposta. Nos bancos em que o INSERT não devolve as linhas criadas
+        (can_return_rows_from_bulk_insert, ex.: MySQL), eles são relidos.
+        """
+        with transaction.atomic(using=self.db):
+            if connections[self.db].features.can_return_rows_from_bulk_insert:
+                criadas = self.bulk_create(solicitacoes, batch_size=tamanho_lote)
+            else:
+                criadas = self._criar_e_reler_ids(solicitacoes, tamanho_lote)
+            solicitacoes_alteradas.send(
+                sender=self.model,
+                alteracoes=[
+                    Alteracao(OPERACAO_CRIACAO, solicitacao.pk, None, solicitacao.estado)
+                    for solicitacao in criadas
+                ],
+            )
+        return criadas
+    
+    criar_em_massa.alters_data = True
+    
+    def _criar_e_reler_ids(self, solicitacoes, tamanho_lote):
+        """
+        bulk_create seguido da leitura dos ids gerados: as linhas com id
+        maior que o maior existente antes do INSERT e data de criação no
+        intervalo das deste lote, em ordem de id (a ordem de inserção).
+        Se outra transação inseriu no mesmo intervalo, as quantidades não
+        conferem e a criação é desfeita.
+        """
+        todas = self.model._base_manager.using(self.db)
+        anterior = todas.aggregate(maior=Max('pk'))['maior'] or 0
+        criadas = self.bulk_create(solicitacoes, batch_size=tamanho_lote)
+        if not criadas:
+            return criadas
+        datas = [solicitacao.data_criacao for solicitacao in criadas]
+        ids = list(
+            todas.filter(pk__gt=anterior, data_criacao__range=(min(datas), max(datas)))
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        if len(ids) != len(criadas):
+            raise DatabaseError('Não foi possível identificar os ids das solicitações criadas em massa.')
+        for solicitacao, pk in zip(criadas, ids):
+            solicitacao.pk = pk
+        return criadas
+    
+    def transicionar(self, acao, observacoes=''):
+        """
+        Aplica a transição `acao` (aprovar, rejeitar ou cancelar) a todas as
+        solicitações do queryset em que ela é permitida, com um único UPDATE
+        condicional (WHERE status IN (...)) que também grava observações e
+        data de atualização. Retorna a quantidade de solicitações alteradas.
+        """
+        status_destino, status_origem = self.model.TRANSICOES[acao]
+        valores = {
+            'status': status_destino,
+            'data_atualizacao': timezone.now(),
+            'versao': F('versao') + 1,
+        }
+        if observacoes:
+            valores['observacoes'] = observacoes
+        
+        with transaction.atomic(using=self.db):
+            elegiveis = self.filter(status__in=status_origem)
+            # Estado anterior das linhas afetadas, para as estruturas derivadas
+            estados = list(
+                elegiveis.order_by().select_for_update().values_list('pk', *CAMPOS_ESTADO)
+            )
+            if not estados:
+                return 0
+            alteradas = elegiveis.update(**valores)
+            solicitacoes_alteradas.send(
+                sender=self.model,
+                alteracoes=[
+                    Alteracao(
+                        OPERACAO_TRANSICAO,
+                        pk,
+                        Estado(*estado),
+                        Estado(*estado)._replace(status=status_destino),
+                    )
+                    for pk, *estado in estados
+                ],
+            )
+        return alteradas
+    
+    transicionar.alters_data = True
+    
+    def aprovar(self, observacoes=''):
+        """
+        Aprova em massa as solicitações aprováveis do queryset
+        """
+        return self.transicionar('aprovar', observacoes)
+    
+    def rejeitar(self, observacoes=''):
+        """
+        Rejeita em massa as solicitações do queryset que podem ser rejeitadas
+        """
+        return self.transicionar('rejeitar', observacoes)
+    
+    def cancelar(self, observacoes=''):
+        """
+        Cancela em massa as solicitações canceláveis do queryset
+        """
+        return self.transicionar('cancelar', observacoes)
+    
+    # Evita que Request.objects.aprovar() afete a tabela inteira por engano
+    aprovar.queryset_only = True
+    rejeitar.queryset_only = True
+    cancelar.queryset_only = True
+    
+    def arquivar(self, antes_de, tamanho_lote=1000, pausa=0):
+        """
+        Move as solicitações finalizadas (aprovadas, rejeitadas ou canceladas)
+        do queryset atualizadas antes de `antes_de` para o arquivo
+        (RequestArquivada), em lotes de `tamanho_lote` linhas.
+        
+        Cada lote é uma transação curta: INSERT ... SELECT no arquivo, DELETE
+        na tabela de solicitações e a transferência das contagens no resumo,
+        seguida de `pausa` segundos para não monopolizar o banco. As estruturas
+        derivadas não são notificadas (solicitacoes_alteradas): as solicitações
+        apenas mudam de tabela, com os mesmos ids. Retorna a quantidade arquivada.
+        """
+        elegiveis = self.filter(
+            status__in=self.model.STATUS_FINALIZADOS,
+            data_atualizacao__lt=antes_de,
+        ).order_by('pk')
+        connection = connections[self.db]
+        tabela = connection.ops.quote_name(self.model._meta.db_table)
+        arquivo = connection.ops.quote_name(RequestArquivada._meta.db_table)
+        colunas = ', '.join(
+            connection.ops.quote_name(campo.column) for campo in RequestArquivada._meta.concrete_fields
+        )
+        
+        arquivadas = 0
+        while True:
+            with transaction.atomic(using=self.db):
+                lote = list(elegiveis.select_for_update().values_list('pk', *CAMPOS_ESTADO)[:tamanho_lote])
+                if not lote:
+                    break
+                ids = [pk for pk, *_ in lote]
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'INSERT INTO {arquivo} ({colunas}) SELECT {colunas} FROM {tabela} '
+                        f'WHERE id IN ({", ".join(["%s"] * len(ids))})',
+                        ids,
+                    )
+                self.model._base_manager.using(self.db).filter(pk__in=ids).delete()
+                RequestSummary.objects.db_manager(self.db).arquivar([Estado(*estado) for _, *estado in lote])
+                incrementar_geracao()
+            arquivadas += len(lote)
+            if len(lote) < tamanho_lote:
+                break
+            if pausa:
+                time.sleep(pausa)
+        return arquivadas
+    
+    arquivar.alters_data = True
+
+
+class SolicitacaoBase(models.Model):
+    """
+    Campos, choices e validações de uma solicitação, compartilhados pela
+    tabela de solicitações (Request) e pelo arquivo (RequestArquivada)
     """
     
     # Choices para tipo de solicitação
@@ -39,6 +355,26 @@ class Request(models.Model):
         (STATUS_CANCELADO, 'Cancelado'),
     ]
     
+    # Status a partir dos quais cada transição é permitida
+    STATUS_APROVAVEIS = [STATUS_PENDENTE, STATUS_EM_ANALISE]
+    STATUS_CANCELAVEIS = [STATUS_PENDENTE, STATUS_EM_ANALISE]
+    # Status finais, a partir dos quais a solicitação pode ser arquivada
+    STATUS_FINALIZADOS = [STATUS_APROVADO, STATUS_REJEITADO, STATUS_CANCELADO]
+    
+    # Transições: ação -> (status de destino, status de origem permitidos)
+    TRANSICOES = {
+        'aprovar': (STATUS_APROVADO, STATUS_APROVAVEIS),
+        'rejeitar': (STATUS_REJEITADO, STATUS_APROVAVEIS),
+        'cancelar': (STATUS_CANCELADO, STATUS_CANCELAVEIS),
+    }
+    
+    # Particípio de cada ação, para as mensagens de erro
+    PARTICIPIOS = {
+        'aprovar': 'aprovada',
+        'rejeitar': 'rejeitada',
+        'cancelar': 'cancelada',
+    }
+    
     # Campos da solicitação
     tipo = models.CharField(
         max_length=20,
@@ -113,15 +449,16 @@ class Request(models.Model):
         verbose_name='Data de Atualização'
     )
     
+    # Controle de concorrência otimista: incrementada a cada escrita
+    versao = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        verbose_name='Versão',
+        help_text='Incrementada a cada alteração (usada com If-Match)'
+    )
+    
     class Meta:
-        verbose_name = 'Solicitação'
-        verbose_name_plural = 'Solicitações'
-        ordering = ['-data_criacao']
-        indexes = [
-            models.Index(fields=['tipo', 'status']),
-            models.Index(fields=['solicitante']),
-            models.Index(fields=['-data_criacao']),
-        ]
+        abstract = True
     
     def __str__(self):
         return f"{self.get_tipo_display()} - {self.titulo} ({self.get_status_display()})"
@@ -153,13 +490,6 @@ class Request(models.Model):
                     'data_fim': 'A data de término deve ser posterior à data de início.'
                 })
     
-    def save(self, *args, **kwargs):
-        """
-        Override do método save para executar validações
-        """
-        self.full_clean()
-        super().save(*args, **kwargs)
-    
     @property
     def duracao_dias(self):
         """
@@ -174,44 +504,1328 @@ class Request(models.Model):
         """
         Verifica se a solicitação pode ser cancelada
         """
-        return self.status in [self.STATUS_PENDENTE, self.STATUS_EM_ANALISE]
+        return self.status in self.STATUS_CANCELAVEIS
     
     @property
     def pode_ser_aprovada(self):
         """
         Verifica se a solicitação pode ser aprovada
         """
-        return self.status in [self.STATUS_PENDENTE, self.STATUS_EM_ANALISE]
+        return self.status in self.STATUS_APROVAVEIS
+
+
+class Request(SolicitacaoBase):
+    """
+    Modelo para representar solicitações internas da empresa.
+    Suporta diferentes tipos de solicitações como férias, reembolsos e treinamentos.
+    """
+    
+    objects = RequestQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name = 'Solicitação'
+        verbose_name_plural = 'Solicitações'
+        ordering = ['-data_criacao']
+        # Índices escolhidos pelas consultas da API (veja ConsultasCanonicasTest)
+        indexes = [
+            # tipo + status (+ faixa de valor) e o GROUP BY do resumo
+            models.Index(fields=['tipo', 'status', 'valor'], name='solicitacao_tipo_st_valor_idx'),
+            models.Index(fields=['solicitante']),
+            # Listagem padrão e paginação por cursor
+            models.Index(fields=['-data_criacao', '-id']),
+            # ?status=... na ordem padrão da listagem
+            models.Index(fields=['status', '-data_criacao', '-id'], name='solicitacao_status_criacao_idx'),
+            # Fila de solicitações em aberto (pendentes e em análise)
+            models.Index(
+                fields=['-data_criacao', '-id'],
+                condition=Q(status__in=['pendente', 'em_analise']),
+                name='solicitacao_abertas_idx',
+            ),
+            # SUM(valor) por status (ex.: total aprovado) sem ler a tabela
+            models.Index(fields=['status', 'valor'], name='solicitacao_status_valor_idx'),
+            # ?data_inicio_min / ?data_inicio_max e ?ordering=data_inicio
+            models.Index(fields=['data_inicio'], name='solicitacao_inicio_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        """
+        Override do método save para executar validações e notificar
+        as estruturas derivadas na mesma transação.
+        
+        Em uma alteração, levanta ConflitoDeVersao se a solicitação foi
+        alterada por outra escrita desde que foi lida (versões diferentes).
+        """
+        self.full_clean()
+        with transaction.atomic(using=kwargs.get('using')):
+            antes = None
+            if self.pk is not None:
+                versao, antes = self._estado_no_banco() or (None, None)
+                if antes is not None and versao != self.versao:
+                    raise ConflitoDeVersao('A solicitação foi alterada por outra requisição.')
+                if antes is not None:
+                    self.versao += 1
+                    if kwargs.get('update_fields') is not None:
+                        kwargs['update_fields'] = {*kwargs['update_fields'], 'versao'}
+            super().save(*args, **kwargs)
+            operacao = OPERACAO_CRIACAO if antes is None else OPERACAO_ATUALIZACAO
+            self._notificar(Alteracao(operacao, self.pk, antes, self.estado))
+    
+    def delete(self, *args, **kwargs):
+        """
+        Override do método delete para notificar as estruturas derivadas
+        """
+        with transaction.atomic(using=kwargs.get('using')):
+            pk = self.pk
+            _, antes = self._estado_no_banco() or (None, None)
+            resultado = super().delete(*args, **kwargs)
+            if antes is not None:
+                self._notificar(Alteracao(OPERACAO_EXCLUSAO, pk, antes, None))
+        return resultado
+    
+    @property
+    def estado(self):
+        """
+        Estado atual (em memória) acompanhado pelas estruturas derivadas
+        """
+        return Estado(*(getattr(self, campo) for campo in CAMPOS_ESTADO))
+    
+    def _estado_no_banco(self):
+        """
+        Lê (e bloqueia, quando suportado) a versão e o estado gravados da
+        solicitação. Retorna (versao, Estado) ou None se ela não existe.
+        """
+        linha = (
+            type(self)._base_manager.select_for_update()
+            .filter(pk=self.pk)
+            .values_list('versao', *CAMPOS_ESTADO)
+            .first()
+        )
+        if linha is None:
+            return None
+        versao, *estado = linha
+        return versao, Estado(*estado)
+    
+    def _notificar(self, *alteracoes):
+        solicitacoes_alteradas.send(sender=type(self), alteracoes=list(alteracoes))
+    
+    def transicionar(self, acao, observacoes=''):
+        """
+        Aplica a transição `acao` (aprovar, rejeitar ou cancelar) com um único
+        UPDATE condicional (WHERE id = ? AND versao = ? AND status IN (...)),
+        que grava apenas status, observações, data de atualização e versão.
+        
+        Levanta ValueError se o status atual não permite a transição e
+        ConflitoDeVersao se a solicitação foi alterada desde que foi lida.
+        """
+        status_destino, status_origem = self.TRANSICOES[acao]
+        if self.status not in status_origem:
+            raise ValueError(
+                f'Solicitação com status {self.get_status_display()} '
+                f'não pode ser {self.PARTICIPIOS[acao]}.'
+            )
+        
+        valores = {'status': status_destino, 'data_atualizacao': timezone.now()}
+        if observacoes:
+            valores['observacoes'] = observacoes
+        
+        with transaction.atomic(using=self._state.db):
+            alteradas = type(self)._base_manager.using(self._state.db).filter(
+                pk=self.pk,
+                versao=self.versao,
+                status__in=status_origem,
+            ).update(versao=F('versao') + 1, **valores)
+            if not alteradas:
+                raise ConflitoDeVersao('A solicitação foi alterada por outra requisição.')
+            
+            # A versão confere, então o estado em memória é o que estava gravado
+            antes = self.estado
+            for campo, valor in valores.items():
+                setattr(self, campo, valor)
+            self.versao += 1
+            self._notificar(Alteracao(OPERACAO_TRANSICAO, self.pk, antes, self.estado))
+    
+    transicionar.alters_data = True
     
     def aprovar(self, observacoes=''):
         """
         Aprova a solicitação
         """
-        if not self.pode_ser_aprovada:
-            raise ValueError(f'Solicitação com status {self.get_status_display()} não pode ser aprovada.')
-        self.status = self.STATUS_APROVADO
-        if observacoes:
-            self.observacoes = observacoes
-        self.save()
+        self.transicionar('aprovar', observacoes)
     
     def rejeitar(self, observacoes=''):
         """
         Rejeita a solicitação
         """
-        if not self.pode_ser_aprovada:
-            raise ValueError(f'Solicitação com status {self.get_status_display()} não pode ser rejeitada.')
-        self.status = self.STATUS_REJEITADO
-        if observacoes:
-            self.observacoes = observacoes
-        self.save()
+        self.transicionar('rejeitar', observacoes)
     
     def cancelar(self, observacoes=''):
         """
         Cancela a solicitação
         """
-        if not self.pode_ser_cancelada:
-            raise ValueError(f'Solicitação com status {self.get_status_display()} não pode ser cancelada.')
-        self.status = self.STATUS_CANCELADO
-        if observacoes:
-            self.observacoes = observacoes
-        self.save()
+        self.transicionar('cancelar', observacoes)
+
+
+class RequestArquivada(SolicitacaoBase):
+    """
+    Arquivo das solicitações finalizadas antigas, com as mesmas colunas (e
+    ids) de Request. Preenchido por Request.objects.arquivar(); a API só o
+    consulta com `?incluir_arquivadas=true`.
+    """
+    id = models.BigIntegerField(primary_key=True, verbose_name='ID')
+    
+    # Mantêm as datas originais da solicitação
+    data_criacao = models.DateTimeField(verbose_name='Data de Criação')
+    
+    data_atualizacao = models.DateTimeField(verbose_name='Data de Atualização')
+    
+    objects = SolicitacaoQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name = 'Solicitação Arquivada'
+        verbose_name_plural = 'Solicitações Arquivadas'
+        ordering = ['-data_criacao']
+        indexes = [
+            models.Index(fields=['-data_criacao', '-id'], name='arquivada_criacao_idx'),
+            models.Index(fields=['tipo', 'status', 'valor'], name='arquivada_tipo_st_valor_idx'),
+            models.Index(fields=['solicitante'], name='arquivada_solicitante_idx'),
+        ]
+
+
+class RequestSummaryManager(models.Manager):
+    """
+    Manager com a manutenção incremental do resumo de solicitações
+    """
+    
+    def aplicar_alteracoes(self, alteracoes, arquivada=False):
+        """
+        Aplica as variações de contagem e valor das alterações recebidas às
+        linhas da tabela de solicitações (ou do arquivo, com `arquivada`)
+        """
+        variacoes = defaultdict(lambda: [0, Decimal('0')])
+        for alteracao in alteracoes:
+            if alteracao.antes is not None:
+                variacao = variacoes[(alteracao.antes.tipo, alteracao.antes.status)]
+                variacao[0] -= 1
+                variacao[1] -= alteracao.antes.valor or 0
+            if alteracao.depois is not None:
+                variacao = variacoes[(alteracao.depois.tipo, alteracao.depois.status)]
+                variacao[0] += 1
+                variacao[1] += alteracao.depois.valor or 0
+        
+        for (tipo, status), (quantidade, valor) in variacoes.items():
+            if not quantidade and not valor:
+                continue
+            atualizadas = self.filter(tipo=tipo, status=status, arquivada=arquivada).update(
+                quantidade=F('quantidade') + quantidade,
+                valor_total=F('valor_total') + valor,
+            )
+            if not atualizadas:
+                self.create(
+                    tipo=tipo, status=status, arquivada=arquivada, quantidade=quantidade, valor_total=valor
+                )
+    
+    def arquivar(self, estados):
+        """
+        Transfere as contagens das solicitações arquivadas (seus estados) da
+        tabela de solicitações para o arquivo
+        """
+        self.aplicar_alteracoes([Alteracao(OPERACAO_EXCLUSAO, None, estado, None) for estado in estados])
+        self.aplicar_alteracoes(
+            [Alteracao(OPERACAO_CRIACAO, None, None, estado) for estado in estados],
+            arquivada=True,
+        )
+    
+    def calcular(self):
+        """
+        Calcula o resumo a partir da tabela de solicitações e do arquivo, no
+        formato {(tipo, status, arquivada): (quantidade, valor_total)}
+        """
+        resumo = {
+            (tipo, status, False): (0, Decimal('0'))
+            for tipo, _ in Request.TIPO_CHOICES
+            for status, _ in Request.STATUS_CHOICES
+        }
+        # No SQLite, SUM de decimais é feito em ponto flutuante: volta às casas do campo
+        casas = Decimal(1).scaleb(-self.model._meta.get_field('valor_total').decimal_places)
+        for arquivada, model in [(False, Request), (True, RequestArquivada)]:
+            agregados = (
+                model.objects.order_by()
+                .values_list('tipo', 'status')
+                .annotate(quantidade=Count('id'), valor_total=Sum('valor'))
+            )
+            for tipo, status, quantidade, valor_total in agregados:
+                resumo[(tipo, status, arquivada)] = (quantidade, (valor_total or Decimal('0')).quantize(casas))
+        return resumo
+    
+    def recalcular(self):
+        """
+        Reconstrói o resumo a partir da tabela de solicitações
+        """
+        with transaction.atomic(using=self.db):
+            resumo = self.calcular()
+            self.all().delete()
+            self.bulk_create([
+                self.model(
+                    tipo=tipo, status=status, arquivada=arquivada, quantidade=quantidade, valor_total=valor_total
+                )
+                for (tipo, status, arquivada), (quantidade, valor_total) in resumo.items()
+            ])
+            incrementar_geracao()
+    
+    def divergencias(self):
+        """
+        Compara o resumo mantido com o calculado e retorna as diferenças
+        no formato {(tipo, status, arquivada): (mantido, calculado)}
+        """
+        calculado = self.calcular()
+        mantido = {
+            (tipo, status, arquivada): (quantidade, valor_total)
+            for tipo, status, arquivada, quantidade, valor_total
+            in self.values_list('tipo', 'status', 'arquivada', 'quantidade', 'valor_total')
+        }
+        divergencias = {}
+        for chave in calculado.keys() | mantido.keys():
+            esperado = calculado.get(chave, (0, Decimal('0')))
+            atual = mantido.get(chave, (0, Decimal('0')))
+            if esperado != atual:
+                divergencias[chave] = (atual, esperado)
+        return divergencias
+    
+    def estatisticas(self):
+        """
+        Monta as estatísticas gerais a partir do resumo (sem varrer as
+        solicitações), somando as da tabela de solicitações e as do arquivo
+        """
+        return self._montar_estatisticas(self.values_list('tipo', 'status', 'quantidade', 'valor_total'))
+    
+    async def aestatisticas(self):
+        """
+        Versão assíncrona de estatisticas()
+        """
+        linhas = self.values_list('tipo', 'status', 'quantidade', 'valor_total')
+        return self._montar_estatisticas([linha async for linha in linhas])
+    
+    def total(self, tipo=None, status=None, arquivadas=False):
+        """
+        Quantidade de solicitações, opcionalmente restrita a listas de tipos
+        e de status, somando as linhas do resumo. Com `arquivadas`, inclui
+        as do arquivo.
+        """
+        return self._filtrar_total(tipo, status, arquivadas).aggregate(total=Sum('quantidade'))['total'] or 0
+    
+    async def atotal(self, tipo=None, status=None, arquivadas=False):
+        """
+        Versão assíncrona de total()
+        """
+        filtradas = self._filtrar_total(tipo, status, arquivadas)
+        return (await filtradas.aaggregate(total=Sum('quantidade')))['total'] or 0
+    
+    def _filtrar_total(self, tipo, status, arquivadas):
+        queryset = self.all() if arquivadas else self.filter(arquivada=False)
+        if tipo:
+            queryset = queryset.filter(tipo__in=tipo)
+        if status:
+            queryset = queryset.filter(status__in=status)
+        return queryset
+    
+    @staticmethod
+    def _montar_estatisticas(linhas):
+        estatisticas = _estatisticas_vazias()
+        por_tipo = defaultdict(int)
+        por_status = defaultdict(int)
+        valor_total_aprovado = Decimal('0')
+        
+        for tipo, status, quantidade, valor_total in linhas:
+            por_tipo[tipo] += quantidade
+            por_status[status] += quantidade
+            if status == Request.STATUS_APROVADO:
+                valor_total_aprovado += valor_total
+        
+        estatisticas['total'] = sum(por_tipo.values())
+        estatisticas['por_tipo'] = {tipo: por_tipo[tipo] for tipo in sorted(por_tipo) if por_tipo[tipo]}
+        estatisticas['por_status'] = {
+            status: por_status[status] for status in sorted(por_status) if por_status[status]
+        }
+        estatisticas['valor_total_aprovado'] = float(valor_total_aprovado)
+        return estatisticas
+
+
+class RequestSummary(models.Model):
+    """
+    Resumo das solicitações por tipo e status, mantido incrementalmente
+    a cada escrita em Request. Atende o endpoint de estatísticas sem
+    varrer a tabela de solicitações. As solicitações arquivadas têm
+    linhas próprias (`arquivada`), atualizadas pelo arquivamento.
+    """
+    tipo = models.CharField(
+        max_length=20,
+        choices=Request.TIPO_CHOICES,
+        verbose_name='Tipo de Solicitação'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Request.STATUS_CHOICES,
+        verbose_name='Status'
+    )
+    
+    quantidade = models.BigIntegerField(
+        default=0,
+        verbose_name='Quantidade'
+    )
+    
+    valor_total = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=0,
+        verbose_name='Valor Total'
+    )
+    
+    # Linhas das solicitações arquivadas (RequestArquivada)
+    arquivada = models.BooleanField(
+        default=False,
+        verbose_name='Arquivadas'
+    )
+    
+    objects = RequestSummaryManager()
+    
+    class Meta:
+        verbose_name = 'Resumo de Solicitações'
+        verbose_name_plural = 'Resumos de Solicitações'
+        constraints = [
+            models.UniqueConstraint(fields=['tipo', 'status', 'arquivada'], name='resumo_tipo_status_arquivada_unico'),
+        ]
+    
+    def __str__(self):
+        arquivadas = ' (arquivadas)' if self.arquivada else ''
+        return f"{self.get_tipo_display()} / {self.get_status_display()}{arquivadas}: {self.quantidade}"
+
+
+class RequestSerieManager(models.Manager):
+    """
+    Manager com a manutenção incremental e a consulta das séries temporais
+    """
+    
+    def aplicar_alteracoes(self, alteracoes):
+        """
+        Aplica as alterações recebidas às linhas dos períodos (dia, semana e
+        mês) de criação de cada solicitação, lidas e gravadas em lote
+        """
+        acumulados = defaultdict(Acumulado)
+        for alteracao in alteracoes:
+            for estado, sinal in [(alteracao.antes, -1), (alteracao.depois, 1)]:
+                if estado is None:
+                    continue
+                for granularidade, inicio in periodos(estado.data_criacao):
+                    acumulados[(granularidade, inicio, estado.tipo, estado.status)].adicionar(estado.valor, sinal)
+        acumulados = {chave: acumulado for chave, acumulado in acumulados.items() if not acumulado.vazio()}
+        if acumulados:
+            self._gravar(acumulados)
+    
+    def _gravar(self, acumulados):
+        # Uma consulta para todas as linhas afetadas (e, no máximo, algumas
+        # outras dos mesmos períodos, tipos e status)
+        inicios = defaultdict(set)
+        for granularidade, inicio, _, _ in acumulados:
+            inicios[granularidade].add(inicio)
+        filtro = Q()
+        for granularidade, datas in inicios.items():
+            filtro |= Q(granularidade=granularidade, inicio__in=datas)
+        existentes = {
+            (linha.granularidade, linha.inicio, linha.tipo, linha.status): linha
+            for linha in self.select_for_update().filter(
+                filtro,
+                tipo__in={tipo for _, _, tipo, _ in acumulados},
+                status__in={status for _, _, _, status in acumulados},
+            )
+        }
+        
+        novas, alteradas, vazias = [], [], []
+        for chave, acumulado in acumulados.items():
+            linha = existentes.get(chave)
+            if linha is None:
+                granularidade, inicio, tipo, status = chave
+                linha = self.model(granularidade=granularidade, inicio=inicio, tipo=tipo, status=status)
+                novas.append(linha)
+            elif linha.quantidade + acumulado.quantidade == 0:
+                vazias.append(linha.pk)
+                continue
+            else:
+                alteradas.append(linha)
+            linha.quantidade += acumulado.quantidade
+            linha.quantidade_valor += acumulado.quantidade_valor
+            linha.valor_total += acumulado.valor_total
+            somar_histogramas(linha.histograma, acumulado.histograma)
+        
+        if vazias:
+            self.filter(pk__in=vazias).delete()
+        if alteradas:
+            self._atualizar(alteradas)
+        if novas:
+            self.bulk_create(novas, batch_size=500)
+    
+    def _atualizar(self, linhas):
+        # Um UPDATE parametrizado por linha em um único executemany: o
+        # bulk_update monta um CASE WHEN por campo e linha, o que custa mais
+        # que a própria escrita nos lotes pequenos de cada requisição
+        connection = connections[self.db]
+        campos = [
+            self.model._meta.get_field(nome)
+            for nome in ['quantidade', 'quantidade_valor', 'valor_total', 'histograma']
+        ]
+        atribuicoes = ', '.join(f'{connection.ops.quote_name(campo.column)} = %s' for campo in campos)
+        sql = (
+            f'UPDATE {connection.ops.quote_name(self.model._meta.db_table)} SET {atribuicoes} '
+            f'WHERE {connection.ops.quote_name(self.model._meta.pk.column)} = %s'
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [
+                [campo.get_db_prep_save(getattr(linha, campo.attname), connection) for campo in campos] + [linha.pk]
+                for linha in linhas
+            ])
+    
+    def calcular(self):
+        """
+        Calcula as séries a partir da tabela de solicitações e do arquivo, no
+        formato {(granularidade, inicio, tipo, status): Acumulado}
+        """
+        acumulados = defaultdict(Acumulado)
+        for model in [Request, RequestArquivada]:
+            linhas = model.objects.order_by().values_list('data_criacao', 'tipo', 'status', 'valor')
+            for data_criacao, tipo, status, valor in linhas.iterator(chunk_size=5000):
+                for granularidade, inicio in periodos(data_criacao):
+                    acumulados[(granularidade, inicio, tipo, status)].adicionar(valor)
+        return acumulados
+    
+    def recalcular(self):
+        """
+        Reconstrói as séries a partir das solicitações (e do arquivo).
+        Retorna a quantidade de linhas gravadas.
+        """
+        with transaction.atomic(using=self.db):
+            acumulados = self.calcular()
+            self.all().delete()
+            self.bulk_create(
+                [
+                    self.model(
+                        granularidade=granularidade,
+                        inicio=inicio,
+                        tipo=tipo,
+                        status=status,
+                        quantidade=acumulado.quantidade,
+                        quantidade_valor=acumulado.quantidade_valor,
+                        valor_total=acumulado.valor_total,
+                        histograma=somar_histogramas({}, acumulado.histograma),
+                    )
+                    for (granularidade, inicio, tipo, status), acumulado in acumulados.items()
+                ],
+                batch_size=1000,
+            )
+            incrementar_geracao()
+        return len(acumulados)
+    
+    def divergencias(self):
+        """
+        Compara as séries mantidas com as calculadas e retorna as diferenças
+        no formato {(granularidade, inicio, tipo, status): (mantido, calculado)},
+        com cada lado como (quantidade, quantidade_valor, valor_total, histograma)
+        """
+        vazio = (0, 0, Decimal('0'), {})
+        calculado = {
+            chave: (
+                acumulado.quantidade,
+                acumulado.quantidade_valor,
+                acumulado.valor_total,
+                somar_histogramas({}, acumulado.histograma),
+            )
+            for chave, acumulado in self.calcular().items()
+        }
+        mantido = {
+            (granularidade, inicio, tipo, status): (quantidade, quantidade_valor, valor_total, histograma)
+            for granularidade, inicio, tipo, status, quantidade, quantidade_valor, valor_total, histograma
+            in self.values_list(*self.campos_serie)
+        }
+        divergencias = {}
+        for chave in calculado.keys() | mantido.keys():
+            esperado = calculado.get(chave, vazio)
+            atual = mantido.get(chave, vazio)
+            if esperado != atual:
+                divergencias[chave] = (atual, esperado)
+        return divergencias
+    
+    campos_serie = [
+        'granularidade', 'inicio', 'tipo', 'status', 'quantidade', 'quantidade_valor', 'valor_total', 'histograma',
+    ]
+    
+    def serie(self, granularidade, inicio, fim, tipo=None, status=None, agrupar=('tipo', 'status')):
+        """
+        Série de `granularidade` dos períodos que contêm as datas entre
+        `inicio` e `fim` (inclusive), opcionalmente restrita a listas de tipos e de status, com um ponto por
+        período e por combinação dos campos de `agrupar` (tipo e/ou status)
+        """
+        return self._montar_serie(self._filtrar_serie(granularidade, inicio, fim, tipo, status), agrupar)
+    
+    async def aserie(self, granularidade, inicio, fim, tipo=None, status=None, agrupar=('tipo', 'status')):
+        """
+        Versão assíncrona de serie()
+        """
+        linhas = self._filtrar_serie(granularidade, inicio, fim, tipo, status)
+        return self._montar_serie([linha async for linha in linhas], agrupar)
+    
+    def _filtrar_serie(self, granularidade, inicio, fim, tipo, status):
+        queryset = self.filter(
+            granularidade=granularidade,
+            inicio__range=(inicio_periodo(inicio, granularidade), fim),
+        )
+        if tipo:
+            queryset = queryset.filter(tipo__in=tipo)
+        if status:
+            queryset = queryset.filter(status__in=status)
+        return queryset.order_by('inicio', 'tipo', 'status').values_list(*self.campos_serie)
+    
+    @staticmethod
+    def _montar_serie(linhas, agrupar):
+        campos = [campo for campo in ('tipo', 'status') if campo in agrupar]
+        pontos = {}
+        for _, inicio, tipo, status, quantidade, quantidade_valor, valor_total, histograma in linhas:
+            grupo = {'tipo': tipo, 'status': status}
+            chave = (inicio, *(grupo[campo] for campo in campos))
+            ponto = pontos.get(chave)
+            if ponto is None:
+                pontos[chave] = [quantidade, quantidade_valor, valor_total, histograma, False]
+                continue
+            ponto[0] += quantidade
+            ponto[1] += quantidade_valor
+            ponto[2] += valor_total
+            # O histograma da primeira linha só é copiado quando há outra a somar
+            if not ponto[4]:
+                ponto[3], ponto[4] = dict(ponto[3]), True
+            somar_histogramas(ponto[3], histograma)
+        
+        serie = []
+        for (inicio, *grupo), (quantidade, quantidade_valor, valor_total, histograma, _) in pontos.items():
+            p50, p90 = percentis(histograma, [50, 90])
+            serie.append({
+                'periodo': inicio,
+                **dict(zip(campos, grupo)),
+                'quantidade': quantidade,
+                'valor_total': float(valor_total),
+                'valor_medio': round(float(valor_total) / quantidade_valor, 2) if quantidade_valor else None,
+                'valor_p50': None if p50 is None else float(p50),
+                'valor_p90': None if p90 is None else float(p90),
+            })
+        return serie
+
+
+class RequestSerie(models.Model):
+    """
+    Série temporal das solicitações: uma linha por período de criação (dia,
+    semana ou mês), tipo e status, mantida incrementalmente a cada escrita
+    em Request. O arquivamento não altera as séries (as solicitações apenas
+    mudam de tabela), então elas cobrem também as arquivadas.
+    """
+    GRANULARIDADE_CHOICES = [
+        (GRANULARIDADES[0], 'Dia'),
+        (GRANULARIDADES[1], 'Semana'),
+        (GRANULARIDADES[2], 'Mês'),
+    ]
+    
+    granularidade = models.CharField(
+        max_length=10,
+        choices=GRANULARIDADE_CHOICES,
+        verbose_name='Granularidade'
+    )
+    
+    inicio = models.DateField(
+        verbose_name='Início do Período',
+        help_text='Primeiro dia do período (semanas começam na segunda-feira)'
+    )
+    
+    tipo = models.CharField(
+        max_length=20,
+        choices=Request.TIPO_CHOICES,
+        verbose_name='Tipo de Solicitação'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Request.STATUS_CHOICES,
+        verbose_name='Status'
+    )
+    
+    quantidade = models.BigIntegerField(
+        default=0,
+        verbose_name='Quantidade'
+    )
+    
+    quantidade_valor = models.BigIntegerField(
+        default=0,
+        verbose_name='Quantidade com Valor'
+    )
+    
+    valor_total = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=0,
+        verbose_name='Valor Total'
+    )
+    
+    histograma = models.JSONField(
+        default=dict,
+        verbose_name='Histograma dos Valores',
+        help_text='Quantidade de valores por faixa logarítmica (veja solicitations/series.py)'
+    )
+    
+    objects = RequestSerieManager()
+    
+    class Meta:
+        verbose_name = 'Série de Solicitações'
+        verbose_name_plural = 'Séries de Solicitações'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularidade', 'inicio', 'tipo', 'status'], name='serie_periodo_tipo_status_unico'
+            ),
+        ]
+    
+    def __str__(self):
+        return (
+            f"{self.get_granularidade_display()} {self.inicio:%d/%m/%Y} - "
+            f"{self.get_tipo_display()} / {self.get_status_display()}: {self.quantidade}"
+        )
+
+
+class RequestMudancaManager(models.Manager):
+    """
+    Manager com o registro e a leitura do log de mudanças
+    """
+    
+    # Chave do pg_advisory_xact_lock que serializa as gravações no log
+    CHAVE_TRAVA = 0x52544543
+    
+    def registrar(self, alteracoes):
+        """
+        Acrescenta ao log uma mudança por alteração, com um único INSERT.
+        
+        Quem lê o log (apos(), eventos SSE) avança pelo id, então os ids
+        precisam ficar visíveis na ordem em que são gerados. No SQLite as
+        transações de escrita já são serializadas. No PostgreSQL a sequência
+        é consumida fora da ordem dos commits: uma transação com id menor
+        que confirma depois seria pulada por quem já leu um id maior. Lá, a
+        gravação toma um advisory lock mantido até o fim da transação, e as
+        gravações no log passam a confirmar na ordem dos ids. Outros bancos
+        não são suportados pelo endpoint de mudanças.
+        """
+        agora = timezone.now()
+        connection = connections[self.db]
+        with transaction.atomic(using=self.db):
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_xact_lock(%s)', [self.CHAVE_TRAVA])
+            self.bulk_create([
+                self.model(
+                    solicitacao_id=alteracao.pk,
+                    operacao=alteracao.operacao,
+                    data=agora,
+                    tipo=(alteracao.depois or alteracao.antes).tipo,
+                    status=(alteracao.depois or alteracao.antes).status,
+                    status_anterior=alteracao.antes.status if alteracao.antes and alteracao.depois else None,
+                )
+                for alteracao in alteracoes
+            ])
+    
+    def atual(self):
+        """
+        Sequência da mudança mais recente (0 se o log está vazio)
+        """
+        return self.aggregate(atual=Max('id'))['atual'] or 0
+    
+    async def aatual(self):
+        """
+        Versão assíncrona de atual()
+        """
+        return (await self.aaggregate(atual=Max('id')))['atual'] or 0
+    
+    def expirada(self, desde):
+        """
+        Indica se mudanças posteriores a `desde` já foram removidas do log
+        (podar), ou seja, se quem leu até `desde` precisa recomeçar do zero
+        """
+        return self._expirada(desde, self.aggregate(primeira=Min('id'))['primeira'])
+    
+    async def aexpirada(self, desde):
+        """
+        Versão assíncrona de expirada()
+        """
+        return self._expirada(desde, (await self.aaggregate(primeira=Min('id')))['primeira'])
+    
+    @staticmethod
+    def _expirada(desde, primeira):
+        return primeira is not None and desde < primeira - 1
+    
+    def apos(self, desde, limite):
+        """
+        Até `limite` mudanças posteriores à sequência `desde`, em ordem.
+        Retorna (mudanças, há mais).
+        """
+        mudancas = list(self._apos(desde, limite))
+        return mudancas[:limite], len(mudancas) > limite
+    
+    async def aapos(self, desde, limite):
+        """
+        Versão assíncrona de apos()
+        """
+        mudancas = [mudanca async for mudanca in self._apos(desde, limite)]
+        return mudancas[:limite], len(mudancas) > limite
+    
+    def _apos(self, desde, limite):
+        return self.filter(id__gt=desde).order_by('id').values_list(*self.campos_mudanca)[:limite + 1]
+    
+    campos_mudanca = ['id', 'solicitacao_id', 'operacao', 'data', 'tipo', 'status', 'status_anterior']
+    
+    def podar(self, antes_de):
+        """
+        Remove as mudanças registradas antes de `antes_de`, preservando a mais
+        recente do log (que marca até onde ele foi podado). Retorna a
+        quantidade removida.
+        """
+        ultima = self.atual()
+        removidas, _ = self.filter(data__lt=antes_de, id__lt=ultima).delete()
+        return removidas
+
+
+class RequestMudanca(models.Model):
+    """
+    Log de mudanças (append-only) das solicitações: uma linha por criação,
+    alteração, transição ou exclusão, gravada na mesma transação da escrita.
+    O id é a sequência usada como token de retomada pelo endpoint de mudanças.
+    """
+    OPERACAO_CHOICES = [
+        (OPERACAO_CRIACAO, 'Criação'),
+        (OPERACAO_ATUALIZACAO, 'Atualização'),
+        (OPERACAO_TRANSICAO, 'Transição'),
+        (OPERACAO_EXCLUSAO, 'Exclusão'),
+    ]
+    
+    # Sem chave estrangeira: a mudança continua no log depois da exclusão
+    solicitacao_id = models.BigIntegerField(verbose_name='Solicitação')
+    
+    operacao = models.CharField(
+        max_length=20,
+        choices=OPERACAO_CHOICES,
+        verbose_name='Operação'
+    )
+    
+    data = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Data'
+    )
+    
+    # Tipo e status depois da mudança (antes, nas exclusões) e o status
+    # anterior nas alterações e transições: permitem filtrar os eventos
+    # (solicitations/eventos.py) sem consultar a solicitação
+    tipo = models.CharField(
+        max_length=20,
+        choices=Request.TIPO_CHOICES,
+        null=True,
+        verbose_name='Tipo de Solicitação'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Request.STATUS_CHOICES,
+        null=True,
+        verbose_name='Status'
+    )
+    
+    status_anterior = models.CharField(
+        max_length=20,
+        choices=Request.STATUS_CHOICES,
+        null=True,
+        verbose_name='Status Anterior'
+    )
+    
+    objects = RequestMudancaManager()
+    
+    class Meta:
+        verbose_name = 'Mudança de Solicitação'
+        verbose_name_plural = 'Mudanças de Solicitações'
+        indexes = [
+            models.Index(fields=['data'], name='mudanca_data_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.pk} {self.get_operacao_display()} da solicitação {self.solicitacao_id}"
+
+
+class RequestWebhook(models.Model):
+    """
+    Assinatura de webhook: recebe as transições de status das solicitações
+    que atendem aos filtros de tipo e de status de destino (vazios = todos).
+    As entregas são feitas fora das requisições (veja solicitations/webhooks.py).
+    """
+    nome = models.CharField(
+        max_length=100,
+        verbose_name='Nome'
+    )
+    
+    url = models.URLField(
+        max_length=500,
+        verbose_name='URL'
+    )
+    
+    tipos = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Tipos',
+        help_text='Tipos de solicitação notificados (vazio: todos)'
+    )
+    
+    status = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Status de destino',
+        help_text='Status que disparam a notificação, ex.: ["aprovado"] (vazio: todos)'
+    )
+    
+    segredo = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Segredo',
+        help_text='Chave da assinatura HMAC-SHA256 enviada em X-Webhook-Assinatura'
+    )
+    
+    concorrencia_maxima = models.PositiveSmallIntegerField(
+        default=2,
+        validators=[MinValueValidator(1)],
+        verbose_name='Concorrência máxima',
+        help_text='Requisições simultâneas para esta URL em cada processo de entrega'
+    )
+    
+    ativo = models.BooleanField(
+        default=True,
+        verbose_name='Ativo'
+    )
+    
+    data_criacao = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Data de Criação'
+    )
+    
+    class Meta:
+        verbose_name = 'Webhook'
+        verbose_name_plural = 'Webhooks'
+        ordering = ['nome']
+    
+    def __str__(self):
+        return f"{self.nome} ({self.url})"
+    
+    def aceita(self, tipo, status):
+        """
+        Indica se a transição de uma solicitação do tipo `tipo` para
+        `status` deve ser notificada
+        """
+        return (not self.tipos or tipo in self.tipos) and (not self.status or status in self.status)
+
+
+class RequestWebhookEntregaManager(models.Manager):
+    """
+    Manager da fila de saída (outbox) de webhooks
+    """
+    
+    def enfileirar(self, alteracoes):
+        """
+        Cria as entregas das transições de status em `alteracoes` para os
+        webhooks ativos que as aceitam. Chamado dentro da transação da
+        escrita: a entrega só existe se a transição for confirmada.
+        """
+        transicoes = [
+            alteracao for alteracao in alteracoes
+            if alteracao.antes and alteracao.depois and alteracao.antes.status != alteracao.depois.status
+        ]
+        if not transicoes:
+            return []
+        webhooks = list(RequestWebhook.objects.db_manager(self.db).filter(ativo=True))
+        destinos = [
+            (alteracao, webhook)
+            for alteracao in transicoes
+            for webhook in webhooks
+            if webhook.aceita(alteracao.depois.tipo, alteracao.depois.status)
+        ]
+        if not destinos:
+            return []
+        
+        # Import local: o serializer importa os modelos
+        from .serializers import RequestListSerializer
+        linhas = RequestListSerializer.valores(
+            Request.objects.db_manager(self.db).filter(pk__in={alteracao.pk for alteracao, _ in destinos})
+        )
+        solicitacoes = {linha['id']: linha for linha in RequestListSerializer.representar(linhas)}
+        agora = timezone.now()
+        return self.bulk_create([
+            self.model(
+                webhook=webhook,
+                solicitacao_id=alteracao.pk,
+                payload={
+                    'evento': f'solicitacao.{alteracao.depois.status}',
+                    'data': agora.isoformat(),
+                    'status_anterior': alteracao.antes.status,
+                    'solicitacao': solicitacoes.get(alteracao.pk),
+                },
+                proxima_tentativa=agora,
+            )
+            for alteracao, webhook in destinos
+        ])
+    
+    def reservar(self, limite, duracao, reserva):
+        """
+        Reserva até `limite` entregas pendentes vencidas por `duracao` para o
+        processo identificado por `reserva` e as retorna (com o webhook).
+        
+        A reserva é um UPDATE condicional: se dois processos escolherem as
+        mesmas linhas, apenas o primeiro UPDATE as altera, também no SQLite
+        (sem SELECT ... FOR UPDATE). Uma reserva vencida (processo que parou
+        no meio da entrega) volta a ficar disponível.
+        """
+        agora = timezone.now()
+        disponiveis = self.filter(
+            Q(reservada_ate__isnull=True) | Q(reservada_ate__lt=agora),
+            situacao=self.model.SITUACAO_PENDENTE,
+            proxima_tentativa__lte=agora,
+        )
+        ids = list(disponiveis.order_by('proxima_tentativa', 'id').values_list('id', flat=True)[:limite])
+        if not ids:
+            return []
+        disponiveis.filter(id__in=ids).update(reservada_ate=agora + duracao, reserva=reserva)
+        return list(self.filter(id__in=ids, reserva=reserva).select_related('webhook').order_by('id'))
+    
+    def confirmar(self, ids):
+        """
+        Marca as entregas `ids` como entregues
+        """
+        return self.filter(id__in=ids).update(
+            situacao=self.model.SITUACAO_ENTREGUE,
+            tentativas=F('tentativas') + 1,
+            data_entrega=timezone.now(),
+            reservada_ate=None,
+            ultimo_erro='',
+        )
+    
+    def reagendar(self, entregas, erro, atraso, tentativas_maximas):
+        """
+        Registra uma tentativa sem sucesso das `entregas`: agenda a próxima
+        após `atraso(tentativas)` ou, esgotadas as tentativas, marca como
+        falha. Um UPDATE por número de tentativas (em geral, um só).
+        """
+        agora = timezone.now()
+        por_tentativas = defaultdict(list)
+        for entrega in entregas:
+            por_tentativas[entrega.tentativas + 1].append(entrega.pk)
+        for tentativas, ids in por_tentativas.items():
+            valores = {'tentativas': tentativas, 'ultimo_erro': erro[:1000], 'reservada_ate': None}
+            if tentativas >= tentativas_maximas:
+                valores['situacao'] = self.model.SITUACAO_FALHA
+            else:
+                valores['proxima_tentativa'] = agora + atraso(tentativas)
+            self.filter(id__in=ids).update(**valores)
+
+
+class RequestWebhookEntrega(models.Model):
+    """
+    Fila de saída (outbox) de webhooks: uma entrega por transição e webhook,
+    gravada na mesma transação da transição e enviada depois pelo comando
+    entregar_webhooks
+    """
+    SITUACAO_PENDENTE = 'pendente'
+    SITUACAO_ENTREGUE = 'entregue'
+    SITUACAO_FALHA = 'falha'
+    
+    SITUACAO_CHOICES = [
+        (SITUACAO_PENDENTE, 'Pendente'),
+        (SITUACAO_ENTREGUE, 'Entregue'),
+        (SITUACAO_FALHA, 'Falha'),
+    ]
+    
+    webhook = models.ForeignKey(
+        RequestWebhook,
+        on_delete=models.CASCADE,
+        related_name='entregas',
+        verbose_name='Webhook'
+    )
+    
+    # Sem chave estrangeira: a entrega continua na fila depois da exclusão
+    solicitacao_id = models.BigIntegerField(verbose_name='Solicitação')
+    
+    payload = models.JSONField(verbose_name='Payload')
+    
+    situacao = models.CharField(
+        max_length=20,
+        choices=SITUACAO_CHOICES,
+        default=SITUACAO_PENDENTE,
+        verbose_name='Situação'
+    )
+    
+    tentativas = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Tentativas'
+    )
+    
+    proxima_tentativa = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Próxima Tentativa'
+    )
+    
+    # Processo de entrega que reservou a linha e até quando
+    reserva = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name='Reserva'
+    )
+    
+    reservada_ate = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Reservada Até'
+    )
+    
+    ultimo_erro = models.TextField(
+        blank=True,
+        verbose_name='Último Erro'
+    )
+    
+    data_criacao = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Data de Criação'
+    )
+    
+    data_entrega = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Data de Entrega'
+    )
+    
+    objects = RequestWebhookEntregaManager()
+    
+    class Meta:
+        verbose_name = 'Entrega de Webhook'
+        verbose_name_plural = 'Entregas de Webhooks'
+        indexes = [
+            models.Index(fields=['situacao', 'proxima_tentativa'], name='entrega_pendentes_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.pk} {self.payload.get('evento')} para {self.webhook_id} ({self.get_situacao_display()})"
+
+
+class RequestRelatorioManager(models.Manager):
+    """
+    Manager da fila de relatórios executados em segundo plano
+    """
+    
+    def reservar(self, reserva, duracao):
+        """
+        Reserva o relatório pendente mais antigo para o processo `reserva`
+        e o retorna (None se não houver). Relatórios em execução cuja reserva
+        venceu (processo que parou) também podem ser reservados.
+        
+        Como nas entregas de webhooks, a reserva é um UPDATE condicional: de
+        dois processos que escolherem o mesmo relatório, só um o altera.
+        """
+        disponiveis = self.filter(
+            Q(situacao=self.model.SITUACAO_PENDENTE)
+            | Q(situacao=self.model.SITUACAO_EXECUTANDO, reservada_ate__lt=timezone.now())
+        )
+        for pk in disponiveis.order_by('id').values_list('id', flat=True)[:10]:
+            agora = timezone.now()
+            reservado = disponiveis.filter(pk=pk).update(
+                situacao=self.model.SITUACAO_EXECUTANDO,
+                reserva=reserva,
+                reservada_ate=agora + duracao,
+                tentativas=F('tentativas') + 1,
+                data_inicio=agora,
+            )
+            if reservado:
+                return self.get(pk=pk)
+        return None
+    
+    def registrar_progresso(self, relatorio, processadas, total, duracao):
+        """
+        Grava o progresso e renova a reserva. Retorna False se o relatório
+        foi reservado por outro processo (a reserva venceu) ou cancelado.
+        """
+        progresso = min(99, processadas * 100 // total) if total else 0
+        atualizados = self.filter(
+            pk=relatorio.pk,
+            reserva=relatorio.reserva,
+            situacao=self.model.SITUACAO_EXECUTANDO,
+        ).update(
+            linhas_processadas=processadas,
+            linhas_total=total,
+            progresso=progresso,
+            reservada_ate=timezone.now() + duracao,
+        )
+        return bool(atualizados)
+
+
+class RequestRelatorio(models.Model):
+    """
+    Relatório pesado (exportação, estatísticas) pedido pela API e executado
+    fora da requisição pelo comando run_workers; o resultado é gravado em
+    MEDIA_ROOT. Veja solicitations/relatorios.py.
+    """
+    TIPO_EXPORTACAO = 'exportacao'
+    TIPO_ESTATISTICAS = 'estatisticas'
+    TIPO_ESTATISTICAS_SERIE = 'estatisticas_serie'
+    
+    TIPO_CHOICES = [
+        (TIPO_EXPORTACAO, 'Exportação'),
+        (TIPO_ESTATISTICAS, 'Estatísticas'),
+        (TIPO_ESTATISTICAS_SERIE, 'Série temporal'),
+    ]
+    
+    FORMATO_CSV = 'csv'
+    FORMATO_NDJSON = 'ndjson'
+    FORMATO_JSON = 'json'
+    
+    FORMATO_CHOICES = [
+        (FORMATO_CSV, 'CSV'),
+        (FORMATO_NDJSON, 'NDJSON'),
+        (FORMATO_JSON, 'JSON'),
+    ]
+    
+    SITUACAO_PENDENTE = 'pendente'
+    SITUACAO_EXECUTANDO = 'executando'
+    SITUACAO_CONCLUIDO = 'concluido'
+    SITUACAO_ERRO = 'erro'
+    
+    SITUACAO_CHOICES = [
+        (SITUACAO_PENDENTE, 'Pendente'),
+        (SITUACAO_EXECUTANDO, 'Executando'),
+        (SITUACAO_CONCLUIDO, 'Concluído'),
+        (SITUACAO_ERRO, 'Erro'),
+    ]
+    
+    tipo = models.CharField(
+        max_length=20,
+        choices=TIPO_CHOICES,
+        verbose_name='Tipo de Relatório'
+    )
+    
+    formato = models.CharField(
+        max_length=10,
+        choices=FORMATO_CHOICES,
+        verbose_name='Formato'
+    )
+    
+    # Parâmetros de consulta do endpoint equivalente ({nome: [valores]}),
+    # ex.: {"tipo": ["reembolso"], "status": ["aprovado"]}
+    parametros = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Parâmetros'
+    )
+    
+    situacao = models.CharField(
+        max_length=20,
+        choices=SITUACAO_CHOICES,
+        default=SITUACAO_PENDENTE,
+        verbose_name='Situação'
+    )
+    
+    progresso = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Progresso (%)'
+    )
+    
+    linhas_processadas = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Linhas Processadas'
+    )
+    
+    linhas_total = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Total de Linhas'
+    )
+    
+    arquivo = models.FileField(
+        upload_to='relatorios/%Y/%m/',
+        blank=True,
+        verbose_name='Arquivo'
+    )
+    
+    erro = models.TextField(
+        blank=True,
+        verbose_name='Erro'
+    )
+    
+    tentativas = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Tentativas'
+    )
+    
+    # Processo que executa o relatório e até quando (renovado a cada progresso)
+    reserva = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name='Reserva'
+    )
+    
+    reservada_ate = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Reservado Até'
+    )
+    
+    data_criacao = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Data de Criação'
+    )
+    
+    data_inicio = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Data de Início'
+    )
+    
+    data_conclusao = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Data de Conclusão'
+    )
+    
+    objects = RequestRelatorioManager()
+    
+    class Meta:
+        verbose_name = 'Relatório'
+        verbose_name_plural = 'Relatórios'
+        indexes = [
+            models.Index(fields=['situacao', 'id'], name='relatorio_situacao_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.pk} {self.get_tipo_display()} ({self.get_situacao_display()})"
+
+
+class RequestIndiceBusca(models.Model):
+    """
+    Índice de busca textual (tabela virtual FTS5) das solicitações no SQLite.
+    
+    A tabela é criada pela migration de busca, não pelo Django; o modelo
+    existe apenas para que a busca seja feita com uma junção em vez de uma
+    subconsulta por linha. Veja solicitations/busca.py.
+    """
+    solicitacao = models.OneToOneField(
+        Request,
+        primary_key=True,
+        db_column='rowid',
+        on_delete=models.DO_NOTHING,
+        related_name='indice_busca',
+    )
+    
+    documento = ColunaFTS5(db_column=TABELA_FTS)
+    
+    rank = models.FloatField()
+    
+    class Meta:
+        managed = False
+        db_table = TABELA_FTS
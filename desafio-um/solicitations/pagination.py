@@ -0,0 +1,382 @@
+"""
+Paginação customizada para a app solicitations
+"""
+
+import json
+import operator
+from base64 import b64decode, b64encode
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .conf import configuracao
+from .models import RequestSummary
+
+
+Posicao = namedtuple('Posicao', ['valores', 'reverso'])
+
+# Campo de ordenação já resolvido: nome, direção e tratamento de nulos
+CampoOrdenacao = namedtuple('CampoOrdenacao', ['nome', 'descendente', 'nulos_primeiro', 'anulavel'])
+
+# Como obter o `count` da paginação por número: 'resumo' (argumento: filtros
+# de tipo/status), 'limitada' (argumento: teto da contagem) ou 'exata'
+PlanoContagem = namedtuple('PlanoContagem', ['modo', 'argumento'])
+
+
+class RequestPageNumberPagination(PageNumberPagination):
+    """
+    Paginação por número de página (padrão da listagem), com uma variante
+    assíncrona para as views servidas via ASGI.
+
+    O `count` evita o COUNT(*) exato sobre o queryset filtrado:
+
+    - sem filtros, ou filtrando só por tipo e status, vem do RequestSummary
+      (exato, mantido a cada escrita);
+    - com outros filtros, a contagem para em LISTAGEM_LIMITE_CONTAGEM linhas
+      além do início da página (SELECT COUNT(*) sobre uma subconsulta com
+      LIMIT). Passando do limite, `contagem_exata` é falso e `count` é um
+      mínimo: "pelo menos `count`", o bastante para o link da próxima página.
+
+    `?contagem=exata` força o COUNT(*) completo.
+    """
+    contagem_query_param = 'contagem'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        paginator = self._preparar(queryset, request, view)
+        if paginator is None:
+            return None
+        plano = self._plano_contagem(request, view, paginator.per_page)
+        if plano.modo == 'resumo':
+            total = RequestSummary.objects.total(**plano.argumento)
+        elif plano.modo == 'limitada':
+            total = queryset.order_by()[:plano.argumento + 1].count()
+        else:
+            total = queryset.count()
+        self._contar(paginator, plano, total)
+        return list(self._pagina(paginator, request))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Versão assíncrona de paginate_queryset(): a contagem e a página
+        são lidas com o ORM assíncrono (acount / aiterator)
+        """
+        paginator = self._preparar(queryset, request, view)
+        if paginator is None:
+            return None
+        plano = self._plano_contagem(request, view, paginator.per_page)
+        if plano.modo == 'resumo':
+            total = await RequestSummary.objects.atotal(**plano.argumento)
+        elif plano.modo == 'limitada':
+            total = await queryset.order_by()[:plano.argumento + 1].acount()
+        else:
+            total = await queryset.acount()
+        self._contar(paginator, plano, total)
+        page = self._pagina(paginator, request)
+        page.object_list = [item async for item in page.object_list.aiterator()]
+        return list(page)
+
+    def _preparar(self, queryset, request, view):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        return self.django_paginator_class(queryset, page_size)
+
+    def _plano_contagem(self, request, view, page_size):
+        """
+        Escolhe como obter o `count`: do resumo, limitado ou exato
+        """
+        limite = configuracao('LISTAGEM_LIMITE_CONTAGEM')
+        if request.query_params.get(self.contagem_query_param) == 'exata' or not limite:
+            return PlanoContagem('exata', None)
+        filtros = getattr(view, 'filtros_do_resumo', lambda request: None)(request)
+        if filtros is not None:
+            return PlanoContagem('resumo', filtros)
+        try:
+            pagina = max(int(request.query_params.get(self.page_query_param, 1)), 1)
+        except ValueError:
+            pagina = 1
+        return PlanoContagem('limitada', (pagina - 1) * page_size + max(limite, page_size))
+
+    def _contar(self, paginator, plano, total):
+        self.contagem_exata = plano.modo != 'limitada' or total <= plano.argumento
+        # Preenche o cached_property `count` para que o Paginator não consulte o banco
+        paginator.count = total
+
+    def _pagina(self, paginator, request):
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'contagem_exata': self.contagem_exata,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        resposta = super().get_paginated_response_schema(schema)
+        resposta['properties']['contagem_exata'] = {
+            'type': 'boolean',
+            'description': 'Falso quando `count` é apenas o limite da contagem (há mais resultados)',
+        }
+        return resposta
+
+
+class RequestCursorPagination(CursorPagination):
+    """
+    Paginação por cursor (keyset) para a listagem de solicitações.
+
+    Diferente da CursorPagination padrão do DRF, que posiciona o cursor apenas
+    pelo primeiro campo de ordenação e usa offset para desempatar, o cursor
+    guarda o valor de todos os campos de ordenação mais o id. Cada página é
+    obtida com uma condição do tipo (data_criacao, id) < (valor, ultimo_id),
+    sem OFFSET e sem COUNT(*), então a página 5000 custa o mesmo que a primeira.
+
+    É opcional: ativada com `?paginacao=cursor` (ou pela presença de `cursor`).
+    """
+    ordering = ('-data_criacao', '-id')
+    campo_desempate = 'id'
+    cursor_query_param = 'cursor'
+    ativacao_query_param = 'paginacao'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    @classmethod
+    def solicitada(cls, request):
+        """
+        Indica se o cliente pediu a paginação por cursor
+        """
+        params = request.query_params
+        return cls.cursor_query_param in params or params.get(cls.ativacao_query_param) == 'cursor'
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Usa a ordenação do OrderingFilter e acrescenta o id como desempate
+        """
+        ordering = list(super().get_ordering(request, queryset, view))
+        nomes = [campo.lstrip('-') for campo in ordering]
+        if self.campo_desempate not in nomes and 'pk' not in nomes:
+            prefixo = '-' if ordering[0].startswith('-') else ''
+            ordering.append(prefixo + self.campo_desempate)
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._preparar(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._concluir(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Versão assíncrona de paginate_queryset(), com a página lida via aiterator()
+        """
+        queryset = self._preparar(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._concluir([item async for item in queryset.aiterator()])
+
+    def _preparar(self, queryset, request, view):
+        """
+        Aplica a ordenação e a posição do cursor, retornando o queryset da
+        página (com uma linha extra para saber se existe página seguinte)
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+        self.campos = self._resolver_campos(self.model, self.ordering)
+        self.posicao = self.decode_cursor(request)
+
+        reverso = self.posicao is not None and self.posicao.reverso
+        campos = [self._inverter(campo) for campo in self.campos] if reverso else self.campos
+        queryset = queryset.order_by(*[self._expressao(campo) for campo in campos])
+
+        if self.posicao is not None:
+            condicao = self._condicao_apos(campos, self.posicao.valores)
+            if condicao is None:
+                queryset = queryset.none()
+            else:
+                queryset = _filtrar(queryset, condicao)
+
+        return queryset[:self.page_size + 1]
+
+    def _concluir(self, resultados):
+        ha_mais = len(resultados) > self.page_size
+        reverso = self.posicao is not None and self.posicao.reverso
+        self.page = resultados[:self.page_size]
+
+        if reverso:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = ha_mais
+        else:
+            self.has_next = ha_mais
+            self.has_previous = self.posicao is not None
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Posicao(self._valores(self.page[-1]), reverso=False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(Posicao(self._valores(self.page[0]), reverso=True))
+
+    def encode_cursor(self, posicao):
+        """
+        Codifica a posição (valores da ordenação + id) em um cursor opaco
+        """
+        conteudo = {
+            'o': list(self.ordering),
+            'v': [_serializar_valor(valor) for valor in posicao.valores],
+            'r': int(posicao.reverso),
+        }
+        codificado = b64encode(json.dumps(conteudo, separators=(',', ':')).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, codificado)
+
+    def decode_cursor(self, request):
+        """
+        Decodifica o cursor recebido, validando-o contra a ordenação atual
+        """
+        codificado = request.query_params.get(self.cursor_query_param)
+        if not codificado:
+            return None
+
+        try:
+            conteudo = json.loads(b64decode(codificado.encode('ascii')))
+            if conteudo['o'] != list(self.ordering) or len(conteudo['v']) != len(self.campos):
+                raise ValueError('Cursor gerado para outra ordenação.')
+            valores = [
+                self._converter_valor(campo, valor)
+                for campo, valor in zip(self.campos, conteudo['v'])
+            ]
+            return Posicao(valores, reverso=bool(conteudo.get('r')))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _resolver_campos(self, model, ordering):
+        campos = []
+        for campo in ordering:
+            nome = campo.lstrip('-')
+            if nome == 'pk':
+                nome = model._meta.pk.name
+            try:
+                anulavel = model._meta.get_field(nome).null
+            except FieldDoesNotExist:
+                # Anotações (ex.: relevância da busca) não possuem campo no modelo
+                anulavel = False
+            campos.append(CampoOrdenacao(nome, campo.startswith('-'), False, anulavel))
+        return campos
+
+    def _converter_valor(self, campo, valor):
+        if valor is None:
+            return None
+        try:
+            field = self.model._meta.get_field(campo.nome)
+        except FieldDoesNotExist:
+            return valor
+        return field.to_python(valor)
+
+    def _valores(self, item):
+        if isinstance(item, dict):
+            return [item[campo.nome] for campo in self.campos]
+        return [getattr(item, campo.nome) for campo in self.campos]
+
+    @staticmethod
+    def _inverter(campo):
+        # Nulos ficam por último na ordem normal, então vêm primeiro na reversa
+        return campo._replace(descendente=not campo.descendente, nulos_primeiro=not campo.nulos_primeiro)
+
+    @staticmethod
+    def _expressao(campo):
+        nulos = {}
+        if campo.anulavel:
+            nulos = {'nulls_first': True} if campo.nulos_primeiro else {'nulls_last': True}
+        expressao = F(campo.nome)
+        return expressao.desc(**nulos) if campo.descendente else expressao.asc(**nulos)
+
+    @staticmethod
+    def _condicao_apos(campos, valores):
+        """
+        Monta a comparação lexicográfica "linha vem depois da posição".
+
+        Para (a, b, id) fica: a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND id > vid),
+        com os operadores invertidos nos campos descendentes e nulos tratados à parte.
+        """
+        termos = []
+        iguais = Q()
+        for campo, valor in zip(campos, valores):
+            apos = _condicao_campo_apos(campo, valor)
+            if apos is not None:
+                termos.append(iguais & apos)
+            if valor is None:
+                iguais &= Q(**{f'{campo.nome}__isnull': True})
+            else:
+                iguais &= Q(**{campo.nome: valor})
+        if not termos:
+            return None
+        return reduce(operator.or_, termos)
+
+
+def _filtrar(queryset, condicao):
+    """
+    filter() que, em uma união (listagem com as arquivadas), é aplicado a
+    cada parte: o Django não filtra depois de union()
+    """
+    if not queryset.query.combinator:
+        return queryset.filter(condicao)
+    uniao = queryset.all()
+    partes = []
+    for parte in queryset.query.combined_queries:
+        parte = parte.clone()
+        parte.add_q(condicao)
+        partes.append(parte)
+    uniao.query.combined_queries = tuple(partes)
+    return uniao
+
+
+def _condicao_campo_apos(campo, valor):
+    if valor is None:
+        # Após um nulo só existem valores não nulos se os nulos vêm primeiro
+        return Q(**{f'{campo.nome}__isnull': False}) if campo.nulos_primeiro else None
+    lookup = 'lt' if campo.descendente else 'gt'
+    condicao = Q(**{f'{campo.nome}__{lookup}': valor})
+    if campo.anulavel and not campo.nulos_primeiro:
+        condicao |= Q(**{f'{campo.nome}__isnull': True})
+    return condicao
+
+
+def _serializar_valor(valor):
+    # Mantém a precisão total (o DjangoJSONEncoder trunca os microssegundos)
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
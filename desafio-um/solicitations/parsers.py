@@ -0,0 +1,75 @@
+"""
+Parsers customizados para a app solicitations
+"""
+
+import io
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+try:
+    import orjson
+except ImportError:  # dependência opcional: sem ela, o JSON é lido pelo json da stdlib
+    orjson = None
+
+
+def carregar_json(conteudo):
+    """
+    json.loads() com o orjson, quando instalado. O que o orjson recusa (JSON
+    inválido, inteiros acima de 64 bits, ...) é relido pelo json da stdlib,
+    que aceita ou levanta o mesmo erro de sempre.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(conteudo)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(conteudo)
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser com o orjson: mesmo resultado e mesmas mensagens de erro,
+    lendo o corpo mais rápido. Sem o orjson instalado, ou com STRICT_JSON
+    desativado (NaN e Infinity aceitos), recorre ao JSONParser.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        conteudo = stream.read()
+        try:
+            if encoding.lower().replace('-', '') != 'utf8':
+                return orjson.loads(conteudo.decode(encoding))
+            return orjson.loads(conteudo)
+        except ValueError:
+            # Relido pelo JSONParser, que aceita ou monta a mensagem de erro de sempre
+            return super().parse(io.BytesIO(conteudo), media_type, parser_context)
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parser para NDJSON (um objeto JSON por linha).
+    Retorna a lista de objetos, ignorando linhas em branco.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        itens = []
+        for numero, linha in enumerate(stream, start=1):
+            linha = linha.decode(encoding).strip()
+            if not linha:
+                continue
+            try:
+                itens.append(carregar_json(linha))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON inválido na linha {numero}: {exc}')
+        return itens
@@ -0,0 +1,90 @@
+"""
+Receptores de sinais da app solicitations
+"""
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .cache import incrementar_geracao
+from .conf import configuracao
+from .eventos import notificar
+from .instrumentacao import registrar_consulta
+from .models import RequestMudanca, RequestSerie, RequestSummary, RequestWebhookEntrega
+from .signals import solicitacoes_alteradas
+
+
+@receiver(solicitacoes_alteradas, dispatch_uid='solicitations.atualizar_resumo')
+def atualizar_resumo(sender, alteracoes, **kwargs):
+    """
+    Mantém o resumo por tipo/status em dia com as alterações
+    """
+    RequestSummary.objects.aplicar_alteracoes(alteracoes)
+
+
+@receiver(solicitacoes_alteradas, dispatch_uid='solicitations.atualizar_series')
+def atualizar_series(sender, alteracoes, **kwargs):
+    """
+    Mantém as séries temporais por período de criação, tipo e status em dia
+    com as alterações
+    """
+    RequestSerie.objects.aplicar_alteracoes(alteracoes)
+
+
+@receiver(solicitacoes_alteradas, dispatch_uid='solicitations.registrar_mudancas')
+def registrar_mudancas(sender, alteracoes, **kwargs):
+    """
+    Acrescenta as alterações ao log de mudanças (endpoint de mudanças)
+    """
+    RequestMudanca.objects.registrar(alteracoes)
+
+
+@receiver(solicitacoes_alteradas, dispatch_uid='solicitations.enfileirar_webhooks')
+def enfileirar_webhooks(sender, alteracoes, **kwargs):
+    """
+    Grava na fila de saída as entregas de webhooks das transições de status
+    (enviadas pelo comando entregar_webhooks)
+    """
+    RequestWebhookEntrega.objects.enfileirar(alteracoes)
+
+
+@receiver(solicitacoes_alteradas, dispatch_uid='solicitations.notificar_eventos')
+def notificar_eventos(sender, alteracoes, **kwargs):
+    """
+    Após o commit, acorda o Transmissor de eventos SSE deste processo, que
+    lê as novas linhas do log de mudanças
+    """
+    transaction.on_commit(notificar)
+
+
+@receiver(solicitacoes_alteradas, dispatch_uid='solicitations.invalidar_cache_respostas')
+def invalidar_cache_respostas(sender, alteracoes, **kwargs):
+    """
+    Invalida as respostas em cache (listagem e estatísticas)
+    """
+    incrementar_geracao()
+
+
+@receiver(connection_created, dispatch_uid='solicitations.configurar_sqlite')
+def configurar_sqlite(sender, connection, **kwargs):
+    """
+    Aplica os PRAGMAs configurados (WAL, busy_timeout, mmap, cache) a cada
+    nova conexão SQLite. Com conexões persistentes, isso ocorre uma vez
+    por conexão, não por requisição.
+    """
+    pragmas = configuracao('SQLITE_PRAGMAS')
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for nome, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nome} = {valor}')
+
+
+@receiver(connection_created, dispatch_uid='solicitations.instrumentar_conexao')
+def instrumentar_conexao(sender, connection, **kwargs):
+    """
+    Instala o execute_wrapper da instrumentação de SQL (veja instrumentacao.py).
+    Ele só mede quando a requisição atual foi amostrada.
+    """
+    if registrar_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(registrar_consulta)
@@ -0,0 +1,259 @@
+"""
+Relatórios executados em segundo plano
+
+Exportações grandes e estatísticas com filtros sobre muitos anos não cabem no
+timeout de uma requisição. POST /api/v1/relatorios/ apenas grava o pedido
+(RequestRelatorio) e responde 202; o comando run_workers mantém um grupo de
+processos que reservam os relatórios pendentes, geram o resultado em
+MEDIA_ROOT e registram o progresso, consultado em GET /api/v1/relatorios/{id}/.
+
+Os parâmetros são os mesmos dos endpoints síncronos (filtros, busca,
+ordenação, incluir_arquivadas, granularidade, ...). O relatório é gerado pelo
+próprio RequestViewSet, preparado como se atendesse a requisição GET
+equivalente, então filtros e formatos são idênticos aos da API.
+"""
+
+import json
+import logging
+import signal
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.files import File
+from django.db import close_old_connections
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from .conf import configuracao
+from .models import Request, RequestArquivada, RequestRelatorio, RequestSerie
+from .renderers import CSVRenderer, NDJSONRenderer
+
+
+logger = logging.getLogger(__name__)
+
+# Formatos aceitos por tipo de relatório (o primeiro é o padrão)
+FORMATOS = {
+    RequestRelatorio.TIPO_EXPORTACAO: [RequestRelatorio.FORMATO_CSV, RequestRelatorio.FORMATO_NDJSON],
+    RequestRelatorio.TIPO_ESTATISTICAS: [RequestRelatorio.FORMATO_JSON],
+    RequestRelatorio.TIPO_ESTATISTICAS_SERIE: [RequestRelatorio.FORMATO_JSON],
+}
+
+RENDERERS_EXPORTACAO = {
+    RequestRelatorio.FORMATO_CSV: CSVRenderer,
+    RequestRelatorio.FORMATO_NDJSON: NDJSONRenderer,
+}
+
+# Ação do RequestViewSet equivalente a cada tipo
+ACOES = {
+    RequestRelatorio.TIPO_EXPORTACAO: 'exportar',
+    RequestRelatorio.TIPO_ESTATISTICAS: 'estatisticas',
+    RequestRelatorio.TIPO_ESTATISTICAS_SERIE: 'estatisticas_serie',
+}
+
+
+class Interrompido(Exception):
+    """
+    O relatório deixou de pertencer a este processo (a reserva venceu)
+    """
+
+
+def visao(tipo, parametros):
+    """
+    RequestViewSet preparado como se atendesse GET com os `parametros`
+    ({nome: [valores]}) na ação equivalente ao `tipo`
+    """
+    # Import local: views importa este módulo
+    from .views import RequestViewSet
+
+    requisicao = HttpRequest()
+    requisicao.method = 'GET'
+    requisicao.GET = QueryDict(mutable=True)
+    for nome, valores in parametros.items():
+        requisicao.GET.setlist(nome, valores)
+    acao = ACOES[tipo]
+    view = RequestViewSet(action_map={'get': acao}, args=(), kwargs={}, format_kwarg=None)
+    view.request = view.initialize_request(requisicao)
+    view.action = acao
+    return view
+
+
+def preparar(tipo, formato=None, parametros=None):
+    """
+    Valida o pedido de relatório antes de enfileirá-lo, com as mesmas regras
+    do endpoint equivalente. Retorna (formato, parâmetros normalizados).
+    """
+    formatos = FORMATOS[tipo]
+    formato = formato or formatos[0]
+    if formato not in formatos:
+        raise ValidationError({'formato': [f'Formatos aceitos para {tipo}: {", ".join(formatos)}.']})
+
+    normalizados = {}
+    for nome, valores in (parametros or {}).items():
+        valores = valores if isinstance(valores, list) else [valores]
+        if not all(isinstance(valor, (str, int, float)) and not isinstance(valor, bool) for valor in valores):
+            raise ValidationError({'parametros': [f'Valores inválidos para "{nome}".']})
+        normalizados[nome] = [str(valor) for valor in valores]
+
+    view = visao(tipo, normalizados)
+    try:
+        if tipo == RequestRelatorio.TIPO_ESTATISTICAS_SERIE:
+            view.parametros_serie(view.request)
+        else:
+            view.filter_queryset(view.get_queryset())
+            view.incluir_arquivadas(view.request)
+            if tipo == RequestRelatorio.TIPO_EXPORTACAO:
+                view.colunas_exportacao(view.request)
+    except ValidationError as exc:
+        raise ValidationError({'parametros': exc.detail})
+    return formato, normalizados
+
+
+class Trabalhador:
+    """
+    Executa os relatórios pendentes, um por vez (um Trabalhador por processo)
+    """
+
+    def __init__(self):
+        # Identifica as reservas deste processo
+        self.reserva = uuid.uuid4().hex
+        self.duracao = timedelta(seconds=configuracao('RELATORIOS_RESERVA_SEGUNDOS'))
+
+    def executar_sempre(self, intervalo):
+        """
+        Laço do processo: executa os relatórios pendentes e, com a fila
+        vazia, espera `intervalo` segundos
+        """
+        while True:
+            close_old_connections()
+            if not self.executar_proximo():
+                time.sleep(intervalo)
+
+    def executar_proximo(self):
+        """
+        Reserva e executa o próximo relatório pendente. Retorna False se a
+        fila estiver vazia.
+        """
+        relatorio = RequestRelatorio.objects.reservar(self.reserva, self.duracao)
+        if relatorio is None:
+            return False
+        self.executar(relatorio)
+        return True
+
+    def executar(self, relatorio):
+        if relatorio.tentativas > configuracao('RELATORIOS_TENTATIVAS_MAXIMAS'):
+            # O relatório derrubou (ou excedeu a reserva de) todos os processos que o executaram
+            self.finalizar(relatorio, situacao=RequestRelatorio.SITUACAO_ERRO, erro='Tentativas esgotadas.')
+            return
+        inicio = time.perf_counter()
+        try:
+            with tempfile.TemporaryFile() as destino:
+                getattr(self, f'gerar_{relatorio.tipo}')(relatorio, destino)
+                destino.seek(0)
+                nome = f'{relatorio.tipo}-{relatorio.pk}.{relatorio.formato}'
+                relatorio.arquivo.save(nome, File(destino), save=False)
+        except Interrompido:
+            logger.warning('Relatório %s reservado por outro processo; execução abandonada', relatorio.pk)
+            return
+        except Exception as exc:
+            logger.exception('Erro ao gerar o relatório %s', relatorio.pk)
+            self.finalizar(relatorio, situacao=RequestRelatorio.SITUACAO_ERRO, erro=f'{type(exc).__name__}: {exc}')
+            return
+
+        concluido = self.finalizar(
+            relatorio,
+            situacao=RequestRelatorio.SITUACAO_CONCLUIDO,
+            arquivo=relatorio.arquivo.name,
+            progresso=100,
+        )
+        if not concluido:
+            relatorio.arquivo.delete(save=False)
+            return
+        logger.info('Relatório %s concluído em %.1fs', relatorio.pk, time.perf_counter() - inicio)
+
+    def finalizar(self, relatorio, **valores):
+        """
+        Grava o resultado, desde que o relatório ainda pertença a este processo
+        """
+        return RequestRelatorio.objects.filter(pk=relatorio.pk, reserva=relatorio.reserva).update(
+            data_conclusao=timezone.now(),
+            reservada_ate=None,
+            **valores,
+        )
+
+    def registrar_progresso(self, relatorio, processadas, total):
+        if not RequestRelatorio.objects.registrar_progresso(relatorio, processadas, total, self.duracao):
+            raise Interrompido
+
+    def gerar_exportacao(self, relatorio, destino):
+        """
+        Mesmo conteúdo de GET /solicitacoes/exportar/, com o progresso
+        registrado a cada EXPORTACAO_TAMANHO_LOTE linhas.
+
+        Os ids são lidos primeiro, na ordem da exportação, e as linhas depois,
+        em blocos: nenhuma consulta fica aberta enquanto o progresso é
+        gravado. No SQLite, uma leitura em andamento impediria a escrita
+        ("database is locked") quando outro processo grava no banco.
+        """
+        view = visao(relatorio.tipo, relatorio.parametros)
+        campos, colunas = view.colunas_exportacao(view.request)
+        queryset = view.filter_queryset(view.get_queryset())
+        lote = configuracao('EXPORTACAO_TAMANHO_LOTE')
+        ids = [
+            linha['id']
+            for linha in view.com_arquivadas(queryset, view.valores_exportacao(colunas)).iterator(chunk_size=lote)
+        ]
+        total = len(ids)
+        self.registrar_progresso(relatorio, 0, total)
+
+        arquivadas = view.incluir_arquivadas(view.request)
+
+        def ler(ids):
+            for inicio in range(0, total, lote):
+                bloco = ids[inicio:inicio + lote]
+                linhas = {linha['id']: linha for linha in Request.objects.filter(pk__in=bloco).values(*colunas)}
+                faltantes = set(bloco) - set(linhas)
+                if arquivadas and faltantes:
+                    linhas.update(
+                        (linha['id'], linha)
+                        for linha in RequestArquivada.objects.filter(pk__in=faltantes).values(*colunas)
+                    )
+                # Solicitações excluídas desde a leitura dos ids ficam de fora
+                yield from (linhas[pk] for pk in bloco if pk in linhas)
+                self.registrar_progresso(relatorio, inicio + len(bloco), total)
+
+        renderer = RENDERERS_EXPORTACAO[relatorio.formato]()
+        for parte in renderer.render_stream(ler(ids), campos):
+            destino.write(parte)
+
+    def gerar_estatisticas(self, relatorio, destino):
+        """
+        Mesmo conteúdo de GET /solicitacoes/estatisticas/
+        """
+        view = visao(relatorio.tipo, relatorio.parametros)
+        self.gravar_json(destino, view.calcular_estatisticas(view.request))
+
+    def gerar_estatisticas_serie(self, relatorio, destino):
+        """
+        Mesmo conteúdo de GET /solicitacoes/estatisticas/serie/
+        """
+        view = visao(relatorio.tipo, relatorio.parametros)
+        parametros = view.parametros_serie(view.request)
+        self.gravar_json(destino, view.montar_resposta_serie(parametros, RequestSerie.objects.serie(**parametros)))
+
+    @staticmethod
+    def gravar_json(destino, dados):
+        destino.write(json.dumps(dados, cls=JSONEncoder, ensure_ascii=False).encode())
+
+
+def trabalhar(intervalo):
+    """
+    Ponto de entrada de cada processo do run_workers
+    """
+    # O processo pai trata o SIGTERM encerrando os filhos
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    Trabalhador().executar_sempre(intervalo)
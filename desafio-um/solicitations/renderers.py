@@ -0,0 +1,182 @@
+"""
+Renderers customizados para a app solicitations
+"""
+
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # dependência opcional: sem ela, o JSON sai pelo json da stdlib
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # dependência opcional: sem ela, não há MessagePack
+    msgpack = None
+
+
+class _Eco:
+    """
+    Pseudo-arquivo para o csv.writer: devolve a linha em vez de gravá-la
+    """
+    def write(self, valor):
+        return valor
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Base dos renderers de exportação.
+
+    Além do render() padrão (usado nas respostas de erro), oferecem
+    render_stream(), que gera o conteúdo em blocos de bytes a partir de um
+    iterável de dicionários (ex.: queryset.values().iterator()), sem
+    carregar o resultado inteiro em memória.
+    """
+    charset = 'utf-8'
+    tamanho_bloco = 500
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        linhas = data if isinstance(data, list) else [data]
+        campos = list(linhas[0]) if linhas else []
+        return b''.join(self.render_stream(linhas, campos))
+
+    def render_stream(self, linhas, campos):
+        linhas = iter(linhas)
+        cabecalho = self.cabecalho(campos)
+        if cabecalho:
+            yield cabecalho.encode(self.charset)
+        while bloco := list(islice(linhas, self.tamanho_bloco)):
+            yield ''.join(self.linha(linha, campos) for linha in bloco).encode(self.charset)
+
+    def cabecalho(self, campos):
+        return ''
+
+    def linha(self, linha, campos):
+        raise NotImplementedError
+
+
+class CSVRenderer(StreamingRenderer):
+    """
+    CSV com cabeçalho; valores nulos viram células vazias
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def __init__(self):
+        self.escritor = csv.writer(_Eco())
+
+    def cabecalho(self, campos):
+        return self.escritor.writerow(campos)
+
+    def linha(self, linha, campos):
+        return self.escritor.writerow([
+            '' if linha[campo] is None else representar(linha[campo]) for campo in campos
+        ])
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """
+    NDJSON: um objeto JSON por linha
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def linha(self, linha, campos):
+        objeto = {campo: representar(linha[campo]) for campo in campos}
+        return json.dumps(objeto, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def representar(valor):
+    """
+    Converte o valor como os serializers da API o fariam
+    (decimais como texto, datas ISO 8601 no fuso horário atual)
+    """
+    if isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        texto = valor.isoformat()
+        return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+# Valores que nem o orjson nem o msgpack serializam (Decimal, datas, lazy
+# strings, ...) são convertidos como no JSONRenderer do DRF
+_converter = JSONEncoder().default
+
+# Bytes de U+2028 e U+2029, escapados pelo JSONRenderer
+_SEPARADORES_DE_LINHA = ('\u2028'.encode(), '\u2029'.encode())
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer com o orjson, em uma fração do tempo de CPU do json da
+    stdlib. Para os dados da API (textos, inteiros, decimais e datas) a
+    saída é a mesma do JSONRenderer; com floats, não necessariamente:
+    expoentes saem sem sinal e zeros (1e16 e 1e-7, em vez de 1e+16 e
+    1e-07; mesmo valor), e NaN e infinito viram null, onde o JSONRenderer
+    (STRICT_JSON) levantaria um erro.
+
+    Datas e horas passam pelo encoder do DRF (OPT_PASSTHROUGH_DATETIME), e
+    Decimal também, para manter o formato atual (ex.: "Z" em UTC). Recorre
+    ao JSONRenderer quando o orjson não está instalado, com indentação
+    (`application/json; indent=4`, API navegável), com UNICODE_JSON ou
+    COMPACT_JSON desativados e quando o orjson não consegue serializar os
+    dados (ex.: inteiros acima de 64 bits).
+    """
+    opcoes = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_converter, option=self.opcoes)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        for separador in _SEPARADORES_DE_LINHA:
+            if separador in ret:
+                ret = ret.replace(separador, separador.decode().encode('unicode_escape'))
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack (`Accept: application/msgpack`), para chamadas entre
+    serviços. Os valores são os mesmos do JSON: decimais e datas seguem como
+    texto, no formato dos serializers.
+
+    Disponível apenas com o pacote msgpack instalado (veja RENDERERS_BINARIOS).
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_converter, use_bin_type=True)
+
+
+# Renderers binários oferecidos na negociação de conteúdo, conforme as
+# dependências opcionais instaladas
+RENDERERS_BINARIOS = [MessagePackRenderer] if msgpack is not None else []
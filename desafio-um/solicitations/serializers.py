@@ -2,11 +2,51 @@
 Serializers para a app solicitations
 """
 
+from datetime import timedelta
+from decimal import Decimal
+from operator import itemgetter
+
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Request
+from .conf import configuracao
+from .models import DuracaoDias, Request, RequestRelatorio
+from .series import GRANULARIDADE_MES, GRANULARIDADES
 
 
-class RequestSerializer(serializers.ModelSerializer):
+class CamposSelecionaveisMixin:
+    """
+    Permite restringir a representação a alguns campos (`campos`, vindo de
+    `?fields=` / `?omit=`) e informa as colunas do modelo que esses campos
+    leem, para que a view consulte apenas elas (only() / values()).
+    
+    Campos calculados declaram em `origens` as colunas de que dependem.
+    """
+    origens = {
+        'tipo_display': ['tipo'],
+        'status_display': ['status'],
+        'duracao_dias': ['data_inicio', 'data_fim'],
+        'pode_ser_cancelada': ['status'],
+        'pode_ser_aprovada': ['status'],
+    }
+    
+    def __init__(self, *args, campos=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if campos is not None:
+            for nome in set(self.fields) - set(campos):
+                self.fields.pop(nome)
+    
+    @classmethod
+    def colunas_dos_campos(cls, campos):
+        """
+        Colunas do modelo lidas pelos `campos`, sem repetições
+        """
+        colunas = []
+        for campo in campos:
+            colunas.extend(cls.origens.get(campo, [campo]))
+        return list(dict.fromkeys(colunas))
+
+
+class RequestSerializer(CamposSelecionaveisMixin, serializers.ModelSerializer):
     """
     Serializer completo para o modelo Request
     """
@@ -35,11 +75,12 @@ class RequestSerializer(serializers.ModelSerializer):
             'observacoes',
             'data_criacao',
             'data_atualizacao',
+            'versao',
             'duracao_dias',
             'pode_ser_cancelada',
             'pode_ser_aprovada',
         ]
-        read_only_fields = ['id', 'data_criacao', 'data_atualizacao']
+        read_only_fields = ['id', 'data_criacao', 'data_atualizacao', 'versao']
     
     def validate(self, attrs):
         """
@@ -132,7 +173,7 @@ class RequestUpdateSerializer(serializers.ModelSerializer):
         return super().validate(attrs)
 
 
-class RequestListSerializer(serializers.ModelSerializer):
+class RequestListSerializer(CamposSelecionaveisMixin, serializers.ModelSerializer):
     """
     Serializer otimizado para listagem de solicitações
     Retorna apenas campos essenciais
@@ -155,6 +196,96 @@ class RequestListSerializer(serializers.ModelSerializer):
             'data_criacao',
             'duracao_dias',
         ]
+    
+    # Na listagem, duracao_dias é calculada no banco (anotação `duracao`)
+    origens = {**CamposSelecionaveisMixin.origens, 'duracao_dias': []}
+    
+    # Colunas lidas pelo caminho rápido da listagem (sem descricao e observacoes)
+    colunas = ['id', 'tipo', 'titulo', 'status', 'valor', 'solicitante', 'data_criacao']
+    
+    @classmethod
+    def valores(cls, queryset, extras=(), campos=None):
+        """
+        Restringe o queryset às colunas da listagem, com duracao_dias
+        calculada no banco. `extras` são colunas adicionais que o chamador
+        precisa nas linhas (ex.: campos de ordenação usados pelo cursor).
+        Com `campos`, lê apenas as colunas desses campos.
+        """
+        colunas = cls.colunas if campos is None else cls.colunas_dos_campos(campos)
+        extras = [campo for campo in dict.fromkeys(extras) if campo not in colunas]
+        if campos is not None and 'duracao_dias' not in campos:
+            return queryset.values(*colunas, *extras)
+        return queryset.values(*colunas, *extras, duracao=DuracaoDias('data_inicio', 'data_fim'))
+    
+    @classmethod
+    def representar(cls, linhas, campos=None):
+        """
+        Monta a listagem a partir das linhas de valores(), com a mesma
+        saída do serializer e sem instanciar modelos nem campos do DRF
+        """
+        if campos is None:
+            return [_representar_linha_listagem(linha) for linha in linhas]
+        conversores = [(campo, _conversores_listagem[campo]) for campo in campos]
+        return [{campo: converter(linha) for campo, converter in conversores} for linha in linhas]
+
+
+def _compilar_representacao_listagem():
+    """
+    Gera a função que converte uma linha de RequestListSerializer.valores()
+    na representação do serializer, e os conversores de cada campo (usados
+    com `?fields=` / `?omit=`). Rótulos e formatos são resolvidos uma única
+    vez aqui; por linha restam apenas consultas a dicionários.
+    """
+    tipo_display = dict(Request.TIPO_CHOICES).get
+    status_display = dict(Request.STATUS_CHOICES).get
+    centavos = Decimal(1).scaleb(-Request._meta.get_field('valor').decimal_places)
+    is_aware = timezone.is_aware
+    localtime = timezone.localtime
+    
+    def data_hora(valor):
+        # Mesmo formato do DateTimeField do DRF: fuso atual, UTC como "Z"
+        if is_aware(valor):
+            valor = localtime(valor)
+        texto = valor.isoformat()
+        return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+    
+    def representar(linha):
+        tipo = linha['tipo']
+        status = linha['status']
+        valor = linha['valor']
+        return {
+            'id': linha['id'],
+            'tipo': tipo,
+            'tipo_display': tipo_display(tipo, tipo),
+            'titulo': linha['titulo'],
+            'status': status,
+            'status_display': status_display(status, status),
+            'valor': None if valor is None else format(valor.quantize(centavos), 'f'),
+            'solicitante': linha['solicitante'],
+            'data_criacao': data_hora(linha['data_criacao']),
+            'duracao_dias': linha['duracao'],
+        }
+    
+    def decimal(valor):
+        return None if valor is None else format(valor.quantize(centavos), 'f')
+    
+    conversores = {
+        'id': itemgetter('id'),
+        'tipo': itemgetter('tipo'),
+        'tipo_display': lambda linha: tipo_display(linha['tipo'], linha['tipo']),
+        'titulo': itemgetter('titulo'),
+        'status': itemgetter('status'),
+        'status_display': lambda linha: status_display(linha['status'], linha['status']),
+        'valor': lambda linha: decimal(linha['valor']),
+        'solicitante': itemgetter('solicitante'),
+        'data_criacao': lambda linha: data_hora(linha['data_criacao']),
+        'duracao_dias': itemgetter('duracao'),
+    }
+    
+    return representar, conversores
+
+
+_representar_linha_listagem, _conversores_listagem = _compilar_representacao_listagem()
 
 
 class RequestAcaoSerializer(serializers.Serializer):
@@ -167,3 +298,160 @@ class RequestAcaoSerializer(serializers.Serializer):
         max_length=500,
         help_text='Observações sobre a ação realizada'
     )
+
+
+class RequestAcaoEmMassaSerializer(RequestAcaoSerializer):
+    """
+    Serializer para ações de aprovação, rejeição e cancelamento em massa
+    """
+    acao = serializers.ChoiceField(
+        choices=list(Request.TRANSICOES),
+        help_text='Ação a aplicar: aprovar, rejeitar ou cancelar'
+    )
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        help_text='IDs das solicitações'
+    )
+    
+    def validate_ids(self, ids):
+        """
+        Remove duplicados e aplica o limite de IDs por requisição
+        """
+        ids = list(dict.fromkeys(ids))
+        max_ids = configuracao('ACOES_EM_MASSA_MAX_IDS')
+        if len(ids) > max_ids:
+            raise serializers.ValidationError(f'Máximo de {max_ids} IDs por requisição.')
+        return ids
+
+
+class RequestCriacaoEmMassaSerializer(serializers.Serializer):
+    """
+    Serializer para os parâmetros da criação em massa
+    """
+    MODO_ATOMICO = 'atomico'
+    MODO_PARCIAL = 'parcial'
+    
+    modo = serializers.ChoiceField(
+        choices=[MODO_ATOMICO, MODO_PARCIAL],
+        default=MODO_ATOMICO,
+        help_text='atomico: nada é criado se algum item for inválido; parcial: cria os itens válidos'
+    )
+    tamanho_lote = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        help_text='Quantidade de linhas por INSERT'
+    )
+
+
+class RequestSerieParametrosSerializer(serializers.Serializer):
+    """
+    Serializer para os parâmetros da série temporal (GET /solicitacoes/estatisticas/serie/)
+    """
+    AGRUPAMENTOS = {
+        'tipo_status': ('tipo', 'status'),
+        'tipo': ('tipo',),
+        'status': ('status',),
+        'periodo': (),
+    }
+    
+    granularidade = serializers.ChoiceField(
+        choices=GRANULARIDADES,
+        default=GRANULARIDADE_MES,
+        help_text='dia, semana (a partir de segunda-feira) ou mes'
+    )
+    inicio = serializers.DateField(
+        required=False,
+        help_text='Primeira data da série (padrão: um ano antes do fim)'
+    )
+    fim = serializers.DateField(
+        required=False,
+        help_text='Última data da série (padrão: hoje)'
+    )
+    tipo = serializers.MultipleChoiceField(choices=Request.TIPO_CHOICES, required=False)
+    status = serializers.MultipleChoiceField(choices=Request.STATUS_CHOICES, required=False)
+    agrupar = serializers.ChoiceField(
+        choices=list(AGRUPAMENTOS),
+        default='tipo_status',
+        help_text='Um ponto por período e por tipo/status, tipo, status ou apenas por período'
+    )
+    
+    def validate(self, attrs):
+        fim = attrs.get('fim') or timezone.localdate()
+        inicio = attrs.get('inicio') or fim - timedelta(days=365)
+        if inicio > fim:
+            raise serializers.ValidationError({'fim': 'A data final deve ser igual ou posterior à inicial.'})
+        attrs['inicio'], attrs['fim'] = inicio, fim
+        attrs['tipo'] = sorted(attrs.get('tipo', []))
+        attrs['status'] = sorted(attrs.get('status', []))
+        attrs['agrupar'] = self.AGRUPAMENTOS[attrs['agrupar']]
+        return attrs
+
+
+class RequestMudancasParametrosSerializer(serializers.Serializer):
+    """
+    Serializer para os parâmetros do log de mudanças (GET /solicitacoes/mudancas/)
+    """
+    desde = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text='Token de retomada devolvido em "proximo" pela chamada anterior'
+    )
+    limite = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        help_text='Máximo de mudanças lidas do log nesta chamada'
+    )
+    
+    def validate_limite(self, limite):
+        maximo = configuracao('MUDANCAS_LIMITE_MAXIMO')
+        if limite > maximo:
+            raise serializers.ValidationError(f'Máximo de {maximo} mudanças por requisição.')
+        return limite
+
+
+class RequestRelatorioSerializer(serializers.ModelSerializer):
+    """
+    Pedido de relatório em segundo plano e o seu andamento. Na criação,
+    apenas tipo, formato (opcional) e parametros são informados.
+    """
+    situacao_display = serializers.CharField(source='get_situacao_display', read_only=True)
+    
+    class Meta:
+        model = RequestRelatorio
+        fields = [
+            'id',
+            'tipo',
+            'formato',
+            'parametros',
+            'situacao',
+            'situacao_display',
+            'progresso',
+            'linhas_processadas',
+            'linhas_total',
+            'arquivo',
+            'erro',
+            'data_criacao',
+            'data_inicio',
+            'data_conclusao',
+        ]
+        read_only_fields = [
+            'situacao',
+            'progresso',
+            'linhas_processadas',
+            'linhas_total',
+            'arquivo',
+            'erro',
+            'data_criacao',
+            'data_inicio',
+            'data_conclusao',
+        ]
+        extra_kwargs = {
+            'formato': {'required': False},
+            'parametros': {'help_text': 'Parâmetros de consulta do endpoint equivalente, ex.: {"status": ["aprovado"]}'},
+        }
+    
+    def validate_parametros(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Informe um objeto {nome: valor ou lista de valores}.')
+        return value
@@ -0,0 +1,130 @@
+"""
+Séries temporais das solicitações (RequestSerie)
+
+Cada linha acumula as solicitações criadas em um período (dia, semana a
+partir de segunda-feira ou mês, no fuso do projeto) por tipo e status:
+quantidade, quantidade com valor, soma dos valores e um histograma dos
+valores em faixas logarítmicas.
+
+O histograma permite estimar percentis (p50, p90) somando linhas, sem ler
+as solicitações: a faixa `i` contém os valores em (γ^(i-1), γ^i], com
+γ = (1 + ERRO_RELATIVO) / (1 - ERRO_RELATIVO), e é representada pelo valor
+2·γ^i / (γ + 1), que dista no máximo ERRO_RELATIVO de qualquer valor da faixa.
+"""
+
+import math
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+
+GRANULARIDADE_DIA = 'dia'
+GRANULARIDADE_SEMANA = 'semana'
+GRANULARIDADE_MES = 'mes'
+
+GRANULARIDADES = [GRANULARIDADE_DIA, GRANULARIDADE_SEMANA, GRANULARIDADE_MES]
+
+# Erro relativo máximo dos percentis estimados pelo histograma
+ERRO_RELATIVO = 0.01
+GAMA = (1 + ERRO_RELATIVO) / (1 - ERRO_RELATIVO)
+LOG_GAMA = math.log(GAMA)
+
+CENTAVOS = Decimal('0.01')
+
+
+def inicio_periodo(data, granularidade):
+    """
+    Primeiro dia do período (dia, semana ou mês) que contém `data`
+    """
+    if granularidade == GRANULARIDADE_SEMANA:
+        return data - timedelta(days=data.weekday())
+    if granularidade == GRANULARIDADE_MES:
+        return data.replace(day=1)
+    return data
+
+
+def periodos(data_criacao):
+    """
+    [(granularidade, início do período)] de uma solicitação criada em `data_criacao`
+    """
+    if timezone.is_aware(data_criacao):
+        data_criacao = timezone.localtime(data_criacao)
+    data = data_criacao.date()
+    return [(granularidade, inicio_periodo(data, granularidade)) for granularidade in GRANULARIDADES]
+
+
+def faixa(valor):
+    """
+    Faixa do histograma em que `valor` (positivo) é contado
+    """
+    return math.ceil(math.log(valor) / LOG_GAMA)
+
+
+def valor_da_faixa(indice):
+    """
+    Valor que representa a faixa `indice` do histograma
+    """
+    return Decimal(2 * GAMA ** indice / (GAMA + 1)).quantize(CENTAVOS)
+
+
+def percentis(histograma, ps):
+    """
+    Estima os percentis `ps` (0 a 100, em ordem crescente) dos valores
+    contados em `histograma` ({faixa: quantidade}), em uma única passada
+    pelas faixas; None para cada um se ele estiver vazio
+    """
+    faixas = sorted((int(indice), quantidade) for indice, quantidade in histograma.items())
+    total = sum(quantidade for _, quantidade in faixas)
+    if not total:
+        return [None] * len(ps)
+    # Posição de cada percentil pelo método "nearest rank"
+    posicoes = [max(1, math.ceil(total * p / 100)) for p in ps]
+    resultado = []
+    acumulado = 0
+    for indice, quantidade in faixas:
+        acumulado += quantidade
+        while len(resultado) < len(posicoes) and acumulado >= posicoes[len(resultado)]:
+            resultado.append(valor_da_faixa(indice))
+    return resultado
+
+
+def somar_histogramas(destino, origem, sinal=1):
+    """
+    Soma (ou subtrai, com `sinal` -1) o histograma `origem` em `destino`,
+    descartando as faixas que zeram. As chaves são strings, como no JSON.
+    """
+    for indice, quantidade in origem.items():
+        indice = str(indice)
+        restante = destino.get(indice, 0) + sinal * quantidade
+        if restante:
+            destino[indice] = restante
+        else:
+            destino.pop(indice, None)
+    return destino
+
+
+class Acumulado:
+    """
+    Quantidade, valores e histograma de um período/tipo/status
+    """
+    __slots__ = ('quantidade', 'quantidade_valor', 'valor_total', 'histograma')
+
+    def __init__(self):
+        self.quantidade = 0
+        self.quantidade_valor = 0
+        self.valor_total = Decimal('0')
+        self.histograma = Counter()
+
+    def adicionar(self, valor, sinal=1):
+        self.quantidade += sinal
+        if valor is not None:
+            self.quantidade_valor += sinal
+            self.valor_total += sinal * valor
+            self.histograma[str(faixa(valor))] += sinal
+
+    def vazio(self):
+        return not self.quantidade and not self.quantidade_valor and not self.valor_total and not any(
+            self.histograma.values()
+        )
@@ -0,0 +1,30 @@
+"""
+Sinais da app solicitations
+"""
+
+from collections import namedtuple
+
+from django.dispatch import Signal
+
+
+# Operações que alteram solicitações
+OPERACAO_CRIACAO = 'criacao'
+OPERACAO_ATUALIZACAO = 'atualizacao'
+OPERACAO_TRANSICAO = 'transicao'
+OPERACAO_EXCLUSAO = 'exclusao'
+
+# Campos de uma solicitação que as estruturas derivadas (contadores, séries, etc.) acompanham
+CAMPOS_ESTADO = ('tipo', 'status', 'valor', 'data_criacao')
+
+# Estado de uma solicitação antes ou depois de uma escrita
+Estado = namedtuple('Estado', CAMPOS_ESTADO)
+
+# Uma alteração: `antes` é None na criação e `depois` é None na exclusão
+Alteracao = namedtuple('Alteracao', ['operacao', 'pk', 'antes', 'depois'])
+
+
+# Enviado dentro da mesma transação de toda escrita em Request, com a lista
+# de alterações aplicadas (argumento `alteracoes`). Os receptores podem
+# atualizar tabelas derivadas e terão suas escritas confirmadas ou desfeitas
+# junto com a alteração original.
+solicitacoes_alteradas = Signal()
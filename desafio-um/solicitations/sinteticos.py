@@ -0,0 +1,186 @@
+"""
+Gerador de solicitações sintéticas com distribuições próximas das de produção
+
+Usado pelo comando seed_solicitacoes para popular bancos de teste de carga:
+
+- tipos desbalanceados (reembolsos são a maioria);
+- status conforme a idade: as recentes ainda pendentes ou em análise, as
+  antigas quase todas finalizadas;
+- solicitantes com distribuição de Zipf (poucas pessoas abrem muitas);
+- criação espalhada pelos últimos `dias`, com mais volume nos recentes;
+- períodos válidos (férias de 5 a 30 dias, treinamentos de 1 a 5 dias,
+  sempre depois da criação) e valores com distribuição log-normal.
+
+As solicitações são geradas sem passar por save()/full_clean(); use
+datas_explicitas() ao inseri-las para manter as datas de criação e de
+atualização geradas.
+"""
+
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate, product
+
+from django.utils import timezone
+
+from .models import Request
+
+
+PRIMEIROS_NOMES = (
+    'Ana Bruno Carlos Daniela Eduardo Fernanda Gabriel Helena Igor Juliana Lucas Mariana '
+    'Nicolas Olívia Paulo Queila Rafael Sofia Thiago Úrsula Vitor Yasmin Alice Bernardo '
+    'Camila Diego Elisa Felipe Giovana Henrique Isabela João Larissa Mateus Natália Pedro'
+).split()
+SOBRENOMES = (
+    'Silva Santos Souza Costa Lima Oliveira Pereira Almeida Ferreira Rodrigues Gomes '
+    'Martins Araújo Barbosa Ribeiro Carvalho Rocha Dias Moreira Cardoso Teixeira Mendes'
+).split()
+
+CATEGORIAS_REEMBOLSO = [
+    'táxi', 'hotel', 'passagem aérea', 'alimentação', 'combustível', 'estacionamento',
+    'material de escritório', 'internet', 'pedágio', 'equipamento',
+]
+CIDADES = ['São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Curitiba', 'Porto Alegre', 'Recife', 'Salvador']
+CURSOS = [
+    'Curso de Inglês', 'Certificação AWS', 'Curso de Python', 'Congresso de Tecnologia',
+    'Workshop de Liderança', 'Curso de Espanhol', 'Certificação PMP', 'Treinamento de Segurança',
+]
+MESES = [
+    'janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho',
+    'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro',
+]
+MOTIVOS_REJEICAO = [
+    'Comprovante ilegível.', 'Fora da política de reembolso.', 'Período conflita com entrega do projeto.',
+    'Orçamento de treinamento esgotado.', 'Solicitação duplicada.',
+]
+
+TIPOS = [(Request.TIPO_REEMBOLSO, 55), (Request.TIPO_FERIAS, 30), (Request.TIPO_TREINAMENTO, 15)]
+
+# (idade máxima em dias, pesos por status)
+STATUS_POR_IDADE = [
+    (7, [
+        (Request.STATUS_PENDENTE, 50), (Request.STATUS_EM_ANALISE, 25), (Request.STATUS_APROVADO, 15),
+        (Request.STATUS_REJEITADO, 6), (Request.STATUS_CANCELADO, 4),
+    ]),
+    (45, [
+        (Request.STATUS_PENDENTE, 12), (Request.STATUS_EM_ANALISE, 13), (Request.STATUS_APROVADO, 50),
+        (Request.STATUS_REJEITADO, 17), (Request.STATUS_CANCELADO, 8),
+    ]),
+    (math.inf, [
+        (Request.STATUS_PENDENTE, 1), (Request.STATUS_EM_ANALISE, 2), (Request.STATUS_APROVADO, 67),
+        (Request.STATUS_REJEITADO, 20), (Request.STATUS_CANCELADO, 10),
+    ]),
+]
+
+DURACOES_FERIAS = [(5, 10), (10, 30), (15, 30), (20, 15), (30, 15)]
+
+
+def _pesos(opcoes):
+    valores, pesos = zip(*opcoes)
+    return list(valores), list(accumulate(pesos))
+
+
+@contextmanager
+def datas_explicitas():
+    """
+    Desliga temporariamente o auto_now/auto_now_add de data_criacao e
+    data_atualizacao, para inserir as datas geradas
+    """
+    campos = [Request._meta.get_field('data_criacao'), Request._meta.get_field('data_atualizacao')]
+    originais = [(campo.auto_now, campo.auto_now_add) for campo in campos]
+    for campo in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, (auto_now, auto_now_add) in zip(campos, originais):
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+class GeradorSolicitacoes:
+    """
+    Gera lotes de Request (não salvos) de forma determinística para a `semente`
+    """
+
+    def __init__(self, semente=42, dias=730, pessoas=2000, agora=None):
+        self.rng = random.Random(semente)
+        self.dias = dias
+        self.agora = agora or timezone.now()
+
+        nomes = [f'{nome} {sobrenome}' for nome, sobrenome in product(PRIMEIROS_NOMES, SOBRENOMES)]
+        nomes += [f'{nome} {sobrenome} {segundo}' for nome, sobrenome, segundo in product(
+            PRIMEIROS_NOMES, SOBRENOMES, SOBRENOMES[:3]
+        )]
+        self.rng.shuffle(nomes)
+        self.solicitantes = nomes[:pessoas]
+        # Zipf-Mandelbrot: a pessoa de posição k abre ~1/(k + 10)^1,1 das solicitações
+        # (a primeira, ~2%; os 10% mais ativos, ~60%)
+        self.pesos_solicitantes = list(accumulate(
+            1 / (k + 10) ** 1.1 for k in range(1, len(self.solicitantes) + 1)
+        ))
+
+        self.tipos, self.pesos_tipos = _pesos(TIPOS)
+        self.status_por_idade = [(limite, *_pesos(opcoes)) for limite, opcoes in STATUS_POR_IDADE]
+        self.duracoes_ferias, self.pesos_ferias = _pesos(DURACOES_FERIAS)
+
+    def lote(self, quantidade):
+        rng = self.rng
+        tipos = rng.choices(self.tipos, cum_weights=self.pesos_tipos, k=quantidade)
+        solicitantes = rng.choices(self.solicitantes, cum_weights=self.pesos_solicitantes, k=quantidade)
+        return [self.solicitacao(tipo, solicitante) for tipo, solicitante in zip(tipos, solicitantes)]
+
+    def solicitacao(self, tipo, solicitante):
+        rng = self.rng
+        # Mais volume nos dias recentes (a empresa cresce)
+        idade = self.dias * rng.random() ** 1.5
+        criacao = self.agora - timedelta(days=idade)
+        status = self.status(idade)
+
+        solicitacao = Request(
+            tipo=tipo,
+            solicitante=solicitante,
+            status=status,
+            data_criacao=criacao,
+            data_atualizacao=criacao,
+        )
+        if tipo == Request.TIPO_REEMBOLSO:
+            categoria = rng.choice(CATEGORIAS_REEMBOLSO)
+            cidade = rng.choice(CIDADES)
+            solicitacao.titulo = f'Reembolso de {categoria} - {cidade}'
+            solicitacao.descricao = f'Despesa com {categoria} em {cidade} durante visita a cliente.'
+            solicitacao.valor = self.valor(mediana=120, minimo=5, maximo=20000)
+        elif tipo == Request.TIPO_FERIAS:
+            inicio = criacao.date() + timedelta(days=rng.randint(7, 120))
+            duracao = rng.choices(self.duracoes_ferias, cum_weights=self.pesos_ferias)[0]
+            solicitacao.titulo = f'Férias de {MESES[inicio.month - 1]}'
+            solicitacao.descricao = f'Férias de {duracao} dias a partir de {inicio:%d/%m/%Y}.'
+            solicitacao.data_inicio = inicio
+            solicitacao.data_fim = inicio + timedelta(days=duracao - 1)
+        else:
+            curso = rng.choice(CURSOS)
+            inicio = criacao.date() + timedelta(days=rng.randint(5, 90))
+            solicitacao.titulo = curso
+            solicitacao.descricao = f'{curso} em {rng.choice(CIDADES)}, com inscrição e material inclusos.'
+            solicitacao.data_inicio = inicio
+            solicitacao.data_fim = inicio + timedelta(days=rng.randint(0, 4))
+            solicitacao.valor = self.valor(mediana=1500, minimo=100, maximo=15000)
+
+        if status != Request.STATUS_PENDENTE:
+            # Decidida algumas horas ou dias depois da criação
+            atualizacao = criacao + timedelta(hours=rng.uniform(1, 240))
+            solicitacao.data_atualizacao = min(atualizacao, self.agora)
+            solicitacao.versao = 2
+            if status == Request.STATUS_REJEITADO:
+                solicitacao.observacoes = rng.choice(MOTIVOS_REJEICAO)
+        return solicitacao
+
+    def status(self, idade):
+        for limite, opcoes, pesos in self.status_por_idade:
+            if idade < limite:
+                return self.rng.choices(opcoes, cum_weights=pesos)[0]
+
+    def valor(self, mediana, minimo, maximo):
+        valor = self.rng.lognormvariate(math.log(mediana), 0.9)
+        return Decimal(min(max(valor, minimo), maximo)).quantize(Decimal('0.01'))
@@ -2,14 +2,47 @@
 Testes para a app solicitations
 """
 
-from django.test import TestCase
+import importlib.util
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.test import TestCase, override_settings
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework import status
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 from decimal import Decimal
 
-from .models import Request
+from .filters import RequestFilter
+from .models import (
+    ConflitoDeVersao,
+    Request,
+    RequestArquivada,
+    RequestMudanca,
+    RequestRelatorio,
+    RequestSerie,
+    RequestSummary,
+    RequestWebhook,
+    RequestWebhookEntrega,
+)
+
+
+# Cache compartilhado entre processos, exigido pelo cache de respostas
+CACHE_COMPARTILHADO = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'solicitacoes-testes-cache'),
+    }
+}
 
 
 class RequestModelTest(TestCase):
@@ -293,3 +326,3132 @@ class RequestAPITest(APITestCase):
         self.assertIn('next', response.data)
         self.assertIn('previous', response.data)
 
+
+
+@override_settings(SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0})
+class RequestListagemRapidaTest(APITestCase):
+    """
+    Testes do caminho rápido da listagem (values() + representação sem serializer)
+    """
+    
+    def setUp(self):
+        self.list_url = '/api/v1/solicitacoes/'
+        Request.objects.create(
+            tipo=Request.TIPO_FERIAS,
+            titulo='Férias de verão',
+            descricao='Viagem em família',
+            solicitante='Ana Costa',
+            data_inicio=date(2024, 12, 20),
+            data_fim=date(2025, 1, 10),
+        ).aprovar('Boas férias')
+        Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Táxi',
+            descricao='Viagem ao cliente',
+            solicitante='Bruno Lima',
+            valor=Decimal('80.5'),
+        )
+        Request.objects.create(
+            tipo=Request.TIPO_TREINAMENTO,
+            titulo='Curso de inglês',
+            descricao='Mensalidade',
+            solicitante='Carlos Souza',
+            valor=Decimal('1500.00'),
+            data_inicio=date(2025, 3, 1),
+            data_fim=date(2025, 3, 1),
+        )
+    
+    def test_saida_igual_ao_serializer(self):
+        """Testa que o JSON é idêntico, byte a byte, ao do RequestListSerializer"""
+        from rest_framework.renderers import JSONRenderer
+        from .serializers import RequestListSerializer
+        
+        for parametros in ['', 'paginacao=cursor', 'search=viagem', 'ordering=valor', 'ordering=-data_inicio&paginacao=cursor']:
+            response = self.client.get(f'{self.list_url}?{parametros}')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids = [item['id'] for item in response.data['results']]
+            solicitacoes = sorted(Request.objects.filter(pk__in=ids), key=lambda s: ids.index(s.pk))
+            esperado = JSONRenderer().render(RequestListSerializer(solicitacoes, many=True).data)
+            self.assertEqual(JSONRenderer().render(response.data['results']), esperado, parametros)
+            self.assertIn(JSONRenderer().render(response.data['results'])[1:-1], response.content)
+        
+        duracoes = {item['tipo']: item['duracao_dias'] for item in self.client.get(self.list_url).data['results']}
+        self.assertEqual(duracoes, {'ferias': 22, 'reembolso': None, 'treinamento': 1})
+    
+    def test_colunas_e_sem_instanciar_modelos(self):
+        """Testa que a página não lê descricao/observacoes nem cria objetos Request"""
+        from unittest import mock
+        
+        with CaptureQueriesContext(connection) as consultas:
+            with mock.patch.object(Request, 'from_db', side_effect=AssertionError('modelo instanciado')):
+                response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        pagina = consultas.captured_queries[-1]['sql']
+        self.assertIn('julianday', pagina)
+        self.assertNotIn('descricao', pagina)
+        self.assertNotIn('observacoes', pagina)
+
+
+class RequestCursorPaginationTest(APITestCase):
+    """Testes para a paginação por cursor (keyset)"""
+    
+    def setUp(self):
+        """Cria solicitações com data de criação empatada e valores nulos"""
+        self.list_url = '/api/v1/solicitacoes/'
+        for i in range(25):
+            if i % 3 == 0:
+                Request.objects.create(
+                    tipo=Request.TIPO_FERIAS,
+                    titulo=f'Férias {i}',
+                    descricao='Férias programadas',
+                    solicitante='João Silva',
+                    data_inicio=date.today(),
+                    data_fim=date.today() + timedelta(days=i),
+                )
+            else:
+                Request.objects.create(
+                    tipo=Request.TIPO_REEMBOLSO,
+                    titulo=f'Reembolso {i}',
+                    descricao='Despesas de viagem',
+                    solicitante='Maria Santos',
+                    valor=Decimal(10 * (i % 4) + 5),
+                )
+        # Força empates na ordenação padrão para exercitar o desempate por id
+        Request.objects.update(data_criacao=Request.objects.first().data_criacao)
+    
+    def percorrer(self, url, link='next'):
+        """Segue os links de paginação e retorna os ids na ordem recebida"""
+        ids = []
+        paginas = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data[link]
+            paginas += 1
+            self.assertLess(paginas, 10)
+        return ids
+    
+    def test_primeira_pagina_sem_count(self):
+        """Testa que o modo cursor não retorna count"""
+        response = self.client.get(f'{self.list_url}?paginacao=cursor')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+    
+    def test_percorrer_ordenacao_padrao(self):
+        """Testa que todas as páginas cobrem todos os registros sem repetição"""
+        ids = self.percorrer(f'{self.list_url}?paginacao=cursor')
+        esperado = list(Request.objects.order_by('-data_criacao', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, esperado)
+    
+    def test_percorrer_ordenacao_por_valor_com_nulos(self):
+        """Testa a ordenação por campo anulável e não único"""
+        for ordering in ['valor', '-valor']:
+            ids = self.percorrer(f'{self.list_url}?paginacao=cursor&ordering={ordering}')
+            self.assertEqual(len(ids), 25)
+            self.assertEqual(len(set(ids)), 25)
+            valores = [Request.objects.get(pk=pk).valor for pk in ids]
+            nao_nulos = [v for v in valores if v is not None]
+            self.assertEqual(valores[:len(nao_nulos)], nao_nulos)
+            self.assertEqual(nao_nulos, sorted(nao_nulos, reverse=ordering.startswith('-')))
+    
+    def test_pagina_anterior(self):
+        """Testa navegação para trás a partir da última página"""
+        url = f'{self.list_url}?paginacao=cursor&ordering=valor'
+        ida = self.percorrer(url)
+        
+        # Vai até a última página e volta pelos links "previous"
+        response = self.client.get(url)
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+        volta = [item['id'] for item in response.data['results']]
+        volta = self.percorrer(response.data['previous'], link='previous') + volta
+        self.assertEqual(sorted(volta), sorted(ida))
+    
+    def test_filtros_combinados(self):
+        """Testa o cursor junto com os filtros do RequestFilter"""
+        ids = self.percorrer(f'{self.list_url}?paginacao=cursor&tipo=reembolso&valor_min=20')
+        esperado = set(
+            Request.objects.filter(tipo='reembolso', valor__gte=20).values_list('id', flat=True)
+        )
+        self.assertEqual(set(ids), esperado)
+        self.assertEqual(len(ids), len(esperado))
+    
+    def test_cursor_invalido(self):
+        """Testa que um cursor inválido retorna 404"""
+        response = self.client.get(f'{self.list_url}?cursor=invalido')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_cursor_de_outra_ordenacao(self):
+        """Testa que o cursor não pode ser reaproveitado com outra ordenação"""
+        response = self.client.get(f'{self.list_url}?paginacao=cursor')
+        next_url = response.data['next'] + '&ordering=valor'
+        response = self.client.get(next_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0, 'LISTAGEM_LIMITE_CONTAGEM': 5})
+class RequestContagemListagemTest(APITestCase):
+    """Testes da contagem da listagem paginada por número (sem COUNT(*) exato)"""
+    
+    def setUp(self):
+        self.list_url = '/api/v1/solicitacoes/'
+        for i in range(23):
+            Request.objects.create(
+                tipo=Request.TIPO_REEMBOLSO if i % 2 else Request.TIPO_FERIAS,
+                titulo=f'Solicitação {i}',
+                descricao='Solicitação de teste',
+                solicitante='Ana Costa' if i < 14 else 'Bruno Lima',
+                valor=Decimal('10.00') if i % 2 else None,
+                data_inicio=None if i % 2 else date(2025, 3, 1),
+                data_fim=None if i % 2 else date(2025, 3, 5),
+            )
+        Request.objects.filter(solicitante='Bruno Lima', tipo=Request.TIPO_REEMBOLSO).update(
+            status=Request.STATUS_APROVADO
+        )
+        RequestSummary.objects.recalcular()
+    
+    def consultas_listagem(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, [consulta['sql'] for consulta in consultas.captured_queries]
+    
+    def test_sem_filtros_usa_o_resumo(self):
+        """Testa que a listagem sem filtros conta pelo resumo, sem COUNT(*) nas solicitações"""
+        response, consultas = self.consultas_listagem(self.list_url)
+        self.assertEqual(response.data['count'], 23)
+        self.assertTrue(response.data['contagem_exata'])
+        self.assertEqual(len(consultas), 2)
+        self.assertIn('solicitations_requestsummary', consultas[0])
+        self.assertNotIn('COUNT(', ''.join(consultas[1:]))
+    
+    def test_tipo_e_status_usam_o_resumo(self):
+        """Testa a contagem exata pelo resumo com filtros de tipo e status"""
+        casos = {
+            '?tipo=reembolso': 11,
+            '?status=aprovado': 4,
+            '?tipo=reembolso&status=pendente&status=aprovado': 11,
+            '?tipo=ferias&status=aprovado': 0,
+        }
+        for parametros, esperado in casos.items():
+            response, consultas = self.consultas_listagem(f'{self.list_url}{parametros}')
+            self.assertEqual(response.data['count'], esperado, parametros)
+            self.assertTrue(response.data['contagem_exata'], parametros)
+            self.assertIn('solicitations_requestsummary', consultas[0], parametros)
+    
+    def test_outros_filtros_contagem_limitada(self):
+        """Testa a contagem limitada com filtros que o resumo não atende"""
+        # Limite menor que a página: a contagem vai até uma página além do início
+        response, consultas = self.consultas_listagem(f'{self.list_url}?solicitante=Ana')
+        self.assertEqual(response.data['count'], 11)
+        self.assertFalse(response.data['contagem_exata'])
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIn('LIMIT 11', consultas[0])
+        
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['count'], 14)
+        self.assertTrue(response.data['contagem_exata'])
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertIsNone(response.data['next'])
+        
+        response = self.client.get(f'{self.list_url}?solicitante=Bruno')
+        self.assertEqual(response.data['count'], 9)
+        self.assertTrue(response.data['contagem_exata'])
+    
+    def test_contagem_exata_opcional(self):
+        """Testa o COUNT(*) completo com ?contagem=exata"""
+        response, consultas = self.consultas_listagem(f'{self.list_url}?solicitante=Ana&contagem=exata')
+        self.assertEqual(response.data['count'], 14)
+        self.assertTrue(response.data['contagem_exata'])
+        self.assertNotIn('LIMIT', consultas[0])
+        
+        with self.settings(SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0, 'LISTAGEM_LIMITE_CONTAGEM': 0}):
+            response = self.client.get(f'{self.list_url}?solicitante=Ana')
+        self.assertEqual(response.data['count'], 14)
+        self.assertTrue(response.data['contagem_exata'])
+    
+    def test_etag_acompanha_a_contagem(self):
+        """Testa que o ETag muda quando a contagem muda, mesmo com a página igual"""
+        url = f'{self.list_url}?tipo=ferias'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        # A mais antiga fica fora da primeira página, mas o count muda
+        Request.objects.filter(tipo=Request.TIPO_FERIAS).order_by('data_criacao', 'id').first().delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 11)
+
+
+class RequestSummaryTest(APITestCase):
+    """Testes para o resumo incremental usado pelas estatísticas"""
+    
+    def setUp(self):
+        """Cria solicitações de tipos e status variados"""
+        self.list_url = '/api/v1/solicitacoes/'
+        self.ferias = Request.objects.create(
+            tipo=Request.TIPO_FERIAS,
+            titulo='Férias',
+            descricao='Férias programadas',
+            solicitante='João Silva',
+            data_inicio=date.today(),
+            data_fim=date.today() + timedelta(days=10),
+        )
+        self.reembolsos = [
+            Request.objects.create(
+                tipo=Request.TIPO_REEMBOLSO,
+                titulo=f'Reembolso {i}',
+                descricao='Despesas de viagem',
+                solicitante='Maria Santos',
+                valor=Decimal('100.50') * i,
+            )
+            for i in range(1, 4)
+        ]
+    
+    def resumo(self, tipo, status_):
+        """Retorna (quantidade, valor_total) mantidos para tipo/status"""
+        registro = RequestSummary.objects.get(tipo=tipo, status=status_)
+        return registro.quantidade, registro.valor_total
+    
+    def assertResumoConsistente(self):
+        self.assertEqual(RequestSummary.objects.divergencias(), {})
+    
+    def test_criacao_atualiza_resumo(self):
+        """Testa que criações incrementam contagem e valor"""
+        self.assertEqual(self.resumo('reembolso', 'pendente'), (3, Decimal('603.00')))
+        self.assertEqual(self.resumo('ferias', 'pendente'), (1, Decimal('0')))
+        self.assertResumoConsistente()
+    
+    def test_transicoes_atualizam_resumo(self):
+        """Testa que aprovar, rejeitar e cancelar movem os contadores"""
+        self.reembolsos[0].aprovar()
+        self.reembolsos[1].rejeitar()
+        self.ferias.cancelar()
+        self.assertEqual(self.resumo('reembolso', 'aprovado'), (1, Decimal('100.50')))
+        self.assertEqual(self.resumo('reembolso', 'rejeitado'), (1, Decimal('201.00')))
+        self.assertEqual(self.resumo('reembolso', 'pendente'), (1, Decimal('301.50')))
+        self.assertEqual(self.resumo('ferias', 'cancelado'), (1, Decimal('0')))
+        self.assertResumoConsistente()
+    
+    def test_atualizacao_de_valor_atualiza_resumo(self):
+        """Testa que alterar o valor ajusta o total"""
+        self.reembolsos[0].valor = Decimal('1000.00')
+        self.reembolsos[0].save()
+        self.assertEqual(self.resumo('reembolso', 'pendente'), (3, Decimal('1502.50')))
+        self.assertResumoConsistente()
+    
+    def test_exclusoes_atualizam_resumo(self):
+        """Testa exclusão individual e em massa"""
+        self.ferias.delete()
+        Request.objects.filter(pk__in=[r.pk for r in self.reembolsos[:2]]).delete()
+        self.assertEqual(self.resumo('ferias', 'pendente'), (0, Decimal('0')))
+        self.assertEqual(self.resumo('reembolso', 'pendente'), (1, Decimal('301.50')))
+        self.assertResumoConsistente()
+    
+    def test_estatisticas_sem_filtro_usam_resumo(self):
+        """Testa que a chamada sem filtros lê apenas o resumo"""
+        self.reembolsos[0].aprovar()
+        with self.assertNumQueries(1):
+            response = self.client.get(f'{self.list_url}estatisticas/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'total': 4,
+            'por_tipo': {'ferias': 1, 'reembolso': 3},
+            'por_status': {'aprovado': 1, 'pendente': 3},
+            'valor_total_aprovado': 100.5,
+        })
+    
+    def test_estatisticas_com_filtro_em_uma_consulta(self):
+        """Testa que a chamada com filtros usa uma única consulta agregada"""
+        self.reembolsos[0].aprovar()
+        self.reembolsos[2].aprovar()
+        with self.assertNumQueries(1):
+            response = self.client.get(f'{self.list_url}estatisticas/?tipo=reembolso&valor_min=200')
+        self.assertEqual(response.data, {
+            'total': 2,
+            'por_tipo': {'reembolso': 2},
+            'por_status': {'aprovado': 1, 'pendente': 1},
+            'valor_total_aprovado': 301.5,
+        })
+    
+    def test_estatisticas_resumo_igual_a_consulta(self):
+        """Testa que resumo e agregação direta produzem a mesma resposta"""
+        self.reembolsos[1].aprovar()
+        self.ferias.rejeitar()
+        self.assertEqual(
+            RequestSummary.objects.estatisticas(),
+            Request.objects.all().estatisticas(),
+        )
+    
+    def test_comando_verificar_e_recalcular(self):
+        """Testa o comando de verificação e reconstrução do resumo"""
+        RequestSummary.objects.filter(tipo='reembolso', status='pendente').update(quantidade=99)
+        
+        with self.assertRaises(CommandError):
+            call_command('recalcular_estatisticas', '--verificar', stdout=StringIO())
+        
+        call_command('recalcular_estatisticas', stdout=StringIO())
+        self.assertEqual(self.resumo('reembolso', 'pendente'), (3, Decimal('603.00')))
+        call_command('recalcular_estatisticas', '--verificar', stdout=StringIO())
+
+
+class RequestCriacaoEmMassaTest(APITestCase):
+    """Testes para a criação em massa de solicitações"""
+    
+    def setUp(self):
+        """Monta uma lista de itens válidos"""
+        self.bulk_url = '/api/v1/solicitacoes/bulk/'
+        self.itens = [
+            {
+                'tipo': 'reembolso',
+                'titulo': f'Reembolso {i}',
+                'descricao': 'Despesas de viagem',
+                'solicitante': 'Maria Santos',
+                'valor': f'{i + 1}0.00',
+            }
+            for i in range(5)
+        ] + [
+            {
+                'tipo': 'ferias',
+                'titulo': 'Férias',
+                'descricao': 'Férias programadas',
+                'solicitante': 'João Silva',
+                'data_inicio': str(date.today()),
+                'data_fim': str(date.today() + timedelta(days=9)),
+            }
+        ]
+        self.item_invalido = {
+            'tipo': 'reembolso',
+            'titulo': 'Sem valor',
+            'descricao': 'Reembolso sem valor',
+            'solicitante': 'Ana Costa',
+        }
+    
+    def test_criar_lista_json(self):
+        """Testa criação em massa a partir de uma lista JSON"""
+        response = self.client.post(self.bulk_url, self.itens, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['criados'], 6)
+        self.assertEqual(response.data['erros'], [])
+        self.assertEqual(len(response.data['ids']), 6)
+        self.assertIn('itens_por_segundo', response.data)
+        self.assertEqual(Request.objects.count(), 6)
+        self.assertEqual(Request.objects.get(pk=response.data['ids'][-1]).duracao_dias, 10)
+    
+    def test_criar_ndjson(self):
+        """Testa criação em massa a partir de NDJSON"""
+        corpo = '\n'.join(json.dumps(item) for item in self.itens) + '\n\n'
+        response = self.client.post(
+            self.bulk_url,
+            corpo,
+            content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['criados'], 6)
+    
+    def test_ndjson_invalido(self):
+        """Testa que uma linha NDJSON malformada é rejeitada"""
+        response = self.client.post(
+            self.bulk_url,
+            '{"tipo": "ferias"}\n{invalido',
+            content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('linha 2', response.data['detail'])
+    
+    def test_modo_atomico_nao_cria_nada_com_erro(self):
+        """Testa que no modo atômico um item inválido impede a criação"""
+        itens = self.itens[:2] + [self.item_invalido]
+        response = self.client.post(self.bulk_url, itens, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['criados'], 0)
+        self.assertEqual(response.data['erros'][0]['indice'], 2)
+        self.assertIn('valor', response.data['erros'][0]['erros'])
+        self.assertEqual(Request.objects.count(), 0)
+    
+    def test_modo_parcial_cria_validos(self):
+        """Testa que no modo parcial os itens válidos são criados"""
+        itens = [self.item_invalido] + self.itens[:3] + ['nao eh objeto']
+        response = self.client.post(f'{self.bulk_url}?modo=parcial', itens, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['criados'], 3)
+        self.assertEqual([erro['indice'] for erro in response.data['erros']], [0, 4])
+        self.assertEqual(Request.objects.count(), 3)
+    
+    def test_tamanho_lote(self):
+        """Testa que o tamanho do lote controla a quantidade de INSERTs"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(f'{self.bulk_url}?tamanho_lote=2', self.itens, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        inserts = [q for q in consultas.captured_queries if q['sql'].startswith('INSERT INTO "solicitations_request"')]
+        self.assertEqual(len(inserts), 3)
+    
+    def test_parametros_invalidos(self):
+        """Testa validação dos parâmetros e do corpo"""
+        response = self.client.post(f'{self.bulk_url}?modo=outro', self.itens, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.bulk_url, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.bulk_url, self.itens[0], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    @override_settings(SOLICITACOES={'CRIACAO_EM_MASSA_MAX_ITENS': 3})
+    def test_limite_de_itens(self):
+        """Testa o limite de itens por requisição"""
+        response = self.client.post(self.bulk_url, self.itens, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Request.objects.count(), 0)
+    
+    def test_resumo_atualizado(self):
+        """Testa que a criação em massa mantém o resumo das estatísticas"""
+        self.client.post(self.bulk_url, self.itens, format='json')
+        self.assertEqual(RequestSummary.objects.divergencias(), {})
+        response = self.client.get('/api/v1/solicitacoes/estatisticas/')
+        self.assertEqual(response.data['total'], 6)
+    
+    def test_banco_sem_retorno_de_ids(self):
+        """Testa que, sem RETURNING no INSERT em massa, os ids são relidos do banco"""
+        from unittest import mock
+        
+        existente = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO, titulo='Antiga', descricao='Teste', solicitante='Bruno', valor=1
+        )
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            criadas = Request.objects.criar_em_massa([
+                Request(tipo=Request.TIPO_REEMBOLSO, titulo=f'Item {i}', descricao='Teste', solicitante='Ana', valor=i + 1)
+                for i in range(5)
+            ], tamanho_lote=2)
+        
+        self.assertTrue(all(solicitacao.pk > existente.pk for solicitacao in criadas))
+        self.assertEqual(
+            [(solicitacao.pk, solicitacao.titulo) for solicitacao in criadas],
+            list(Request.objects.exclude(pk=existente.pk).order_by('pk').values_list('pk', 'titulo')),
+        )
+        self.assertEqual(
+            set(RequestMudanca.objects.filter(operacao='criacao').values_list('solicitacao_id', flat=True)),
+            {existente.pk, *(solicitacao.pk for solicitacao in criadas)},
+        )
+        self.assertEqual(RequestSummary.objects.divergencias(), {})
+
+
+class RequestAcoesEmMassaTest(APITestCase):
+    """Testes para as transições de status em massa"""
+    
+    def setUp(self):
+        """Cria solicitações pendentes, em análise e já finalizadas"""
+        self.url = '/api/v1/solicitacoes/acoes-em-massa/'
+        self.solicitacoes = [
+            Request.objects.create(
+                tipo=Request.TIPO_REEMBOLSO,
+                titulo=f'Reembolso {i}',
+                descricao='Despesas de viagem',
+                solicitante='Maria Santos',
+                valor=Decimal('50.00'),
+            )
+            for i in range(6)
+        ]
+        Request.objects.filter(pk=self.solicitacoes[1].pk).update(status=Request.STATUS_EM_ANALISE)
+        self.solicitacoes[4].aprovar()
+        self.solicitacoes[5].rejeitar()
+        RequestSummary.objects.recalcular()
+        self.ids = [s.pk for s in self.solicitacoes]
+    
+    def test_queryset_transicionar(self):
+        """Testa a transição em massa pelo queryset"""
+        alteradas = Request.objects.filter(pk__in=self.ids).aprovar('Lote 1')
+        self.assertEqual(alteradas, 4)
+        self.assertEqual(Request.objects.filter(status=Request.STATUS_APROVADO).count(), 5)
+        self.assertEqual(
+            Request.objects.get(pk=self.ids[0]).observacoes,
+            'Lote 1'
+        )
+        self.assertEqual(RequestSummary.objects.divergencias(), {})
+    
+    def test_queryset_sem_observacoes_mantem_as_existentes(self):
+        """Testa que observações vazias não sobrescrevem as atuais"""
+        Request.objects.filter(pk=self.ids[0]).update(observacoes='Original')
+        Request.objects.filter(pk=self.ids[0]).cancelar()
+        solicitacao = Request.objects.get(pk=self.ids[0])
+        self.assertEqual(solicitacao.status, Request.STATUS_CANCELADO)
+        self.assertEqual(solicitacao.observacoes, 'Original')
+    
+    def test_manager_nao_expoe_atalhos(self):
+        """Testa que os atalhos de transição exigem um queryset explícito"""
+        self.assertFalse(hasattr(Request.objects, 'aprovar'))
+    
+    def test_endpoint_acoes_em_massa(self):
+        """Testa o endpoint de ações em massa"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(
+                self.url,
+                {'acao': 'rejeitar', 'ids': self.ids + [999999], 'observacoes': 'Sem orçamento'},
+                format='json'
+            )
+        updates = [
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].startswith('UPDATE "solicitations_request"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"status" IN', updates[0])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'acao': 'rejeitar',
+            'solicitadas': 7,
+            'alteradas': 4,
+            'ignoradas': 3,
+        })
+        self.assertEqual(Request.objects.filter(status=Request.STATUS_REJEITADO).count(), 5)
+        self.assertEqual(RequestSummary.objects.divergencias(), {})
+    
+    def test_endpoint_validacao(self):
+        """Testa validação da ação e dos IDs"""
+        response = self.client.post(self.url, {'acao': 'arquivar', 'ids': self.ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('acao', response.data)
+        response = self.client.post(self.url, {'acao': 'aprovar', 'ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ids', response.data)
+    
+    def test_acao_do_admin(self):
+        """Testa que a ação do admin usa a transição em massa"""
+        from django.contrib.auth.models import User
+        
+        admin_user = User.objects.create_superuser('admin', 'admin@rtech.com', 'senha-segura')
+        self.client.force_login(admin_user)
+        response = self.client.post(
+            '/admin/solicitations/request/',
+            {'action': 'cancelar_solicitacoes', '_selected_action': self.ids},
+        )
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(Request.objects.filter(status=Request.STATUS_CANCELADO).count(), 4)
+        self.assertEqual(
+            Request.objects.get(pk=self.ids[0]).observacoes,
+            'Cancelado em massa pelo admin'
+        )
+
+
+class RequestBuscaTextualTest(APITestCase):
+    """Testes para a busca textual (FTS5 no SQLite)"""
+    
+    def setUp(self):
+        """Cria solicitações com textos variados"""
+        self.list_url = '/api/v1/solicitacoes/'
+        
+        def criar(titulo, descricao, solicitante):
+            return Request.objects.create(
+                tipo=Request.TIPO_REEMBOLSO,
+                titulo=titulo,
+                descricao=descricao,
+                solicitante=solicitante,
+                valor=Decimal('10.00'),
+            )
+        
+        self.viagem_titulo = criar('Viagem para São Paulo', 'Passagens aéreas', 'Ana Costa')
+        self.viagem_descricao = criar('Despesas diversas', 'Hotel durante a viagem', 'Bruno Lima')
+        self.curso = criar('Curso de inglês', 'Mensalidade do curso', 'Carlos Souza')
+    
+    def buscar(self, termo, extra=''):
+        response = self.client.get(f'{self.list_url}?search={termo}{extra}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+    
+    def test_busca_ignora_acentos_e_caixa(self):
+        """Testa que a busca encontra termos sem acento e em outra caixa"""
+        self.assertEqual(self.buscar('AEREAS'), [self.viagem_titulo.pk])
+        self.assertEqual(self.buscar('ingles'), [self.curso.pk])
+    
+    def test_busca_por_prefixo_e_multiplos_termos(self):
+        """Testa busca por prefixo e exigência de todos os termos"""
+        self.assertEqual(self.buscar('Carl'), [self.curso.pk])
+        self.assertEqual(self.buscar('viagem hotel'), [self.viagem_descricao.pk])
+        self.assertEqual(self.buscar('viagem curso'), [])
+    
+    def test_busca_ordenada_por_relevancia(self):
+        """Testa que ocorrências no título pesam mais que na descrição"""
+        self.assertEqual(self.buscar('viagem'), [self.viagem_titulo.pk, self.viagem_descricao.pk])
+    
+    def test_ordenacao_explicita_prevalece(self):
+        """Testa que ?ordering= substitui a ordenação por relevância"""
+        ids = self.buscar('viagem', '&ordering=-data_criacao')
+        self.assertEqual(ids, [self.viagem_descricao.pk, self.viagem_titulo.pk])
+    
+    def test_busca_com_caracteres_especiais(self):
+        """Testa que operadores da sintaxe FTS não quebram a consulta"""
+        self.assertEqual(self.buscar('"viagem" OR -*'), [])
+        self.assertEqual(self.buscar('viagem"'), [self.viagem_titulo.pk, self.viagem_descricao.pk])
+    
+    def test_indice_acompanha_alteracoes(self):
+        """Testa que atualizações e exclusões refletem no índice"""
+        self.curso.titulo = 'Curso de espanhol'
+        self.curso.save()
+        self.assertEqual(self.buscar('ingles'), [])
+        self.assertEqual(self.buscar('espanhol'), [self.curso.pk])
+        
+        self.curso.delete()
+        self.assertEqual(self.buscar('espanhol'), [])
+    
+    def test_busca_com_cursor_e_estatisticas(self):
+        """Testa a busca combinada com paginação por cursor e estatísticas"""
+        self.assertEqual(
+            self.buscar('viagem', '&paginacao=cursor'),
+            [self.viagem_titulo.pk, self.viagem_descricao.pk]
+        )
+        response = self.client.get(f'{self.list_url}estatisticas/?search=viagem')
+        self.assertEqual(response.data['total'], 2)
+    
+    def test_garantir_triggers_recria_indice(self):
+        """Testa a recriação dos triggers descartados por uma migration"""
+        from . import busca
+        
+        with connection.cursor() as cursor:
+            for nome in busca.TRIGGERS_SQLITE:
+                cursor.execute(f'DROP TRIGGER {nome}')
+        novo = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Estacionamento',
+            descricao='Estacionamento no cliente',
+            solicitante='Ana Costa',
+            valor=Decimal('20.00'),
+        )
+        self.assertEqual(self.buscar('estacionamento'), [])
+        
+        busca.garantir_triggers(connection)
+        self.assertEqual(self.buscar('estacionamento'), [novo.pk])
+
+
+class RequestExportacaoTest(APITestCase):
+    """
+    Testes da exportação em CSV e NDJSON
+    """
+    
+    def setUp(self):
+        self.url = '/api/v1/solicitacoes/exportar/'
+        self.reembolso = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Táxi, aeroporto',
+            descricao='Linha 1\nLinha 2',
+            solicitante='Ana Costa',
+            valor=Decimal('80.50'),
+        )
+        self.reembolso.aprovar('Ok')
+        self.ferias = Request.objects.create(
+            tipo=Request.TIPO_FERIAS,
+            titulo='Férias',
+            descricao='Descanso',
+            solicitante='Bruno Lima',
+            data_inicio=date(2025, 1, 10),
+            data_fim=date(2025, 1, 20),
+        )
+    
+    def exportar(self, parametros='', **extra):
+        response = self.client.get(f'{self.url}?{parametros}', **extra)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+    
+    def test_exportar_csv(self):
+        """Testa o CSV (formato padrão) com cabeçalho e valores como na API"""
+        import csv
+        
+        response, conteudo = self.exportar()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('solicitacoes.csv', response['Content-Disposition'])
+        
+        linhas = list(csv.DictReader(StringIO(conteudo.decode('utf-8'))))
+        self.assertEqual([int(linha['id']) for linha in linhas], [self.ferias.pk, self.reembolso.pk])
+        detalhe = self.client.get(f'/api/v1/solicitacoes/{self.reembolso.pk}/').data
+        for campo in ['titulo', 'descricao', 'status', 'valor', 'data_criacao', 'data_atualizacao']:
+            self.assertEqual(linhas[1][campo], detalhe[campo])
+        self.assertEqual(linhas[0]['valor'], '')
+        self.assertEqual(linhas[0]['data_inicio'], '2025-01-10')
+    
+    def test_exportar_ndjson_com_filtros(self):
+        """Testa o NDJSON respeitando os filtros da listagem"""
+        response, conteudo = self.exportar('format=ndjson&tipo=reembolso&status=aprovado')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        
+        itens = [json.loads(linha) for linha in conteudo.decode('utf-8').splitlines()]
+        self.assertEqual(len(itens), 1)
+        self.assertEqual(itens[0]['id'], self.reembolso.pk)
+        self.assertEqual(itens[0]['valor'], '80.50')
+        self.assertIsNone(itens[0]['data_inicio'])
+        
+        _, conteudo = self.exportar('format=ndjson&search=descanso')
+        self.assertEqual([json.loads(linha)['id'] for linha in conteudo.splitlines()], [self.ferias.pk])
+    
+    def test_exportar_sem_instanciar_modelos(self):
+        """Testa que as linhas são lidas com values(), sem criar objetos Request"""
+        from unittest import mock
+        
+        with mock.patch.object(Request, 'from_db', side_effect=AssertionError('modelo instanciado')):
+            _, conteudo = self.exportar('format=ndjson')
+        self.assertEqual(len(conteudo.splitlines()), 2)
+    
+    def test_exportar_gzip(self):
+        """Testa a compressão gzip sob demanda"""
+        import gzip
+        
+        response, conteudo = self.exportar('format=ndjson', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(len(gzip.decompress(conteudo).splitlines()), 2)
+    
+    def test_exportar_filtro_invalido(self):
+        """Testa que filtros inválidos retornam erro"""
+        response = self.client.get(f'{self.url}?format=ndjson&valor_min=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('valor_min', json.loads(response.content))
+
+
+@override_settings(SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0})
+class RequestRespostaCondicionalTest(APITestCase):
+    """
+    Testes de GET condicional (ETag / Last-Modified), sem o cache de respostas
+    """
+    
+    def setUp(self):
+        self.list_url = '/api/v1/solicitacoes/'
+        self.solicitacao = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Táxi',
+            descricao='Visita a cliente',
+            solicitante='Ana Costa',
+            valor=Decimal('80.00'),
+        )
+        self.detail_url = f'{self.list_url}{self.solicitacao.pk}/'
+    
+    def test_detalhe_if_none_match(self):
+        """Testa o 304 do detalhe sem serializar a solicitação"""
+        from unittest import mock
+        from .serializers import RequestSerializer
+        
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        
+        with mock.patch.object(RequestSerializer, 'to_representation') as serializar:
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        serializar.assert_not_called()
+        
+        self.solicitacao.aprovar('Ok')
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_detalhe_if_modified_since(self):
+        """Testa o 304 do detalhe com If-Modified-Since"""
+        ultima = self.client.get(self.detail_url)['Last-Modified']
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=ultima)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        Request.objects.filter(pk=self.solicitacao.pk).update(
+            data_atualizacao=self.solicitacao.data_atualizacao + timedelta(minutes=1)
+        )
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=ultima)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_listagem_muda_com_exclusao(self):
+        """Testa o 304 da listagem e a invalidação por exclusão"""
+        outra = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Almoço',
+            descricao='Almoço com cliente',
+            solicitante='Bruno Lima',
+            valor=Decimal('50.00'),
+        )
+        url = f'{self.list_url}?tipo=reembolso'
+        etag = self.client.get(url)['ETag']
+        
+        # A contagem (do resumo) e a página, sem serializar
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        # A exclusão altera a contagem e a página
+        outra.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        
+        # Outra página ou outro filtro não reaproveitam o ETag
+        response = self.client.get(f'{self.list_url}?tipo=ferias', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_listagem_por_cursor(self):
+        """Testa o 304 na paginação por cursor"""
+        url = f'{self.list_url}?paginacao=cursor'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        self.solicitacao.titulo = 'Táxi aeroporto'
+        self.solicitacao.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_estatisticas(self):
+        """Testa o 304 das estatísticas, com e sem filtros"""
+        for url in [f'{self.list_url}estatisticas/', f'{self.list_url}estatisticas/?tipo=reembolso']:
+            etag = self.client.get(url)['ETag']
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        self.solicitacao.aprovar()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(CACHES=CACHE_COMPARTILHADO)
+class RequestCacheRespostasTest(APITestCase):
+    """
+    Testes do cache de respostas da listagem e das estatísticas
+    """
+    
+    def setUp(self):
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.list_url = '/api/v1/solicitacoes/'
+        self.solicitacao = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Táxi',
+            descricao='Visita a cliente',
+            solicitante='Ana Costa',
+            valor=Decimal('80.00'),
+        )
+    
+    def test_acerto_sem_consultas(self):
+        """Testa que a segunda requisição é respondida pelo cache, sem consultar o banco"""
+        from . import cache
+        
+        url = f'{self.list_url}?status=pendente&tipo=reembolso'
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        
+        with self.assertNumQueries(0):
+            cacheada = self.client.get(f'{self.list_url}?tipo=reembolso&status=pendente')
+        self.assertEqual(cacheada['X-Cache'], 'HIT')
+        self.assertEqual(cacheada.data, response.data)
+        self.assertEqual(cacheada['ETag'], response['ETag'])
+        
+        with self.assertNumQueries(0):
+            nao_modificada = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(nao_modificada.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        contadores = cache.contadores()
+        self.assertEqual((contadores['acertos'], contadores['falhas']), (2, 1))
+    
+    def test_invalidacao_por_escritas(self):
+        """Testa que criação, transição em massa e exclusão invalidam as respostas"""
+        url = f'{self.list_url}estatisticas/'
+        self.assertEqual(self.client.get(url).data['total'], 1)
+        
+        outra = Request.objects.create(
+            tipo=Request.TIPO_FERIAS,
+            titulo='Férias',
+            descricao='Descanso',
+            solicitante='Bruno Lima',
+            data_inicio=date(2025, 1, 10),
+            data_fim=date(2025, 1, 20),
+        )
+        response = self.client.get(url)
+        self.assertEqual((response['X-Cache'], response.data['total']), ('MISS', 2))
+        
+        Request.objects.all().aprovar()
+        response = self.client.get(url)
+        self.assertEqual((response['X-Cache'], response.data['por_status']), ('MISS', {'aprovado': 2}))
+        
+        Request.objects.filter(pk=outra.pk).delete()
+        response = self.client.get(url)
+        self.assertEqual((response['X-Cache'], response.data['total']), ('MISS', 1))
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+    
+    def test_geracao_incrementada_apos_commit(self):
+        """Testa que a geração é incrementada na escrita e novamente após o commit"""
+        from . import cache
+        
+        inicial = cache.geracao()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.solicitacao.aprovar()
+            self.assertEqual(cache.geracao(), inicial + 1)
+        self.assertEqual(cache.geracao(), inicial + 2)
+    
+    @override_settings(SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0})
+    def test_cache_desativado(self):
+        """Testa que timeout 0 desativa o cache"""
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url)
+        self.assertNotIn('X-Cache', response)
+    
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_cache_local_ignorado(self):
+        """Testa que com o LocMemCache (local a cada processo) as respostas não são guardadas"""
+        from . import cache
+        
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url)
+        self.assertNotIn('X-Cache', response)
+        self.assertFalse(cache.ativo())
+    
+    def test_geracao_compartilhada_entre_instancias(self):
+        """Testa que duas instâncias do cache (como em dois workers) enxergam a mesma geração"""
+        from django.core.cache.backends.filebased import FileBasedCache
+        from . import cache
+        
+        parametros = CACHE_COMPARTILHADO['default']
+        worker_a = FileBasedCache(parametros['LOCATION'], {})
+        worker_b = FileBasedCache(parametros['LOCATION'], {})
+        inicial = worker_b.get_or_set(cache.CHAVE_GERACAO, 0, timeout=None)
+        
+        cache._incrementar(worker_a, cache.CHAVE_GERACAO)
+        self.assertEqual(worker_b.get(cache.CHAVE_GERACAO), inicial + 1)
+        
+        # A resposta guardada por um worker é invalidada pelo incremento feito no outro
+        self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'HIT')
+        cache._incrementar(worker_b, cache.CHAVE_GERACAO)
+        self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'MISS')
+    
+    def test_comando_cache_respostas(self):
+        """Testa o comando que mostra e invalida o cache"""
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+        
+        saida = StringIO()
+        call_command('cache_respostas', '--invalidar', stdout=saida)
+        contadores = json.loads(saida.getvalue())
+        self.assertEqual(contadores['taxa_acertos'], 0.5)
+        self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'MISS')
+
+
+@override_settings(SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0})
+class RequestConcorrenciaTest(APITestCase):
+    """
+    Testes das transições condicionais e do controle de concorrência otimista
+    """
+    
+    def setUp(self):
+        self.solicitacao = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Táxi',
+            descricao='Visita a cliente',
+            solicitante='Ana Costa',
+            valor=Decimal('80.00'),
+            observacoes='Original',
+        )
+        self.detail_url = f'/api/v1/solicitacoes/{self.solicitacao.pk}/'
+    
+    def test_transicao_em_um_update_condicional(self):
+        """Testa que a transição é um único UPDATE das colunas de status, sem SELECT prévio"""
+        with CaptureQueriesContext(connection) as consultas:
+            self.solicitacao.aprovar('Ok')
+        consultas_solicitacao = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if 'solicitations_request"' in consulta['sql']
+        ]
+        self.assertEqual(len(consultas_solicitacao), 1)
+        update = consultas_solicitacao[0]
+        self.assertTrue(update.startswith('UPDATE'))
+        self.assertIn('"versao" =', update.split('WHERE')[1])
+        self.assertIn('"status" IN', update.split('WHERE')[1])
+        for campo in ['titulo', 'descricao', 'valor', 'solicitante']:
+            self.assertNotIn(f'"{campo}"', update)
+        
+        self.solicitacao.refresh_from_db()
+        self.assertEqual(
+            (self.solicitacao.status, self.solicitacao.observacoes, self.solicitacao.versao),
+            (Request.STATUS_APROVADO, 'Ok', 2)
+        )
+    
+    def test_transicoes_concorrentes(self):
+        """Testa que apenas a primeira de duas transições simultâneas é aplicada"""
+        revisor_a = Request.objects.get(pk=self.solicitacao.pk)
+        revisor_b = Request.objects.get(pk=self.solicitacao.pk)
+        revisor_a.aprovar()
+        with self.assertRaises(ConflitoDeVersao):
+            revisor_b.rejeitar('Rejeitado')
+        
+        self.solicitacao.refresh_from_db()
+        self.assertEqual(self.solicitacao.status, Request.STATUS_APROVADO)
+        self.assertEqual(self.solicitacao.observacoes, 'Original')
+        self.assertEqual(RequestSummary.objects.divergencias(), {})
+    
+    def test_save_com_versao_desatualizada(self):
+        """Testa que save() não sobrescreve uma alteração concorrente"""
+        outra = Request.objects.get(pk=self.solicitacao.pk)
+        outra.titulo = 'Táxi aeroporto'
+        outra.save()
+        self.assertEqual(outra.versao, 2)
+        
+        self.solicitacao.valor = Decimal('90.00')
+        with self.assertRaises(ConflitoDeVersao):
+            self.solicitacao.save()
+        self.solicitacao.refresh_from_db()
+        self.assertEqual((self.solicitacao.titulo, self.solicitacao.valor), ('Táxi aeroporto', Decimal('80.00')))
+    
+    def test_if_match_na_atualizacao(self):
+        """Testa o If-Match no PATCH com o ETag do detalhe e com a versão"""
+        etag = self.client.get(self.detail_url)['ETag']
+        
+        response = self.client.patch(self.detail_url, {'titulo': 'Táxi 1'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['versao'], 2)
+        self.assertNotEqual(response['ETag'], etag)
+        
+        response = self.client.patch(self.detail_url, {'titulo': 'Táxi 2'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response.data['versao'], 2)
+        
+        response = self.client.patch(self.detail_url, {'titulo': 'Táxi 2'}, format='json', HTTP_IF_MATCH='"2"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.solicitacao.refresh_from_db()
+        self.assertEqual((self.solicitacao.titulo, self.solicitacao.versao), ('Táxi 2', 3))
+    
+    def test_if_match_nas_acoes(self):
+        """Testa o If-Match desatualizado nas ações de aprovação/rejeição"""
+        response = self.client.post(f'{self.detail_url}aprovar/', HTTP_IF_MATCH='"7"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        
+        response = self.client.post(f'{self.detail_url}aprovar/', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['solicitacao']['versao'], 2)
+        
+        response = self.client.post(f'{self.detail_url}rejeitar/', HTTP_IF_MATCH='"2"')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_conflito_sem_if_match(self):
+        """Testa o 409 quando a solicitação muda entre a leitura e a gravação"""
+        from unittest import mock
+        from .views import RequestViewSet
+        
+        desatualizada = Request.objects.get(pk=self.solicitacao.pk)
+        self.solicitacao.cancelar()
+        
+        with mock.patch.object(RequestViewSet, 'get_object', return_value=desatualizada):
+            response = self.client.post(f'{self.detail_url}aprovar/')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['versao'], 2)
+        
+        pendente = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Almoço',
+            descricao='Almoço com cliente',
+            solicitante='Bruno Lima',
+            valor=Decimal('50.00'),
+        )
+        desatualizada = Request.objects.get(pk=pendente.pk)
+        pendente.titulo = 'Almoço de negócios'
+        pendente.save()
+        with mock.patch.object(RequestViewSet, 'get_object', return_value=desatualizada):
+            response = self.client.patch(
+                f'/api/v1/solicitacoes/{pendente.pk}/', {'valor': '60.00'}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        pendente.refresh_from_db()
+        self.assertEqual((pendente.titulo, pendente.valor), ('Almoço de negócios', Decimal('50.00')))
+    
+    def test_transicao_em_massa_incrementa_versao(self):
+        """Testa que as transições em massa também incrementam a versão"""
+        Request.objects.filter(pk=self.solicitacao.pk).aprovar()
+        self.solicitacao.refresh_from_db()
+        self.assertEqual(self.solicitacao.versao, 2)
+    
+    def test_conflito_no_admin(self):
+        """Testa que o admin mostra o conflito de versão e volta ao formulário, sem erro 500"""
+        from unittest import mock
+        from django.contrib.auth.models import User
+        from .admin import RequestAdmin
+        
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@rtech.com', 'senha-segura'))
+        url = f'/admin/solicitations/request/{self.solicitacao.pk}/change/'
+        desatualizada = Request.objects.get(pk=self.solicitacao.pk)
+        Request.objects.filter(pk=self.solicitacao.pk).aprovar('Aprovada por outra pessoa')
+        
+        dados = {
+            'tipo': Request.TIPO_REEMBOLSO,
+            'titulo': 'Táxi aeroporto',
+            'descricao': 'Visita a cliente',
+            'solicitante': 'Ana Costa',
+            'status': Request.STATUS_PENDENTE,
+            'observacoes': 'Original',
+            'valor': '80.00',
+        }
+        with mock.patch.object(RequestAdmin, 'get_object', return_value=desatualizada):
+            response = self.client.post(url, dados)
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.solicitacao.refresh_from_db()
+        self.assertEqual((self.solicitacao.titulo, self.solicitacao.status), ('Táxi', Request.STATUS_APROVADO))
+        mensagens = [str(mensagem) for mensagem in self.client.get(url).context['messages']]
+        self.assertTrue(mensagens[0].startswith('A solicitação foi alterada por outra requisição.'))
+        
+        # Ações em massa
+        lista = '/admin/solicitations/request/'
+        with mock.patch.object(RequestAdmin, 'cancelar_solicitacoes', side_effect=ConflitoDeVersao('Conflito.')):
+            response = self.client.post(
+                lista, {'action': 'cancelar_solicitacoes', '_selected_action': [self.solicitacao.pk]}
+            )
+        self.assertRedirects(response, lista)
+
+
+@override_settings(ROOT_URLCONF='core.urls_asgi', SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0})
+class RequestAsyncViewSetTest(APITestCase):
+    """
+    Testes das views assíncronas (caminho ASGI), comparadas às síncronas
+    """
+    
+    def setUp(self):
+        from django.test import AsyncClient
+        
+        self.async_client = AsyncClient()
+        self.list_url = '/api/v1/solicitacoes/'
+        self.reembolso = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Táxi',
+            descricao='Viagem ao cliente',
+            solicitante='Ana Costa',
+            valor=Decimal('80.00'),
+        )
+        self.ferias = Request.objects.create(
+            tipo=Request.TIPO_FERIAS,
+            titulo='Férias',
+            descricao='Descanso',
+            solicitante='Bruno Lima',
+            data_inicio=date(2025, 1, 10),
+            data_fim=date(2025, 1, 20),
+        )
+    
+    async def test_rotas_assincronas(self):
+        """Testa que list, retrieve, create e estatisticas são atendidos pela view assíncrona"""
+        from django.urls import resolve
+        from asgiref.sync import iscoroutinefunction
+        
+        for url in [self.list_url, f'{self.list_url}{self.ferias.pk}/', f'{self.list_url}estatisticas/']:
+            self.assertTrue(iscoroutinefunction(resolve(url).func), url)
+        self.assertFalse(iscoroutinefunction(resolve(f'{self.list_url}{self.ferias.pk}/aprovar/').func))
+        # Ações de coleção não são confundidas com o detalhe (pk=exportar)
+        self.assertEqual(resolve(f'{self.list_url}exportar/').kwargs, {})
+        self.assertFalse(iscoroutinefunction(resolve(f'{self.list_url}exportar/').func))
+    
+    async def test_mesmas_respostas_que_o_caminho_sincrono(self):
+        """Testa que as respostas (corpo e ETag) são iguais às das views síncronas"""
+        from asgiref.sync import sync_to_async
+        
+        urls = [
+            self.list_url,
+            f'{self.list_url}?tipo=reembolso',
+            f'{self.list_url}?search=viagem',
+            f'{self.list_url}?paginacao=cursor&page_size=1',
+            f'{self.list_url}?page=2',
+            f'{self.list_url}?solicitante=Ana',
+            f'{self.list_url}?solicitante=Ana&contagem=exata',
+            f'{self.list_url}{self.ferias.pk}/',
+            f'{self.list_url}estatisticas/',
+            f'{self.list_url}estatisticas/?status=pendente&tipo=ferias',
+        ]
+        for url in urls:
+            sincrona = await sync_to_async(self.client.get)(url)
+            assincrona = await self.async_client.get(url)
+            self.assertEqual(assincrona.status_code, sincrona.status_code, url)
+            self.assertEqual(assincrona.content, sincrona.content, url)
+            self.assertEqual(assincrona.get('ETag'), sincrona.get('ETag'), url)
+    
+    async def test_get_condicional_e_erros(self):
+        """Testa 304, 404 e filtros inválidos no caminho assíncrono"""
+        url = f'{self.list_url}{self.reembolso.pk}/'
+        etag = (await self.async_client.get(url))['ETag']
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        response = await self.async_client.get(f'{self.list_url}999999/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await self.async_client.get(f'{self.list_url}?valor_min=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('valor_min', json.loads(response.content))
+    
+    async def test_criacao_e_metodos_sincronos(self):
+        """Testa a criação assíncrona e o repasse de PATCH/DELETE ao ViewSet síncrono"""
+        payload = {
+            'tipo': 'reembolso',
+            'titulo': 'Almoço',
+            'descricao': 'Almoço com cliente',
+            'solicitante': 'Carlos Souza',
+            'valor': '50.00',
+        }
+        response = await self.async_client.post(self.list_url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        criada = json.loads(response.content)
+        self.assertEqual((criada['valor'], criada['versao']), ('50.00', 1))
+        
+        response = await self.async_client.post(self.list_url, {'tipo': 'reembolso'}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        url = f"{self.list_url}{criada['id']}/"
+        response = await self.async_client.patch(url, {'titulo': 'Almoço de negócios'}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['titulo'], 'Almoço de negócios')
+        response = await self.async_client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(await Request.objects.acount(), 2)
+    
+    @override_settings(CACHES=CACHE_COMPARTILHADO, SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 300})
+    async def test_cache_de_respostas(self):
+        """Testa o cache de respostas com o decorator nas views assíncronas"""
+        from django.core.cache import cache
+        
+        await cache.aclear()
+        url = f'{self.list_url}estatisticas/'
+        self.assertEqual((await self.async_client.get(url))['X-Cache'], 'MISS')
+        response = await self.async_client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(json.loads(response.content)['total'], 2)
+    
+    def test_renderizar_preserva_cookies(self):
+        """Testa que a resposta renderizada mantém cabeçalhos e cookies da resposta do DRF"""
+        from rest_framework.response import Response
+        from .renderers import ORJSONRenderer
+        from .views_async import RequestAsyncViewSet
+        
+        response = Response({'total': 1}, status=status.HTTP_201_CREATED, headers={'ETag': '"1"'})
+        response.accepted_renderer = ORJSONRenderer()
+        response.accepted_media_type = 'application/json'
+        response.renderer_context = {}
+        response.set_cookie('preferencia', 'compacta', httponly=True)
+        
+        renderizada = RequestAsyncViewSet.renderizar(response)
+        self.assertEqual((renderizada.status_code, renderizada.content), (201, b'{"total":1}'))
+        self.assertEqual(renderizada['ETag'], '"1"')
+        self.assertEqual(renderizada.cookies['preferencia'].value, 'compacta')
+        self.assertTrue(renderizada.cookies['preferencia']['httponly'])
+    
+    async def test_autenticacao_e_permissoes(self):
+        """Testa que as ações assíncronas avaliam autenticação e permissões como as síncronas"""
+        import base64
+        from unittest import mock
+        from django.contrib.auth.models import User
+        from rest_framework.permissions import IsAuthenticated
+        from .views_async import RequestAsyncViewSet
+        
+        await User.objects.acreate_user('gestor', password='senha-segura')
+        credenciais = base64.b64encode(b'gestor:senha-segura').decode()
+        with mock.patch.object(RequestAsyncViewSet, 'permission_classes', [IsAuthenticated]):
+            response = await self.async_client.get(self.list_url)
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+            self.assertIn('detail', json.loads(response.content))
+            
+            response = await self.async_client.get(self.list_url, headers={'authorization': f'Basic {credenciais}'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(response.content)['count'], 2)
+    
+    async def test_csrf_na_sessao(self):
+        """Testa que a criação autenticada pela sessão exige o token CSRF"""
+        from django.contrib.auth.models import User
+        from django.test import AsyncClient
+        
+        usuario = await User.objects.acreate_user('gestor', password='senha-segura')
+        cliente = AsyncClient(enforce_csrf_checks=True)
+        await cliente.aforce_login(usuario)
+        dados = {
+            'tipo': Request.TIPO_REEMBOLSO,
+            'titulo': 'Estacionamento',
+            'descricao': 'Reunião no centro',
+            'solicitante': 'Ana Costa',
+            'valor': '25.00',
+        }
+        response = await cliente.post(self.list_url, dados, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertIn('CSRF', json.loads(response.content)['detail'])
+        
+        # Sem sessão (clientes da API), a criação não depende do token
+        response = await AsyncClient(enforce_csrf_checks=True).post(self.list_url, dados, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class ConfiguracaoSQLiteTest(TestCase):
+    """
+    Testes do perfil de produção do SQLite
+    """
+    
+    def test_perfil_producao(self):
+        """Testa as conexões persistentes, o modo IMMEDIATE e os PRAGMAs do perfil de produção"""
+        import importlib
+        import os
+        from unittest import mock
+        from core import settings as modulo_settings
+        
+        with mock.patch.dict(os.environ, {'RTECH_PERFIL_BANCO': 'producao'}):
+            producao = importlib.reload(modulo_settings)
+            banco = producao.DATABASES['default']
+            pragmas = producao.SOLICITACOES['SQLITE_PRAGMAS']
+        desenvolvimento = importlib.reload(modulo_settings)
+        
+        self.assertEqual((banco['CONN_MAX_AGE'], banco['CONN_HEALTH_CHECKS']), (600, True))
+        self.assertEqual(banco['OPTIONS'], {'transaction_mode': 'IMMEDIATE'})
+        self.assertEqual(pragmas['journal_mode'], 'WAL')
+        self.assertNotIn('SQLITE_PRAGMAS', desenvolvimento.SOLICITACOES)
+        self.assertNotIn('CONN_MAX_AGE', desenvolvimento.DATABASES['default'])
+    
+    def test_pragmas_aplicados_na_conexao(self):
+        """Testa que os PRAGMAs configurados são aplicados em cada nova conexão"""
+        from django.db.backends.signals import connection_created
+        
+        def ler(pragma):
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA {pragma}')
+                return cursor.fetchone()[0]
+        
+        # journal_mode e synchronous não podem mudar dentro da transação do TestCase
+        pragmas = {'busy_timeout': 4321, 'cache_size': -2048}
+        with override_settings(SOLICITACOES={'SQLITE_PRAGMAS': pragmas}):
+            connection_created.send(sender=type(connection), connection=connection)
+        self.assertEqual((ler('busy_timeout'), ler('cache_size')), (4321, -2048))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN é específico do SQLite')
+class ConsultasCanonicasTest(TestCase):
+    """
+    Planos de execução das consultas mais frequentes da API: cada uma deve
+    ser atendida por um índice, sem varrer a tabela inteira
+    """
+    
+    tabela = Request._meta.db_table
+    
+    @classmethod
+    def setUpTestData(cls):
+        # Distribuição próxima da de produção: a maioria já finalizada
+        pesos = [
+            (Request.STATUS_APROVADO, 10),
+            (Request.STATUS_REJEITADO, 5),
+            (Request.STATUS_CANCELADO, 2),
+            (Request.STATUS_PENDENTE, 2),
+            (Request.STATUS_EM_ANALISE, 1),
+        ]
+        status_linhas = [status_ for status_, peso in pesos for _ in range(peso)]
+        tipos = [tipo for tipo, _ in Request.TIPO_CHOICES]
+        Request.objects.bulk_create([
+            Request(
+                tipo=tipos[i % len(tipos)],
+                titulo=f'Solicitação {i}',
+                descricao='Descrição',
+                solicitante=f'Pessoa {i % 50}',
+                valor=Decimal(i % 500),
+                status=status_linhas[i % len(status_linhas)],
+            )
+            for i in range(2000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {cls.tabela}')
+    
+    def filtrar(self, **parametros):
+        """Aplica o RequestFilter como a listagem faz, na ordenação padrão"""
+        return RequestFilter(parametros, queryset=Request.objects.all()).qs.order_by('-data_criacao', '-id')
+    
+    def assertUsaIndice(self, plano, indice, ordenado=True):
+        self.assertNotRegex(plano, rf'SCAN {self.tabela}(?! USING)', f'varredura completa:\n{plano}')
+        self.assertRegex(plano, rf'USING (COVERING )?INDEX {indice}\b', plano)
+        if ordenado:
+            self.assertNotIn('USE TEMP B-TREE', plano, f'ordenação fora do índice:\n{plano}')
+    
+    def test_listagem_padrao(self):
+        """Testa a primeira página da listagem sem filtros"""
+        self.assertUsaIndice(self.filtrar()[:20].explain(), 'solicitatio_data_cr_9a880f_idx')
+    
+    def test_listagem_por_status(self):
+        """Testa ?status=pendente na ordem padrão"""
+        plano = self.filtrar(status=[Request.STATUS_PENDENTE])[:20].explain()
+        self.assertUsaIndice(plano, 'solicitacao_status_criacao_idx')
+    
+    def test_listagem_por_varios_status(self):
+        """Testa que ?status=a&status=b vira um único IN, sem DISTINCT"""
+        queryset = self.filtrar(status=[Request.STATUS_PENDENTE, Request.STATUS_EM_ANALISE])
+        self.assertFalse(queryset.query.distinct)
+        self.assertIn(' IN (', str(queryset.query))
+        self.assertNotRegex(queryset[:20].explain(), rf'SCAN {self.tabela}(?! USING)')
+    
+    def test_listagem_por_tipo_status_e_valor(self):
+        """Testa tipo + status + faixa de valor"""
+        plano = self.filtrar(
+            tipo=[Request.TIPO_REEMBOLSO], status=[Request.STATUS_PENDENTE], valor_min='10', valor_max='100',
+        )[:20].explain()
+        self.assertUsaIndice(plano, 'solicitacao_tipo_st_valor_idx', ordenado=False)
+        self.assertIn('valor>? AND valor<?', plano)
+    
+    def test_filtro_por_data_inicio(self):
+        """Testa ?data_inicio_min / ?data_inicio_max"""
+        plano = self.filtrar(data_inicio_min='2024-01-01', data_inicio_max='2024-06-30').explain()
+        self.assertUsaIndice(plano, 'solicitacao_inicio_idx', ordenado=False)
+    
+    def test_paginacao_por_cursor_com_status(self):
+        """Testa a página seguinte do cursor com ?status="""
+        referencia = Request.objects.filter(status=Request.STATUS_PENDENTE).order_by('-data_criacao', '-id')[10]
+        queryset = self.filtrar(status=[Request.STATUS_PENDENTE]).filter(
+            Q(data_criacao__lt=referencia.data_criacao)
+            | Q(data_criacao=referencia.data_criacao, id__lt=referencia.id)
+        )
+        self.assertUsaIndice(queryset[:21].explain(), 'solicitacao_status_criacao_idx')
+    
+    def test_soma_aprovadas(self):
+        """Testa SUM(valor) das aprovadas lendo só o índice"""
+        plano = Request.objects.filter(status=Request.STATUS_APROVADO).order_by().values('valor').explain()
+        self.assertIn('USING COVERING INDEX solicitacao_status_valor_idx', plano)
+    
+    def test_resumo_por_tipo_e_status(self):
+        """Testa o GROUP BY tipo, status do resumo lendo só o índice"""
+        plano = (
+            Request.objects.order_by().values_list('tipo', 'status')
+            .annotate(quantidade=Count('id'), valor_total=Sum('valor')).explain()
+        )
+        self.assertIn('USING COVERING INDEX solicitacao_tipo_st_valor_idx', plano)
+        self.assertNotIn('USE TEMP B-TREE', plano)
+    
+    def test_indice_parcial_das_abertas(self):
+        """Testa que o predicado do índice parcial corresponde ao filtro da fila em aberto"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'EXPLAIN QUERY PLAN SELECT id FROM {self.tabela} '
+                f"WHERE status IN ('pendente', 'em_analise') ORDER BY data_criacao DESC, id DESC LIMIT 20"
+            )
+            plano = '\n'.join(linha[-1] for linha in cursor.fetchall())
+        self.assertUsaIndice(plano, 'solicitacao_abertas_idx')
+
+
+@override_settings(SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0, 'INSTRUMENTACAO_AMOSTRAGEM': 1})
+class InstrumentacaoTest(APITestCase):
+    """
+    Testes da instrumentação de SQL por requisição (Server-Timing e log)
+    """
+    
+    def setUp(self):
+        self.list_url = '/api/v1/solicitacoes/'
+        self.solicitacao = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Táxi',
+            descricao='Viagem ao cliente',
+            solicitante='Ana Costa',
+            valor=Decimal('80.00'),
+        )
+    
+    @staticmethod
+    def metricas(response):
+        """Converte o Server-Timing em {nome: {parâmetro: valor}}"""
+        resultado = {}
+        for metrica in response['Server-Timing'].split(', '):
+            nome, *parametros = metrica.split(';')
+            resultado[nome] = dict(parametro.split('=', 1) for parametro in parametros)
+        return resultado
+    
+    def test_server_timing_e_log(self):
+        """Testa o cabeçalho e a linha de log com as consultas da requisição"""
+        with CaptureQueriesContext(connection) as consultas:
+            with self.assertLogs('solicitations.instrumentacao', 'INFO') as logs:
+                response = self.client.get(self.list_url, HTTP_ACCEPT='application/json')
+        
+        metricas = self.metricas(response)
+        self.assertEqual(metricas['db']['desc'], f'"{len(consultas)} consultas"')
+        self.assertEqual({'db', 'db-lenta', 'serializacao', 'total'}, set(metricas))
+        
+        registro = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertEqual(registro['view'], 'RequestViewSet.list')
+        self.assertEqual(registro['consultas'], len(consultas))
+        self.assertIn('SELECT', registro['consulta_mais_lenta'])
+        self.assertGreater(registro['serializacao_ms'], 0)
+        self.assertEqual(registro['repetidas'], [])
+    
+    def test_consultas_repetidas(self):
+        """Testa que a mesma forma de consulta repetida é apontada como suspeita de N+1"""
+        itens = [
+            {'tipo': 'reembolso', 'titulo': f'Item {i}', 'descricao': 'Item', 'solicitante': 'Ana', 'valor': '10.00'}
+            for i in range(3)
+        ]
+        with self.settings(SOLICITACOES={'INSTRUMENTACAO_LIMIAR_REPETICOES': 3}):
+            with self.assertLogs('solicitations.instrumentacao', 'WARNING') as logs:
+                response = self.client.post('/api/v1/solicitacoes/bulk/?tamanho_lote=1', itens, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.metricas(response)['n1']['desc'], '"1 formas repetidas (max 3x)"')
+        self.assertTrue(response['Server-Timing'].isascii())
+        registro = json.loads(logs.records[0].getMessage())
+        self.assertEqual(registro['view'], 'RequestViewSet.criar_em_massa')
+        self.assertTrue(registro['repetidas'][0]['sql'].startswith('INSERT INTO'))
+        self.assertEqual(registro['repetidas'][0]['vezes'], 3)
+    
+    def test_amostragem(self):
+        """Testa que requisições fora da amostra não são medidas"""
+        with self.settings(SOLICITACOES={'INSTRUMENTACAO_AMOSTRAGEM': 0}):
+            response = self.client.get(self.list_url, HTTP_ACCEPT='application/json')
+        self.assertNotIn('Server-Timing', response)
+    
+    def test_forma_das_consultas(self):
+        """Testa a normalização de valores, literais e listas de IN"""
+        from .instrumentacao import forma
+        
+        self.assertEqual(
+            forma("SELECT * FROM t WHERE a IN (%s, %s, %s) AND b = 'x' LIMIT 21 OFFSET 40"),
+            forma("SELECT * FROM t WHERE a IN (%s) AND b = 'y' LIMIT 21 OFFSET 60"),
+        )
+        self.assertNotEqual(forma('SELECT a FROM t'), forma('SELECT b FROM t'))
+    
+    @override_settings(ROOT_URLCONF='core.urls_asgi')
+    async def test_views_assincronas(self):
+        """Testa a medição das consultas feitas pelas views assíncronas (em outra thread)"""
+        from django.test import AsyncClient
+        
+        with self.assertLogs('solicitations.instrumentacao', 'INFO') as logs:
+            response = await AsyncClient().get(f'{self.list_url}{self.solicitacao.pk}/', HTTP_ACCEPT='application/json')
+        registro = json.loads(logs.records[0].getMessage())
+        self.assertEqual(registro['view'], 'RequestAsyncViewSet.retrieve')
+        self.assertEqual(registro['consultas'], 1)
+        self.assertEqual(self.metricas(response)['db']['desc'], '"1 consultas"')
+
+
+class MetricasTest(APITestCase):
+    """
+    Testes das métricas do Prometheus (GET /metrics)
+    """
+    
+    def setUp(self):
+        import shutil
+        import tempfile
+        
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        # Sem amostragem: as métricas valem para todas as requisições
+        configuracoes = override_settings(SOLICITACOES={
+            'CACHE_RESPOSTAS_TIMEOUT': 0,
+            'INSTRUMENTACAO_AMOSTRAGEM': 0,
+            'METRICAS_DIRETORIO': self.diretorio,
+        })
+        configuracoes.enable()
+        self.addCleanup(configuracoes.disable)
+        self.list_url = '/api/v1/solicitacoes/'
+        self.solicitacao = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Táxi',
+            descricao='Viagem ao cliente',
+            solicitante='Ana Costa',
+            valor=Decimal('80.00'),
+        )
+    
+    def ler_metricas(self):
+        """Lê o /metrics como {série: valor}"""
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return {
+            serie: float(valor)
+            for serie, valor in (
+                linha.rsplit(' ', 1) for linha in response.content.decode().splitlines()
+                if not linha.startswith('#')
+            )
+        }
+    
+    def test_requisicoes_por_acao(self):
+        """Testa os contadores e histogramas por ação do RequestViewSet"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.list_url, HTTP_ACCEPT='application/json')
+        # O log de consultas é zerado a cada requisição
+        total_consultas = len(consultas)
+        self.client.get(self.list_url, HTTP_ACCEPT='application/json')
+        self.client.post(f'{self.list_url}{self.solicitacao.pk}/aprovar/', {}, format='json')
+        
+        valores = self.ler_metricas()
+        rotulos = 'view="RequestViewSet",acao="list"'
+        self.assertEqual(valores[f'solicitacoes_http_requisicoes_total{{{rotulos},metodo="GET",status="200"}}'], 2)
+        self.assertEqual(valores[f'solicitacoes_http_latencia_segundos_count{{{rotulos}}}'], 2)
+        self.assertEqual(valores[f'solicitacoes_http_latencia_segundos_bucket{{{rotulos},le="+Inf"}}'], 2)
+        self.assertEqual(valores[f'solicitacoes_http_consultas_sql_sum{{{rotulos}}}'], 2 * total_consultas)
+        self.assertEqual(valores[f'solicitacoes_http_resposta_bytes_sum{{{rotulos}}}'], 2 * len(response.content))
+        self.assertEqual(valores[f'solicitacoes_http_erros_total{{{rotulos}}}'], 0)
+        self.assertEqual(
+            valores['solicitacoes_http_requisicoes_total{view="RequestViewSet",acao="aprovar",metodo="POST",status="200"}'],
+            1,
+        )
+        # Buckets acumulados
+        buckets = [
+            valor for serie, valor in valores.items()
+            if serie.startswith(f'solicitacoes_http_latencia_segundos_bucket{{{rotulos}')
+        ]
+        self.assertEqual(buckets, sorted(buckets))
+    
+    def test_erros(self):
+        """Testa a contagem de respostas 5xx"""
+        from unittest import mock
+        from .views import RequestViewSet
+        
+        self.client.raise_request_exception = False
+        with mock.patch.object(RequestViewSet, 'retrieve', side_effect=RuntimeError('falha')):
+            response = self.client.get(f'{self.list_url}{self.solicitacao.pk}/')
+        self.assertEqual(response.status_code, 500)
+        
+        valores = self.ler_metricas()
+        self.assertEqual(valores['solicitacoes_http_erros_total{view="RequestViewSet",acao="retrieve"}'], 1)
+    
+    @skipUnless(hasattr(__import__('os'), 'fork'), 'requer fork()')
+    def test_soma_entre_processos(self):
+        """Testa que o /metrics soma as observações de vários processos (workers)"""
+        import os
+        from . import metricas
+        
+        registro = metricas.registro()
+        registro.observar('RequestViewSet', 'create', 'POST', 201, 0.01, 2, 100)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                for _ in range(3):
+                    registro.observar('RequestViewSet', 'create', 'POST', 201, 0.02, 3, 200)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        
+        self.assertEqual(len(os.listdir(self.diretorio)), 2)
+        valores = self.ler_metricas()
+        rotulos = 'view="RequestViewSet",acao="create"'
+        self.assertEqual(valores[f'solicitacoes_http_requisicoes_total{{{rotulos},metodo="POST",status="201"}}'], 4)
+        self.assertEqual(valores[f'solicitacoes_http_consultas_sql_sum{{{rotulos}}}'], 11)
+        self.assertEqual(valores[f'solicitacoes_http_resposta_bytes_bucket{{{rotulos},le="256.0"}}'], 4)
+    
+    def test_desativadas(self):
+        """Testa que o /metrics não existe com as métricas desativadas"""
+        with self.settings(SOLICITACOES={'METRICAS_ATIVAS': False}):
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SeedBenchmarkTest(TestCase):
+    """Testes para os comandos seed_solicitacoes e benchmark_api"""
+    
+    def test_seed(self):
+        """Testa que o seed gera solicitações válidas e mantém o resumo consistente"""
+        saida = StringIO()
+        call_command('seed_solicitacoes', '--rows', '300', '--lote', '120', '--dias', '90', stdout=saida)
+        
+        relatorio = json.loads(saida.getvalue())
+        self.assertEqual(relatorio['criadas'], 300)
+        self.assertEqual(Request.objects.count(), 300)
+        self.assertEqual(RequestSummary.objects.divergencias(), {})
+        
+        tipos = dict(Request.objects.values_list('tipo').annotate(total=Count('id')))
+        self.assertGreater(tipos[Request.TIPO_REEMBOLSO], tipos[Request.TIPO_TREINAMENTO])
+        self.assertGreater(Request.objects.values('solicitante').distinct().count(), 20)
+        # Datas espalhadas pelo período, e não todas iguais ao momento da carga
+        datas = Request.objects.values_list('data_criacao', flat=True)
+        self.assertGreater(max(datas) - min(datas), timedelta(days=30))
+        for solicitacao in Request.objects.all()[:100]:
+            solicitacao.full_clean()
+            self.assertGreaterEqual(solicitacao.data_atualizacao, solicitacao.data_criacao)
+        
+        # auto_now restaurado depois da carga
+        self.assertTrue(Request._meta.get_field('data_atualizacao').auto_now)
+        self.assertTrue(Request._meta.get_field('data_criacao').auto_now_add)
+    
+    def test_seed_deterministico(self):
+        """Testa que a mesma semente gera as mesmas solicitações"""
+        from .sinteticos import GeradorSolicitacoes
+        
+        agora = timezone.now()
+        primeiro = GeradorSolicitacoes(semente=7, agora=agora).lote(20)
+        segundo = GeradorSolicitacoes(semente=7, agora=agora).lote(20)
+        self.assertEqual(
+            [(s.tipo, s.solicitante, s.valor, s.data_criacao) for s in primeiro],
+            [(s.tipo, s.solicitante, s.valor, s.data_criacao) for s in segundo],
+        )
+    
+    def test_benchmark(self):
+        """Testa o relatório do benchmark e que o banco fica inalterado"""
+        call_command('seed_solicitacoes', '--linhas', '200', '--dias', '30', stdout=StringIO())
+        pendentes = Request.objects.filter(status=Request.STATUS_PENDENTE).count()
+        
+        saida = StringIO()
+        call_command('benchmark_api', '--repeticoes', '2', '--aquecimento', '0', stdout=saida)
+        
+        resultado = json.loads(saida.getvalue())
+        self.assertEqual(resultado['linhas'], 200)
+        self.assertIn('transicao_aprovar', resultado['cenarios'])
+        for nome, cenario in resultado['cenarios'].items():
+            self.assertEqual(cenario['n'], 2, nome)
+            self.assertLessEqual(cenario['p50_ms'], cenario['p99_ms'], nome)
+            self.assertGreaterEqual(cenario['consultas_por_chamada'], 1, nome)
+        # As transições foram desfeitas
+        self.assertEqual(Request.objects.filter(status=Request.STATUS_PENDENTE).count(), pendentes)
+        self.assertEqual(RequestSummary.objects.divergencias(), {})
+    
+    def test_benchmark_cenario_desconhecido(self):
+        """Testa a validação dos cenários"""
+        Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO, titulo='Táxi', descricao='Táxi', solicitante='Ana', valor=Decimal('10.00')
+        )
+        with self.assertRaises(CommandError):
+            call_command('benchmark_api', '--cenarios', 'inexistente', stdout=StringIO())
+
+
+@override_settings(SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0})
+class ArquivamentoTest(APITestCase):
+    """Testes do arquivamento das solicitações finalizadas antigas"""
+    
+    def setUp(self):
+        self.list_url = '/api/v1/solicitacoes/'
+        self.antigas = []
+        for i in range(5):
+            solicitacao = Request.objects.create(
+                tipo=Request.TIPO_REEMBOLSO,
+                titulo=f'Hotel {i}',
+                descricao='Hospedagem em congresso',
+                solicitante='Ana Costa' if i % 2 else 'Bruno Lima',
+                valor=Decimal('100.00') * (i + 1),
+            )
+            self.antigas.append(solicitacao)
+        self.antigas[0].aprovar()
+        self.antigas[1].aprovar()
+        self.antigas[2].rejeitar('Fora da política')
+        self.antigas[3].cancelar()
+        # antigas[4] continua pendente: não é arquivada, mesmo antiga
+        self.recente = Request.objects.create(
+            tipo=Request.TIPO_FERIAS,
+            titulo='Férias',
+            descricao='Descanso',
+            solicitante='Ana Costa',
+            data_inicio=date(2025, 1, 10),
+            data_fim=date(2025, 1, 20),
+        )
+        self.recente.aprovar()
+        
+        # Criadas e finalizadas há dois anos, em dias diferentes
+        agora = timezone.now()
+        for dias, solicitacao in enumerate(self.antigas):
+            Request.objects.filter(pk=solicitacao.pk).update(
+                data_criacao=agora - timedelta(days=800 - dias),
+                data_atualizacao=agora - timedelta(days=700 - dias),
+            )
+        self.arquivaveis = [solicitacao.pk for solicitacao in self.antigas[:4]]
+        self.limite = agora - timedelta(days=365)
+    
+    def arquivar(self, **kwargs):
+        return Request.objects.arquivar(self.limite, **kwargs)
+    
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return [item['id'] for item in response.data['results']]
+    
+    def test_arquivar_finalizadas_antigas(self):
+        """Testa que só as finalizadas antigas são movidas, em lotes, com as mesmas colunas"""
+        campos = [campo.name for campo in RequestArquivada._meta.concrete_fields]
+        originais = list(Request.objects.filter(pk__in=self.arquivaveis).order_by('pk').values(*campos))
+        
+        self.assertEqual(self.arquivar(tamanho_lote=3), 4)
+        
+        self.assertEqual(list(RequestArquivada.objects.order_by('pk').values(*campos)), originais)
+        self.assertEqual(
+            set(Request.objects.values_list('pk', flat=True)),
+            {self.antigas[4].pk, self.recente.pk},
+        )
+        self.assertEqual(RequestSummary.objects.divergencias(), {})
+        self.assertEqual(RequestSummary.objects.total(), 2)
+        self.assertEqual(RequestSummary.objects.total(arquivadas=True), 6)
+        # Nada mais a arquivar
+        self.assertEqual(self.arquivar(), 0)
+    
+    def test_listagem(self):
+        """Testa a listagem sem e com as arquivadas (UNION ALL), com filtros e busca"""
+        self.arquivar()
+        
+        self.assertEqual(self.ids(self.list_url), [self.recente.pk, self.antigas[4].pk])
+        todas = [self.recente.pk] + [solicitacao.pk for solicitacao in reversed(self.antigas)]
+        response = self.client.get(f'{self.list_url}?incluir_arquivadas=true')
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual([item['id'] for item in response.data['results']], todas)
+        
+        # Filtros, busca e ordenação valem para as duas tabelas
+        url = f'{self.list_url}?incluir_arquivadas=true&solicitante=Ana'
+        self.assertEqual(self.ids(url), [self.recente.pk, self.antigas[3].pk, self.antigas[1].pk])
+        self.assertEqual(self.client.get(url).data['count'], 3)
+        url = f'{self.list_url}?incluir_arquivadas=true&status=aprovado&ordering=-valor'
+        self.assertEqual(self.ids(url)[:2], [self.antigas[1].pk, self.antigas[0].pk])
+        url = f'{self.list_url}?incluir_arquivadas=true&search=hotel'
+        self.assertEqual(self.ids(url)[0], self.antigas[4].pk)
+        self.assertEqual(len(self.ids(url)), 5)
+        self.assertEqual(self.ids(f'{self.list_url}?search=hotel'), [self.antigas[4].pk])
+        
+        response = self.client.get(f'{self.list_url}?incluir_arquivadas=talvez')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('incluir_arquivadas', response.data)
+    
+    def test_listagem_por_cursor(self):
+        """Testa a paginação por cursor percorrendo as duas tabelas"""
+        self.arquivar()
+        url = f'{self.list_url}?incluir_arquivadas=true&paginacao=cursor&page_size=2'
+        vistos = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            vistos += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(vistos, [self.recente.pk] + [solicitacao.pk for solicitacao in reversed(self.antigas)])
+    
+    def test_estatisticas_iguais_apos_arquivar(self):
+        """Testa que as estatísticas consideram as arquivadas, com e sem filtros"""
+        urls = [
+            f'{self.list_url}estatisticas/',
+            f'{self.list_url}estatisticas/?tipo=reembolso',
+            f'{self.list_url}estatisticas/?valor_min=150&status=aprovado&status=rejeitado',
+            f'{self.list_url}estatisticas/?search=hotel',
+        ]
+        antes = [self.client.get(url).data for url in urls]
+        self.arquivar()
+        with self.assertNumQueries(1):
+            self.client.get(urls[1])
+        self.assertEqual([self.client.get(url).data for url in urls], antes)
+        self.assertEqual(antes[0]['total'], 6)
+        self.assertEqual(antes[2], {
+            'total': 2,
+            'por_tipo': {'reembolso': 2},
+            'por_status': {'aprovado': 1, 'rejeitado': 1},
+            'valor_total_aprovado': 200.0,
+        })
+    
+    def test_detalhe_e_escritas(self):
+        """Testa o detalhe de uma arquivada e que ela não aceita escritas"""
+        self.arquivar()
+        url = f'{self.list_url}{self.antigas[0].pk}/'
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        
+        response = self.client.get(f'{url}?incluir_arquivadas=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], Request.STATUS_APROVADO)
+        self.assertFalse(response.data['pode_ser_cancelada'])
+        
+        response = self.client.post(f'{url}cancelar/?incluir_arquivadas=true', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_exportacao(self):
+        """Testa a exportação com as arquivadas"""
+        self.arquivar()
+        response = self.client.get(f'{self.list_url}exportar/?format=ndjson&incluir_arquivadas=true&tipo=reembolso')
+        linhas = [json.loads(linha) for linha in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([linha['id'] for linha in linhas], [solicitacao.pk for solicitacao in reversed(self.antigas)])
+        
+        # Com a busca, a união é ordenada pela relevância (as arquivadas vêm depois)
+        response = self.client.get(f'{self.list_url}exportar/?format=ndjson&incluir_arquivadas=true&search=hotel')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        linhas = [json.loads(linha) for linha in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(linhas[0]['id'], self.antigas[4].pk)
+        self.assertEqual(sorted(linha['id'] for linha in linhas), sorted(solicitacao.pk for solicitacao in self.antigas))
+        self.assertNotIn('relevancia', linhas[0])
+    
+    def test_comando(self):
+        """Testa o comando arquivar_solicitacoes (simulação e arquivamento)"""
+        saida = StringIO()
+        call_command('arquivar_solicitacoes', '--dias', '365', '--simular', stdout=saida)
+        self.assertEqual(json.loads(saida.getvalue())['elegiveis'], 4)
+        self.assertEqual(RequestArquivada.objects.count(), 0)
+        
+        saida = StringIO()
+        call_command('arquivar_solicitacoes', '--lote', '1', stdout=saida)
+        self.assertEqual(json.loads(saida.getvalue())['arquivadas'], 4)
+        self.assertEqual(RequestArquivada.objects.count(), 4)
+        call_command('recalcular_estatisticas', '--verificar', stdout=StringIO())
+    
+    @override_settings(ROOT_URLCONF='core.urls_asgi')
+    async def test_caminho_assincrono(self):
+        """Testa que as views assíncronas respondem como as síncronas com as arquivadas"""
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncClient
+        
+        await sync_to_async(self.arquivar)()
+        cliente = AsyncClient()
+        urls = [
+            f'{self.list_url}?incluir_arquivadas=true',
+            f'{self.list_url}?incluir_arquivadas=true&solicitante=Ana',
+            f'{self.list_url}{self.antigas[0].pk}/?incluir_arquivadas=true',
+            f'{self.list_url}estatisticas/?tipo=reembolso',
+        ]
+        for url in urls:
+            sincrona = await sync_to_async(self.client.get)(url)
+            assincrona = await cliente.get(url)
+            self.assertEqual(assincrona.status_code, status.HTTP_200_OK, url)
+            self.assertEqual(assincrona.content, sincrona.content, url)
+
+
+@override_settings(SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0})
+class SerieTemporalTest(APITestCase):
+    """Testes das séries temporais (RequestSerie) e do endpoint estatisticas/serie/"""
+    
+    def setUp(self):
+        from .sinteticos import datas_explicitas
+        
+        self.url = '/api/v1/solicitacoes/estatisticas/serie/'
+        
+        def criada_em(ano, mes, dia, hora=12, **campos):
+            data = timezone.make_aware(datetime(ano, mes, dia, hora))
+            return Request(data_criacao=data, data_atualizacao=data, descricao='Teste', solicitante='Ana', **campos)
+        
+        # Dez reembolsos em janeiro de 2026 (valores 10, 20, ..., 100), dois
+        # treinamentos em fevereiro e férias (sem valor) em janeiro
+        solicitacoes = [
+            criada_em(2026, 1, 5 + i % 3, tipo=Request.TIPO_REEMBOLSO, titulo=f'Táxi {i}', valor=Decimal(10 * (i + 1)))
+            for i in range(10)
+        ]
+        solicitacoes += [
+            criada_em(
+                2026, 2, 10, tipo=Request.TIPO_TREINAMENTO, titulo='Curso', valor=Decimal('1500.00'),
+                data_inicio=date(2026, 3, 1), data_fim=date(2026, 3, 2),
+            ),
+            criada_em(
+                2026, 2, 11, tipo=Request.TIPO_TREINAMENTO, titulo='Curso', valor=Decimal('500.00'),
+                data_inicio=date(2026, 3, 1), data_fim=date(2026, 3, 2),
+            ),
+            # 01/02 01:00 em UTC ainda é 31/01 no fuso do projeto
+            Request(
+                tipo=Request.TIPO_FERIAS, titulo='Férias', descricao='Teste', solicitante='Bruno',
+                data_inicio=date(2026, 3, 1), data_fim=date(2026, 3, 10),
+                data_criacao=datetime(2026, 2, 1, 1, tzinfo=dt_timezone.utc),
+                data_atualizacao=datetime(2026, 2, 1, 1, tzinfo=dt_timezone.utc),
+            ),
+        ]
+        with datas_explicitas():
+            self.solicitacoes = Request.objects.criar_em_massa(solicitacoes)
+    
+    def consultar(self, **parametros):
+        parametros = {'inicio': '2026-01-01', 'fim': '2026-03-31', **parametros}
+        response = self.client.get(self.url, parametros)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.json()
+    
+    def test_serie_mensal(self):
+        """Testa a série por mês, tipo e status, com média e percentis"""
+        dados = self.consultar(granularidade='mes')
+        self.assertEqual(dados['granularidade'], 'mes')
+        self.assertEqual(dados['inicio'], '2026-01-01')
+        self.assertEqual(
+            [(ponto['periodo'], ponto['tipo'], ponto['status'], ponto['quantidade']) for ponto in dados['resultados']],
+            [
+                ('2026-01-01', 'ferias', 'pendente', 1),
+                ('2026-01-01', 'reembolso', 'pendente', 10),
+                ('2026-02-01', 'treinamento', 'pendente', 2),
+            ],
+        )
+        ferias, reembolsos, treinamentos = dados['resultados']
+        self.assertIsNone(ferias['valor_medio'])
+        self.assertIsNone(ferias['valor_p50'])
+        self.assertEqual(reembolsos['valor_total'], 550.0)
+        self.assertEqual(reembolsos['valor_medio'], 55.0)
+        self.assertAlmostEqual(reembolsos['valor_p50'], 50, delta=0.5)
+        self.assertAlmostEqual(reembolsos['valor_p90'], 90, delta=0.9)
+        self.assertEqual(treinamentos['valor_medio'], 1000.0)
+    
+    def test_granularidades_e_agrupamentos(self):
+        """Testa as séries por dia e semana, os filtros e os agrupamentos"""
+        dados = self.consultar(granularidade='dia', tipo='reembolso')
+        self.assertEqual(
+            [(ponto['periodo'], ponto['quantidade']) for ponto in dados['resultados']],
+            [('2026-01-05', 4), ('2026-01-06', 3), ('2026-01-07', 3)],
+        )
+        dados = self.consultar(granularidade='semana', agrupar='periodo')
+        self.assertEqual(
+            [(ponto['periodo'], ponto['quantidade']) for ponto in dados['resultados']],
+            [('2026-01-05', 10), ('2026-01-26', 1), ('2026-02-09', 2)],
+        )
+        self.assertNotIn('tipo', dados['resultados'][0])
+        dados = self.consultar(agrupar='tipo', status=['pendente', 'aprovado'], inicio='2026-02-05')
+        # O período que contém o início (fevereiro) entra inteiro
+        self.assertEqual(
+            [(ponto['periodo'], ponto['tipo'], ponto['quantidade']) for ponto in dados['resultados']],
+            [('2026-02-01', 'treinamento', 2)],
+        )
+        self.assertEqual(dados['resultados'][0]['valor_total'], 2000.0)
+    
+    def test_manutencao_incremental(self):
+        """Testa que criações, alterações, transições, exclusões e o arquivamento mantêm as séries"""
+        reembolso = self.solicitacoes[0]
+        reembolso.valor = Decimal('15.00')
+        reembolso.save()
+        reembolso.aprovar()
+        self.solicitacoes[1].rejeitar('Fora da política')
+        Request.objects.filter(pk__in=[s.pk for s in self.solicitacoes[2:5]]).cancelar()
+        self.solicitacoes[5].delete()
+        Request.objects.filter(pk=self.solicitacoes[6].pk).delete()
+        Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO, titulo='Hotel', descricao='Teste', solicitante='Ana', valor=Decimal('80.00')
+        )
+        Request.objects.arquivar(timezone.now() + timedelta(days=1))
+        self.assertTrue(RequestArquivada.objects.exists())
+        
+        self.assertEqual(RequestSerie.objects.divergencias(), {})
+        dados = self.consultar(granularidade='mes', tipo='reembolso', agrupar='status')
+        self.assertEqual(
+            {ponto['status']: ponto['quantidade'] for ponto in dados['resultados']},
+            {'aprovado': 1, 'rejeitado': 1, 'cancelado': 3, 'pendente': 3},
+        )
+        # Linhas zeradas são removidas
+        self.assertFalse(RequestSerie.objects.filter(quantidade=0).exists())
+    
+    def test_uma_consulta(self):
+        """Testa que a série é lida com uma consulta à tabela de séries"""
+        with CaptureQueriesContext(connection) as consultas:
+            self.consultar(granularidade='dia')
+        self.assertEqual(len(consultas), 1)
+        self.assertIn(RequestSerie._meta.db_table, consultas[0]['sql'])
+    
+    def test_parametros_invalidos(self):
+        """Testa a validação dos parâmetros"""
+        response = self.client.get(self.url, {'granularidade': 'ano'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('granularidade', response.data)
+        response = self.client.get(self.url, {'inicio': '2026-02-01', 'fim': '2026-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fim', response.data)
+        response = self.client.get(self.url, {'tipo': 'viagem'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_comando_recalcular_series(self):
+        """Testa a verificação e a reconstrução (backfill) das séries pelo comando"""
+        call_command('recalcular_series', '--verificar', stdout=StringIO())
+        esperado = self.consultar(granularidade='semana')
+        
+        RequestSerie.objects.filter(granularidade='semana').delete()
+        with self.assertRaises(CommandError):
+            call_command('recalcular_series', '--verificar', stdout=StringIO())
+        call_command('recalcular_series', stdout=StringIO())
+        self.assertEqual(RequestSerie.objects.divergencias(), {})
+        self.assertEqual(self.consultar(granularidade='semana'), esperado)
+    
+    @override_settings(ROOT_URLCONF='core.urls_asgi')
+    async def test_caminho_assincrono(self):
+        """Testa que a série assíncrona responde como a síncrona"""
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncClient
+        
+        url = f'{self.url}?inicio=2026-01-01&fim=2026-03-31&granularidade=semana'
+        sincrona = await sync_to_async(self.client.get)(url)
+        assincrona = await AsyncClient().get(url)
+        self.assertEqual(assincrona.status_code, status.HTTP_200_OK)
+        self.assertEqual(assincrona.content, sincrona.content)
+
+
+class MudancasTest(APITestCase):
+    """Testes do log de mudanças e do endpoint de sincronização incremental"""
+    
+    def setUp(self):
+        self.url = '/api/v1/solicitacoes/mudancas/'
+        self.token = self.client.get(self.url).data['proximo']
+    
+    def criar(self, titulo, **campos):
+        return Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo=titulo,
+            descricao='Teste',
+            solicitante='Ana Costa',
+            valor=Decimal('50.00'),
+            **campos
+        )
+    
+    def mudancas(self, desde, **parametros):
+        response = self.client.get(self.url, {'desde': desde, **parametros})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.data
+    
+    def test_token_inicial(self):
+        """Testa que sem `desde` apenas o token atual é devolvido"""
+        self.assertEqual(self.token, '0')
+        self.criar('Táxi')
+        dados = self.client.get(self.url).data
+        self.assertEqual(dados['mudancas'], [])
+        self.assertEqual(dados['proximo'], str(RequestMudanca.objects.atual()))
+        self.assertEqual(self.mudancas(dados['proximo'])['mudancas'], [])
+    
+    def test_mudancas_em_ordem_com_exclusoes(self):
+        """Testa o lote ordenado, com a última mudança de cada solicitação e lápides"""
+        taxi = self.criar('Táxi')
+        hotel = self.criar('Hotel')
+        excluida = self.criar('Duplicada').pk
+        taxi.titulo = 'Táxi aeroporto'
+        taxi.save()
+        Request.objects.get(pk=excluida).delete()
+        hotel.aprovar()
+        
+        dados = self.mudancas(self.token)
+        self.assertFalse(dados['mais'])
+        self.assertEqual(
+            [(mudanca['id'], mudanca['operacao']) for mudanca in dados['mudancas']],
+            [(taxi.pk, 'atualizacao'), (excluida, 'exclusao'), (hotel.pk, 'transicao')],
+        )
+        taxi_mudanca, lapide, hotel_mudanca = dados['mudancas']
+        self.assertEqual(taxi_mudanca['solicitacao']['titulo'], 'Táxi aeroporto')
+        self.assertEqual(taxi_mudanca['solicitacao']['versao'], 2)
+        self.assertIsNone(lapide['solicitacao'])
+        self.assertEqual(hotel_mudanca['solicitacao']['status'], Request.STATUS_APROVADO)
+        self.assertEqual(dados['proximo'], str(hotel_mudanca['sequencia']))
+        
+        # Retomada: só o que mudou depois do token
+        taxi.cancelar()
+        dados = self.mudancas(dados['proximo'])
+        self.assertEqual([(m['id'], m['operacao']) for m in dados['mudancas']], [(taxi.pk, 'transicao')])
+        self.assertEqual(self.mudancas(dados['proximo'])['mudancas'], [])
+    
+    def test_operacoes_em_massa(self):
+        """Testa que criação, transição e exclusão em massa entram no log"""
+        criadas = Request.objects.criar_em_massa([
+            Request(tipo=Request.TIPO_REEMBOLSO, titulo=f'Item {i}', descricao='Teste', solicitante='Ana', valor=1)
+            for i in range(3)
+        ])
+        ids = [solicitacao.pk for solicitacao in criadas]
+        self.assertEqual(RequestMudanca.objects.filter(operacao='criacao').count(), 3)
+        Request.objects.filter(pk__in=ids[:2]).aprovar()
+        Request.objects.filter(pk=ids[2]).delete()
+        self.assertEqual(
+            list(RequestMudanca.objects.order_by('id').values_list('solicitacao_id', 'operacao')),
+            [(ids[0], 'criacao'), (ids[1], 'criacao'), (ids[2], 'criacao'),
+             (ids[0], 'transicao'), (ids[1], 'transicao'), (ids[2], 'exclusao')],
+        )
+    
+    def test_lotes_com_limite(self):
+        """Testa a leitura em lotes de `limite` mudanças com `mais`"""
+        ids = [self.criar(f'Item {i}').pk for i in range(5)]
+        lidos, token = [], self.token
+        while True:
+            dados = self.mudancas(token, limite=2)
+            lidos += [mudanca['id'] for mudanca in dados['mudancas']]
+            token = dados['proximo']
+            if not dados['mais']:
+                break
+        self.assertEqual(lidos, ids)
+    
+    def test_custo_independente_da_tabela(self):
+        """Testa que a sincronização faz poucas consultas, limitadas ao que mudou"""
+        for i in range(20):
+            self.criar(f'Item {i}')
+        token = self.client.get(self.url).data['proximo']
+        alterada = Request.objects.order_by('id').first()
+        alterada.aprovar()
+        with self.assertNumQueries(3):
+            dados = self.mudancas(token)
+        self.assertEqual([mudanca['id'] for mudanca in dados['mudancas']], [alterada.pk])
+    
+    def test_arquivadas(self):
+        """Testa que o arquivamento não gera mudanças e que as arquivadas são encontradas"""
+        solicitacao = self.criar('Hotel')
+        solicitacao.aprovar()
+        Request.objects.arquivar(timezone.now() + timedelta(days=1))
+        dados = self.mudancas(self.token)
+        self.assertEqual(len(dados['mudancas']), 1)
+        self.assertEqual(dados['mudancas'][0]['operacao'], 'transicao')
+        self.assertEqual(dados['mudancas'][0]['solicitacao']['status'], Request.STATUS_APROVADO)
+    
+    def test_podar_e_token_expirado(self):
+        """Testa a poda do log e o 410 para tokens anteriores ao trecho removido"""
+        for i in range(3):
+            self.criar(f'Antiga {i}')
+        lido = self.mudancas(self.token)['proximo']
+        RequestMudanca.objects.update(data=timezone.now() - timedelta(days=60))
+        recente = self.criar('Recente')
+        
+        saida = StringIO()
+        call_command('podar_mudancas', '--dias', '30', stdout=saida)
+        self.assertEqual(json.loads(saida.getvalue())['removidas'], 3)
+        
+        response = self.client.get(self.url, {'desde': self.token})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        # Quem já tinha lido até a última removida continua de onde parou
+        dados = self.mudancas(lido)
+        self.assertEqual([mudanca['id'] for mudanca in dados['mudancas']], [recente.pk])
+        
+        # A mudança mais recente nunca é removida
+        RequestMudanca.objects.update(data=timezone.now() - timedelta(days=60))
+        call_command('podar_mudancas', '--dias', '30', stdout=StringIO())
+        self.assertEqual(RequestMudanca.objects.count(), 1)
+        self.assertEqual(self.mudancas(dados['proximo'])['mudancas'], [])
+    
+    def test_parametros_invalidos(self):
+        """Testa a validação de `desde` e `limite`"""
+        response = self.client.get(self.url, {'desde': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('desde', response.data)
+        response = self.client.get(self.url, {'desde': 0, 'limite': 100000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('limite', response.data)
+    
+    @override_settings(ROOT_URLCONF='core.urls_asgi')
+    def test_rota_sob_asgi(self):
+        """Testa que sob ASGI a rota de mudanças não é confundida com o detalhe"""
+        self.criar('Táxi')
+        dados = self.mudancas(self.token)
+        self.assertEqual(len(dados['mudancas']), 1)
+    
+    def test_gravacao_serializada_no_postgresql(self):
+        """Testa que no PostgreSQL a gravação no log toma o advisory lock antes do INSERT"""
+        from unittest import mock
+        from .signals import OPERACAO_CRIACAO, Alteracao, Estado
+        
+        solicitacao = self.criar('Táxi')
+        estado = Estado(*(getattr(solicitacao, campo) for campo in Estado._fields))
+        comandos = []
+        
+        def interceptar(execute, sql, params, many, context):
+            if not sql.startswith(('SAVEPOINT', 'RELEASE SAVEPOINT')):
+                comandos.append(sql)
+            if 'pg_advisory_xact_lock' in sql:
+                self.assertEqual(params, [RequestMudanca.objects.CHAVE_TRAVA])
+                return None
+            return execute(sql, params, many, context)
+        
+        with mock.patch.object(connection, 'vendor', 'postgresql'), connection.execute_wrapper(interceptar):
+            RequestMudanca.objects.registrar([Alteracao(OPERACAO_CRIACAO, solicitacao.pk, None, estado)])
+        self.assertIn('pg_advisory_xact_lock', comandos[0])
+        self.assertTrue(comandos[1].startswith('INSERT'))
+        
+        comandos.clear()
+        with connection.execute_wrapper(interceptar):
+            RequestMudanca.objects.registrar([Alteracao(OPERACAO_CRIACAO, solicitacao.pk, None, estado)])
+        self.assertFalse(any('pg_advisory_xact_lock' in sql for sql in comandos))
+
+
+@override_settings(
+    ROOT_URLCONF='core.urls_asgi',
+    SOLICITACOES={'EVENTOS_INTERVALO_SEGUNDOS': 0.05, 'EVENTOS_BATIMENTO_SEGUNDOS': 0.2},
+)
+class EventosTest(APITestCase):
+    """Testes do stream de eventos (Server-Sent Events) sob ASGI"""
+    
+    url = '/api/v1/solicitacoes/eventos/'
+    
+    def criar(self, titulo, tipo=Request.TIPO_REEMBOLSO, solicitante='Ana Costa'):
+        dados = {
+            'tipo': tipo,
+            'titulo': titulo,
+            'descricao': 'Teste',
+            'solicitante': solicitante,
+        }
+        if tipo == Request.TIPO_REEMBOLSO:
+            dados['valor'] = Decimal('50.00')
+        else:
+            dados['data_inicio'] = date.today() + timedelta(days=30)
+            dados['data_fim'] = date.today() + timedelta(days=40)
+        return Request.objects.create(**dados)
+    
+    async def abrir(self, **parametros):
+        from django.test import AsyncClient
+        
+        response = await AsyncClient().get(self.url, parametros.pop('dados', {}), **parametros)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, aiter(response.streaming_content)
+    
+    async def proximo(self, stream):
+        """Próximo evento do stream, ignorando retry e os comentários de batimento"""
+        import asyncio
+        
+        while True:
+            bloco = (await asyncio.wait_for(anext(stream), timeout=5)).decode()
+            if bloco.startswith('id:'):
+                linhas = dict(linha.split(': ', 1) for linha in bloco.strip().split('\n'))
+                return int(linhas['id']), linhas['event'], json.loads(linhas['data'])
+    
+    async def test_eventos_em_tempo_real(self):
+        """Testa criação, transição e exclusão enviadas como eventos, na ordem do log"""
+        from asgiref.sync import sync_to_async
+        
+        response, stream = await self.abrir()
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual((await anext(stream)).decode(), 'retry: 3000\n\n')
+        
+        taxi = await sync_to_async(self.criar)('Táxi')
+        sequencia, evento, dados = await self.proximo(stream)
+        self.assertEqual(evento, 'criacao')
+        self.assertEqual(dados['id'], taxi.pk)
+        self.assertEqual(dados['sequencia'], sequencia)
+        self.assertEqual(dados['solicitacao']['titulo'], 'Táxi')
+        
+        await sync_to_async(taxi.aprovar)()
+        sequencia_transicao, evento, dados = await self.proximo(stream)
+        self.assertGreater(sequencia_transicao, sequencia)
+        self.assertEqual(evento, 'transicao')
+        self.assertEqual(dados['status_anterior'], Request.STATUS_PENDENTE)
+        self.assertEqual(dados['solicitacao']['status'], Request.STATUS_APROVADO)
+        
+        pk = taxi.pk
+        await sync_to_async(taxi.delete)()
+        _, evento, dados = await self.proximo(stream)
+        self.assertEqual(evento, 'exclusao')
+        self.assertEqual(dados['id'], pk)
+        self.assertIsNone(dados['solicitacao'])
+        await stream.aclose()
+    
+    async def test_filtros(self):
+        """Testa os filtros de tipo, status (atual ou anterior) e solicitante"""
+        from asgiref.sync import sync_to_async
+        
+        _, stream = await self.abrir(dados={'tipo': Request.TIPO_FERIAS, 'status': Request.STATUS_PENDENTE})
+        await sync_to_async(self.criar)('Táxi')
+        ferias = await sync_to_async(self.criar)('Férias', tipo=Request.TIPO_FERIAS)
+        _, evento, dados = await self.proximo(stream)
+        self.assertEqual((evento, dados['id']), ('criacao', ferias.pk))
+        # Aprovada deixa de ser pendente, mas quem acompanha as pendentes vê a transição
+        await sync_to_async(ferias.aprovar)()
+        _, evento, dados = await self.proximo(stream)
+        self.assertEqual((evento, dados['id']), ('transicao', ferias.pk))
+        await stream.aclose()
+        
+        _, stream = await self.abrir(dados={'solicitante': 'bruno'})
+        await sync_to_async(self.criar)('Hotel')
+        bruno = await sync_to_async(self.criar)('Hotel', solicitante='Bruno Lima')
+        _, _, dados = await self.proximo(stream)
+        self.assertEqual(dados['id'], bruno.pk)
+        await stream.aclose()
+    
+    async def test_retomada_com_last_event_id(self):
+        """Testa que Last-Event-ID (ou ?desde=) reenvia as mudanças perdidas, sem repetições"""
+        from asgiref.sync import sync_to_async
+        
+        desde = await RequestMudanca.objects.aatual()
+        perdidas = [await sync_to_async(self.criar)(f'Perdida {i}') for i in range(3)]
+        
+        _, stream = await self.abrir(headers={'Last-Event-ID': str(desde)})
+        recebidas = [(await self.proximo(stream))[2]['id'] for _ in perdidas]
+        self.assertEqual(recebidas, [solicitacao.pk for solicitacao in perdidas])
+        nova = await sync_to_async(self.criar)('Nova')
+        self.assertEqual((await self.proximo(stream))[2]['id'], nova.pk)
+        await stream.aclose()
+        
+        sequencia = await RequestMudanca.objects.aatual()
+        _, stream = await self.abrir(dados={'desde': sequencia - 1})
+        self.assertEqual((await self.proximo(stream))[0], sequencia)
+        await stream.aclose()
+    
+    @override_settings(SOLICITACOES={'EVENTOS_INTERVALO_SEGUNDOS': 0.05, 'EVENTOS_FILA_MAXIMA': 1})
+    async def test_cliente_lento_relido_do_log(self):
+        """Testa que um cliente cuja fila encheu recebe os eventos seguintes pelo log"""
+        from asgiref.sync import sync_to_async
+        
+        _, stream = await self.abrir()
+        criadas = await sync_to_async(lambda: [self.criar(f'Lote {i}').pk for i in range(5)])()
+        recebidas = [(await self.proximo(stream))[2]['id'] for _ in criadas]
+        self.assertEqual(recebidas, criadas)
+        await stream.aclose()
+    
+    async def test_token_expirado(self):
+        """Testa o evento `expirado` quando as mudanças perdidas já foram podadas"""
+        from asgiref.sync import sync_to_async
+        
+        await sync_to_async(self.criar)('Táxi')
+        await sync_to_async(self.criar)('Hotel')
+        await sync_to_async(RequestMudanca.objects.podar)(timezone.now() + timedelta(days=1))
+        
+        _, stream = await self.abrir(headers={'Last-Event-ID': '0'})
+        sequencia, evento, _ = await self.proximo(stream)
+        self.assertEqual(evento, 'expirado')
+        self.assertEqual(sequencia, await RequestMudanca.objects.aatual())
+        await stream.aclose()
+    
+    async def test_parametros_invalidos(self):
+        """Testa 400 para filtros ou sequência inválidos e 405 para outros métodos"""
+        from django.test import AsyncClient
+        
+        cliente = AsyncClient()
+        response = await cliente.get(self.url, {'tipo': 'inexistente'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tipo', response.json())
+        for desde in ['abc', '\u00b2', '-1']:
+            response = await cliente.get(self.url, headers={'Last-Event-ID': desde})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, desde)
+        response = await cliente.get(self.url, {'desde': '\u00b2'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = await cliente.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+    
+    async def test_autenticacao_e_permissoes(self):
+        """Testa que o stream avalia autenticação e permissões como as demais rotas"""
+        import base64
+        from unittest import mock
+        from django.contrib.auth.models import User
+        from django.test import AsyncClient
+        from rest_framework.permissions import IsAuthenticated
+        from .views_async import RequestAsyncViewSet
+        
+        await User.objects.acreate_user('gestor', password='senha-segura')
+        credenciais = base64.b64encode(b'gestor:senha-segura').decode()
+        with mock.patch.object(RequestAsyncViewSet, 'permission_classes', [IsAuthenticated]):
+            response = await AsyncClient().get(self.url, headers={'Accept': 'text/event-stream'})
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+            self.assertIn('detail', json.loads(response.content))
+            
+            _, stream = await self.abrir(headers={'authorization': f'Basic {credenciais}'})
+            self.assertEqual((await anext(stream)).decode(), 'retry: 3000\n\n')
+            await stream.aclose()
+    
+    async def test_transmissor_sobrevive_a_erros(self):
+        """Testa que um erro na leitura do log não encerra a tarefa do Transmissor"""
+        from unittest import mock
+        from asgiref.sync import sync_to_async
+        from django.db import DatabaseError
+        from . import eventos
+        
+        ler_eventos = eventos.ler_eventos
+        falhas = [DatabaseError('database is locked')]
+        
+        async def instavel(desde, limite):
+            if falhas:
+                raise falhas.pop()
+            return await ler_eventos(desde, limite)
+        
+        _, stream = await self.abrir()
+        with mock.patch.object(eventos, 'ler_eventos', instavel), self.assertLogs('solicitations.eventos', 'ERROR'):
+            taxi = await sync_to_async(self.criar)('Táxi')
+            _, evento, dados = await self.proximo(stream)
+        self.assertEqual((evento, dados['id']), ('criacao', taxi.pk))
+        self.assertEqual(falhas, [])
+        await stream.aclose()
+
+
+class WebhooksTest(TestCase):
+    """Testes da fila de saída de webhooks e da entrega contra um servidor HTTP local"""
+    
+    @classmethod
+    def setUpClass(cls):
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        
+        super().setUpClass()
+        teste = cls
+        
+        class Receptor(BaseHTTPRequestHandler):
+            def do_POST(self):
+                corpo = self.rfile.read(int(self.headers['Content-Length']))
+                with teste.trava:
+                    teste.simultaneas += 1
+                    teste.maximo_simultaneas = max(teste.maximo_simultaneas, teste.simultaneas)
+                time.sleep(teste.espera)
+                with teste.trava:
+                    teste.simultaneas -= 1
+                    teste.recebidas.append((self.path, dict(self.headers), corpo))
+                    codigo = teste.respostas.pop(0) if teste.respostas else 200
+                self.send_response(codigo)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            
+            def log_message(self, *args):
+                pass
+        
+        cls.trava = threading.Lock()
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), Receptor)
+        cls.base = f'http://127.0.0.1:{cls.servidor.server_address[1]}'
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        super().tearDownClass()
+    
+    def setUp(self):
+        type(self).recebidas = []
+        type(self).respostas = []
+        type(self).espera = 0
+        type(self).simultaneas = 0
+        type(self).maximo_simultaneas = 0
+        self.folha = RequestWebhook.objects.create(
+            nome='Folha',
+            url=f'{self.base}/folha',
+            tipos=[Request.TIPO_FERIAS, Request.TIPO_REEMBOLSO],
+            status=[Request.STATUS_APROVADO],
+            segredo='segredo',
+        )
+    
+    def criar(self, titulo, tipo=Request.TIPO_REEMBOLSO):
+        dados = {'tipo': tipo, 'titulo': titulo, 'descricao': 'Teste', 'solicitante': 'Ana Costa'}
+        if tipo == Request.TIPO_REEMBOLSO:
+            dados['valor'] = Decimal('80.00')
+        else:
+            dados['data_inicio'] = date.today() + timedelta(days=30)
+            dados['data_fim'] = date.today() + timedelta(days=40)
+        return Request.objects.create(**dados)
+    
+    def entregar(self, **opcoes):
+        from .webhooks import Entregador
+        
+        return Entregador(**opcoes).executar_lote()
+    
+    def test_enfileira_apenas_transicoes_aceitas(self):
+        """Testa que só as transições aceitas pelos filtros entram na fila, sem enviar nada"""
+        aprovada = self.criar('Táxi')
+        aprovada.aprovar()
+        self.criar('Hotel').rejeitar()
+        treinamento = Request.objects.create(
+            tipo=Request.TIPO_TREINAMENTO,
+            titulo='Curso',
+            descricao='Teste',
+            solicitante='Ana Costa',
+            data_inicio=date.today() + timedelta(days=10),
+            data_fim=date.today() + timedelta(days=12),
+            valor=Decimal('900.00'),
+        )
+        treinamento.aprovar()
+        
+        entrega = RequestWebhookEntrega.objects.get()
+        self.assertEqual(entrega.webhook, self.folha)
+        self.assertEqual(entrega.solicitacao_id, aprovada.pk)
+        self.assertEqual(entrega.payload['evento'], 'solicitacao.aprovado')
+        self.assertEqual(entrega.payload['status_anterior'], Request.STATUS_PENDENTE)
+        self.assertEqual(entrega.payload['solicitacao']['valor'], '80.00')
+        self.assertEqual(self.recebidas, [])
+    
+    def test_transicao_desfeita_nao_notifica(self):
+        """Testa que a entrega é gravada na transação da transição"""
+        from django.db import transaction
+        
+        solicitacao = self.criar('Táxi')
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                solicitacao.aprovar()
+                raise RuntimeError
+        self.assertFalse(RequestWebhookEntrega.objects.exists())
+        
+        Request.objects.filter(pk=solicitacao.pk).aprovar()
+        self.assertEqual(RequestWebhookEntrega.objects.count(), 1)
+    
+    def test_entrega_em_lote_assinada(self):
+        """Testa o envio agrupado em um POST assinado e a confirmação das entregas"""
+        import hashlib
+        import hmac
+        
+        ids = [self.criar(f'Táxi {i}').pk for i in range(3)]
+        Request.objects.filter(pk__in=ids).aprovar()
+        
+        self.assertEqual(self.entregar(), {'entregues': 3, 'reagendadas': 0, 'falhas': 0})
+        self.assertEqual(len(self.recebidas), 1)
+        caminho, cabecalhos, corpo = self.recebidas[0]
+        self.assertEqual(caminho, '/folha')
+        esperado = hmac.new(b'segredo', corpo, hashlib.sha256).hexdigest()
+        self.assertEqual(cabecalhos['X-Webhook-Assinatura'], f'sha256={esperado}')
+        eventos = json.loads(corpo)['eventos']
+        self.assertEqual(sorted(evento['solicitacao']['id'] for evento in eventos), sorted(ids))
+        self.assertEqual(
+            RequestWebhookEntrega.objects.filter(situacao=RequestWebhookEntrega.SITUACAO_ENTREGUE).count(), 3
+        )
+        self.assertEqual(self.entregar(), {'entregues': 0, 'reagendadas': 0, 'falhas': 0})
+    
+    @override_settings(SOLICITACOES={'WEBHOOKS_TENTATIVAS_MAXIMAS': 2, 'WEBHOOKS_ATRASO_INICIAL_SEGUNDOS': 10})
+    def test_novas_tentativas_com_espera_exponencial(self):
+        """Testa o reagendamento após erro e a falha ao esgotar as tentativas"""
+        from .webhooks import atraso
+        
+        self.criar('Táxi').aprovar()
+        self.respostas.extend([500, 503])
+        
+        self.assertEqual(self.entregar(), {'entregues': 0, 'reagendadas': 1, 'falhas': 0})
+        entrega = RequestWebhookEntrega.objects.get()
+        self.assertEqual((entrega.situacao, entrega.tentativas, entrega.ultimo_erro), ('pendente', 1, 'HTTP 500'))
+        espera = entrega.proxima_tentativa - timezone.now()
+        self.assertTrue(timedelta(seconds=4) < espera <= timedelta(seconds=10))
+        # Ainda não venceu
+        self.assertEqual(self.entregar(), {'entregues': 0, 'reagendadas': 0, 'falhas': 0})
+        
+        RequestWebhookEntrega.objects.update(proxima_tentativa=timezone.now())
+        self.assertEqual(self.entregar(), {'entregues': 0, 'reagendadas': 0, 'falhas': 1})
+        entrega.refresh_from_db()
+        self.assertEqual((entrega.situacao, entrega.tentativas), ('falha', 2))
+        # 10s dobrando a cada tentativa, com variação de até 50% para menos
+        self.assertTrue(timedelta(seconds=20) <= atraso(3) <= timedelta(seconds=40))
+    
+    def test_concorrencia_por_webhook(self):
+        """Testa o limite de requisições simultâneas por webhook"""
+        type(self).espera = 0.05
+        RequestWebhook.objects.filter(pk=self.folha.pk).update(concorrencia_maxima=2)
+        ids = [self.criar(f'Táxi {i}').pk for i in range(6)]
+        Request.objects.filter(pk__in=ids).aprovar()
+        
+        resultado = self.entregar(eventos_por_requisicao=1, concorrencia=8)
+        self.assertEqual(resultado['entregues'], 6)
+        self.assertEqual(len(self.recebidas), 6)
+        self.assertEqual(self.maximo_simultaneas, 2)
+    
+    def test_reserva_entre_processos(self):
+        """Testa que entregas reservadas não são reservadas de novo até a reserva vencer"""
+        self.criar('Táxi').aprovar()
+        self.criar('Hotel').aprovar()
+        
+        primeiro = RequestWebhookEntrega.objects.reservar(10, timedelta(minutes=1), 'a')
+        self.assertEqual(len(primeiro), 2)
+        self.assertEqual(RequestWebhookEntrega.objects.reservar(10, timedelta(minutes=1), 'b'), [])
+        RequestWebhookEntrega.objects.update(reservada_ate=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(RequestWebhookEntrega.objects.reservar(10, timedelta(minutes=1), 'b')), 2)
+    
+    def test_comando_entregar_webhooks(self):
+        """Testa o comando com --uma-vez e a URL inacessível"""
+        self.criar('Táxi').aprovar()
+        RequestWebhook.objects.create(nome='Fora do ar', url='http://127.0.0.1:9/', status=[Request.STATUS_APROVADO])
+        self.criar('Hotel').aprovar()
+        
+        saida = StringIO()
+        call_command('entregar_webhooks', '--uma-vez', stdout=saida)
+        self.assertEqual(json.loads(saida.getvalue()), {'entregues': 2, 'reagendadas': 1, 'falhas': 0})
+        falha = RequestWebhookEntrega.objects.get(situacao=RequestWebhookEntrega.SITUACAO_PENDENTE)
+        self.assertIn('Connection', falha.ultimo_erro)
+
+
+class RelatoriosTest(APITestCase):
+    """Testes dos relatórios executados em segundo plano"""
+    
+    url = '/api/v1/relatorios/'
+    
+    def setUp(self):
+        import shutil
+        import tempfile
+        
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=self.media, SOLICITACOES={'EXPORTACAO_TAMANHO_LOTE': 2})
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        for indice in range(5):
+            Request.objects.create(
+                tipo=Request.TIPO_REEMBOLSO,
+                titulo=f'Táxi {indice}',
+                descricao='Teste',
+                solicitante='Ana Costa' if indice % 2 else 'Bruno Lima',
+                valor=Decimal('10.00') * (indice + 1),
+            )
+    
+    def pedir(self, **dados):
+        response = self.client.post(self.url, dados, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.content)
+        return response
+    
+    def executar(self):
+        saida = StringIO()
+        call_command('run_workers', '--uma-vez', stdout=saida)
+        return json.loads(saida.getvalue())
+    
+    def conteudo(self, relatorio_id):
+        response = self.client.get(f'{self.url}{relatorio_id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        relatorio = RequestRelatorio.objects.get(pk=relatorio_id)
+        with relatorio.arquivo.open('rb') as arquivo:
+            return response.data, arquivo.read().decode()
+    
+    def test_exportacao_igual_ao_endpoint(self):
+        """Testa que o relatório de exportação tem o mesmo conteúdo de /exportar/"""
+        response = self.pedir(tipo='exportacao', formato='ndjson', parametros={'solicitante': 'ana'})
+        self.assertEqual(response.data['situacao'], RequestRelatorio.SITUACAO_PENDENTE)
+        self.assertTrue(response['Location'].endswith(f"/api/v1/relatorios/{response.data['id']}/"))
+        
+        self.assertEqual(self.executar(), {'executados': 1})
+        dados, conteudo = self.conteudo(response.data['id'])
+        self.assertEqual(dados['situacao'], RequestRelatorio.SITUACAO_CONCLUIDO)
+        self.assertEqual((dados['progresso'], dados['linhas_processadas'], dados['linhas_total']), (100, 2, 2))
+        self.assertTrue(dados['arquivo'].startswith('http://testserver/media/relatorios/'))
+        
+        sincrono = self.client.get('/api/v1/solicitacoes/exportar/', {'format': 'ndjson', 'solicitante': 'ana'})
+        self.assertEqual(conteudo, b''.join(sincrono.streaming_content).decode())
+    
+    def test_exportacao_com_busca_e_arquivadas(self):
+        """Testa a exportação com busca e arquivadas, ordenada pela relevância"""
+        parametros = {'search': 'taxi', 'incluir_arquivadas': 'true'}
+        relatorio = self.pedir(tipo='exportacao', formato='ndjson', parametros=parametros).data
+        self.assertEqual(self.executar(), {'executados': 1})
+        dados, conteudo = self.conteudo(relatorio['id'])
+        self.assertEqual((dados['situacao'], dados['linhas_total']), (RequestRelatorio.SITUACAO_CONCLUIDO, 5))
+        
+        sincrono = self.client.get('/api/v1/solicitacoes/exportar/', {'format': 'ndjson', **parametros})
+        self.assertEqual(conteudo, b''.join(sincrono.streaming_content).decode())
+    
+    def test_estatisticas_e_serie(self):
+        """Testa os relatórios de estatísticas (com filtros) e de série temporal"""
+        estatisticas = self.pedir(tipo='estatisticas', parametros={'solicitante': 'bruno'}).data
+        serie = self.pedir(tipo='estatisticas_serie', parametros={'granularidade': 'dia'}).data
+        self.assertEqual(estatisticas['formato'], 'json')
+        self.assertEqual(self.executar(), {'executados': 2})
+        
+        _, conteudo = self.conteudo(estatisticas['id'])
+        esperado = self.client.get('/api/v1/solicitacoes/estatisticas/', {'solicitante': 'bruno'}, format='json')
+        self.assertEqual(json.loads(conteudo), json.loads(esperado.content))
+        self.assertEqual(json.loads(conteudo)['total'], 3)
+        
+        _, conteudo = self.conteudo(serie['id'])
+        resultados = json.loads(conteudo)['resultados']
+        self.assertEqual(sum(ponto['quantidade'] for ponto in resultados), 5)
+    
+    def test_validacao_do_pedido(self):
+        """Testa os erros de validação com as regras dos endpoints equivalentes"""
+        casos = [
+            ({'tipo': 'inexistente'}, 'tipo'),
+            ({'tipo': 'exportacao', 'formato': 'json'}, 'formato'),
+            ({'tipo': 'exportacao', 'parametros': {'status': 'inexistente'}}, 'parametros'),
+            ({'tipo': 'exportacao', 'parametros': {'incluir_arquivadas': 'talvez'}}, 'parametros'),
+            ({'tipo': 'estatisticas_serie', 'parametros': {'granularidade': 'ano'}}, 'parametros'),
+            ({'tipo': 'estatisticas', 'parametros': ['status']}, 'parametros'),
+        ]
+        for dados, campo in casos:
+            with self.subTest(dados=dados):
+                response = self.client.post(self.url, dados, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(campo, response.data)
+        self.assertFalse(RequestRelatorio.objects.exists())
+    
+    def test_progresso_e_reserva(self):
+        """Testa o progresso por lote e que uma reserva tomada por outro processo interrompe a execução"""
+        from unittest import mock
+        
+        from .relatorios import Trabalhador
+        
+        relatorio_id = self.pedir(tipo='exportacao').data['id']
+        trabalhador = Trabalhador()
+        progressos = []
+        registrar = RequestRelatorio.objects.registrar_progresso
+        
+        def espiar(relatorio, processadas, total, duracao):
+            registrado = registrar(relatorio, processadas, total, duracao)
+            progressos.append(RequestRelatorio.objects.get(pk=relatorio.pk).progresso)
+            return registrado
+        
+        with mock.patch.object(RequestRelatorio.objects, 'registrar_progresso', side_effect=espiar):
+            self.assertTrue(trabalhador.executar_proximo())
+        # A cada 2 linhas (EXPORTACAO_TAMANHO_LOTE) e 100% só ao gravar o arquivo
+        self.assertEqual(progressos, [0, 40, 80, 99])
+        self.assertEqual(RequestRelatorio.objects.get(pk=relatorio_id).progresso, 100)
+        self.assertFalse(trabalhador.executar_proximo())
+        
+        # Outro processo assumiu o relatório (reserva vencida): o resultado é descartado
+        RequestRelatorio.objects.filter(pk=relatorio_id).update(situacao=RequestRelatorio.SITUACAO_PENDENTE)
+        relatorio = RequestRelatorio.objects.reservar('outro', timedelta(minutes=5))
+        relatorio.reserva = 'este'
+        with self.assertLogs('solicitations.relatorios', 'WARNING'):
+            trabalhador.executar(relatorio)
+        relatorio.refresh_from_db()
+        self.assertEqual((relatorio.reserva, relatorio.situacao), ('outro', RequestRelatorio.SITUACAO_EXECUTANDO))
+    
+    def test_erro_e_tentativas(self):
+        """Testa o registro do erro e o limite de execuções de um relatório"""
+        from unittest import mock
+        
+        from .relatorios import Trabalhador
+        
+        relatorio_id = self.pedir(tipo='estatisticas').data['id']
+        with mock.patch.object(Trabalhador, 'gerar_estatisticas', side_effect=RuntimeError('banco indisponível')):
+            with self.assertLogs('solicitations.relatorios', 'ERROR'):
+                self.executar()
+        dados = self.client.get(f'{self.url}{relatorio_id}/').data
+        self.assertEqual(dados['situacao'], RequestRelatorio.SITUACAO_ERRO)
+        self.assertEqual(dados['erro'], 'RuntimeError: banco indisponível')
+        
+        RequestRelatorio.objects.filter(pk=relatorio_id).update(
+            situacao=RequestRelatorio.SITUACAO_EXECUTANDO,
+            reservada_ate=timezone.now() - timedelta(seconds=1),
+            tentativas=3,
+        )
+        self.assertEqual(self.executar(), {'executados': 1})
+        self.assertEqual(RequestRelatorio.objects.get(pk=relatorio_id).erro, 'Tentativas esgotadas.')
+    
+    def test_concurrency_invalida(self):
+        """Testa a validação das opções do run_workers"""
+        with self.assertRaises(CommandError):
+            call_command('run_workers', '--concurrency', '0', stdout=StringIO())
+
+
+@override_settings(SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0})
+class CamposEsparsosTest(APITestCase):
+    """
+    Testes de ?fields= / ?omit= nas ações de leitura
+    """
+    
+    def setUp(self):
+        self.list_url = '/api/v1/solicitacoes/'
+        self.ferias = Request.objects.create(
+            tipo=Request.TIPO_FERIAS,
+            titulo='Férias de verão',
+            descricao='Viagem em família',
+            solicitante='Ana Costa',
+            data_inicio=date(2025, 1, 10),
+            data_fim=date(2025, 1, 20),
+        )
+        self.reembolso = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Táxi',
+            descricao='Viagem ao cliente',
+            solicitante='Bruno Lima',
+            valor=Decimal('80.5'),
+        )
+    
+    def test_listagem(self):
+        """Testa que a listagem devolve e lê apenas as colunas dos campos pedidos"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(f'{self.list_url}?fields=status,id,titulo')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Na ordem do serializer, não na do parâmetro
+        self.assertEqual(list(response.data['results'][0]), ['id', 'titulo', 'status'])
+        pagina = consultas.captured_queries[-1]['sql']
+        for coluna in ['"tipo"', 'valor', 'solicitante', 'julianday', 'descricao']:
+            self.assertNotIn(coluna, pagina)
+        
+        completa = self.client.get(self.list_url).data['results']
+        for parametros, campos in [
+            ('omit=tipo_display,status_display', ['id', 'tipo', 'titulo', 'status', 'valor', 'solicitante', 'data_criacao', 'duracao_dias']),
+            ('fields=valor,duracao_dias&fields=tipo_display', ['tipo_display', 'valor', 'duracao_dias']),
+            ('fields=id,valor&omit=valor&paginacao=cursor', ['id']),
+        ]:
+            response = self.client.get(f'{self.list_url}?{parametros}')
+            self.assertEqual(response.status_code, status.HTTP_200_OK, parametros)
+            self.assertEqual(
+                response.data['results'],
+                [{campo: item[campo] for campo in campos} for item in completa],
+                parametros
+            )
+    
+    def test_detalhe(self):
+        """Testa o detalhe com only(): campos calculados trazem as colunas de que dependem"""
+        from unittest import mock
+        
+        url = f'{self.list_url}{self.ferias.pk}/'
+        with mock.patch.object(Request, 'refresh_from_db', side_effect=AssertionError('coluna adiada lida')):
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get(f'{url}?fields=duracao_dias,pode_ser_cancelada,tipo_display')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'tipo_display': 'Férias', 'duracao_dias': 11, 'pode_ser_cancelada': True})
+        self.assertNotIn('descricao', consultas.captured_queries[-1]['sql'])
+        
+        response = self.client.get(f'{url}?omit=descricao,observacoes')
+        completa = self.client.get(url).data
+        self.assertEqual(response.data, {campo: valor for campo, valor in completa.items() if campo not in ('descricao', 'observacoes')})
+    
+    def test_etag_por_campos(self):
+        """Testa que representações parciais têm ETag próprio, e o If-Match aceita a versão"""
+        url = f'{self.list_url}{self.ferias.pk}/'
+        completa = self.client.get(url)
+        parcial = self.client.get(f'{url}?fields=id,status')
+        self.assertNotEqual(parcial['ETag'], completa['ETag'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=parcial['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(f'{url}?fields=id,status', HTTP_IF_NONE_MATCH=parcial['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        response = self.client.patch(url, {'titulo': 'Férias'}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_exportacao_e_mudancas(self):
+        """Testa os campos na exportação (também com as arquivadas) e em mudancas"""
+        for parametros in ['fields=id,titulo', 'fields=id,titulo&incluir_arquivadas=true']:
+            response = self.client.get(f'{self.list_url}exportar/?{parametros}')
+            self.assertEqual(response.status_code, status.HTTP_200_OK, parametros)
+            linhas = b''.join(response.streaming_content).decode().splitlines()
+            self.assertEqual(linhas, ['id,titulo', f'{self.reembolso.pk},Táxi', f'{self.ferias.pk},Férias de verão'])
+        
+        response = self.client.get(f'{self.list_url}mudancas/?desde=0&fields=id,status')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [mudanca['solicitacao'] for mudanca in response.data['mudancas']],
+            [{'id': self.ferias.pk, 'status': 'pendente'}, {'id': self.reembolso.pk, 'status': 'pendente'}]
+        )
+    
+    def test_validacao(self):
+        """Testa campos desconhecidos e seleção vazia"""
+        for url, parametro in [
+            (f'{self.list_url}?fields=id,descricao', 'fields'),
+            (f'{self.list_url}{self.ferias.pk}/?omit=senha', 'omit'),
+            (f'{self.list_url}exportar/?fields=tipo_display', 'fields'),
+            (f'{self.list_url}?fields=id&omit=id', 'fields'),
+        ]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, url)
+            self.assertIn(parametro, response.content.decode(), url)
+    
+    @override_settings(ROOT_URLCONF='core.urls_asgi')
+    async def test_caminho_assincrono(self):
+        """Testa que a listagem e o detalhe assíncronos respeitam os campos"""
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncClient
+        
+        for url in [f'{self.list_url}?fields=id,duracao_dias', f'{self.list_url}{self.ferias.pk}/?omit=descricao']:
+            sincrona = await sync_to_async(self.client.get)(url)
+            assincrona = await AsyncClient().get(url)
+            self.assertEqual(assincrona.status_code, status.HTTP_200_OK)
+            self.assertEqual(assincrona.content, sincrona.content)
+
+
+class RenderizacaoTest(APITestCase):
+    """
+    Testes do JSON com orjson e do MessagePack
+    """
+    
+    def setUp(self):
+        self.list_url = '/api/v1/solicitacoes/'
+        self.reembolso = Request.objects.create(
+            tipo=Request.TIPO_REEMBOLSO,
+            titulo='Táxi \u2028 aeroporto',
+            descricao='Viagem ao cliente',
+            solicitante='Ana Costa',
+            valor=Decimal('80.5'),
+        )
+    
+    def test_mesma_saida_do_json_renderer(self):
+        """Testa que o ORJSONRenderer gera os mesmos bytes do JSONRenderer para os dados da API"""
+        from django.utils.functional import lazy
+        from rest_framework.exceptions import ErrorDetail
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import ORJSONRenderer
+        
+        dados = {
+            'decimal': Decimal('80.50'),
+            'utc': datetime(2026, 10, 16, 12, 0, 0, 123456, tzinfo=dt_timezone.utc),
+            'local': datetime(2026, 10, 16, 9, 0, tzinfo=dt_timezone(timedelta(hours=-3))),
+            'ingenua': datetime(2026, 10, 16, 9, 0),
+            'data': date(2026, 10, 16),
+            'duracao': timedelta(days=1, seconds=30),
+            'erro': ErrorDetail('Inválido', code='invalid'),
+            'preguicoso': lazy(lambda: 'Férias', str)(),
+            'separadores': 'a\u2028b\u2029c',
+            'chaves': {1: 'um', None: 'nulo'},
+            'lista': (1, 2.5, True, None),
+            'grande': 2 ** 70,
+        }
+        for valor in [dados, [dados], {}, []]:
+            self.assertEqual(ORJSONRenderer().render(valor), JSONRenderer().render(valor))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+        self.assertEqual(
+            ORJSONRenderer().render(dados, 'application/json; indent=4'),
+            JSONRenderer().render(dados, 'application/json; indent=4'),
+        )
+        
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertIn(b'\\u2028', response.content)
+    
+    @skipUnless(importlib.util.find_spec('orjson'), 'orjson não instalado')
+    def test_diferencas_nos_floats(self):
+        """Testa as diferenças documentadas do ORJSONRenderer nos floats"""
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import ORJSONRenderer
+        
+        dados = [1e16, 1e-7, 0.1]
+        self.assertEqual(ORJSONRenderer().render(dados), b'[1e16,1e-7,0.1]')
+        self.assertEqual(JSONRenderer().render(dados), b'[1e+16,1e-07,0.1]')
+        self.assertEqual(json.loads(ORJSONRenderer().render(dados)), dados)
+        self.assertEqual(ORJSONRenderer().render([float('nan'), float('inf')]), b'[null,null]')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render([float('nan')])
+    
+    def test_sem_orjson(self):
+        """Testa que, sem o orjson instalado, renderer e parser recorrem à stdlib"""
+        from unittest import mock
+        from rest_framework.renderers import JSONRenderer
+        
+        esperado = self.client.get(self.list_url).content
+        with mock.patch('solicitations.renderers.orjson', None), mock.patch('solicitations.parsers.orjson', None):
+            response = self.client.get(self.list_url)
+            self.assertEqual(response.content, esperado)
+            self.assertEqual(response.content, JSONRenderer().render(response.data))
+            response = self.client.post(self.list_url, {
+                'tipo': Request.TIPO_REEMBOLSO,
+                'titulo': 'Hotel',
+                'descricao': 'Hospedagem',
+                'solicitante': 'Bruno Lima',
+                'valor': '120.00',
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    
+    def test_renderer_e_parser_sem_orjson(self):
+        """Testa o renderer e o parser diretamente, sem o orjson instalado"""
+        from io import BytesIO
+        from unittest import mock
+        from rest_framework.exceptions import ParseError
+        from rest_framework.parsers import JSONParser
+        from rest_framework.renderers import JSONRenderer
+        from .parsers import ORJSONParser, carregar_json
+        from .renderers import ORJSONRenderer
+        
+        dados = {'decimal': Decimal('80.50'), 'data': date(2026, 10, 16), 'separadores': 'a\u2028b', 'grande': 2 ** 70}
+        with mock.patch('solicitations.renderers.orjson', None):
+            self.assertEqual(ORJSONRenderer().render(dados), JSONRenderer().render(dados))
+            self.assertEqual(ORJSONRenderer().render(None), b'')
+        
+        with mock.patch('solicitations.parsers.orjson', None):
+            corpo = b'{"a": [1, 2.5, null, "\\u00e9"]}'
+            self.assertEqual(ORJSONParser().parse(BytesIO(corpo)), JSONParser().parse(BytesIO(corpo)))
+            self.assertEqual(carregar_json('{"grande": 1180591620717411303424}'), {'grande': 2 ** 70})
+            with self.assertRaises(ParseError) as esperado:
+                JSONParser().parse(BytesIO(b'{"a": '))
+            with self.assertRaises(ParseError) as obtido:
+                ORJSONParser().parse(BytesIO(b'{"a": '))
+            self.assertEqual(str(obtido.exception), str(esperado.exception))
+            with self.assertRaises(ValueError):
+                carregar_json('{"a": ')
+    
+    def test_renderers_binarios_sem_msgpack(self):
+        """Testa que, sem o msgpack instalado, o MessagePack não é oferecido"""
+        import sys
+        from unittest import mock
+        from . import renderers
+        from .views import RequestViewSet
+        
+        # O módulo é carregado de novo, à parte, como se o msgpack não existisse
+        spec = importlib.util.spec_from_file_location('renderers_sem_msgpack', renderers.__file__)
+        sem_msgpack = importlib.util.module_from_spec(spec)
+        with mock.patch.dict(sys.modules, {'msgpack': None, 'orjson': None}):
+            spec.loader.exec_module(sem_msgpack)
+        self.assertIsNone(sem_msgpack.msgpack)
+        self.assertIsNone(sem_msgpack.orjson)
+        self.assertEqual(sem_msgpack.RENDERERS_BINARIOS, [])
+        self.assertEqual(sem_msgpack.ORJSONRenderer.opcoes, 0)
+        
+        renderer_classes = [renderers.ORJSONRenderer, *sem_msgpack.RENDERERS_BINARIOS]
+        with mock.patch.object(RequestViewSet, 'renderer_classes', renderer_classes):
+            response = self.client.get(self.list_url, HTTP_ACCEPT='application/msgpack')
+            self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+            self.assertEqual(self.client.get(self.list_url).status_code, status.HTTP_200_OK)
+    
+    def test_parser(self):
+        """Testa que o ORJSONParser lê como o JSONParser, com as mesmas mensagens de erro"""
+        from io import BytesIO
+        from rest_framework.exceptions import ParseError
+        from rest_framework.parsers import JSONParser
+        from .parsers import ORJSONParser
+        
+        for corpo in [b'{"a": [1, 2.5, null, "\\u00e9"]}', '{"grande": 1180591620717411303424}'.encode()]:
+            self.assertEqual(ORJSONParser().parse(BytesIO(corpo)), JSONParser().parse(BytesIO(corpo)))
+        for corpo in [b'{"a": ', b'{"a": NaN}', b'\xff']:
+            with self.assertRaises(ParseError) as esperado:
+                JSONParser().parse(BytesIO(corpo))
+            with self.assertRaises(ParseError) as obtido:
+                ORJSONParser().parse(BytesIO(corpo))
+            self.assertEqual(str(obtido.exception), str(esperado.exception))
+        
+        response = self.client.post(self.list_url, '{"tipo": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(response.data['detail'].startswith('JSON parse error'))
+    
+    @skipUnless(importlib.util.find_spec('msgpack'), 'msgpack não instalado')
+    def test_msgpack(self):
+        """Testa a negociação de MessagePack, com os mesmos valores do JSON"""
+        import msgpack
+        
+        url = f'{self.list_url}{self.reembolso.pk}/'
+        for caminho in [self.list_url, url, f'{self.list_url}estatisticas/', f'{self.list_url}0/']:
+            json_ = self.client.get(caminho)
+            response = self.client.get(caminho, HTTP_ACCEPT='application/msgpack')
+            self.assertEqual(response.status_code, json_.status_code, caminho)
+            self.assertEqual(response['Content-Type'], 'application/msgpack')
+            self.assertEqual(msgpack.unpackb(response.content), json_.json(), caminho)
+        # Cada formato tem o seu ETag
+        self.assertNotEqual(self.client.get(url, HTTP_ACCEPT='application/msgpack')['ETag'], self.client.get(url)['ETag'])
+    
+    @skipUnless(importlib.util.find_spec('msgpack'), 'msgpack não instalado')
+    @override_settings(ROOT_URLCONF='core.urls_asgi', SOLICITACOES={'CACHE_RESPOSTAS_TIMEOUT': 0})
+    async def test_caminho_assincrono(self):
+        """Testa o JSON e o MessagePack das views assíncronas"""
+        import msgpack
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncClient
+        
+        sincrona = await sync_to_async(self.client.get)(self.list_url)
+        assincrona = await AsyncClient().get(self.list_url)
+        self.assertEqual(assincrona.content, sincrona.content)
+        assincrona = await AsyncClient().get(self.list_url, headers={'Accept': 'application/msgpack'})
+        self.assertEqual(assincrona['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(assincrona.content), sincrona.json())
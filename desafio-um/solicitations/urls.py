@@ -4,12 +4,13 @@ URL configuration for solicitations app.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RequestViewSet
+from .views import RequestRelatorioViewSet, RequestViewSet
 
 
 # Configurar roteador do DRF
 router = DefaultRouter()
 router.register(r'solicitacoes', RequestViewSet, basename='solicitacao')
+router.register(r'relatorios', RequestRelatorioViewSet, basename='relatorio')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -18,6 +19,7 @@ urlpatterns = [
 # Rotas disponíveis:
 # GET    /api/v1/solicitacoes/              - Listar todas as solicitações
 # POST   /api/v1/solicitacoes/              - Criar nova solicitação
+# POST   /api/v1/solicitacoes/bulk/         - Criar solicitações em massa (JSON ou NDJSON)
 # GET    /api/v1/solicitacoes/{id}/         - Visualizar detalhes de uma solicitação
 # PUT    /api/v1/solicitacoes/{id}/         - Atualizar solicitação completa
 # PATCH  /api/v1/solicitacoes/{id}/         - Atualizar solicitação parcial
@@ -25,5 +27,10 @@ urlpatterns = [
 # POST   /api/v1/solicitacoes/{id}/aprovar/ - Aprovar solicitação
 # POST   /api/v1/solicitacoes/{id}/rejeitar/ - Rejeitar solicitação
 # POST   /api/v1/solicitacoes/{id}/cancelar/ - Cancelar solicitação
+# POST   /api/v1/solicitacoes/acoes-em-massa/ - Aprovar, rejeitar ou cancelar em massa
+# GET    /api/v1/solicitacoes/exportar/ - Exportar solicitações filtradas (CSV ou NDJSON)
+# GET    /api/v1/solicitacoes/mudancas/ - Mudanças desde um token (sincronização incremental)
 # GET    /api/v1/solicitacoes/estatisticas/ - Obter estatísticas
-
+# GET    /api/v1/solicitacoes/estatisticas/serie/ - Série temporal por dia, semana ou mês
+# POST   /api/v1/relatorios/ - Pedir um relatório em segundo plano (exportação, estatísticas)
+# GET    /api/v1/relatorios/{id}/ - Situação, progresso e arquivo do relatório
@@ -0,0 +1,38 @@
+"""
+Rotas assíncronas da app solicitations, usadas apenas sob ASGI (core/urls_asgi.py).
+
+Mesmos caminhos do router do DRF em solicitations/urls.py; os métodos sem
+variante assíncrona são repassados ao RequestViewSet síncrono.
+"""
+
+from django.urls import re_path
+
+from .views_async import RequestAsyncViewSet, eventos
+
+
+urlpatterns = [
+    re_path(
+        r'^solicitacoes/$',
+        RequestAsyncViewSet.as_async_view({'get': 'list', 'post': 'create'}),
+    ),
+    re_path(
+        r'^solicitacoes/estatisticas/$',
+        RequestAsyncViewSet.as_async_view({'get': 'estatisticas'}),
+    ),
+    re_path(
+        r'^solicitacoes/estatisticas/serie/$',
+        RequestAsyncViewSet.as_async_view({'get': 'estatisticas_serie'}),
+    ),
+    # Server-Sent Events: só existe sob ASGI (uma conexão aberta por cliente)
+    re_path(r'^solicitacoes/eventos/$', eventos),
+    re_path(
+        # Só ids numéricos: as ações de coleção (exportar, mudancas, ...) seguem para o router síncrono
+        r'^solicitacoes/(?P<pk>[0-9]+)/$',
+        RequestAsyncViewSet.as_async_view({
+            'get': 'retrieve',
+            'put': 'update',
+            'patch': 'partial_update',
+            'delete': 'destroy',
+        }),
+    ),
+]
@@ -2,21 +2,68 @@
 Views for the solicitations app
 """
 
-from rest_framework import viewsets, status
+import hashlib
+import json
+import re
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, FloatField, Max, Value
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, quote_etag
+from django.utils.text import compress_sequence
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField, DateTimeField
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .models import Request
+from .models import (
+    ConflitoDeVersao,
+    Request,
+    RequestArquivada,
+    RequestMudanca,
+    RequestRelatorio,
+    RequestSerie,
+    RequestSummary,
+)
 from .serializers import (
     RequestSerializer,
     RequestCreateSerializer,
     RequestUpdateSerializer,
     RequestListSerializer,
     RequestAcaoSerializer,
+    RequestAcaoEmMassaSerializer,
+    RequestCriacaoEmMassaSerializer,
+    RequestMudancasParametrosSerializer,
+    RequestRelatorioSerializer,
+    RequestSerieParametrosSerializer,
 )
-from .filters import RequestFilter
+from . import metricas, relatorios
+from .cache import em_cache
+from .conf import configuracao
+from .filters import RequestFilter, RequestOrderingFilter, RequestSearchFilter
+from .pagination import RequestCursorPagination, RequestPageNumberPagination
+from .parsers import NDJSONParser, ORJSONParser
+from .renderers import RENDERERS_BINARIOS, CSVRenderer, NDJSONRenderer, ORJSONRenderer
+from .signals import OPERACAO_EXCLUSAO
+
+
+ACEITA_GZIP = re.compile(r'\bgzip\b')
+
+
+def gerar_etag(*partes):
+    """
+    Gera um ETag forte a partir das partes que identificam a representação
+    """
+    conteudo = json.dumps(partes, cls=DjangoJSONEncoder, separators=(',', ':'), sort_keys=True)
+    return quote_etag(hashlib.md5(conteudo.encode(), usedforsecurity=False).hexdigest())
 
 
 class RequestViewSet(viewsets.ModelViewSet):
@@ -33,19 +80,69 @@ class RequestViewSet(viewsets.ModelViewSet):
     - Rejeitar solicitação
     - Cancelar solicitação
     - Obter estatísticas das solicitações
+    - Obter séries temporais (por dia, semana ou mês) das solicitações
+    - Sincronizar incrementalmente pelo log de mudanças
+    
+    A listagem, o detalhe e a exportação consultam apenas a tabela de
+    solicitações; com `?incluir_arquivadas=true`, incluem também o arquivo
+    (RequestArquivada). As estatísticas sempre consideram as duas.
+    
+    O JSON é gerado e lido com o orjson, quando instalado; com o msgpack
+    instalado, as respostas também estão disponíveis em MessagePack
+    (`Accept: application/msgpack`).
     """
     queryset = Request.objects.all()
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer, *RENDERERS_BINARIOS]
+    parser_classes = [ORJSONParser, FormParser, MultiPartParser]
+    pagination_class = RequestPageNumberPagination
+    filter_backends = [DjangoFilterBackend, RequestSearchFilter, RequestOrderingFilter]
     filterset_class = RequestFilter
     search_fields = ['titulo', 'descricao', 'solicitante']
     ordering_fields = ['data_criacao', 'data_atualizacao', 'data_inicio', 'valor']
-    ordering = ['-data_criacao']
+    ordering = ['-data_criacao', '-id']
+    campos_exportacao = [
+        'id',
+        'tipo',
+        'titulo',
+        'descricao',
+        'status',
+        'valor',
+        'data_inicio',
+        'data_fim',
+        'solicitante',
+        'observacoes',
+        'data_criacao',
+        'data_atualizacao',
+    ]
+    arquivadas_query_param = 'incluir_arquivadas'
+    campos_query_param = 'fields'
+    omitir_query_param = 'omit'
+    # Lidas no detalhe mesmo quando não pedidas: ETag e Last-Modified
+    colunas_validadores = ['id', 'versao', 'data_atualizacao']
+    # Versão da coleção filtrada usada no ETag da listagem sem paginação
+    agregados_versao = {
+        'ultima_atualizacao': Max('data_atualizacao'),
+        'total': Count('id'),
+    }
+    
+    @property
+    def paginator(self):
+        """
+        Usa a paginação por cursor quando solicitada via `?paginacao=cursor`
+        """
+        if (
+            not hasattr(self, '_paginator')
+            and self.request is not None
+            and RequestCursorPagination.solicitada(self.request)
+        ):
+            self._paginator = RequestCursorPagination()
+        return super().paginator
     
     def get_serializer_class(self):
         """
         Retorna o serializer apropriado baseado na ação
         """
-        if self.action == 'create':
+        if self.action in ['create', 'criar_em_massa']:
             return RequestCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return RequestUpdateSerializer
@@ -53,8 +150,268 @@ class RequestViewSet(viewsets.ModelViewSet):
             return RequestListSerializer
         elif self.action in ['aprovar', 'rejeitar', 'cancelar']:
             return RequestAcaoSerializer
+        elif self.action == 'acoes_em_massa':
+            return RequestAcaoEmMassaSerializer
         return RequestSerializer
     
+    @em_cache
+    def list(self, request, *args, **kwargs):
+        """
+        Lista as solicitações, respondendo 304 quando a página não mudou.
+        
+        A página é lida primeiro, e a versão que entra no ETag (junto com a
+        URL) é a própria página: id e data_atualizacao de cada linha, mais o
+        `count` na paginação por número. Qualquer criação, alteração ou
+        exclusão que mude a resposta muda o ETag, sem agregar o queryset
+        filtrado inteiro. O `count` vem do resumo ou de uma contagem limitada
+        (veja RequestPageNumberPagination).
+        
+        As linhas são lidas com values() apenas com as colunas da listagem e
+        montadas por RequestListSerializer.representar(), sem instanciar
+        modelos nem passar pelos campos do DRF. Com `?fields=` / `?omit=`,
+        apenas as colunas dos campos pedidos são lidas.
+        """
+        campos = self.campos_listagem(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(self.com_arquivadas(queryset, self.valores_pagina))
+        if page is not None:
+            versao = self.versao_pagina(page)
+        else:
+            versao = queryset.order_by().aggregate(**self.agregados_versao)
+        etag = gerar_etag(request.get_full_path(), request.accepted_renderer.format, versao)
+        nao_modificada = self.resposta_condicional(request, etag)
+        if nao_modificada is not None:
+            return nao_modificada
+        
+        if page is not None:
+            response = self.get_paginated_response(RequestListSerializer.representar(page, campos))
+        else:
+            linhas = RequestListSerializer.valores(queryset, campos=campos)
+            response = Response(RequestListSerializer.representar(linhas, campos))
+        return self.aplicar_validadores(response, etag)
+    
+    def valores_pagina(self, queryset):
+        """
+        Colunas da listagem (ou dos campos pedidos) mais as que o ETag
+        precisa (id e data_atualizacao) e, na paginação por cursor ou com as
+        arquivadas, os campos de ordenação
+        """
+        extras = ['id', 'data_atualizacao']
+        if isinstance(self.paginator, RequestCursorPagination) or self.incluir_arquivadas(self.request):
+            extras += self.ordering_fields
+            if 'relevancia' in queryset.query.annotations:
+                extras.append('relevancia')
+        return RequestListSerializer.valores(queryset, extras, self.campos_listagem(self.request))
+    
+    def campos_solicitados(self, request, disponiveis):
+        """
+        Campos pedidos com `?fields=` e/ou sem os de `?omit=` (nomes
+        separados por vírgula), na ordem de `disponiveis`. Retorna None
+        quando a requisição não restringe os campos.
+        """
+        selecao = {}
+        for parametro in (self.campos_query_param, self.omitir_query_param):
+            valores = request.query_params.getlist(parametro)
+            if not valores:
+                continue
+            nomes = [nome.strip() for valor in valores for nome in valor.split(',') if nome.strip()]
+            desconhecidos = [nome for nome in nomes if nome not in disponiveis]
+            if desconhecidos:
+                raise ValidationError({parametro: [
+                    f'Campos desconhecidos: {", ".join(desconhecidos)}. '
+                    f'Disponíveis: {", ".join(disponiveis)}.'
+                ]})
+            selecao[parametro] = set(nomes)
+        if not selecao:
+            return None
+        
+        pedidos = selecao.get(self.campos_query_param, set(disponiveis))
+        campos = [campo for campo in disponiveis if campo in pedidos - selecao.get(self.omitir_query_param, set())]
+        if not campos:
+            raise ValidationError({self.campos_query_param: ['Nenhum campo selecionado.']})
+        return campos
+    
+    def campos_listagem(self, request):
+        return self.campos_solicitados(request, RequestListSerializer.Meta.fields)
+    
+    def campos_detalhe(self, request):
+        return self.campos_solicitados(request, RequestSerializer.Meta.fields)
+    
+    def restringir_colunas(self, queryset, campos):
+        """
+        Lê do detalhe apenas as colunas dos `campos` pedidos (e as dos
+        validadores), sem carregar descricao e observacoes à toa
+        """
+        if campos is None:
+            return queryset
+        return queryset.only(*self.colunas_validadores, *RequestSerializer.colunas_dos_campos(campos))
+    
+    def versao_pagina(self, page):
+        versao = [(item['id'], item['data_atualizacao']) for item in page]
+        if isinstance(self.paginator, RequestPageNumberPagination):
+            # O count e os links de próxima/anterior também fazem parte da resposta
+            return [self.paginator.page.paginator.count, self.paginator.contagem_exata, versao]
+        return versao
+    
+    def incluir_arquivadas(self, request):
+        """
+        Indica se a requisição pediu também as solicitações arquivadas
+        (`?incluir_arquivadas=true`)
+        """
+        valor = request.query_params.get(self.arquivadas_query_param)
+        if not valor:
+            return False
+        try:
+            return BooleanField().to_internal_value(valor)
+        except ValidationError as exc:
+            raise ValidationError({self.arquivadas_query_param: exc.detail})
+    
+    def filtrar_arquivadas(self, queryset):
+        """
+        Aplica às solicitações arquivadas os mesmos filtros e busca da
+        requisição (a busca no arquivo usa icontains, sem índice full-text)
+        """
+        filterset = self.filterset_class(self.request.query_params, queryset=queryset, request=self.request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return RequestSearchFilter().filter_queryset(self.request, filterset.qs, self)
+    
+    def com_arquivadas(self, queryset, valores):
+        """
+        Aplica `valores` (a projeção com values()) ao queryset filtrado e,
+        com `?incluir_arquivadas=true`, une o resultado (UNION ALL) ao das
+        arquivadas que atendem aos mesmos filtros, na mesma ordenação.
+        
+        A união continua aceitando order_by() e fatias; a paginação por
+        cursor aplica a posição a cada parte (veja pagination.py).
+        """
+        linhas = valores(queryset)
+        if not self.incluir_arquivadas(self.request):
+            return linhas
+        arquivadas = self.filtrar_arquivadas(RequestArquivada.objects.all())
+        if 'relevancia' in queryset.query.annotations and 'relevancia' not in arquivadas.query.annotations:
+            # Sem índice full-text no arquivo: as arquivadas vêm depois das demais
+            arquivadas = arquivadas.annotate(relevancia=Value(0.0, output_field=FloatField()))
+        ordenacao = queryset.query.order_by or self.ordering
+        return linhas.order_by().union(valores(arquivadas).order_by(), all=True).order_by(*ordenacao)
+    
+    def get_queryset(self):
+        """
+        No detalhe com `?fields=` / `?omit=`, lê apenas as colunas necessárias
+        """
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = self.restringir_colunas(queryset, self.campos_detalhe(self.request))
+        return queryset
+    
+    def get_object(self):
+        """
+        No detalhe com `?incluir_arquivadas=true`, procura também no arquivo
+        """
+        try:
+            return super().get_object()
+        except Http404:
+            if self.action != 'retrieve' or not self.incluir_arquivadas(self.request):
+                raise
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        arquivadas = self.restringir_colunas(RequestArquivada.objects.all(), self.campos_detalhe(self.request))
+        return get_object_or_404(arquivadas, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+    
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Detalha uma solicitação, com ETag e Last-Modified derivados de
+        data_atualizacao. Responde 304 sem serializar quando o cliente
+        já possui a versão atual.
+        
+        Com `?fields=` / `?omit=`, a resposta (e a consulta) se limita aos
+        campos pedidos.
+        """
+        campos = self.campos_detalhe(request)
+        instance = self.get_object()
+        etag = self.etag_solicitacao(request, instance, campos)
+        nao_modificada = self.resposta_condicional(request, etag, instance.data_atualizacao)
+        if nao_modificada is not None:
+            return nao_modificada
+        
+        serializer = self.get_serializer(instance, campos=campos)
+        return self.aplicar_validadores(Response(serializer.data), etag, instance.data_atualizacao)
+    
+    def etag_solicitacao(self, request, instance, campos=None):
+        """
+        ETag de uma solicitação, derivado da sua versão (e dos campos
+        pedidos, quando a representação é parcial). No If-Match, o ETag de
+        uma representação parcial não é reconhecido: envie o ETag completo
+        ou a versão ("3").
+        """
+        if campos is None:
+            return gerar_etag(instance.pk, instance.versao, request.accepted_renderer.format)
+        return gerar_etag(instance.pk, instance.versao, request.accepted_renderer.format, campos)
+    
+    def verificar_if_match(self, request, instance):
+        """
+        Avalia o If-Match de uma escrita contra a versão atual da solicitação.
+        
+        Aceita o ETag do detalhe ou a própria versão entre aspas ("3").
+        Retorna a resposta 412 quando a versão do cliente está desatualizada,
+        ou None quando a escrita pode prosseguir.
+        """
+        cabecalho = request.META.get('HTTP_IF_MATCH')
+        if not cabecalho:
+            return None
+        aceitas = {'*', self.etag_solicitacao(request, instance), quote_etag(str(instance.versao))}
+        if aceitas.isdisjoint(parse_etags(cabecalho)):
+            return self.resposta_conflito(request, instance)
+        return None
+    
+    def resposta_conflito(self, request, instance):
+        """
+        Resposta para uma escrita sobre uma versão desatualizada: 412 quando
+        o cliente enviou If-Match, 409 quando a alteração concorrente foi
+        detectada apenas na gravação
+        """
+        instance.refresh_from_db(fields=['versao'])
+        codigo = (
+            status.HTTP_412_PRECONDITION_FAILED
+            if request.META.get('HTTP_IF_MATCH')
+            else status.HTTP_409_CONFLICT
+        )
+        response = Response(
+            {
+                'detail': 'A solicitação foi alterada por outra requisição.',
+                'versao': instance.versao,
+            },
+            status=codigo
+        )
+        response['ETag'] = self.etag_solicitacao(request, instance)
+        return response
+    
+    def resposta_condicional(self, request, etag, ultima_atualizacao=None):
+        """
+        Avalia If-None-Match / If-Modified-Since (e If-Match) da requisição.
+        
+        Retorna a resposta 304 (ou 412) já com os validadores, ou None
+        quando a resposta completa deve ser gerada.
+        """
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(ultima_atualizacao.timestamp()) if ultima_atualizacao else None,
+        )
+        if response is not None:
+            self.aplicar_validadores(response, etag, ultima_atualizacao)
+        return response
+    
+    def aplicar_validadores(self, response, etag, ultima_atualizacao=None):
+        """
+        Adiciona ETag e Last-Modified à resposta e pede revalidação ao cliente
+        """
+        response['ETag'] = etag
+        if ultima_atualizacao is not None:
+            response['Last-Modified'] = http_date(ultima_atualizacao.timestamp())
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ['Accept'])
+        return response
+    
     def create(self, request, *args, **kwargs):
         """
         Cria uma nova solicitação
@@ -78,13 +435,22 @@ class RequestViewSet(viewsets.ModelViewSet):
         """
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
+        conflito = self.verificar_if_match(request, instance)
+        if conflito is not None:
+            return conflito
+        
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        try:
+            self.perform_update(serializer)
+        except ConflitoDeVersao:
+            return self.resposta_conflito(request, instance)
         
         # Retorna o objeto completo usando o RequestSerializer
         output_serializer = RequestSerializer(serializer.instance)
-        return Response(output_serializer.data)
+        response = Response(output_serializer.data)
+        response['ETag'] = self.etag_solicitacao(request, serializer.instance)
+        return response
     
     def destroy(self, request, *args, **kwargs):
         """
@@ -112,26 +478,7 @@ class RequestViewSet(viewsets.ModelViewSet):
             "observacoes": "Motivo da aprovação"
         }
         """
-        solicitacao = self.get_object()
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        
-        try:
-            observacoes = serializer.validated_data.get('observacoes', '')
-            solicitacao.aprovar(observacoes)
-            output_serializer = RequestSerializer(solicitacao)
-            return Response(
-                {
-                    'detail': 'Solicitação aprovada com sucesso.',
-                    'solicitacao': output_serializer.data
-                },
-                status=status.HTTP_200_OK
-            )
-        except ValueError as e:
-            return Response(
-                {'detail': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return self.executar_transicao(request, 'aprovar', 'Solicitação aprovada com sucesso.')
     
     @action(detail=True, methods=['post'])
     def rejeitar(self, request, pk=None):
@@ -143,59 +490,335 @@ class RequestViewSet(viewsets.ModelViewSet):
             "observacoes": "Motivo da rejeição"
         }
         """
+        return self.executar_transicao(request, 'rejeitar', 'Solicitação rejeitada.')
+    
+    @action(detail=True, methods=['post'])
+    def cancelar(self, request, pk=None):
+        """
+        Cancela uma solicitação específica.
+        
+        Corpo da requisição (opcional):
+        {
+            "observacoes": "Motivo do cancelamento"
+        }
+        """
+        return self.executar_transicao(request, 'cancelar', 'Solicitação cancelada.')
+    
+    def executar_transicao(self, request, acao, mensagem):
+        """
+        Aplica a transição com um UPDATE condicional, respeitando o If-Match.
+        
+        Responde 400 se o status não permite a ação, 412 se o If-Match não
+        confere e 409 se outra requisição alterou a solicitação no meio tempo.
+        """
         solicitacao = self.get_object()
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        conflito = self.verificar_if_match(request, solicitacao)
+        if conflito is not None:
+            return conflito
         
         try:
             observacoes = serializer.validated_data.get('observacoes', '')
-            solicitacao.rejeitar(observacoes)
-            output_serializer = RequestSerializer(solicitacao)
-            return Response(
-                {
-                    'detail': 'Solicitação rejeitada.',
-                    'solicitacao': output_serializer.data
-                },
-                status=status.HTTP_200_OK
-            )
+            solicitacao.transicionar(acao, observacoes)
         except ValueError as e:
             return Response(
                 {'detail': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except ConflitoDeVersao:
+            return self.resposta_conflito(request, solicitacao)
+        
+        output_serializer = RequestSerializer(solicitacao)
+        response = Response(
+            {
+                'detail': mensagem,
+                'solicitacao': output_serializer.data
+            },
+            status=status.HTTP_200_OK
+        )
+        response['ETag'] = self.etag_solicitacao(request, solicitacao)
+        return response
     
-    @action(detail=True, methods=['post'])
-    def cancelar(self, request, pk=None):
+    @action(detail=False, methods=['post'], url_path='acoes-em-massa')
+    def acoes_em_massa(self, request):
         """
-        Cancela uma solicitação específica.
+        Aprova, rejeita ou cancela várias solicitações de uma vez.
         
-        Corpo da requisição (opcional):
+        Cada ação é aplicada com um único UPDATE condicional; solicitações
+        em status que não permite a ação (ou inexistentes) são ignoradas.
+        
+        Corpo da requisição:
         {
-            "observacoes": "Motivo do cancelamento"
+            "acao": "aprovar",
+            "ids": [1, 2, 3],
+            "observacoes": "Aprovado em lote"
+        }
+        
+        Resposta:
+        {
+            "acao": "aprovar",
+            "solicitadas": 3,
+            "alteradas": 2,
+            "ignoradas": 1
         }
         """
-        solicitacao = self.get_object()
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        acao = serializer.validated_data['acao']
+        ids = serializer.validated_data['ids']
         
-        try:
-            observacoes = serializer.validated_data.get('observacoes', '')
-            solicitacao.cancelar(observacoes)
-            output_serializer = RequestSerializer(solicitacao)
+        alteradas = Request.objects.filter(pk__in=ids).transicionar(
+            acao,
+            serializer.validated_data.get('observacoes', '')
+        )
+        return Response(
+            {
+                'acao': acao,
+                'solicitadas': len(ids),
+                'alteradas': alteradas,
+                'ignoradas': len(ids) - alteradas,
+            },
+            status=status.HTTP_200_OK
+        )
+    
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[ORJSONParser, NDJSONParser])
+    def criar_em_massa(self, request):
+        """
+        Cria várias solicitações em uma única requisição.
+        
+        Aceita uma lista JSON ou NDJSON (Content-Type: application/x-ndjson).
+        Todos os itens são validados em uma passada, com erros reportados por
+        índice, e os válidos são inseridos com bulk_create em uma transação.
+        
+        Parâmetros:
+        - modo: "atomico" (padrão, nada é criado se houver erro) ou "parcial"
+        - tamanho_lote: linhas por INSERT
+        
+        Resposta:
+        {
+            "modo": "parcial",
+            "recebidos": 3,
+            "criados": 2,
+            "ids": [10, 11],
+            "erros": [{"indice": 1, "erros": {"valor": ["..."]}}],
+            "tempo_ms": 12.5,
+            "itens_por_segundo": 240.0
+        }
+        """
+        inicio = time.perf_counter()
+        
+        parametros = RequestCriacaoEmMassaSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        modo = parametros.validated_data['modo']
+        tamanho_lote = parametros.validated_data.get(
+            'tamanho_lote', configuracao('CRIACAO_EM_MASSA_TAMANHO_LOTE')
+        )
+        
+        itens = request.data
+        max_itens = configuracao('CRIACAO_EM_MASSA_MAX_ITENS')
+        if not isinstance(itens, list) or not itens:
             return Response(
-                {
-                    'detail': 'Solicitação cancelada.',
-                    'solicitacao': output_serializer.data
-                },
-                status=status.HTTP_200_OK
+                {'detail': 'Envie uma lista com ao menos uma solicitação.'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        except ValueError as e:
+        if len(itens) > max_itens:
             return Response(
-                {'detail': str(e)},
+                {'detail': f'Máximo de {max_itens} solicitações por requisição.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        
+        # Um único serializer valida todos os itens (sem recriar os campos a cada item)
+        serializer = self.get_serializer()
+        solicitacoes = []
+        erros = []
+        for indice, item in enumerate(itens):
+            try:
+                solicitacoes.append(Request(**serializer.run_validation(item)))
+            except ValidationError as e:
+                erros.append({'indice': indice, 'erros': e.detail})
+        
+        if erros and modo == RequestCriacaoEmMassaSerializer.MODO_ATOMICO:
+            criadas = []
+            status_code = status.HTTP_400_BAD_REQUEST
+        else:
+            criadas = Request.objects.criar_em_massa(solicitacoes, tamanho_lote)
+            status_code = status.HTTP_207_MULTI_STATUS if erros else status.HTTP_201_CREATED
+        
+        duracao = time.perf_counter() - inicio
+        return Response(
+            {
+                'modo': modo,
+                'recebidos': len(itens),
+                'criados': len(criadas),
+                'ids': [solicitacao.pk for solicitacao in criadas],
+                'erros': erros,
+                'tempo_ms': round(duracao * 1000, 2),
+                'itens_por_segundo': round(len(criadas) / duracao, 1) if duracao else None,
+            },
+            status=status_code
+        )
+    
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def exportar(self, request):
+        """
+        Exporta as solicitações filtradas em CSV (padrão) ou NDJSON.
+        
+        Aceita os mesmos filtros, busca e ordenação da listagem, sem paginação:
+        /solicitacoes/exportar/?format=ndjson&tipo=reembolso&status=aprovado
+        
+        As linhas são lidas com values().iterator() e enviadas aos poucos
+        (sem instanciar modelos ou serializers), então o consumo de memória
+        não depende do tamanho do resultado. Com `Accept-Encoding: gzip`, o
+        conteúdo é comprimido durante o envio. `?fields=` / `?omit=`
+        restringem as colunas exportadas (e lidas).
+        """
+        campos, colunas = self.colunas_exportacao(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        linhas = self.com_arquivadas(queryset, self.valores_exportacao(colunas))
+        linhas = linhas.iterator(chunk_size=configuracao('EXPORTACAO_TAMANHO_LOTE'))
+        renderer = request.accepted_renderer
+        conteudo = renderer.render_stream(linhas, campos)
+        
+        comprimir = ACEITA_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if comprimir:
+            conteudo = compress_sequence(conteudo)
+        
+        response = StreamingHttpResponse(
+            conteudo,
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = f'attachment; filename="solicitacoes.{renderer.format}"'
+        if comprimir:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+    
+    def colunas_exportacao(self, request):
+        """
+        Campos exportados (todos ou os de `?fields=` / `?omit=`) e as colunas
+        a ler: os campos mais os de ordenação, que a união com as arquivadas
+        precisa selecionar
+        """
+        campos = self.campos_solicitados(request, self.campos_exportacao) or self.campos_exportacao
+        colunas = list(dict.fromkeys([*campos, *self.ordering_fields, 'id']))
+        return campos, colunas
+    
+    @staticmethod
+    def valores_exportacao(colunas):
+        """
+        Projeção da exportação para com_arquivadas(): as `colunas` e, com a
+        busca, a relevância, pela qual a união com as arquivadas é ordenada
+        """
+        def valores(queryset):
+            extras = ['relevancia'] if 'relevancia' in queryset.query.annotations else []
+            return queryset.values(*colunas, *extras)
+        return valores
     
     @action(detail=False, methods=['get'])
+    def mudancas(self, request):
+        """
+        Retorna as mudanças (criações, alterações, transições e exclusões)
+        posteriores ao token `desde`, em ordem, lidas do log RequestMudanca.
+        
+        Cada solicitação aparece uma vez por resposta, na posição da sua
+        última mudança do lote e com o estado atual; exclusões vêm com
+        "solicitacao": null (`?fields=` / `?omit=` restringem os campos de
+        "solicitacao"). "proximo" é o token para a chamada seguinte e
+        "mais" indica que há mudanças além do `limite`. Sem `desde`, devolve
+        apenas o token atual: obtenha-o antes de uma carga completa pela
+        listagem. Um token anterior ao trecho já removido do log (veja o
+        comando podar_mudancas) recebe 410 Gone: recomece com uma carga
+        completa.
+        
+        Resposta:
+        {
+            "desde": "120",
+            "proximo": "123",
+            "mais": false,
+            "mudancas": [
+                {
+                    "sequencia": 122,
+                    "id": 7,
+                    "operacao": "transicao",
+                    "data": "2026-10-16T21:00:00-03:00",
+                    "solicitacao": {"id": 7, "status": "aprovado", ...}
+                },
+                {
+                    "sequencia": 123,
+                    "id": 9,
+                    "operacao": "exclusao",
+                    "data": "2026-10-16T21:05:00-03:00",
+                    "solicitacao": null
+                }
+            ]
+        }
+        """
+        serializer = RequestMudancasParametrosSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        desde = serializer.validated_data.get('desde')
+        limite = serializer.validated_data.get('limite') or configuracao('MUDANCAS_LIMITE_PADRAO')
+        
+        if desde is None:
+            return Response({
+                'desde': None,
+                'proximo': str(RequestMudanca.objects.atual()),
+                'mais': False,
+                'mudancas': [],
+            })
+        if RequestMudanca.objects.expirada(desde):
+            return Response(
+                {'detail': 'Token expirado: as mudanças seguintes já foram removidas. Faça uma carga completa.'},
+                status=status.HTTP_410_GONE
+            )
+        
+        mudancas, mais = RequestMudanca.objects.apos(desde, limite)
+        # Última mudança de cada solicitação, na ordem do log
+        ultimas = {}
+        for sequencia, pk, operacao, data, *_ in mudancas:
+            ultimas.pop(pk, None)
+            ultimas[pk] = (sequencia, operacao, data)
+        solicitacoes = self.solicitacoes_atuais(
+            [pk for pk, (_, operacao, _) in ultimas.items() if operacao != OPERACAO_EXCLUSAO],
+            self.campos_detalhe(request),
+        )
+        
+        # Datas no fuso do projeto, como nos serializers
+        data_hora = DateTimeField().to_representation
+        itens = []
+        for pk, (sequencia, operacao, data) in ultimas.items():
+            solicitacao = solicitacoes.get(pk)
+            itens.append({
+                'sequencia': sequencia,
+                'id': pk,
+                # Excluída depois desta mudança (a exclusão vem em um próximo lote)
+                'operacao': operacao if solicitacao is not None else OPERACAO_EXCLUSAO,
+                'data': data_hora(data),
+                'solicitacao': solicitacao,
+            })
+        return Response({
+            'desde': str(desde),
+            'proximo': str(mudancas[-1][0] if mudancas else desde),
+            'mais': mais,
+            'mudancas': itens,
+        })
+    
+    def solicitacoes_atuais(self, ids, campos=None):
+        """
+        {id: representação} das solicitações, procurando no arquivo as que
+        não estão mais na tabela de solicitações
+        """
+        solicitacoes = self.restringir_colunas(Request.objects.all(), campos).in_bulk(ids)
+        faltantes = set(ids) - set(solicitacoes)
+        if faltantes:
+            solicitacoes.update(self.restringir_colunas(RequestArquivada.objects.all(), campos).in_bulk(faltantes))
+        return {
+            pk: RequestSerializer(solicitacao, campos=campos).data
+            for pk, solicitacao in solicitacoes.items()
+        }
+    
+    @action(detail=False, methods=['get'])
+    @em_cache
     def estatisticas(self, request):
         """
         Retorna estatísticas das solicitações.
@@ -218,37 +841,141 @@ class RequestViewSet(viewsets.ModelViewSet):
             "valor_total_aprovado": 150000.00
         }
         """
-        from django.db.models import Count, Sum, Q
-        
-        queryset = self.filter_queryset(self.get_queryset())
+        return self.resposta_estatisticas(request, self.calcular_estatisticas(request))
+    
+    def calcular_estatisticas(self, request):
+        # Sem filtros, as estatísticas vêm do resumo mantido incrementalmente;
+        # com filtros, de uma consulta com agregação condicional em cada tabela
+        # (solicitações e arquivo)
+        if self.possui_filtros(request):
+            queryset = self.filter_queryset(self.get_queryset())
+            return queryset.estatisticas(self.filtrar_arquivadas(RequestArquivada.objects.all()))
+        return RequestSummary.objects.estatisticas()
+    
+    @action(detail=False, methods=['get'], url_path='estatisticas/serie')
+    @em_cache
+    def estatisticas_serie(self, request):
+        """
+        Retorna a série temporal das solicitações por período de criação.
         
-        # Total de solicitações
-        total = queryset.count()
+        Parâmetros: granularidade (dia, semana ou mes), inicio e fim (datas),
+        tipo e status (repetíveis) e agrupar (tipo_status, tipo, status ou
+        periodo). Lida da tabela RequestSerie, mantida a cada escrita: um ano
+        por mês custa poucas dezenas de linhas, sem varrer as solicitações.
+        Os percentis são estimados por histograma (erro de até 1%).
         
-        # Contagem por tipo
-        por_tipo = dict(
-            queryset.values_list('tipo')
-            .annotate(count=Count('id'))
-            .order_by('tipo')
-        )
-        
-        # Contagem por status
-        por_status = dict(
-            queryset.values_list('status')
-            .annotate(count=Count('id'))
-            .order_by('status')
+        Resposta:
+        {
+            "granularidade": "mes",
+            "inicio": "2025-10-16",
+            "fim": "2026-10-16",
+            "resultados": [
+                {
+                    "periodo": "2025-10-01",
+                    "tipo": "reembolso",
+                    "status": "aprovado",
+                    "quantidade": 42,
+                    "valor_total": 5210.5,
+                    "valor_medio": 124.06,
+                    "valor_p50": 98.75,
+                    "valor_p90": 310.2
+                }
+            ]
+        }
+        """
+        parametros = self.parametros_serie(request)
+        serie = RequestSerie.objects.serie(**parametros)
+        return self.resposta_estatisticas(request, self.montar_resposta_serie(parametros, serie))
+    
+    def parametros_serie(self, request):
+        serializer = RequestSerieParametrosSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+    
+    @staticmethod
+    def montar_resposta_serie(parametros, serie):
+        return {
+            'granularidade': parametros['granularidade'],
+            'inicio': parametros['inicio'],
+            'fim': parametros['fim'],
+            'resultados': serie,
+        }
+    
+    def resposta_estatisticas(self, request, estatisticas):
+        """
+        Responde as estatísticas com ETag, ou 304 se o cliente já as possui
+        """
+        # As estatísticas já são um resumo de poucas linhas: o ETag vem do
+        # próprio conteúdo, o que evita uma segunda agregação só para a versão
+        etag = gerar_etag(estatisticas, request.accepted_renderer.format)
+        nao_modificada = self.resposta_condicional(request, etag)
+        if nao_modificada is not None:
+            return nao_modificada
+        return self.aplicar_validadores(Response(estatisticas), etag)
+    
+    def filtros_do_resumo(self, request):
+        """
+        Filtros de tipo/status (e a inclusão das arquivadas) quando a
+        requisição não usa nenhum outro filtro nem busca, ou seja, quando o
+        RequestSummary responde a contagem da listagem; None nos demais casos
+        """
+        filtros = {'arquivadas': self.incluir_arquivadas(request)}
+        for parametro in [*self.filterset_class.base_filters, api_settings.SEARCH_PARAM]:
+            valores = [valor for valor in request.query_params.getlist(parametro) if valor]
+            if not valores:
+                continue
+            if parametro not in ('tipo', 'status'):
+                return None
+            filtros[parametro] = valores
+        return filtros
+    
+    def possui_filtros(self, request):
+        """
+        Indica se a requisição usa algum filtro ou busca
+        """
+        parametros = list(self.filterset_class.base_filters) + [api_settings.SEARCH_PARAM]
+        return any(
+            valor
+            for parametro in parametros
+            for valor in request.query_params.getlist(parametro)
         )
-        
-        # Valor total aprovado
-        valor_total_aprovado = queryset.filter(
-            status=Request.STATUS_APROVADO
-        ).aggregate(
-            total=Sum('valor')
-        )['total'] or 0
-        
-        return Response({
-            'total': total,
-            'por_tipo': por_tipo,
-            'por_status': por_status,
-            'valor_total_aprovado': float(valor_total_aprovado),
-        })
\ No newline at end of file
+
+
+class RequestRelatorioViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Relatórios pesados executados fora da requisição (manage.py run_workers).
+    
+    POST /relatorios/ valida o pedido com as regras do endpoint equivalente
+    e responde 202 com o relatório pendente; GET /relatorios/{id}/ informa a
+    situação, o progresso e, quando concluído, a URL do arquivo.
+    
+    Corpo do POST:
+    {
+        "tipo": "exportacao",
+        "formato": "ndjson",
+        "parametros": {"tipo": "reembolso", "status": ["aprovado", "pendente"]}
+    }
+    """
+    queryset = RequestRelatorio.objects.all()
+    serializer_class = RequestRelatorioSerializer
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        formato, parametros = relatorios.preparar(**serializer.validated_data)
+        serializer.save(formato=formato, parametros=parametros)
+        url = request.build_absolute_uri(f'{serializer.instance.pk}/')
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED, headers={'Location': url})
+
+
+def metricas_prometheus(request):
+    """
+    GET /metrics: métricas da API no formato texto do Prometheus, somando
+    os arquivos de todos os processos (veja metricas.py)
+    """
+    if not metricas.ativas():
+        raise Http404
+    return HttpResponse(
+        metricas.exposicao(metricas.registro().valores()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
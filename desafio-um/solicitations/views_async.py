@@ -0,0 +1,259 @@
+"""
+Views assíncronas da app solicitations (caminho ASGI)
+
+Sob ASGI (uvicorn, daphne), a listagem, o detalhe, a criação e as estatísticas
+são atendidos por RequestAsyncViewSet, que consulta o banco com o ORM
+assíncrono (aiterator, acount, aaggregate) sem ocupar uma thread por
+requisição enquanto espera o banco. As demais ações (PUT, PATCH, DELETE,
+aprovar, exportar, ...) continuam no RequestViewSet síncrono, assim como
+todas as rotas sob WSGI. Veja core/asgi.py e core/urls_asgi.py.
+
+O DRF não possui views assíncronas: o despacho abaixo reaproveita a
+negociação de conteúdo, os filtros, a paginação e o tratamento de erros do
+RequestViewSet, apenas aguardando as consultas ao banco.
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import em_cache
+from .eventos import Filtros, transmitir
+from .filters import RequestFilter
+from .instrumentacao import serializando
+from .models import Request, RequestArquivada, RequestSerie, RequestSummary
+from .renderers import RENDERERS_BINARIOS, ORJSONRenderer
+from .serializers import RequestListSerializer, RequestSerializer
+from .views import RequestViewSet, gerar_etag
+
+
+class RequestAsyncViewSet(RequestViewSet):
+    """
+    Variante assíncrona do RequestViewSet para list, retrieve, create, estatisticas
+    e estatisticas_serie
+    """
+    # O BrowsableAPIRenderer é síncrono (formulários, templates)
+    renderer_classes = [ORJSONRenderer, *RENDERERS_BINARIOS]
+    acoes_async = {'list', 'retrieve', 'create', 'estatisticas', 'estatisticas_serie'}
+
+    @classmethod
+    def as_async_view(cls, actions):
+        """
+        Cria a view de uma rota do router: os métodos mapeados para ações
+        assíncronas são atendidos aqui; os demais, pelo RequestViewSet síncrono
+        """
+        view_sync = sync_to_async(RequestViewSet.as_view(actions))
+
+        async def view(request, *args, **kwargs):
+            acao = actions.get(request.method.lower())
+            if request.method == 'HEAD':
+                acao = actions.get('get')
+            if acao not in cls.acoes_async:
+                return await view_sync(request, *args, **kwargs)
+            return await cls(action_map=actions).despachar(acao, request, *args, **kwargs)
+
+        # Como nas views do DRF, para identificar a ação (ex.: na instrumentação)
+        view.cls = cls
+        view.actions = actions
+        # Como em APIView.as_view(): o CSRF é verificado pela SessionAuthentication
+        # em initial(), apenas para requisições autenticadas pela sessão
+        return csrf_exempt(view)
+
+    async def despachar(self, acao, request, *args, **kwargs):
+        """
+        Equivalente assíncrono de APIView.dispatch() para uma ação.
+
+        initial() (negociação de conteúdo, versão, autenticação, permissões,
+        throttling e CSRF) roda em uma thread: a autenticação consulta a sessão
+        e o banco de forma síncrona. Depois dela, request.user fica em memória.
+        """
+        self.action = acao
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await getattr(self, acao)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.renderizar(self.response)
+
+    def autorizar(self, request):
+        """
+        A parte de initial() que não depende da negociação de conteúdo
+        """
+        self.perform_authentication(request)
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    @staticmethod
+    def renderizar(response):
+        """
+        Renderiza a resposta do DRF aqui mesmo: o handler do Django renderiza
+        respostas adiadas em uma thread (sync_to_async), o que anularia o ganho
+        """
+        if not isinstance(response, SimpleTemplateResponse):
+            return response
+        with serializando():
+            response.render()
+        renderizada = HttpResponse(response.content, status=response.status_code)
+        for cabecalho, valor in response.items():
+            renderizada[cabecalho] = valor
+        renderizada.cookies = response.cookies
+        return renderizada
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+    async def aget_object(self):
+        """
+        Versão assíncrona de get_object(), procurando também no arquivo
+        com `?incluir_arquivadas=true`
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filtro = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filtro)
+        except queryset.model.DoesNotExist:
+            if not self.incluir_arquivadas(self.request):
+                raise Http404
+            try:
+                arquivadas = self.restringir_colunas(RequestArquivada.objects.all(), self.campos_detalhe(self.request))
+                obj = await arquivadas.aget(**filtro)
+            except RequestArquivada.DoesNotExist:
+                raise Http404
+        except (DjangoValidationError, TypeError, ValueError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    @em_cache
+    async def list(self, request, *args, **kwargs):
+        """
+        Listagem com as mesmas respostas (e ETag) de RequestViewSet.list()
+        """
+        campos = self.campos_listagem(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(self.com_arquivadas(queryset, self.valores_pagina))
+        if page is not None:
+            versao = self.versao_pagina(page)
+        else:
+            versao = await queryset.order_by().aaggregate(**self.agregados_versao)
+        etag = gerar_etag(request.get_full_path(), request.accepted_renderer.format, versao)
+        nao_modificada = self.resposta_condicional(request, etag)
+        if nao_modificada is not None:
+            return nao_modificada
+
+        if page is not None:
+            response = self.get_paginated_response(RequestListSerializer.representar(page, campos))
+        else:
+            linhas = RequestListSerializer.valores(queryset, campos=campos)
+            response = Response(RequestListSerializer.representar([linha async for linha in linhas.aiterator()], campos))
+        return self.aplicar_validadores(response, etag)
+
+    async def retrieve(self, request, *args, **kwargs):
+        """
+        Detalhe com ETag / Last-Modified, como RequestViewSet.retrieve()
+        """
+        campos = self.campos_detalhe(request)
+        instance = await self.aget_object()
+        etag = self.etag_solicitacao(request, instance, campos)
+        nao_modificada = self.resposta_condicional(request, etag, instance.data_atualizacao)
+        if nao_modificada is not None:
+            return nao_modificada
+
+        serializer = self.get_serializer(instance, campos=campos)
+        return self.aplicar_validadores(Response(serializer.data), etag, instance.data_atualizacao)
+
+    async def create(self, request, *args, **kwargs):
+        """
+        Criação: a validação roda aqui; a gravação (save() com transação e
+        sinais, que são síncronos) roda em uma thread
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(self.perform_create)(serializer)
+
+        headers = self.get_success_headers(serializer.data)
+        return Response(
+            RequestSerializer(serializer.instance).data,
+            status=status.HTTP_201_CREATED,
+            headers=headers
+        )
+
+    @em_cache
+    async def estatisticas(self, request):
+        """
+        Estatísticas a partir do resumo ou, com filtros, de uma agregação
+        """
+        if self.possui_filtros(request):
+            queryset = self.filter_queryset(self.get_queryset())
+            estatisticas = await queryset.aestatisticas(self.filtrar_arquivadas(RequestArquivada.objects.all()))
+        else:
+            estatisticas = await RequestSummary.objects.aestatisticas()
+        return self.resposta_estatisticas(request, estatisticas)
+
+    @em_cache
+    async def estatisticas_serie(self, request):
+        """
+        Série temporal a partir da tabela RequestSerie
+        """
+        parametros = self.parametros_serie(request)
+        serie = await RequestSerie.objects.aserie(**parametros)
+        return self.resposta_estatisticas(request, self.montar_resposta_serie(parametros, serie))
+
+
+@csrf_exempt
+async def eventos(request):
+    """
+    GET /api/v1/solicitacoes/eventos/: criações, alterações, transições e
+    exclusões como Server-Sent Events (veja solicitations/eventos.py).
+
+    Aceita os filtros tipo, status e solicitante do RequestFilter e retoma
+    a partir do cabeçalho Last-Event-ID (enviado pelo EventSource ao
+    reconectar) ou de `?desde=<sequência>`, como o endpoint de mudanças.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Método "{request.method}" não permitido.'}, status=405)
+
+    # Autenticação, permissões e throttling do RequestViewSet, como nas demais
+    # rotas. Sem initial(): a negociação de conteúdo recusaria text/event-stream.
+    view = RequestAsyncViewSet(action_map={'get': 'eventos'}, args=(), kwargs={}, format_kwarg=None)
+    view.action = 'eventos'
+    view.request = view.initialize_request(request)
+    view.headers = view.default_response_headers
+    try:
+        await sync_to_async(view.autorizar)(view.request)
+    except Exception as exc:
+        view.response = view.finalize_response(view.request, view.handle_exception(exc))
+        return view.renderizar(view.response)
+
+    filtro = RequestFilter(data=request.GET, queryset=Request.objects.none())
+    if not filtro.is_valid():
+        return JsonResponse(filtro.errors, status=400)
+
+    desde = request.headers.get('Last-Event-ID') or request.GET.get('desde')
+    if desde is not None:
+        if not desde.isdecimal():
+            return JsonResponse({'desde': ['Informe uma sequência numérica.']}, status=400)
+        desde = int(desde)
+
+    dados = filtro.form.cleaned_data
+    filtros = Filtros(dados.get('tipo'), dados.get('status'), dados.get('solicitante'))
+    response = StreamingHttpResponse(await transmitir(filtros, desde), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Sem buffer em proxies como o nginx, para os eventos chegarem na hora
+    response['X-Accel-Buffering'] = 'no'
+    return response
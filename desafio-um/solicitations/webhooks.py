@@ -0,0 +1,153 @@
+"""
+Entrega de webhooks das transições de status
+
+A transição (Request.aprovar, ações em massa, ...) apenas grava as entregas
+na fila de saída RequestWebhookEntrega, na mesma transação: a latência da
+API não depende de quem recebe, e uma transição desfeita não é notificada.
+
+O comando entregar_webhooks (Entregador, abaixo) lê a fila em outro processo:
+
+- reserva um lote de entregas vencidas com um UPDATE condicional, para que
+  vários processos possam rodar ao mesmo tempo;
+- agrupa as entregas por webhook e envia até WEBHOOKS_EVENTOS_POR_REQUISICAO
+  eventos por POST ({"eventos": [...]}), assinados com HMAC-SHA256;
+- envia em paralelo, sem passar de `concorrencia_maxima` requisições
+  simultâneas por webhook;
+- em caso de erro, reagenda com espera exponencial (com variação aleatória)
+  até WEBHOOKS_TENTATIVAS_MAXIMAS, quando a entrega é marcada como falha.
+
+As threads apenas fazem as requisições HTTP; as leituras e escritas no
+banco ficam na thread principal.
+"""
+
+import hashlib
+import hmac
+import json
+import random
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .conf import configuracao
+from .models import RequestWebhookEntrega
+
+
+CABECALHO_ASSINATURA = 'X-Webhook-Assinatura'
+CABECALHO_ENTREGAS = 'X-Webhook-Entregas'
+
+
+def assinar(segredo, corpo):
+    """
+    Assinatura do corpo enviado em X-Webhook-Assinatura ("sha256=<hex>")
+    """
+    return 'sha256=' + hmac.new(segredo.encode(), corpo, hashlib.sha256).hexdigest()
+
+
+def atraso(tentativas):
+    """
+    Espera antes da tentativa seguinte: dobra a cada tentativa, até
+    WEBHOOKS_ATRASO_MAXIMO_SEGUNDOS, com variação de até 50% para que
+    entregas que falharam juntas não voltem todas ao mesmo tempo
+    """
+    inicial = configuracao('WEBHOOKS_ATRASO_INICIAL_SEGUNDOS')
+    segundos = min(inicial * 2 ** (tentativas - 1), configuracao('WEBHOOKS_ATRASO_MAXIMO_SEGUNDOS'))
+    return timedelta(seconds=segundos * random.uniform(0.5, 1))
+
+
+def enviar(webhook, entregas, timeout):
+    """
+    Envia as `entregas` de um webhook em um único POST. Retorna None em caso
+    de sucesso (2xx) ou a descrição do erro.
+    """
+    corpo = json.dumps(
+        {'eventos': [{'id': entrega.pk, **entrega.payload} for entrega in entregas]},
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+    ).encode()
+    requisicao = urllib.request.Request(webhook.url, data=corpo, method='POST', headers={
+        'Content-Type': 'application/json',
+        'User-Agent': 'rtech-solicitacoes-webhooks',
+        CABECALHO_ENTREGAS: ','.join(str(entrega.pk) for entrega in entregas),
+    })
+    if webhook.segredo:
+        requisicao.add_header(CABECALHO_ASSINATURA, assinar(webhook.segredo, corpo))
+    try:
+        with urllib.request.urlopen(requisicao, timeout=timeout) as resposta:
+            resposta.read()
+    except urllib.error.HTTPError as exc:
+        return f'HTTP {exc.code}'
+    except (OSError, ValueError) as exc:
+        # URLError, timeout, conexão recusada, URL inválida
+        return f'{type(exc).__name__}: {exc}'
+    return None
+
+
+class Entregador:
+    """
+    Reserva e envia lotes de entregas pendentes (um por chamada a executar_lote)
+    """
+
+    def __init__(self, tamanho_lote=None, concorrencia=None, eventos_por_requisicao=None, timeout=None):
+        self.tamanho_lote = tamanho_lote or configuracao('WEBHOOKS_TAMANHO_LOTE')
+        self.concorrencia = concorrencia or configuracao('WEBHOOKS_CONCORRENCIA')
+        self.eventos_por_requisicao = eventos_por_requisicao or configuracao('WEBHOOKS_EVENTOS_POR_REQUISICAO')
+        self.timeout = timeout or configuracao('WEBHOOKS_TIMEOUT_SEGUNDOS')
+        # Identifica as reservas deste processo
+        self.reserva = uuid.uuid4().hex
+
+    def executar_lote(self):
+        """
+        Reserva, envia e registra o resultado de um lote. Retorna as
+        quantidades de entregas entregues, reagendadas e com falha.
+        """
+        duracao = timedelta(seconds=configuracao('WEBHOOKS_RESERVA_SEGUNDOS'))
+        entregas = RequestWebhookEntrega.objects.reservar(self.tamanho_lote, duracao, self.reserva)
+        resultado = {'entregues': 0, 'reagendadas': 0, 'falhas': 0}
+        if not entregas:
+            return resultado
+
+        tentativas_maximas = configuracao('WEBHOOKS_TENTATIVAS_MAXIMAS')
+        for grupo, erro in self.enviar_lote(entregas):
+            if erro is None:
+                RequestWebhookEntrega.objects.confirmar([entrega.pk for entrega in grupo])
+                resultado['entregues'] += len(grupo)
+                continue
+            RequestWebhookEntrega.objects.reagendar(grupo, erro, atraso, tentativas_maximas)
+            for entrega in grupo:
+                resultado['falhas' if entrega.tentativas + 1 >= tentativas_maximas else 'reagendadas'] += 1
+        return resultado
+
+    def enviar_lote(self, entregas):
+        """
+        Envia as entregas agrupadas por webhook, em requisições de até
+        `eventos_por_requisicao` eventos. Cada webhook é atendido por no
+        máximo `concorrencia_maxima` threads, que enviam seus grupos em
+        sequência. Retorna [(grupo de entregas, erro ou None)].
+        """
+        por_webhook = defaultdict(list)
+        for entrega in entregas:
+            por_webhook[entrega.webhook_id].append(entrega)
+
+        filas = []
+        for pendentes in por_webhook.values():
+            webhook = pendentes[0].webhook
+            grupos = [
+                pendentes[inicio:inicio + self.eventos_por_requisicao]
+                for inicio in range(0, len(pendentes), self.eventos_por_requisicao)
+            ]
+            # Cada fila é consumida por uma thread; as filas de um webhook
+            # repartem os grupos dele
+            quantidade = min(webhook.concorrencia_maxima, len(grupos))
+            filas.extend((webhook, grupos[indice::quantidade]) for indice in range(quantidade))
+
+        with ThreadPoolExecutor(max_workers=min(self.concorrencia, len(filas))) as executor:
+            resultados = executor.map(lambda fila: self._enviar_fila(*fila), filas)
+            return [item for resultado in resultados for item in resultado]
+
+    def _enviar_fila(self, webhook, grupos):
+        return [(grupo, enviar(webhook, grupo, self.timeout)) for grupo in grupos]